@@ -1,6 +1,7 @@
 from typing import Dict, Any, List, Optional
 from agents.base import BaseAgent
 from services.ai_service import ai_service
+from core.config import settings
 import json
 import datetime
 
@@ -19,14 +20,15 @@ class CalendarAgent(BaseAgent):
         subject = context.get('subject', '')
         sender = context.get('sender', '')
         body = context.get('body', '')
-        current_time = datetime.datetime.now().isoformat()
+        # The date only (with weekday, for "next Tuesday"): a full timestamp would make every cache key unique
+        current_date = datetime.date.today().strftime("%Y-%m-%d (%A)")
         
         # Construct Prompt
         prompt = f"""
         You are an AI Scheduling Assistant.
         Analyze the following email and extract event details for a calendar entry.
         
-        Current Date/Time: {current_time}
+        Current Date: {current_date}
         
         Email Context:
         From: {sender}
@@ -63,7 +65,9 @@ class CalendarAgent(BaseAgent):
         
         try:
             # Generate
-            response_text = await ai_service.generate_content(prompt)
+            response_text = await ai_service.generate_content(
+                prompt, cache_ttl=settings.LLM_CACHE_TTL_SECONDS, cache_tag="calendar_agent"
+            )
             
             if response_text == "ERROR_RATE_LIMIT_EXCEEDED":
                 return {
@@ -1,8 +1,10 @@
-from typing import Dict, Any
+from typing import Dict, Any, AsyncIterator, Tuple
 from agents.base import BaseAgent
 from services.ai_service import ai_service
 from services.altimeter_service import altimeter_service
 from services.knowledge_service import knowledge_service
+from services.prompt_builder import PromptBuilder
+from core.config import settings
 import json
 
 class DraftAgent(BaseAgent):
@@ -18,6 +20,28 @@ class DraftAgent(BaseAgent):
         """
         Generate a draft based on email context + Company Data.
         """
+        prompt, altimeter_context, token_breakdown = self.build_prompt(context)
+        generated_content = await ai_service.generate_content(prompt, token_breakdown=token_breakdown)
+        
+        return {
+            "draft_text": generated_content,
+            "context_used": altimeter_context,
+            "status": "generated",
+            "model": "gemini-2.0-flash"
+        }
+
+    def stream(self, context: Dict[str, Any]) -> Tuple[AsyncIterator[str], Dict[str, Any]]:
+        """
+        Streaming variant of process(): (text chunks, altimeter context used).
+        """
+        prompt, altimeter_context, token_breakdown = self.build_prompt(context)
+        return ai_service.generate_stream(prompt, token_breakdown=token_breakdown), altimeter_context
+
+    def build_prompt(self, context: Dict[str, Any]) -> Tuple[str, Dict[str, Any], Dict[str, Any]]:
+        """
+        Gather Altimeter + knowledge context and build the draft prompt
+        within the prompt token budget. Returns (prompt, altimeter context, token breakdown).
+        """
         subject = context.get('subject', '')
         sender = context.get('sender', '')
         body = context.get('body', '')
@@ -53,7 +77,10 @@ class DraftAgent(BaseAgent):
             print(f"[DraftAgent] Knowledge Search Error: {e}")
 
         # 3. Construct Prompt
-        prompt = f"""
+        builder = PromptBuilder("draft_agent", settings.PROMPT_TOKEN_BUDGET)
+        builder.add("body", body, max_tokens=settings.PROMPT_BODY_MAX_TOKENS, min_tokens=200, strategy="email")
+        builder.add("knowledge_context", knowledge_context, max_tokens=settings.PROMPT_RAG_MAX_TOKENS)
+        prompt = builder.render("""
         You are Atlas, a personal AI assistant for Davis Electric.
         Draft a response to the following email using company context and knowledge.
         
@@ -63,7 +90,7 @@ class DraftAgent(BaseAgent):
         - Content: {body}
         
         Project: {project_info}
-        Sender Role: {altimeter_context.get('company_role', 'Unknown')}
+        Sender Role: {sender_role}
         
         {knowledge_context}
         
@@ -74,15 +101,8 @@ class DraftAgent(BaseAgent):
         - If GUIDELINES are provided, adhere to the management rules.
         - If SKILLS/SOPS are provided, ensure technical accuracy.
         - Tone: Professional, Competent, Proactive.
-        """
-        
-        generated_content = await ai_service.generate_content(prompt)
-        
-        return {
-            "draft_text": generated_content,
-            "context_used": altimeter_context,
-            "status": "generated",
-            "model": "gemini-2.0-flash"
-        }
+        """, sender=sender, subject=subject, project_info=project_info,
+           sender_role=altimeter_context.get('company_role', 'Unknown'), instructions=instructions)
+        return prompt, altimeter_context, builder.breakdown
 
 draft_agent = DraftAgent()
@@ -1,10 +1,10 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime, timedelta
 import asyncio
 
 from agents.base import BaseAgent
 from services.altimeter_service import altimeter_service, intelligence_bridge
-from services.search_service import search_service
+from services.hybrid_search_service import hybrid_search_service
 from services.ai_service import ai_service
 from database.database import SessionLocal
 from database.models import Task
@@ -35,13 +35,25 @@ class ProjectAgent(BaseAgent):
         Implements the DaVinci "Safe Mode" Drafter.
         Gathers context, writes a draft log, and saves it for manual review.
         """
+        prompt, error = self.build_daily_log_prompt(project_id, user_prompt)
+        if error:
+            return error
+
+        draft_content = await ai_service.generate_content(prompt)
+        return self.save_daily_log_draft(project_id, user_prompt, draft_content)
+
+    def build_daily_log_prompt(self, project_id: str, user_prompt: str) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """
+        Gather project context and build the Daily Log prompt.
+        Returns (prompt, None), or (None, error result) if the context is unavailable.
+        """
         if not project_id:
-            return {"status": "error", "message": "project_id is required."}
+            return None, {"status": "error", "message": "project_id is required."}
 
         # 1. Gather Project Context
         project_ctx = intelligence_bridge.load_project_context(project_id)
         if not project_ctx:
-            return {"status": "error", "message": f"Could not load project context for {project_id}."}
+            return None, {"status": "error", "message": f"Could not load project context for {project_id}."}
 
         project_name = project_ctx.get('project', {}).get('name', 'Unknown')
         
@@ -49,9 +61,13 @@ class ProjectAgent(BaseAgent):
         # Search the vector database for relevant project context
         recent_context = ""
         try:
-             # Look for recent project emails
+             # Look for recent project emails, scoped to this project's vectors only
              query = f"Project {project_id} update"
-             results = search_service.search(query, collection_name="emails", n_results=5)
+             filters = {
+                 "project_id": project_id,
+                 "date_from": datetime.now() - timedelta(hours=48)
+             }
+             results = hybrid_search_service.search(query, collection_name="emails", n_results=5, filters=filters)
              if results:
                  recent_context = "Recent Emails:\n"
                  for res in results:
@@ -81,9 +97,12 @@ class ProjectAgent(BaseAgent):
         - Issues or Delays
         - Next Steps
         '''
-        
-        draft_content = await ai_service.generate_content(prompt)
-        
+        return prompt, None
+
+    def save_daily_log_draft(self, project_id: str, user_prompt: str, draft_content: str) -> Dict[str, Any]:
+        """
+        Safe Mode output: save the generated log as a pending review Task and an email draft.
+        """
         # 4. Safe Mode Output: Save as Pending Task
         db = SessionLocal()
         try:
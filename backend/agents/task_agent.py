@@ -1,11 +1,15 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from agents.base import BaseAgent
 from services.ai_service import ai_service
+from core.config import settings
 from services.knowledge_service import knowledge_service
 from services.date_parsing_service import date_parsing_service
+from services.prompt_builder import PromptBuilder, trim_to_tokens
 import json
 import datetime
 
+RATE_LIMIT_ERROR = "AI Rate limit exceeded."
+
 class TaskAgent(BaseAgent):
     """
     Agent responsible for extracting actionable tasks and categorizing 
@@ -23,18 +27,11 @@ class TaskAgent(BaseAgent):
             "Communication" # General coordination
         ]
         
-    async def process(self, context: Dict[str, Any]) -> Dict[str, Any]:
-        """
-        Analyze email, extract tasks, and categorize.
-        """
-        subject = context.get('subject', '')
-        sender = context.get('sender', '')
-        body = context.get('body', '')
-        
-        # 1. Integrate Knowledge Search
+    @staticmethod
+    def _knowledge_context(query: str, top_k: int = 2) -> str:
         knowledge_context = ""
         try:
-            knowledge_results = knowledge_service.search_all_knowledge(f"{subject} {body[:200]}", top_k=2)
+            knowledge_results = knowledge_service.search_all_knowledge(query, top_k=top_k)
             
             if knowledge_results.get("skills"):
                 knowledge_context += "\nRelevant Skills/Procedures:\n"
@@ -47,13 +44,46 @@ class TaskAgent(BaseAgent):
                     knowledge_context += f"- {guide['metadata'].get('title', 'Unknown')}: {guide.get('content_snippet', '')}\n"
         except Exception as e:
             print(f"[TaskAgent] Knowledge Search Failed: {e}")
+        return knowledge_context
+
+    @staticmethod
+    def _parse_json(response_text: str) -> Dict[str, Any]:
+        cleaned_text = response_text.replace("```json", "").replace("```", "").strip()
+        return json.loads(cleaned_text)
+
+    @staticmethod
+    def _post_process(data: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+        # Relative Date Parsing: if AI didn't find a due_date, we try to parse it from the body
+        for task in data.get("tasks", []):
+            if not task.get("due_date"):
+                task["due_date"] = date_parsing_service.parse_deadline_from_text(context.get('body', ''))
+            
+            # Enhance with metadata
+            task["source"] = "email"
+            task["source_id"] = context.get("message_id")
+            task["created_at"] = datetime.datetime.now().isoformat()
+        return data
 
-        # 2. Construct Prompt
-        prompt = f"""
+    async def process(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Analyze email, extract tasks, and categorize.
+        """
+        subject = context.get('subject', '')
+        sender = context.get('sender', '')
+        body = context.get('body', '')
+        
+        # 1. Integrate Knowledge Search
+        knowledge_context = self._knowledge_context(f"{subject} {body[:200]}")
+
+        # 2. Construct Prompt (within the prompt token budget)
+        builder = PromptBuilder("task_agent", settings.PROMPT_TOKEN_BUDGET)
+        builder.add("body", body, max_tokens=settings.PROMPT_BODY_MAX_TOKENS, min_tokens=200, strategy="email")
+        builder.add("knowledge_context", knowledge_context, max_tokens=settings.PROMPT_RAG_MAX_TOKENS)
+        prompt = builder.render("""
         You are an AI Task extraction and categorization assistant for a Construction Project Manager.
-        Analyze the following {context.get('type', 'email')} and provide actionable insights.
+        Analyze the following {item_type} and provide actionable insights.
         
-        Context Source: {context.get('type', 'Unknown')}
+        Context Source: {source_type}
         Subject: {subject}
         From: {sender}
         Content:
@@ -69,7 +99,7 @@ class TaskAgent(BaseAgent):
         5. Assign a "confidence" score (0.0-1.0) indicating certainty of extraction.
         6. Extract "evidence": the exact sentence from the source that generated the task.
         7. Deduplication rule: "Do not create a task if one with a similar title already exists".
-        8. For Calendar events, consider location ({context.get('location', 'N/A')}) and timing ({context.get('start_time', 'N/A')}).
+        8. For Calendar events, consider location ({location}) and timing ({start_time}).
         9. Return the result as a STRICT JSON object with a key "tasks" containing a list of task objects.
         
         JSON Schema:
@@ -90,44 +120,197 @@ class TaskAgent(BaseAgent):
         
         If no tasks are found, return {{"category": "...", "summary": "...", "tasks": []}}.
         Do not include markdown formatting. Just the raw JSON string.
-        """
+        """, item_type=context.get('type', 'email'), source_type=context.get('type', 'Unknown'),
+           subject=subject, sender=sender,
+           location=context.get('location', 'N/A'), start_time=context.get('start_time', 'N/A'))
         
         try:
             # Generate
-            response_text = await ai_service.generate_content(prompt)
+            response_text = await ai_service.generate_content(
+                prompt, cache_ttl=settings.LLM_CACHE_TTL_SECONDS, cache_tag="task_agent",
+                token_breakdown=builder.breakdown
+            )
             
             if response_text == "ERROR_RATE_LIMIT_EXCEEDED":
-                return {"status": "error", "error": "AI Rate limit exceeded."}
+                return {"status": "error", "error": RATE_LIMIT_ERROR}
 
             if not response_text:
                 return {"status": "error", "error": "AI Service returned empty response."}
 
-            cleaned_text = response_text.replace("```json", "").replace("```", "").strip()
-            
             try:
-                data = json.loads(cleaned_text)
+                data = self._parse_json(response_text)
             except json.JSONDecodeError as je:
                 print(f"[TaskAgent] JSON Parse Error: {je}")
                 return {"status": "error", "error": f"Failed to parse AI response: {str(je)}"}
             
-            # 3. Post-Process: Relative Date Parsing
-            # If AI didn't find a due_date, we try to parse it from the body
-            for task in data.get("tasks", []):
-                if not task.get("due_date"):
-                    task["due_date"] = date_parsing_service.parse_deadline_from_text(body)
-                
-                # Enhance with metadata
-                task["source"] = "email"
-                task["source_id"] = context.get("message_id")
-                task["created_at"] = datetime.datetime.now().isoformat()
-                
+            # 3. Post-Process
             return {
                 "status": "success",
-                "data": data
+                "data": self._post_process(data, context)
             }
             
         except Exception as e:
             print(f"[TaskAgent] Error: {e}")
             return {"status": "error", "error": str(e)}
 
+    def _chunk(self, contexts: List[Dict[str, Any]]) -> List[List[int]]:
+        """Group context indexes into batches bounded by count and total body size."""
+        batch_size = max(1, int(settings.TASK_AGENT_BATCH_SIZE))
+        max_chars = int(settings.TASK_AGENT_BATCH_MAX_CHARS)
+        chunks, current, size = [], [], 0
+        for index, context in enumerate(contexts):
+            length = len(context.get('body', '') or '')
+            if current and (len(current) >= batch_size or size + length > max_chars):
+                chunks.append(current)
+                current, size = [], 0
+            current.append(index)
+            size += length
+        if current:
+            chunks.append(current)
+        return chunks
+
+    async def process_batch(self, contexts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Extract tasks from several emails with one LLM call per batch.
+
+        Returns one result per context, in order, shaped like `process()`. The
+        instructions, schema and knowledge context are sent once per batch.
+        Emails whose result is missing or invalid (or a whole batch whose
+        response doesn't parse) are retried with single-item calls.
+
+        Once the AI service sheds a call for rate limiting, nothing more is
+        sent: that email and every one after it get `{"status": "deferred"}`
+        so the caller can requeue them instead of retrying one by one.
+        """
+        results: List[Dict[str, Any]] = [None] * len(contexts)
+        deferred = {"status": "deferred", "error": RATE_LIMIT_ERROR}
+        rate_limited = False
+        for chunk in self._chunk(contexts):
+            if rate_limited:
+                for index in chunk:
+                    results[index] = dict(deferred)
+                continue
+            extracted = {} if len(chunk) == 1 else await self._extract_batch([contexts[i] for i in chunk])
+            if extracted is None:
+                rate_limited = True
+                for index in chunk:
+                    results[index] = dict(deferred)
+                continue
+            for offset, index in enumerate(chunk):
+                data = extracted.get(f"E{offset + 1}")
+                if rate_limited:
+                    results[index] = dict(deferred)
+                elif data is None:
+                    result = await self.process(contexts[index])
+                    if result.get("error") == RATE_LIMIT_ERROR:
+                        rate_limited = True
+                        result = dict(deferred)
+                    results[index] = result
+                else:
+                    results[index] = {"status": "success", "data": self._post_process(data, contexts[index])}
+        return results
+
+    async def _extract_batch(self, contexts: List[Dict[str, Any]]) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Valid per-email results keyed by email ID ("E1", "E2", ...); {} if the
+        batch failed, None if the AI service shed it for rate limiting.
+        """
+        sections = []
+        for number, context in enumerate(contexts, start=1):
+            section = f"""
+        === EMAIL E{number} ===
+        Context Source: {context.get('type', 'Unknown')}
+        Subject: {context.get('subject', '')}
+        From: {context.get('sender', '')}"""
+            if context.get('type') == 'calendar':
+                section += f"""
+        Location: {context.get('location', 'N/A')}
+        Start Time: {context.get('start_time', 'N/A')}"""
+            body = trim_to_tokens(context.get('body', '') or '', settings.PROMPT_BODY_MAX_TOKENS, "email")
+            section += f"""
+        Content:
+        {body}
+        === END E{number} ==="""
+            sections.append(section)
+
+        knowledge_context = self._knowledge_context(
+            " ".join(c.get('subject', '') for c in contexts)[:500], top_k=3
+        )
+
+        # Each item gets a single prompt's budget; bodies were already capped one by one
+        builder = PromptBuilder("task_agent_batch", settings.PROMPT_TOKEN_BUDGET * len(contexts))
+        builder.add("items", "".join(sections))
+        builder.add("knowledge_context", knowledge_context, max_tokens=settings.PROMPT_RAG_MAX_TOKENS)
+        prompt = builder.render("""
+        You are an AI Task extraction and categorization assistant for a Construction Project Manager.
+        Analyze EACH of the following {item_count} items independently and provide actionable insights.
+        {items}
+        
+        {knowledge_context}
+        
+        Instructions (apply to each item separately):
+        1. Identify clear, actionable tasks.
+        2. Assign a priority (High, Medium, Low).
+        3. Infer a due date if mentioned (use YYYY-MM-DD format). If no year is specified, assume 2026.
+        4. Extract a concise title and detailed description.
+        5. Assign a "confidence" score (0.0-1.0) indicating certainty of extraction.
+        6. Extract "evidence": the exact sentence from that item that generated the task.
+        7. Deduplication rule: "Do not create a task if one with a similar title already exists".
+        8. For Calendar events, consider their location and timing.
+        9. Never attribute a task to the wrong item; each result must carry its item's ID.
+        10. Return a STRICT JSON object with a key "results": one entry per item, in any order.
+        
+        JSON Schema:
+        {{
+            "results": [
+                {{
+                    "id": "E1",
+                    "category": "Selected Category",
+                    "summary": "One sentence summary",
+                    "tasks": [
+                        {{
+                            "title": "Short Task Title",
+                            "description": "Detailed explanation...",
+                            "priority": "High|Medium|Low",
+                            "due_date": "YYYY-MM-DD" or null,
+                            "confidence": 0.0-1.0,
+                            "evidence": "Exact sentence from source..."
+                        }}
+                    ]
+                }}
+            ]
+        }}
+        
+        Items without tasks still get an entry with "tasks": [].
+        """, item_count=len(contexts))
+
+        try:
+            response_text = await ai_service.generate_content(
+                prompt, json_mode=True, cache_ttl=settings.LLM_CACHE_TTL_SECONDS, cache_tag="task_agent_batch",
+                token_breakdown=builder.breakdown
+            )
+            if response_text == "ERROR_RATE_LIMIT_EXCEEDED":
+                return None
+            if not response_text:
+                return {}
+            entries = self._parse_json(response_text).get("results")
+        except Exception as e:
+            print(f"[TaskAgent] Batch extraction failed, falling back to single items: {e}")
+            return {}
+
+        expected = {f"E{n}" for n in range(1, len(contexts) + 1)}
+        extracted = {}
+        for entry in entries if isinstance(entries, list) else []:
+            if not isinstance(entry, dict) or entry.get("id") not in expected or entry["id"] in extracted:
+                continue
+            tasks = entry.get("tasks", [])
+            if not isinstance(tasks, list) or not all(isinstance(t, dict) and t.get("title") for t in tasks):
+                continue
+            extracted[entry["id"]] = {
+                "category": entry.get("category"),
+                "summary": entry.get("summary"),
+                "tasks": tasks
+            }
+        return extracted
+
 task_agent = TaskAgent()
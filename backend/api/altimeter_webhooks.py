@@ -90,8 +90,10 @@ async def receive_altimeter_webhook(
             db.refresh(task)
             logger.info(f"Created placeholder task {task.task_id} for remote {remote_id}")
 
-        # Enqueue 'pull' to fetch full details and handle conflicts
-        altimeter_sync_service.enqueue_task(db, task.task_id, "pull")
+        # Enqueue 'pull' to fetch full details and handle conflicts (bursts coalesce into one pull)
+        altimeter_sync_service.enqueue_task(
+            db, task.task_id, "pull", debounce_seconds=settings.SYNC_WEBHOOK_DEBOUNCE_SECONDS
+        )
 
         return {"status": "queued", "task_id": task.task_id}
 
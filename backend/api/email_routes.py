@@ -25,6 +25,7 @@ def run_background_scan(limit: int):
                     type="analyze_email",
                     payload={
                         "email_id": email.email_id,
+                        "message_id": email.message_id,
                         "subject": email.subject,
                         "from_address": email.from_address,
                         "body_text": email.body_text,
@@ -170,12 +171,13 @@ async def search_emails(
     return results
 
 @router.get("/semantic-search")
-async def semantic_search(q: str, top_k: int = 10):
+async def semantic_search(q: str, top_k: int = 10, project_id: Optional[str] = None, sender: Optional[str] = None):
     """
     Semantic search for emails using vector embeddings.
+    Optional project/sender filters are applied inside the vector store.
     """
     from services.embedding_service import embedding_service
-    results = embedding_service.semantic_search_emails(q, top_k)
+    results = embedding_service.semantic_search_emails(q, top_k, filters={"project_id": project_id, "sender": sender})
     return results
 
 @router.get("/{email_id}", response_model=EmailResponse)
@@ -420,3 +422,28 @@ async def generate_draft_reply(email_id: int, request: DraftReplyRequest, db: Se
     result = await draft_agent.process(agent_context)
     return result
 
+@router.post("/{email_id}/draft-reply/stream")
+async def stream_draft_reply(email_id: int, request: DraftReplyRequest, db: Session = Depends(get_db)):
+    """Generate an AI draft reply, streamed as Server-Sent Events"""
+    from agents.draft_agent import draft_agent
+    from core.sse import sse_event, sse_response
+
+    email = db.query(Email).filter(Email.email_id == email_id).first()
+    if not email:
+        raise HTTPException(status_code=404, detail="Email not found")
+
+    agent_context = {
+        "subject": email.subject,
+        "sender": email.from_address,
+        "body": email.body_text or "",
+        "instructions": request.instructions
+    }
+    chunks, altimeter_context = draft_agent.stream(agent_context)
+
+    async def events():
+        async for chunk in chunks:
+            yield sse_event({"delta": chunk})
+        yield sse_event({"status": "generated", "context_used": altimeter_context}, event="done")
+
+    return sse_response(events())
+
@@ -43,14 +43,22 @@ async def search_knowledge(q: str = Query(..., min_length=3)):
 @router.post("/reindex")
 async def reindex_knowledge_base(background_tasks: BackgroundTasks):
     """
-    Trigger manual reindexing and deduplication as a background task.
+    Trigger manual reindexing as a background task.
+    Only files changed since the last sync are re-embedded.
     """
     try:
         # Run the heavy work in background
-        background_tasks.add_task(knowledge_service.reindex_knowledge)
+        background_tasks.add_task(knowledge_service.reindex_all)
         return {
             "status": "accepted", 
             "message": "Knowledge Base reindexing started in background. Systems remain operational."
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Reindexing trigger failed: {str(e)}")
+
+@router.get("/reindex/status")
+async def get_reindex_status():
+    """
+    Progress of the running (or last) reindex per collection.
+    """
+    return knowledge_service.get_reindex_status()
@@ -37,3 +37,27 @@ async def draft_daily_log_for_project(project_id: str, request: DraftLogRequest)
         
     return result
 
+
+@router.post("/{project_id}/draft-daily-log/stream")
+async def stream_daily_log_for_project(project_id: str, request: DraftLogRequest):
+    """
+    Stream the Safe Mode Daily Log draft as Server-Sent Events.
+    The draft is saved for review once generation completes; the "done" event carries the result.
+    """
+    from agents.project_agent import project_agent
+    from services.ai_service import ai_service
+    from core.sse import sse_event, sse_response
+
+    prompt, error = project_agent.build_daily_log_prompt(project_id, request.prompt)
+    if error:
+        raise HTTPException(status_code=400, detail=error.get("message"))
+
+    async def events():
+        parts = []
+        async for chunk in ai_service.generate_stream(prompt):
+            parts.append(chunk)
+            yield sse_event({"delta": chunk})
+        result = project_agent.save_daily_log_draft(project_id, request.prompt, "".join(parts))
+        yield sse_event(result, event="done")
+
+    return sse_response(events())
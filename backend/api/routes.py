@@ -1,7 +1,9 @@
+import asyncio
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import Optional
 from agents.draft_agent import draft_agent
+from core.sse import sse_event, sse_response
 
 router = APIRouter()
 
@@ -44,6 +46,24 @@ async def generate_draft_endpoint(request: DraftRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/agents/draft/stream")
+async def stream_draft_endpoint(request: DraftRequest):
+    """Same as /agents/draft, streamed as Server-Sent Events ({"delta"} frames, then a "done" event)."""
+    context = {
+        "subject": request.subject,
+        "sender": request.sender,
+        "body": request.body,
+        "instructions": request.instructions
+    }
+    chunks, altimeter_context = draft_agent.stream(context)
+
+    async def events():
+        async for chunk in chunks:
+            yield sse_event({"delta": chunk})
+        yield sse_event({"status": "generated", "detected_context": altimeter_context}, event="done")
+
+    return sse_response(events())
+
 # from services.google_service import google_service
 
 class SendEmailRequest(BaseModel):
@@ -105,45 +125,43 @@ router.include_router(sync_router, prefix="/sync", tags=["Sync"])
 from api.dashboard_routes import router as dashboard_router
 router.include_router(dashboard_router, prefix="/dashboard", tags=["Dashboard"])
 
-@router.post("/chat")
-async def chat_assistant(request: dict):
-    """
-    Semantic intelligence chat bot.
-    Now enhanced with:
-    - RAG (Docs/Email)
-    - SQL (Altimeter DB)
-    - Strata Security
-    """
-    from services.search_service import search_service
-    from services.ai_service import ai_service
-    from services.altimeter_service import altimeter_service
-    
-    query = request.get("message", "").strip()
-    if not query:
-        raise HTTPException(status_code=400, detail="Empty message")
+from api.project_routes import router as project_router
+router.include_router(project_router, prefix="/projects", tags=["Projects"])
 
-    # Strata Level (Mocked to 5 for now as per previous context, but architected for dynamic)
-    user_strata = 5
+# Strata Level (Mocked to 5 for now as per previous context, but architected for dynamic)
+CHAT_USER_STRATA = 5
+CHAT_TOOL_PREFIXES = ("SQL:", "UI:")
+
+def _build_chat_prompt(query: str, user_strata: int) -> tuple:
+    """First-pass chat prompt and its token breakdown."""
+    from services.hybrid_search_service import hybrid_search_service
+    from services.altimeter_service import altimeter_service
+    from services.prompt_builder import PromptBuilder
+    from core.config import settings
 
     # 1. RAG Search (Docs & Email)
     rag_context = ""
-    knowledge_results = search_service.search(query, collection_name="knowledge", n_results=3)
+    knowledge_results = hybrid_search_service.search(query, collection_name="knowledge", n_results=3)
     if knowledge_results:
         rag_context += "RELEVANT DOCUMENTS:\n"
         for res in knowledge_results:
             rag_context += f"- {res['metadata'].get('title')}: {res['content_snippet']}\n"
 
-    email_results = search_service.search(query, collection_name="emails", n_results=2)
+    email_results = hybrid_search_service.search(query, collection_name="emails", n_results=2)
     if email_results:
         rag_context += "RELEVANT EMAILS:\n"
         for res in email_results:
             rag_context += f"- From {res['metadata'].get('sender')}: {res['content_snippet']}\n"
 
-    # 2. Database Schema Injection
-    schema_context = altimeter_service.get_db_schema(user_strata)
+    # 2. Database Schema Injection (only the tables relevant to this question)
+    schema_context = altimeter_service.get_schema_digest(query, user_strata)
 
-    # 3. Prompt Construction
-    system_prompt = f"""
+    # 3. Prompt Construction (within the prompt token budget; the RAG hits give way first)
+    builder = PromptBuilder("chat", settings.PROMPT_TOKEN_BUDGET)
+    builder.add("query", query, max_tokens=settings.PROMPT_BODY_MAX_TOKENS, strategy="middle")
+    builder.add("schema_context", schema_context)
+    builder.add("rag_context", rag_context, max_tokens=settings.PROMPT_RAG_MAX_TOKENS)
+    system_prompt = builder.render("""
     You are Jules, the Atlas AI. You have access to the company's Knowledge Base and the Altimeter Project Database.
 
     USER QUERY: {query}
@@ -161,45 +179,153 @@ async def chat_assistant(request: dict):
     - UI ACTION FORMAT: UI: render_task_list (or render_schedule)
     - If the answer is in the RAG context, summarize it.
     - If you don't know, say so.
+    """)
+    return system_prompt, builder.breakdown
+
+def _chat_sql_prompt(query: str, sql_query: str) -> tuple:
+    """Run the AI's SQL in the sandbox and build the second-pass prompt and its token breakdown (raises on SQL errors)."""
+    from services.altimeter_service import altimeter_service
+    from services.prompt_builder import PromptBuilder
+    from core.config import settings
+
+    print(f"Executing AI SQL: {sql_query}")
+    result = altimeter_service.query_sandbox.run(sql_query)
+    db_results = result["rows"]
+    if result["truncated"]:
+        db_results = f"{db_results}\n(Only the first {len(result['rows'])} rows are shown.)"
+
+    builder = PromptBuilder("chat_sql", settings.PROMPT_TOKEN_BUDGET)
+    builder.add("query", query, max_tokens=settings.PROMPT_BODY_MAX_TOKENS, strategy="middle")
+    builder.add("db_results", str(db_results), strategy="middle")
+    prompt = builder.render("""
+    The user asked: {query}
+    You decided to run this SQL: {sql_query}
+    Here are the results from the database:
+    {db_results}
+    Please formulate a natural language answer based on these results.
+    """, sql_query=sql_query)
+    return prompt, builder.breakdown
+
+def _chat_ui_action(component: str) -> dict:
+    return {
+        "reply": f"Opening {component} view...",
+        "ui_action": {"component": component, "props": {}}
+    }
+
+@router.post("/chat")
+async def chat_assistant(request: dict):
     """
+    Semantic intelligence chat bot.
+    Now enhanced with:
+    - RAG (Docs/Email)
+    - SQL (Altimeter DB)
+    - Strata Security
+    """
+    from services.ai_service import ai_service
+    from services.llm_dispatcher import PRIORITY_INTERACTIVE
+    
+    query = request.get("message", "").strip()
+    if not query:
+        raise HTTPException(status_code=400, detail="Empty message")
+
+    user_strata = CHAT_USER_STRATA
+    # RAG search and the schema digest make blocking embedding calls: keep them off the event loop
+    system_prompt, token_breakdown = await asyncio.to_thread(_build_chat_prompt, query, user_strata)
 
     # 4. First Pass: AI Reasoning
-    response_text = await ai_service.generate_content(system_prompt, include_context=True, user_strata=user_strata)
+    response_text = await ai_service.generate_content(
+        system_prompt, include_context=True, user_strata=user_strata, priority=PRIORITY_INTERACTIVE,
+        token_breakdown=token_breakdown
+    )
 
     # 5. Tool Execution Loop (SQL or UI)
     stripped_resp = response_text.strip()
 
     if stripped_resp.startswith("SQL:"):
         sql_query = stripped_resp.replace("SQL:", "").strip()
-        print(f"Executing AI SQL: {sql_query}")
-
         try:
-            db_results = altimeter_service.execute_read_only_query(sql_query)
-
-            # 6. Second Pass: Synthesize Data
-            final_prompt = f"""
-            The user asked: {query}
-            You decided to run this SQL: {sql_query}
-            Here are the results from the database:
-            {db_results}
-            Please formulate a natural language answer based on these results.
-            """
-            final_response = await ai_service.generate_content(final_prompt)
+            # 6. Second Pass: Synthesize Data (the sandboxed query blocks for up to its timeout)
+            final_prompt, final_breakdown = await asyncio.to_thread(_chat_sql_prompt, query, sql_query)
+            final_response = await ai_service.generate_content(
+                final_prompt, priority=PRIORITY_INTERACTIVE, token_breakdown=final_breakdown
+            )
             return {"reply": final_response, "links": []}
 
         except Exception as e:
             return {"reply": f"I tried to query the database but encountered an error: {str(e)}", "links": []}
 
     if stripped_resp.startswith("UI:"):
-        component = stripped_resp.replace("UI:", "").strip()
-        return {
-            "reply": f"Opening {component} view...",
-            "ui_action": {"component": component, "props": {}}
-        }
+        return _chat_ui_action(stripped_resp.replace("UI:", "").strip())
 
     # 6. Standard Response
     return {"reply": response_text, "links": [{"label": "Explore Library", "moduleId": "procedures"}]}
 
+@router.post("/chat/stream")
+async def chat_assistant_stream(request: dict):
+    """
+    /chat streamed as Server-Sent Events: {"delta": text} frames, then a "done"
+    event with links / ui_action. The first pass is held back only until it's
+    clear whether it is a tool call (SQL:/UI:); answers stream straight through.
+    """
+    from services.ai_service import ai_service
+    from services.llm_dispatcher import PRIORITY_INTERACTIVE
+
+    query = request.get("message", "").strip()
+    if not query:
+        raise HTTPException(status_code=400, detail="Empty message")
+
+    user_strata = CHAT_USER_STRATA
+    # RAG search and the schema digest make blocking embedding calls: keep them off the event loop
+    system_prompt, token_breakdown = await asyncio.to_thread(_build_chat_prompt, query, user_strata)
+
+    async def events():
+        first_pass = ai_service.generate_stream(
+            system_prompt, include_context=True, user_strata=user_strata, priority=PRIORITY_INTERACTIVE,
+            token_breakdown=token_breakdown
+        )
+        held, tool_call = "", None
+        async for chunk in first_pass:
+            if tool_call is False:
+                yield sse_event({"delta": chunk})
+                continue
+            held += chunk
+            head = held.lstrip()
+            if any(head.startswith(p) for p in CHAT_TOOL_PREFIXES):
+                tool_call = True # Collect the whole tool call silently
+            elif not any(p.startswith(head) for p in CHAT_TOOL_PREFIXES):
+                tool_call = False
+                yield sse_event({"delta": held})
+
+        stripped_resp = held.strip()
+        if tool_call is None and stripped_resp:
+            # Whole reply was shorter than a tool prefix
+            yield sse_event({"delta": held})
+
+        if tool_call and stripped_resp.startswith("SQL:"):
+            sql_query = stripped_resp.replace("SQL:", "").strip()
+            try:
+                final_prompt, final_breakdown = await asyncio.to_thread(_chat_sql_prompt, query, sql_query)
+            except Exception as e:
+                yield sse_event({"delta": f"I tried to query the database but encountered an error: {str(e)}"})
+                yield sse_event({"links": []}, event="done")
+                return
+            async for chunk in ai_service.generate_stream(
+                final_prompt, priority=PRIORITY_INTERACTIVE, token_breakdown=final_breakdown
+            ):
+                yield sse_event({"delta": chunk})
+            yield sse_event({"links": []}, event="done")
+            return
+
+        if tool_call and stripped_resp.startswith("UI:"):
+            action = _chat_ui_action(stripped_resp.replace("UI:", "").strip())
+            yield sse_event({"delta": action["reply"]})
+            yield sse_event({"ui_action": action["ui_action"]}, event="done")
+            return
+
+        yield sse_event({"links": [{"label": "Explore Library", "moduleId": "procedures"}]}, event="done")
+
+    return sse_response(events())
+
 # --- Dashboard & Scheduler Routes ---
 from services.scheduler_service import SchedulerService
 scheduler_service = SchedulerService()
@@ -224,20 +350,16 @@ async def get_oracle_feed():
     """
     The Oracle Protocol: Returns predictive Mission Intel.
     Combines Active Phases + Weather Context + Knowledge Base.
+    Served from the precomputed cache (see mission_intel_job).
     """
-    from services.altimeter_service import altimeter_service, intelligence_bridge
+    from services.mission_intel_service import mission_intel_service
     from services.weather_service import weather_service
 
-    # 1. Get Context
-    active_phases = altimeter_service.get_active_phases()
-    weather_data = None
-    try:
-        # Get weather for default location
-        weather_data = await weather_service.get_weather()
-    except:
-        pass # Fail gracefully if weather service is down
-
-    # 2. Predict Intelligence
-    mission_intel = intelligence_bridge.predict_mission_intel(active_phases, weather_data)
+    if not mission_intel_service.has_weather():
+        try:
+            # First call before the scheduled job ran: get weather for default location
+            mission_intel_service.update_weather(await weather_service.get_weather())
+        except:
+            pass # Fail gracefully if weather service is down
 
-    return mission_intel
+    return mission_intel_service.get_oracle_feed()
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException, Query
 from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
+from datetime import datetime
 from services.search_service import search_service
 
 router = APIRouter()
@@ -14,13 +15,35 @@ class IndexRequest(BaseModel):
     body: str
     message_id: str
     date: Optional[str] = None
+    project_id: Optional[str] = None
+    provider: Optional[str] = None
+    category: Optional[str] = None
 
 @router.get("/", response_model=SearchResponse)
-async def search_emails(q: str = Query(..., min_length=3)):
+async def search_emails(
+    q: str = Query(..., min_length=3),
+    collection: str = "emails",
+    n_results: int = Query(5, ge=1, le=50),
+    project_id: Optional[str] = None,
+    sender: Optional[str] = None,
+    provider: Optional[str] = None,
+    category: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None
+):
     """
-    Semantic search for emails.
+    Semantic search, optionally pre-filtered on vector metadata
+    (project, sender, provider, category, date range).
     """
-    results = search_service.search(q)
+    filters = {
+        "project_id": project_id,
+        "sender": sender,
+        "provider": provider,
+        "category": category,
+        "date_from": date_from,
+        "date_to": date_to
+    }
+    results = search_service.search(q, collection_name=collection, n_results=n_results, filters=filters)
     return {"results": results}
 
 @router.post("/index")
@@ -35,7 +35,8 @@ async def get_sync_status(db: Session = Depends(get_db)):
                 "time": e.timestamp
             } for e in recent_errors
         ],
-        "worker_running": altimeter_sync_service.is_running
+        "worker_running": altimeter_sync_service.is_running,
+        "coalesced": altimeter_sync_service.coalesced
     }
 
 # Endpoint to start/stop worker manually (for debugging)
@@ -88,16 +89,22 @@ async def resolve_conflict(
     choice = resolution.get("choice")
 
     if choice == "local":
-        # Keep local, push to remote
+        # Keep local, push to remote (every field, without If-Match)
+        task.dirty_fields = {field: None for field in Task.SYNC_FIELDS}
+        task.etag = None
         altimeter_sync_service.enqueue_task(db, task.task_id, "push")
         conflict.status = "resolved_local"
     elif choice == "remote":
         # Accept remote, update local
         remote_data = conflict.remote_version
+        task._applying_remote = True
         task.title = remote_data.get("title", task.title)
         task.description = remote_data.get("description", task.description)
         task.status = remote_data.get("status", task.status)
         task.priority = remote_data.get("priority", task.priority)
+        task.dirty_fields = None
+        task.synced_version = task.local_version
+        task.etag = remote_data.get("etag", task.etag)
         task.sync_status = "synced"
         conflict.status = "resolved_remote"
     else:
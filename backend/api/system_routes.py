@@ -4,7 +4,8 @@ from fastapi import APIRouter, Request, HTTPException, Depends
 from fastapi import APIRouter, Depends
 import requests
 from typing import Dict, List, Any
-from datetime import datetime
+import asyncio
+from datetime import datetime, timedelta
 from services.activity_service import activity_service
 from core.security import verify_local_request
 
@@ -150,6 +151,30 @@ async def get_sync_status():
     finally:
         db.close()
 
+@router.get("/llm/metrics")
+async def get_llm_metrics():
+    """
+    LLM dispatcher queue depths and wait times, plus response and context cache hit rates.
+    """
+    from services.llm_dispatcher import llm_dispatcher
+    from services.llm_cache_service import llm_cache_service
+    from services.context_cache_service import context_cache
+    return {"dispatcher": llm_dispatcher.stats(), "cache": llm_cache_service.stats(), "context": context_cache.stats()}
+
+@router.get("/llm/audit")
+async def get_llm_audit_summary(hours: int = 24, bucket: str = "hour", by_model: bool = True):
+    """
+    LLM request counts, latency and token usage from the audit log, bucketed by minute/hour/day.
+    """
+    from services.ai_audit_service import ai_audit_logger, BUCKET_FORMATS
+    if bucket not in BUCKET_FORMATS:
+        raise HTTPException(status_code=400, detail=f"bucket must be one of {', '.join(BUCKET_FORMATS)}")
+    since = datetime.now() - timedelta(hours=hours)
+    # Reads the (possibly compressed) log files, so keep it off the event loop
+    summary = await asyncio.to_thread(ai_audit_logger.summarize, since, None, bucket, by_model)
+    summary["writer"] = ai_audit_logger.stats()
+    return summary
+
 @router.get("/geo/status")
 async def get_geo_status():
     """
@@ -234,7 +234,9 @@ async def extract_tasks(
     if not email:
         raise HTTPException(status_code=404, detail="Email not found")
 
-    context = altimeter_service.get_context_for_email(email.from_address, email.subject)
+    context = altimeter_service.get_context_for_email(
+        email.from_address, email.subject, email.body_text or "", message_id=email.message_id
+    )
     agent_context = {
         "subject": email.subject,
         "sender": email.from_address,
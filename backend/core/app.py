@@ -13,6 +13,12 @@ from services.scheduler_service import scheduler_service
 from contextlib import asynccontextmanager
 from services.websocket_manager import ws_manager
 from services.altimeter_sync_service import altimeter_sync_service
+from services.altimeter_api_service import altimeter_api_service
+from services.file_watcher_service import file_watcher_service
+from services.altimeter_service import altimeter_service
+from services.http_client_service import http_clients
+from services.ai_audit_service import ai_audit_logger
+from services.llm_router import llm_router
 
 # Set WebSocket manager in sync service
 altimeter_sync_service.set_ws_manager(ws_manager)
@@ -29,13 +35,29 @@ async def lifespan(app: FastAPI):
     )
     scheduler_service.start()
 
+    # Pooled HTTP clients (Ollama, weather, health checks)
+    http_clients.start()
+
+    # Ollama health probes for the LLM circuit breakers
+    llm_router.start()
+
     # Start Sync Worker
     sync_worker_task = asyncio.create_task(altimeter_sync_service.start_worker())
 
+    # Live knowledge / document-control indexing
+    if settings.KNOWLEDGE_WATCHER_ENABLED:
+        file_watcher_service.start()
+
     yield
     # Shutdown
     scheduler_service.shutdown()
+    file_watcher_service.stop()
+    altimeter_service.close()
     altimeter_sync_service.stop_worker()
+    await altimeter_api_service.close()
+    await llm_router.stop()
+    await http_clients.aclose()
+    ai_audit_logger.close()
     # Wait for sync worker to finish (optional but good practice)
     # await sync_worker_task
 
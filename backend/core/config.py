@@ -30,12 +30,35 @@ class Settings(BaseSettings):
     # Integrations
     ALTIMETER_API_URL: str = os.getenv("ALTIMETER_API_URL", "https://api.altimeter.com/v1")
     ALTIMETER_API_KEY: str = os.getenv("ALTIMETER_API_KEY", "")
+    ALTIMETER_API_CONCURRENCY: int = 8 # Concurrent requests (and pooled keep-alive connections) to the API
+    ALTIMETER_API_RATE_LIMIT: float = 20.0 # Max requests started per second (0 = unlimited)
+    ALTIMETER_API_BULK_SIZE: int = 50 # Operations per POST /tasks/bulk call
+    SYNC_WORKER_CONCURRENCY: int = 4 # Sync queue items processed at once
+    SYNC_LEASE_SECONDS: int = 120 # A claimed item is reclaimable after this (e.g. worker crashed)
+    SYNC_PUSH_DEBOUNCE_SECONDS: float = 2.0 # Rapid local edits collapse into one push
+    SYNC_WEBHOOK_DEBOUNCE_SECONDS: float = 5.0 # task.updated bursts collapse into one pull
+    SYNC_COALESCE_MAX_DELAY_SECONDS: int = 30 # Debouncing never delays an item longer than this
     ALTIMETER_PATH: str = os.getenv("ALTIMETER_PATH", "./data/altimeter")
+    ALTIMETER_DB_POOL_SIZE: int = 4 # Pooled read-only connections to the Altimeter DB
+    ALTIMETER_DB_MMAP_SIZE: int = 268435456 # 256 MB memory-mapped reads
+    ALTIMETER_CACHE_CHECK_SECONDS: float = 5.0 # How often the reference cache checks PRAGMA data_version
+    ALTIMETER_CACHE_RECONCILE_SECONDS: float = 60.0 # How often a refresh re-reads project ids to evict deleted projects
+    ALTIMETER_QUERY_TIMEOUT_SECONDS: float = 5.0 # Deadline for ad-hoc (AI-written) SQL
+    ALTIMETER_QUERY_MAX_ROWS: int = 500 # Rows returned before a result is truncated
+    ALTIMETER_QUERY_MAX_COST: int = 50000000 # EXPLAIN-estimated rows scanned before a query is rejected
+    ALTIMETER_SCHEMA_TOKEN_BUDGET: int = 1200 # Approx. prompt tokens for the /chat schema digest
     OBSIDIAN_KNOWLEDGE_PATH: str = os.getenv("OBSIDIAN_KNOWLEDGE_PATH", "./data/knowledge")
     ONEDRIVE_ROOT_PATH: str = os.getenv("ONEDRIVE_ROOT_PATH", r"C:\Users\mhkem\OneDrive\Documents\Davis Projects OneDrive")
     ONEDRIVE_SKILLS_PATH: str = os.getenv("ONEDRIVE_SKILLS_PATH", "SKILLS/LOCKED")
     ONEDRIVE_GUIDELINES_PATH: str = os.getenv("ONEDRIVE_GUIDELINES_PATH", "GUIDELINES")
     ONEDRIVE_TEMPLATES_PATH: str = os.getenv("ONEDRIVE_TEMPLATES_PATH", "TEMPLATES")
+
+    # Knowledge File Watcher
+    KNOWLEDGE_WATCHER_ENABLED: bool = True # Off under tests (tests/conftest.py sets the env var)
+    KNOWLEDGE_WATCHER_DEBOUNCE_SECONDS: float = 2.0
+    KNOWLEDGE_WATCHER_POLL_SECONDS: int = 60 # Fallback interval when watchdog is not installed
+    KNOWLEDGE_REINDEX_WORKERS: int = 0 # 0 = one parser process per CPU
+    KNOWLEDGE_REINDEX_BATCH_SIZE: int = 64 # Chunks per embed/upsert call
     
     # System Scripts
     SYSTEM_BOOT_SILENT_SCRIPT: str = os.getenv("SYSTEM_BOOT_SILENT_SCRIPT", r"C:\Users\mhkem\Desktop\START_SYSTEM_SILENT.vbs")
@@ -56,6 +79,46 @@ class Settings(BaseSettings):
     # Secrets (Loaded from secrets.json or env vars)
     OPENAI_API_KEY: str = ""
     GEMINI_API_KEY: str = ""
+    GEMINI_MAX_CONCURRENCY: int = 4 # Gemini requests in flight at once (all processes, see LLM_ADMISSION_SHARED)
+    GEMINI_REQUESTS_PER_MINUTE: int = 15 # Match the project's Gemini quota (RPM); per process if LLM_ADMISSION_SHARED is off
+    GEMINI_TOKENS_PER_MINUTE: int = 1000000 # Match the project's Gemini quota (TPM); per process if LLM_ADMISSION_SHARED is off
+    GEMINI_TIMEOUT_SECONDS: float = 60.0 # Per-attempt deadline for a Gemini request
+    LLM_CACHE_ENABLED: bool = True # Serve repeated prompts (opted-in callers) from the LLM cache
+    LLM_CACHE_MAX_ENTRIES: int = 5000 # Least recently used responses are evicted beyond this
+    LLM_CACHE_TTL_SECONDS: int = 604800 # Default lifetime of a cached extraction/classification (7 days)
+    OLLAMA_BASE_URL: str = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+    OLLAMA_MAX_CONNECTIONS: int = 4 # Pooled connections to the local model server
+    OLLAMA_MAX_CONCURRENCY: int = 1 # Local generations at once (one GPU/CPU model runner, all processes)
+    LLM_BREAKER_FAILURE_THRESHOLD: int = 3 # Consecutive failures before a backend's circuit opens
+    LLM_BREAKER_RESET_SECONDS: float = 30.0 # Open circuit lets one trial request through after this
+    LLM_ROUTER_PROBE_SECONDS: float = 30.0 # Ollama health probe interval (0 = no background probe)
+    LLM_ROUTER_PROBE_TIMEOUT_SECONDS: float = 2.0 # A probe slower than this counts as down
+    LLM_ROUTER_LATENCY_FACTOR: float = 3.0 # Local-first requests go to Gemini when Ollama is this many times slower
+    TASK_AGENT_BATCH_SIZE: int = 5 # Emails packed into one TaskAgent extraction prompt
+    TASK_AGENT_BATCH_MAX_CHARS: int = 24000 # Email body characters per batch prompt
+    PROMPT_TOKEN_BUDGET: int = 6000 # Whole-prompt cap for agent and chat prompts (instructions + sections)
+    PROMPT_BODY_MAX_TOKENS: int = 3000 # Email/document body section (quoted history is dropped first)
+    PROMPT_RAG_MAX_TOKENS: int = 1000 # Knowledge/RAG snippets section
+    MORNING_BRIEFING_TOKEN_BUDGET: int = 12000 # Morning briefing prompt (yesterday's daily logs)
+    LLM_BATCH_MAX_QUEUE: int = 50 # Batch LLM requests queued before new ones are shed
+    LLM_BATCH_MAX_WAIT_SECONDS: float = 120.0 # A batch request waiting longer than this is shed
+    LLM_AGENT_MAX_WAIT_SECONDS: float = 300.0 # Same for agent requests (every lane has a finite wait)
+    LLM_INTERACTIVE_MAX_WAIT_SECONDS: float = 60.0 # Same for interactive chat requests
+    LLM_ADMISSION_SHARED: bool = True # Share LLM slots, Gemini quota and lane priority across processes (API, task worker) via SQLite; off = limits apply per process
+    LLM_ADMISSION_LEASE_SECONDS: float = 30.0 # A crashed process's slots and queue entries are freed after this (renewed while alive)
+    LLM_ADMISSION_POLL_SECONDS: float = 0.2 # Recheck interval while another process holds the slot or has priority
+    HTTP_POOL_MAX_CONNECTIONS: int = 10 # Per-upstream connection limit for shared HTTP clients
+    HTTP_POOL_KEEPALIVE_SECONDS: float = 30.0 # Idle keep-alive connections are closed after this
+    AI_AUDIT_BATCH_SIZE: int = 100 # Audit entries appended per write
+    AI_AUDIT_FLUSH_SECONDS: float = 1.0 # Max delay before queued audit entries reach disk
+    AI_AUDIT_QUEUE_MAX: int = 10000 # Entries beyond this are dropped (and counted) instead of blocking
+    AI_AUDIT_MAX_BYTES: int = 50 * 1024 * 1024 # Rotate ai_audit_log.jsonl past this size...
+    AI_AUDIT_ROTATE_HOURS: float = 24 # ...or once it is this old (0 = size only)
+    AI_AUDIT_RETAIN_FILES: int = 14 # Compressed rotated logs kept
+    AI_AUDIT_CONTENT_STORE: bool = False # Store prompt/response bodies by SHA-256; the log keeps hashes
+    CONTEXT_TOKEN_BUDGET: int = 600 # Cap on the [SYSTEM CONTEXT] block added with include_context
+    CONTEXT_LESSONS_TTL_SECONDS: float = 300 # Recent lessons fragment (also invalidated by record_lesson)
+    CONTEXT_PROJECTS_TTL_SECONDS: float = 300 # Active projects fragment (also rebuilt when Altimeter data changes)
     JWT_SECRET_KEY: str = os.getenv("JWT_SECRET_KEY", "")
     
     # Strata Permissions Definition
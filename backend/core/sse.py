@@ -0,0 +1,27 @@
+import json
+from typing import Any, AsyncIterator, Dict, Optional
+from fastapi.responses import StreamingResponse
+
+def sse_event(data: Dict[str, Any], event: Optional[str] = None) -> str:
+    """One Server-Sent Event frame. Unnamed events carry {"delta": ...} text chunks."""
+    frame = f"event: {event}\n" if event else ""
+    return frame + f"data: {json.dumps(data, default=str)}\n\n"
+
+async def _with_error_event(events: AsyncIterator[str]) -> AsyncIterator[str]:
+    try:
+        async for frame in events:
+            yield frame
+    except Exception as e:
+        # The status line is already sent: report the failure in-band
+        yield sse_event({"error": str(e)}, event="error")
+
+def sse_response(events: AsyncIterator[str]) -> StreamingResponse:
+    """
+    Stream pre-formatted SSE frames without proxy buffering. An exception
+    raised mid-stream ends it with an "error" event instead of a cut connection.
+    """
+    return StreamingResponse(
+        _with_error_event(events),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
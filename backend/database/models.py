@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, JSON, ForeignKey, Float
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, JSON, ForeignKey, Float, Index, event, inspect
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from database.database import Base
@@ -128,6 +128,37 @@ class Task(Base):
     etag = Column(String, nullable=True) # For conflict detection
     remote_id = Column(String, index=True, nullable=True) # Altimeter ID
 
+    # Delta sync: fields edited locally since the last successful push, mapped
+    # to their value before the edit (the last synced value), and a local edit
+    # counter (local_version) vs. the counter value last pushed (synced_version).
+    # Together with etag (remote version) this forms the two-sided version
+    # vector used for conflict detection.
+    dirty_fields = Column(JSON, nullable=True)
+    local_version = Column(Integer, default=0)
+    synced_version = Column(Integer, default=0)
+
+    # Fields mirrored to Altimeter
+    SYNC_FIELDS = ("title", "description", "status", "priority", "due_date", "project_id")
+
+@event.listens_for(Task, "before_update")
+def _track_task_sync_fields(mapper, connection, target):
+    """Record which synced fields a local edit changed (skipped while applying remote data)."""
+    if target.__dict__.pop("_applying_remote", False):
+        return
+    state = inspect(target)
+    dirty = dict(target.dirty_fields or {})
+    changed = False
+    for field in Task.SYNC_FIELDS:
+        history = state.attrs[field].history
+        if history.added and (not history.deleted or history.added[0] != history.deleted[0]):
+            changed = True
+            if field not in dirty:
+                base = history.deleted[0] if history.deleted else None
+                dirty[field] = base.isoformat() if isinstance(base, datetime.date) else base
+    if changed:
+        target.dirty_fields = dirty
+        target.local_version = (target.local_version or 0) + 1
+
 class CalendarEvent(Base):
     __tablename__ = "calendar_events"
 
@@ -232,13 +263,22 @@ class SyncQueue(Base):
     entity_type = Column(String, index=True) # e.g., "task"
     entity_id = Column(Integer, index=True)
     direction = Column(String, index=True) # "push" (Atlas->Altimeter) or "pull" (Altimeter->Atlas)
-    status = Column(String, default="pending", index=True) # pending, syncing, synced, error, conflict
+    status = Column(String, default="pending", index=True) # pending, retry, syncing, synced, failed, conflict, coalesced
     retry_count = Column(Integer, default=0)
     last_attempt = Column(DateTime(timezone=True), nullable=True)
     error_message = Column(Text, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    # Worker scheduling: when the item is due, and who holds it while it runs
+    next_attempt_at = Column(DateTime(timezone=True), nullable=True) # NULL = due now
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)
+    leased_by = Column(String, nullable=True)
+
+    __table_args__ = (
+        Index("ix_sync_queue_status_next_attempt", "status", "next_attempt_at"),
+    )
+
 class SyncActivityLog(Base):
     __tablename__ = "sync_activity_log"
 
@@ -262,3 +302,15 @@ class SyncConflict(Base):
     status = Column(String(20), default='unresolved')
     resolved_at = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class KnowledgeManifest(Base):
+    __tablename__ = "knowledge_manifest"
+
+    id = Column(Integer, primary_key=True, index=True)
+    collection = Column(String, index=True) # e.g., "skills", "guidelines", "knowledge"
+    path = Column(String, index=True) # Absolute file path
+    mtime = Column(Float)
+    size = Column(Integer)
+    sha256 = Column(String(64))
+    chunk_ids = Column(JSON) # Vector IDs produced from this file
+    indexed_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
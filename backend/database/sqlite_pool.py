@@ -0,0 +1,139 @@
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from urllib.request import pathname2url
+from typing import Dict, Any
+
+class ReadOnlySQLitePool:
+    """
+    Thread-safe pool of long-lived, read-only SQLite connections.
+
+    Connections open with mode=ro, PRAGMA query_only and memory-mapped I/O, and
+    keep sqlite3's per-connection prepared statement cache warm across calls.
+    Each checkout runs a cheap health check and transparently replaces a broken
+    connection.
+    """
+    def __init__(self, db_path: str, size: int = 4, timeout: float = 5.0,
+                 mmap_size: int = 256 * 1024 * 1024, statement_cache_size: int = 128):
+        self.db_path = db_path
+        self.size = max(1, int(size))
+        self.timeout = timeout
+        self.mmap_size = int(mmap_size)
+        self.statement_cache_size = statement_cache_size
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._stats = {"checkouts": 0, "waits": 0, "recycled": 0, "connects": 0}
+
+    def _connect(self) -> sqlite3.Connection:
+        db_uri = f"file:{pathname2url(os.path.abspath(self.db_path))}?mode=ro"
+        conn = sqlite3.connect(
+            db_uri,
+            uri=True,
+            timeout=self.timeout,
+            check_same_thread=False, # Connections move between threads via the pool
+            cached_statements=self.statement_cache_size
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA query_only = ON")
+        conn.execute(f"PRAGMA mmap_size = {self.mmap_size}")
+        with self._lock:
+            self._stats["connects"] += 1
+        return conn
+
+    @staticmethod
+    def _is_healthy(conn: sqlite3.Connection) -> bool:
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _checkout(self) -> sqlite3.Connection:
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_create = self._created < self.size
+                if can_create:
+                    self._created += 1
+            if can_create:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                with self._lock:
+                    self._stats["waits"] += 1
+                try:
+                    conn = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    raise TimeoutError(f"No pooled connection available for {self.db_path}")
+
+        if not self._is_healthy(conn):
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+            with self._lock:
+                self._stats["recycled"] += 1
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        with self._lock:
+            self._stats["checkouts"] += 1
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for the duration of a with-block."""
+        conn = self._checkout()
+        try:
+            yield conn
+        finally:
+            try:
+                if conn.in_transaction:
+                    conn.rollback()
+            except sqlite3.Error:
+                pass # Broken connections are replaced by the next checkout's health check
+            self._idle.put(conn)
+
+    def dedicated_connection(self) -> sqlite3.Connection:
+        """
+        Open an unpooled connection with the pool's settings. Useful for
+        PRAGMA data_version, whose value is only meaningful per connection.
+        """
+        return self._connect()
+
+    def close_all(self):
+        """Close all idle connections (e.g. on shutdown or when the database moves)."""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+            with self._lock:
+                self._created -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            idle = self._idle.qsize()
+            return {
+                "size": self.size,
+                "open": self._created,
+                "idle": idle,
+                "in_use": self._created - idle,
+                **self._stats
+            }
@@ -0,0 +1,22 @@
+import sys
+import os
+
+# Ensure backend directory is in python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+from database.database import engine, Base
+from database.models import KnowledgeManifest
+
+def migrate():
+    print("Starting migration...")
+
+    # The manifest is a new table; create_all leaves existing tables untouched.
+    # An empty manifest simply makes the next knowledge sync index everything once.
+    print("Creating table 'knowledge_manifest'...")
+    Base.metadata.create_all(bind=engine, tables=[KnowledgeManifest.__table__])
+
+    print("Migration completed successfully.")
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,48 @@
+import sys
+import os
+
+# Ensure backend directory is in python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+from database.database import engine
+from sqlalchemy import text
+
+def migrate():
+    print("Starting migration...")
+
+    with engine.connect() as conn:
+        print("Checking for missing columns in 'sync_queue' table...")
+
+        result = conn.execute(text("PRAGMA table_info(sync_queue)"))
+        existing_columns = [row[1] for row in result.fetchall()]
+
+        columns_to_add = [
+            ("next_attempt_at", "DATETIME"),
+            ("lease_expires_at", "DATETIME"),
+            ("leased_by", "VARCHAR")
+        ]
+
+        for col_name, col_type in columns_to_add:
+            if col_name not in existing_columns:
+                print(f"Adding column '{col_name}' to 'sync_queue'...")
+                try:
+                    conn.execute(text(f"ALTER TABLE sync_queue ADD COLUMN {col_name} {col_type}"))
+                    conn.commit()
+                except Exception as e:
+                    print(f"Error adding {col_name}: {e}")
+            else:
+                print(f"Column '{col_name}' already exists.")
+
+        print("Creating index for due-item claims...")
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_sync_queue_status_next_attempt ON sync_queue (status, next_attempt_at)"
+        ))
+        # Items stuck in 'syncing' from the old worker become due again
+        conn.execute(text("UPDATE sync_queue SET status = 'retry' WHERE status = 'syncing' AND leased_by IS NULL"))
+        conn.commit()
+
+    print("Migration completed successfully.")
+
+if __name__ == "__main__":
+    migrate()
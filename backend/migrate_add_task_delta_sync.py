@@ -0,0 +1,40 @@
+import sys
+import os
+
+# Ensure backend directory is in python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+from database.database import engine
+from sqlalchemy import text
+
+def migrate():
+    print("Starting migration...")
+
+    with engine.connect() as conn:
+        print("Checking for missing columns in 'tasks' table...")
+
+        result = conn.execute(text("PRAGMA table_info(tasks)"))
+        existing_columns = [row[1] for row in result.fetchall()]
+
+        columns_to_add = [
+            ("dirty_fields", "JSON"),
+            ("local_version", "INTEGER DEFAULT 0"),
+            ("synced_version", "INTEGER DEFAULT 0")
+        ]
+
+        for col_name, col_type in columns_to_add:
+            if col_name not in existing_columns:
+                print(f"Adding column '{col_name}' to 'tasks'...")
+                try:
+                    conn.execute(text(f"ALTER TABLE tasks ADD COLUMN {col_name} {col_type}"))
+                    conn.commit()
+                except Exception as e:
+                    print(f"Error adding {col_name}: {e}")
+            else:
+                print(f"Column '{col_name}' already exists.")
+
+    print("Migration completed successfully.")
+
+if __name__ == "__main__":
+    migrate()
@@ -14,8 +14,13 @@ from agents.calendar_agent import calendar_agent
 from database.database import Base, engine, SessionLocal
 from database.models import Email
 from services.search_service import search_service
+from services.llm_dispatcher import llm_dispatcher, PRIORITY_BATCH
+from core.config import settings
 
-async def process_task(task):
+RATE_LIMIT_BACKOFF_SECONDS = 60
+
+def prepare_task(task):
+    """Context lookup, categorization and indexing for a claimed item. Returns (context, agent_context)."""
     print(f"Processing task {task['id']}...")
     payload = task['payload']
 
@@ -27,7 +32,7 @@ async def process_task(task):
     provider_type = payload.get('provider_type', 'google')
 
     # 1. Get Context (Now enriched with mission_intel/SOPs)
-    context = altimeter_service.get_context_for_email(sender, subject, body)
+    context = altimeter_service.get_context_for_email(sender, subject, body, message_id=payload.get('message_id'))
 
     # 1.5 Update Email Category & Index (Moved from IMAP Provider)
     if email_id:
@@ -51,7 +56,10 @@ async def process_task(task):
                     "sender": email_obj.from_address,
                     "body": email_obj.body_text or email_obj.body_html,
                     "message_id": email_obj.message_id,
-                    "date": email_obj.date_received.isoformat() if email_obj.date_received else ""
+                    "date": email_obj.date_received.isoformat() if email_obj.date_received else "",
+                    "project_id": email_obj.project_id,
+                    "provider": email_obj.provider_type,
+                    "category": email_obj.category
                 })
                 print(f"  -> Indexed Email in Vector DB")
         except Exception as e:
@@ -70,8 +78,18 @@ async def process_task(task):
     if context.get("is_proposal"):
         agent_context["instructions"] = "This appears to be a Request for Proposal (RFP). Create a high priority task to review and bid."
 
+    return context, agent_context
+
+async def process_task(task, prepared=None, task_out=None):
+    """Runs the agents for a claimed item (task_out: TaskAgent result already computed in a batch)."""
+    payload = task['payload']
+    email_id = payload.get('email_id')
+    provider_type = payload.get('provider_type', 'google')
+    context, agent_context = prepared or prepare_task(task)
+
     # 2. Run Task Agent
-    task_out = await task_agent.process(agent_context)
+    if task_out is None:
+        task_out = await task_agent.process(agent_context)
     if task_out.get("status") == "success":
         for t_data in task_out["data"].get("tasks", []):
             if context.get("is_proposal"):
@@ -141,15 +159,62 @@ async def process_task(task):
 
 async def worker_loop():
     print("Worker started. Waiting for tasks...")
+    # Bulk ingestion: never compete with interactive LLM calls
+    with llm_dispatcher.lane(PRIORITY_BATCH):
+        await _worker_loop()
+
+async def process_batch(tasks):
+    """
+    Processes claimed items with one TaskAgent extraction call per batch.
+    Returns how many items were requeued because the AI service was rate limiting.
+    """
+    prepared = []
+    for task in tasks:
+        try:
+            prepared.append((task, prepare_task(task)))
+        except Exception as e:
+            print(f"Error processing task {task['id']}: {e}")
+            data_api.fail_task(task['id'], str(e))
+    if not prepared:
+        return 0
+
+    try:
+        task_outs = await task_agent.process_batch([agent_context for _, (_, agent_context) in prepared])
+    except Exception as e:
+        print(f"Batch extraction failed, processing items one by one: {e}")
+        task_outs = [None] * len(prepared)
+
+    deferred = 0
+    for (task, prep), task_out in zip(prepared, task_outs):
+        if task_out is not None and task_out.get("status") == "deferred":
+            # Shed by the rate limiter: put it back rather than finishing it without tasks
+            data_api.requeue_task(task['id'], task_out.get("error", "deferred"))
+            deferred += 1
+            continue
+        try:
+            await process_task(task, prep, task_out)
+        except Exception as e:
+            print(f"Error processing task {task['id']}: {e}")
+            data_api.fail_task(task['id'], str(e))
+    if deferred:
+        print(f"Requeued {deferred} task(s): AI rate limit exceeded.")
+    return deferred
+
+async def _worker_loop():
+    batch_size = max(1, int(settings.TASK_AGENT_BATCH_SIZE))
     while True:
-        # Claim task
-        task = data_api.claim_next_task("analyze_email", "worker_1")
-        if task:
-            try:
-                await process_task(task)
-            except Exception as e:
-                print(f"Error processing task {task['id']}: {e}")
-                data_api.fail_task(task['id'], str(e))
+        # Claim up to a batch of tasks
+        tasks = []
+        while len(tasks) < batch_size:
+            task = data_api.claim_next_task("analyze_email", "worker_1")
+            if not task:
+                break
+            tasks.append(task)
+
+        if tasks:
+            if await process_batch(tasks):
+                # Rate limited: give the limiter time to recover before reclaiming
+                await asyncio.sleep(RATE_LIMIT_BACKOFF_SECONDS)
         else:
             # Sleep briefly to avoid busy loop
             await asyncio.sleep(5)
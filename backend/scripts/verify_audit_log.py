@@ -3,7 +3,7 @@ import os
 import json
 import time
 import asyncio
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, AsyncMock
 
 # Add backend to sys.path
 sys.path.append(os.getcwd())
@@ -15,6 +15,8 @@ if "TEST" in os.environ:
 
 from backend.services.ai_service import ai_service
 from backend.core.config import settings
+# Same module instance ai_service writes through (imported as services.*)
+from services.ai_audit_service import ai_audit_logger
 
 LOG_DIR = os.path.join(os.getcwd(), "backend", "data")
 LOG_FILE = os.path.join(LOG_DIR, "ai_audit_log.jsonl")
@@ -23,8 +25,8 @@ def setup():
     # Clean up existing logs
     if os.path.exists(LOG_FILE):
         os.remove(LOG_FILE)
-    if os.path.exists(LOG_FILE.replace(".jsonl", ".1.jsonl")):
-        os.remove(LOG_FILE.replace(".jsonl", ".1.jsonl"))
+    for rotated in ai_audit_logger.rotated_files():
+        os.remove(rotated)
 
     # Mock the client
     mock_client = MagicMock()
@@ -33,7 +35,7 @@ def setup():
     mock_response.usage_metadata = MagicMock()
     mock_response.usage_metadata.total_token_count = 123
 
-    mock_client.models.generate_content.return_value = mock_response
+    mock_client.aio.models.generate_content = AsyncMock(return_value=mock_response)
 
     ai_service.client = mock_client
     ai_service.model_name = "mock-gemini-model"
@@ -45,6 +47,7 @@ async def verify_basic_logging():
     mock_client = setup()
 
     await ai_service.generate_content("Test Prompt")
+    ai_audit_logger.flush()
 
     if not os.path.exists(LOG_FILE):
         print("FAIL: Log file not created")
@@ -89,9 +92,10 @@ async def verify_error_logging():
     mock_client = setup()
 
     # Simulate error
-    mock_client.models.generate_content.side_effect = Exception("Simulated API Error")
+    mock_client.aio.models.generate_content.side_effect = Exception("Simulated API Error")
 
     await ai_service.generate_content("Error Prompt")
+    ai_audit_logger.flush()
 
     if not os.path.exists(LOG_FILE):
         print("FAIL: Log file not created on error")
@@ -142,7 +146,7 @@ async def verify_log_rotation():
     mock_response.text = "Response after rotation"
     mock_response.usage_metadata = MagicMock()
     mock_response.usage_metadata.total_token_count = 123
-    mock_client.models.generate_content.return_value = mock_response
+    mock_client.aio.models.generate_content = AsyncMock(return_value=mock_response)
     ai_service.client = mock_client
 
     # Manually recreate the large file because setup() deleted it
@@ -150,14 +154,18 @@ async def verify_log_rotation():
         f.write(large_content)
 
     await ai_service.generate_content("Rotation Prompt")
+    ai_audit_logger.flush()
 
-    rotated_file = LOG_FILE.replace(".jsonl", ".1.jsonl")
-    if not os.path.exists(rotated_file):
+    rotated_files = ai_audit_logger.rotated_files()
+    if not rotated_files:
         print("FAIL: Rotated file not created")
         return False
 
-    # Check size of rotated file
-    if os.path.getsize(rotated_file) < 50 * 1024 * 1024:
+    # Rotated files are gzipped; check the uncompressed size
+    import gzip
+    with gzip.open(rotated_files[-1], "rb") as f:
+        rotated_size = len(f.read())
+    if rotated_size < 50 * 1024 * 1024:
         print("FAIL: Rotated file size is too small")
         return False
 
@@ -186,6 +194,7 @@ async def verify_test_mode():
     os.environ["TEST"] = "true"
 
     await ai_service.generate_content("Test Mode Prompt")
+    ai_audit_logger.flush()
 
     if os.path.exists(LOG_FILE):
         print("FAIL: Log file created in TEST mode")
@@ -0,0 +1,300 @@
+import os
+import glob
+import gzip
+import json
+import queue
+import atexit
+import shutil
+import hashlib
+import datetime
+import threading
+from typing import Dict, Any, List, Optional
+from core.config import settings
+
+LOG_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+LOG_FILE = os.path.join(LOG_DIR, "ai_audit_log.jsonl")
+BLOB_DIR = os.path.join(LOG_DIR, "ai_audit_blobs")
+
+BUCKET_FORMATS = {"minute": "%Y-%m-%dT%H:%M", "hour": "%Y-%m-%dT%H:00", "day": "%Y-%m-%d"}
+
+class AIAuditLogger:
+    """
+    Buffered writer for the AI audit log (ai_audit_log.jsonl).
+
+    `log()` only puts the entry on a queue, so callers (including the event
+    loop) never touch the disk. A background thread appends entries in
+    batches. It rotates the file by size or age, gzips rotated files and
+    keeps the newest AI_AUDIT_RETAIN_FILES of them. With
+    AI_AUDIT_CONTENT_STORE on, prompt and response bodies are stored once
+    each under ai_audit_blobs/, keyed by SHA-256, and the log keeps only
+    the hashes. If the queue is full, entries are dropped and counted
+    rather than blocking the request path.
+    """
+    def __init__(self, log_file: str = LOG_FILE, blob_dir: str = BLOB_DIR):
+        self.log_file = log_file
+        self.blob_dir = blob_dir
+        self.batch_size = max(1, int(getattr(settings, "AI_AUDIT_BATCH_SIZE", 100)))
+        self.flush_seconds = float(getattr(settings, "AI_AUDIT_FLUSH_SECONDS", 1.0))
+        self.max_bytes = int(getattr(settings, "AI_AUDIT_MAX_BYTES", 50 * 1024 * 1024))
+        self.rotate_seconds = float(getattr(settings, "AI_AUDIT_ROTATE_HOURS", 24)) * 3600
+        self.retain_files = int(getattr(settings, "AI_AUDIT_RETAIN_FILES", 14))
+        self.content_store = bool(getattr(settings, "AI_AUDIT_CONTENT_STORE", False))
+
+        self._queue: queue.Queue = queue.Queue(maxsize=int(getattr(settings, "AI_AUDIT_QUEUE_MAX", 10000)))
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._opened_at: Optional[float] = None
+        self._stats = {"written": 0, "dropped": 0, "batches": 0, "rotations": 0, "errors": 0}
+
+    # --- Request path ---
+
+    def log(self, entry: Dict[str, Any]):
+        """Queue one audit entry (never blocks)."""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self._stats["dropped"] += 1
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until everything queued so far is on disk. False on timeout."""
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def close(self, timeout: float = 5.0):
+        """Drain the queue and stop the writer thread (app shutdown)."""
+        thread = self._thread
+        if thread is None:
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        thread.join(timeout)
+        self._thread = None
+
+    # --- Writer thread ---
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="ai-audit-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        stop = False
+        while not stop:
+            try:
+                item = self._queue.get(timeout=self.flush_seconds)
+            except queue.Empty:
+                continue
+
+            batch, waiters = [], []
+            while True:
+                if item is None:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    batch.append(item)
+                if stop or len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            if batch:
+                self._write(batch)
+            for waiter in waiters:
+                waiter.set()
+
+    def _write(self, batch: List[Dict[str, Any]]):
+        try:
+            os.makedirs(os.path.dirname(self.log_file), exist_ok=True)
+            lines = "".join(json.dumps(self._index_entry(e), default=str) + "\n" for e in batch)
+            self._maybe_rotate(len(lines.encode("utf-8")))
+            with open(self.log_file, "a") as f:
+                f.write(lines)
+            self._stats["written"] += len(batch)
+            self._stats["batches"] += 1
+        except Exception as e:
+            self._stats["errors"] += 1
+            # Fallback print if logging fails
+            print(f"Failed to write to AI audit log: {e}")
+
+    def _index_entry(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        if not self.content_store:
+            return entry
+        entry = dict(entry)
+        for field in ("prompt", "response"):
+            body = entry.pop(field, None)
+            if body is None:
+                continue
+            entry[f"{field}_sha256"] = self._store_blob(body)
+            entry[f"{field}_chars"] = len(body)
+        return entry
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.blob_dir, digest[:2], f"{digest}.txt.gz")
+
+    def _store_blob(self, body: str) -> str:
+        data = body.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(digest)
+        if not os.path.exists(path): # Same prompt twice (e.g. the system context) is stored once
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with gzip.open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        return digest
+
+    def load_body(self, digest: str) -> Optional[str]:
+        """Prompt or response text stored under `digest` (None if unknown)."""
+        try:
+            with gzip.open(self._blob_path(digest), "rb") as f:
+                return f.read().decode("utf-8")
+        except (OSError, ValueError):
+            return None
+
+    # --- Rotation ---
+
+    def _first_timestamp(self) -> float:
+        """When the current file was started (its first entry), for age-based rotation."""
+        try:
+            with open(self.log_file) as f:
+                first = json.loads(f.readline())
+            return datetime.datetime.fromisoformat(first["timestamp"]).timestamp()
+        except Exception:
+            return os.path.getmtime(self.log_file)
+
+    def _maybe_rotate(self, incoming_bytes: int):
+        if not os.path.exists(self.log_file):
+            self._opened_at = datetime.datetime.now().timestamp()
+            return
+        if self._opened_at is None:
+            self._opened_at = self._first_timestamp()
+
+        now = datetime.datetime.now()
+        too_big = os.path.getsize(self.log_file) + incoming_bytes > self.max_bytes
+        too_old = self.rotate_seconds > 0 and now.timestamp() - self._opened_at > self.rotate_seconds
+        if not (too_big or too_old):
+            return
+
+        rotated = self.log_file.replace(".jsonl", f".{now.strftime('%Y%m%d-%H%M%S-%f')}.jsonl.gz")
+        with open(self.log_file, "rb") as src, gzip.open(rotated, "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(self.log_file)
+        self._opened_at = now.timestamp()
+        self._stats["rotations"] += 1
+
+        if self.retain_files > 0:
+            for old in self.rotated_files()[:-self.retain_files]:
+                os.remove(old)
+
+    def rotated_files(self) -> List[str]:
+        """Compressed rotated logs, oldest first (names sort by rotation time)."""
+        return sorted(glob.glob(self.log_file.replace(".jsonl", ".*.jsonl.gz")))
+
+    # --- Queries ---
+
+    def _read_entries(self, since: datetime.datetime):
+        paths = []
+        for path in self.rotated_files():
+            # A rotated file only holds entries from before its rotation time
+            stamp = os.path.basename(path).split(".")[-3]
+            try:
+                if datetime.datetime.strptime(stamp, "%Y%m%d-%H%M%S-%f") < since:
+                    continue
+            except ValueError:
+                pass
+            paths.append(path)
+        if os.path.exists(self.log_file):
+            paths.append(self.log_file)
+
+        for path in paths:
+            opener = gzip.open if path.endswith(".gz") else open
+            try:
+                with opener(path, "rt") as f:
+                    for line in f:
+                        try:
+                            yield json.loads(line)
+                        except ValueError:
+                            continue
+            except OSError as e:
+                print(f"Failed to read AI audit log {path}: {e}")
+
+    def summarize(self, since: Optional[datetime.datetime] = None, until: Optional[datetime.datetime] = None,
+                  bucket: str = "hour", group_by_model: bool = True) -> Dict[str, Any]:
+        """
+        Request counts, latency (avg/p50/p95) and token usage per time bucket
+        (minute/hour/day) and model, over [since, until). Defaults to the last 24h.
+        """
+        if bucket not in BUCKET_FORMATS:
+            raise ValueError(f"bucket must be one of {', '.join(BUCKET_FORMATS)}")
+        until = until or datetime.datetime.now()
+        since = since or until - datetime.timedelta(hours=24)
+        self.flush()
+
+        groups: Dict[tuple, Dict[str, Any]] = {}
+        for entry in self._read_entries(since):
+            try:
+                ts = datetime.datetime.fromisoformat(entry["timestamp"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            if not (since <= ts < until):
+                continue
+            key = (ts.strftime(BUCKET_FORMATS[bucket]), entry.get("model") if group_by_model else None)
+            group = groups.setdefault(key, {"requests": 0, "errors": 0, "cache_hits": 0, "tokens": 0, "latencies": []})
+            group["requests"] += 1
+            status = entry.get("status")
+            if status == "cache_hit":
+                group["cache_hits"] += 1
+            elif status != "success":
+                group["errors"] += 1
+            group["tokens"] += entry.get("tokens_used") or 0
+            if status != "cache_hit" and entry.get("latency_ms") is not None:
+                group["latencies"].append(entry["latency_ms"])
+
+        rows = []
+        for (bucket_start, model), group in sorted(groups.items(), key=lambda g: (g[0][0], g[0][1] or "")):
+            latencies = sorted(group.pop("latencies"))
+            row = {"bucket": bucket_start, **group}
+            if group_by_model:
+                row["model"] = model
+            if latencies:
+                row["latency_ms"] = {
+                    "avg": round(sum(latencies) / len(latencies), 1),
+                    "p50": round(latencies[len(latencies) // 2], 1),
+                    "p95": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 1)
+                }
+            rows.append(row)
+
+        return {
+            "since": since.isoformat(),
+            "until": until.isoformat(),
+            "bucket": bucket,
+            "totals": {
+                "requests": sum(r["requests"] for r in rows),
+                "errors": sum(r["errors"] for r in rows),
+                "cache_hits": sum(r["cache_hits"] for r in rows),
+                "tokens": sum(r["tokens"] for r in rows)
+            },
+            "buckets": rows
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {"queued": self._queue.qsize(), "content_store": self.content_store, **self._stats}
+
+# Singleton instance
+ai_audit_logger = AIAuditLogger()
+atexit.register(ai_audit_logger.close)
@@ -1,4 +1,4 @@
-from typing import Optional, List
+from typing import Optional, List, Dict, Any, AsyncIterator
 import asyncio
 import json
 import time
@@ -9,13 +9,27 @@ try:
 except ImportError:
     genai = None
 from core.config import settings
+from services.http_client_service import http_clients
+from services.llm_cache_service import llm_cache_service
+from services.llm_dispatcher import llm_dispatcher, LLMOverloaded
+from services.ai_audit_service import ai_audit_logger
+from services.context_cache_service import context_cache
+from services.llm_router import llm_router
+from services.prompt_builder import count_tokens
 
-LOG_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
-LOG_FILE = os.path.join(LOG_DIR, "ai_audit_log.jsonl")
+class StreamInterrupted(Exception):
+    """The model failed after part of a streamed answer was already sent."""
+    pass
 
 class GeminiService:
     """
     Service for interacting with Google Gemini AI.
+
+    Gemini calls go through the SDK's async client, so a slow request only
+    suspends its own coroutine. Each attempt is bounded by GEMINI_TIMEOUT_SECONDS.
+    Cancelling the caller cancels the underlying HTTP request. Every model
+    call is admitted by llm_dispatcher, which applies the priority lanes,
+    concurrency caps and rate limits.
     """
     def __init__(self):
         """Initialize the Gemini Service."""
@@ -26,83 +40,109 @@ class GeminiService:
         else:
             self.client = None
             self.model_name = None
+        self.timeout_seconds = float(getattr(settings, "GEMINI_TIMEOUT_SECONDS", 60.0))
+
+    async def _call_gemini(self, prompt: str, config: dict, priority: Optional[int] = None):
+        estimated_tokens = llm_dispatcher.estimate_tokens(prompt)
+        async with llm_dispatcher.slot("gemini", priority, estimated_tokens):
+            response = await asyncio.wait_for(
+                self.client.aio.models.generate_content(
+                    model=self.model_name,
+                    contents=prompt,
+                    config=config
+                ),
+                timeout=self.timeout_seconds
+            )
+        usage = getattr(response, "usage_metadata", None)
+        if usage and isinstance(getattr(usage, "total_token_count", None), int):
+            llm_dispatcher.record_usage("gemini", estimated_tokens, usage.total_token_count)
+        return response
 
-    def _log_audit(self, prompt: str, response: str, model: str, tokens_used: Optional[int], latency_ms: float, status: str, error_message: Optional[str] = None):
+    def _log_audit(self, prompt: str, response: str, model: str, tokens_used: Optional[int], latency_ms: float, status: str, error_message: Optional[str] = None, extra: Optional[Dict[str, Any]] = None):
         """
-        Log AI audit entry.
+        Log AI audit entry. Only queued here; ai_audit_logger writes it in the background.
         """
         if os.environ.get("TEST"):
             return
 
-        try:
-            if not os.path.exists(LOG_DIR):
-                os.makedirs(LOG_DIR)
-
-            # Log rotation
-            if os.path.exists(LOG_FILE) and os.path.getsize(LOG_FILE) > 50 * 1024 * 1024:
-                rotated_file = LOG_FILE.replace(".jsonl", ".1.jsonl")
-                os.replace(LOG_FILE, rotated_file)
-
-            entry = {
-                "timestamp": datetime.datetime.now().isoformat(),
-                "prompt": prompt,
-                "response": response,
-                "model": model,
-                "tokens_used": tokens_used,
-                "latency_ms": latency_ms,
-                "status": status
-            }
-            if error_message:
-                entry["error_message"] = error_message
-
-            with open(LOG_FILE, "a") as f:
-                f.write(json.dumps(entry) + "\n")
-        except Exception as e:
-            # Fallback print if logging fails
-            print(f"Failed to write to AI audit log: {e}")
+        entry = {
+            "timestamp": datetime.datetime.now().isoformat(),
+            "prompt": prompt,
+            "response": response,
+            "model": model,
+            "tokens_used": tokens_used,
+            "latency_ms": latency_ms,
+            "status": status
+        }
+        if error_message:
+            entry["error_message"] = error_message
+        if extra:
+            entry.update(extra)
+        ai_audit_logger.log(entry)
 
     def _build_context(self, user_strata: int) -> str:
         """
         Build system context string.
         """
         from services.altimeter_service import altimeter_service
-        from services.learning_service import learning_service
-
-        context_str = "\n\n[SYSTEM CONTEXT]\n"
 
         # 1. Strata Permissions
         permissions = settings.STRATA_PERMISSIONS.get(user_strata, [])
-        context_str += f"User Access Level: Strata {user_strata} (Permissions: {', '.join(permissions)})\n"
+        strata_str = f"User Access Level: Strata {user_strata} (Permissions: {', '.join(permissions)})\n"
+
+        # 2. Learning Core (Shadow Tester Feedback), invalidated by record_lesson
+        lessons_str = context_cache.get(
+            "lessons", self._lessons_fragment, ttl=float(getattr(settings, "CONTEXT_LESSONS_TTL_SECONDS", 300))
+        )
+
+        # 3. Active Projects, rebuilt when the Altimeter database changes
+        try:
+            data_version = altimeter_service.reference_cache.data_version()
+        except Exception:
+            data_version = None
+        projects_str = context_cache.get(
+            "projects", self._projects_fragment,
+            ttl=float(getattr(settings, "CONTEXT_PROJECTS_TTL_SECONDS", 300)), version=data_version
+        )
+
+        return context_cache.assemble(
+            "\n\n[SYSTEM CONTEXT]\n",
+            [("strata", strata_str), ("lessons", lessons_str), ("projects", projects_str)],
+            token_budget=int(getattr(settings, "CONTEXT_TOKEN_BUDGET", 600))
+        )
 
-        # 2. Learning Core (Shadow Tester Feedback)
+    @staticmethod
+    def _lessons_fragment() -> str:
+        from services.learning_service import learning_service
         try:
             recent_lessons = learning_service.get_recent_lessons(limit=5)
             if recent_lessons:
                 lessons_str = "\n".join([f"- {l['created_at']}: [{l['topic']}] {l['insight']}" for l in recent_lessons])
-                context_str += f"Previous learnings:\n{lessons_str}\n"
-            else:
-                context_str += "Previous learnings: None\n"
+                return f"Previous learnings:\n{lessons_str}\n"
+            return "Previous learnings: None\n"
         except Exception:
-            context_str += "Previous learnings: Unavailable\n"
+            return "Previous learnings: Unavailable\n"
 
-        # 3. Active Projects
+    @staticmethod
+    def _projects_fragment() -> str:
+        from services.altimeter_service import altimeter_service
         try:
-            projects = altimeter_service.list_projects()
-            active_projects = [p['name'] for p in projects[:3]]
-            context_str += f"Active Projects: {', '.join(active_projects)}\n"
+            active_projects = altimeter_service.list_active_project_names(limit=3)
+            return f"Active Projects: {', '.join(active_projects)}\n"
         except Exception:
-            pass
-
-        return context_str
+            return ""
 
     def get_embedding(self, text: str) -> Optional[List[float]]:
         """
         Generate vector embedding for text using Local Ollama.
+        Returns None at once while the embed circuit is open.
         """
-        import requests
+        if not llm_router.allow("ollama_embed"):
+            return None
+        start_time = time.time()
         try:
-            response = requests.post(
-                "http://localhost:11434/api/embeddings",
+            response = http_clients.get_sync("ollama").post(
+                f"{settings.OLLAMA_BASE_URL}/api/embeddings",
                 json={
                     "model": "mxbai-embed-large",
                     "prompt": text
@@ -111,12 +151,91 @@ class GeminiService:
             )
             if response.status_code == 200:
                 data = response.json()
+                llm_router.record_success("ollama_embed", (time.time() - start_time) * 1000)
                 return data.get("embedding")
+            llm_router.record_failure("ollama_embed", f"HTTP {response.status_code}")
             return None
         except Exception as e:
+            llm_router.record_failure("ollama_embed", e)
             print(f"Error generating embedding via Ollama: {e}")
             return None
 
+    def get_embeddings(self, texts: List[str]) -> Optional[List[List[float]]]:
+        """
+        Embed several texts in one Ollama call (/api/embed), in order.
+        None if the call fails or the embed circuit is open.
+        """
+        if not texts:
+            return []
+        if not llm_router.allow("ollama_embed"):
+            return None
+        start_time = time.time()
+        try:
+            response = http_clients.get_sync("ollama").post(
+                f"{settings.OLLAMA_BASE_URL}/api/embed",
+                json={
+                    "model": "mxbai-embed-large",
+                    "input": texts
+                },
+                timeout=60.0
+            )
+            if response.status_code == 200:
+                embeddings = response.json().get("embeddings") or []
+                llm_router.record_success("ollama_embed", (time.time() - start_time) * 1000)
+                return embeddings if len(embeddings) == len(texts) else None
+            llm_router.record_failure("ollama_embed", f"HTTP {response.status_code}")
+            return None
+        except Exception as e:
+            llm_router.record_failure("ollama_embed", e)
+            print(f"Error generating embeddings via Ollama: {e}")
+            return None
+
+    def _cache_lookup(self, final_prompt: str, cache_ttl: Optional[int], cache_tag: Optional[str],
+                      use_local_model: bool, json_mode: bool, temperature: Optional[float]):
+        """(cache key or None if not opted in, cached response or None)."""
+        if not cache_ttl:
+            return None, None
+        model_route = f"{'ollama:llama3>' if use_local_model else ''}{self.model_name}"
+        cache_key = llm_cache_service.make_key(model_route, final_prompt, json_mode, temperature)
+        lookup_start = time.time()
+        cached = llm_cache_service.get(cache_key)
+        if cached is None:
+            return cache_key, None
+        self._log_audit(
+            prompt=final_prompt,
+            response=cached["response"],
+            model=cached["model"],
+            tokens_used=0,
+            latency_ms=(time.time() - lookup_start) * 1000,
+            status="cache_hit",
+            extra={"cache_tag": cache_tag, "saved_ms": cached["latency_ms"]}
+        )
+        return cache_key, cached["response"]
+
+    @staticmethod
+    def _ollama_payload(final_prompt: str, json_mode: bool, temperature: Optional[float], stream: bool) -> Dict[str, Any]:
+        payload = {
+            "model": "llama3", # Defaulting to llama3, could be configured in settings
+            "prompt": final_prompt,
+            "stream": stream
+        }
+        if json_mode:
+            payload["format"] = "json"
+        if temperature is not None:
+            payload["options"] = {"temperature": temperature}
+        return payload
+
+    @staticmethod
+    def _token_audit(token_breakdown: Optional[Dict[str, Any]], prompt: str, final_prompt: str,
+                     include_context: bool) -> Optional[Dict[str, Any]]:
+        """Audit-log fields for the prompt's token breakdown (plus the injected system context)."""
+        if token_breakdown is None and not include_context:
+            return None
+        breakdown = dict(token_breakdown or {})
+        if include_context:
+            breakdown["system_context"] = count_tokens(final_prompt[len(prompt):])
+        return {"token_breakdown": breakdown}
+
     async def generate_content(
         self,
         prompt: str,
@@ -124,7 +243,12 @@ class GeminiService:
         include_context: bool = False,
         user_strata: int = 1,
         json_mode: bool = False,
-        use_local_model: bool = True
+        use_local_model: bool = True,
+        temperature: Optional[float] = None,
+        cache_ttl: Optional[int] = None,
+        cache_tag: Optional[str] = None,
+        priority: Optional[int] = None,
+        token_breakdown: Optional[Dict[str, Any]] = None
     ) -> Optional[str]:
         """
         Generate content using Gemini AI or local Ollama.
@@ -136,6 +260,11 @@ class GeminiService:
             user_strata: The user's strata level for context customization.
             json_mode: Whether to enforce JSON output structure.
             use_local_model: If True, attempts to route the request to a local Ollama instance before falling back to Gemini.
+            temperature: Sampling temperature (model default if None).
+            cache_ttl: Opt-in: serve/store the response in the LLM cache for this many seconds.
+            cache_tag: Caller name recorded with cache entries and hits (e.g. "task_agent").
+            priority: Dispatcher lane (PRIORITY_INTERACTIVE/AGENT/BATCH); defaults to the current lane.
+            token_breakdown: Per-section token counts from PromptBuilder, recorded in the audit log.
 
         Returns:
             The generated content as a string, or an error message.
@@ -145,86 +274,136 @@ class GeminiService:
         # Inject Context
         if include_context:
             final_prompt += self._build_context(user_strata)
+        audit_extra = self._token_audit(token_breakdown, prompt, final_prompt, include_context)
+
+        cache_key, cached = self._cache_lookup(final_prompt, cache_ttl, cache_tag, use_local_model, json_mode, temperature)
+        if cached is not None:
+            return cached
 
-        if use_local_model:
-            import httpx
+        # Backends whose circuit is open are skipped without waiting on them
+        route = llm_router.route(use_local_model, self.client is not None)
+
+        if "ollama" in route and llm_router.allow("ollama_generate"):
             try:
                 start_time = time.time()
-                async with httpx.AsyncClient() as client:
-                    ollama_payload = {
-                        "model": "llama3", # Defaulting to llama3, could be configured in settings
-                        "prompt": final_prompt,
-                        "stream": False
-                    }
-                    if json_mode:
-                        ollama_payload["format"] = "json"
-                        
+                client = http_clients.get("ollama")
+                ollama_payload = self._ollama_payload(final_prompt, json_mode, temperature, stream=False)
+                    
+                async with llm_dispatcher.slot("ollama", priority):
                     response = await client.post(
-                        "http://localhost:11434/api/generate",
+                        f"{settings.OLLAMA_BASE_URL}/api/generate",
                         json=ollama_payload,
                         timeout=60.0 # Local models might take a while
                     )
-                    response.raise_for_status()
-                    result = response.json().get("response", "")
-                    
-                    self._log_audit(
-                        prompt=final_prompt,
-                        response=result,
-                        model="ollama-local",
-                        tokens_used=None,
-                        latency_ms=(time.time() - start_time) * 1000,
-                        status="success"
-                    )
-                    return result
+                response.raise_for_status()
+                result = response.json().get("response", "")
+                latency_ms = (time.time() - start_time) * 1000
+                llm_router.record_success("ollama_generate", latency_ms)
+                
+                self._log_audit(
+                    prompt=final_prompt,
+                    extra=audit_extra,
+                    response=result,
+                    model="ollama-local",
+                    tokens_used=None,
+                    latency_ms=latency_ms,
+                    status="success"
+                )
+                if cache_key:
+                    llm_cache_service.put(cache_key, result, cache_ttl, "ollama-local", cache_tag, latency_ms)
+                return result
+            except LLMOverloaded as e:
+                # Shed, not failed: falling back to Gemini would defeat the load shedding
+                llm_router.release("ollama_generate")
+                print(f"{e}")
+                return "ERROR_RATE_LIMIT_EXCEEDED"
+            except asyncio.CancelledError:
+                llm_router.release("ollama_generate")
+                raise
             except Exception as e:
+                llm_router.record_failure("ollama_generate", e)
                 print(f"Local Ollama model failed: {e}. Falling back to Gemini.")
 
         if not self.client:
             return "AI Service Unavailable: Missing API Key"
+        if "gemini" not in route or not llm_router.allow("gemini"):
+            return llm_router.unavailable_message(["ollama_generate", "gemini"] if use_local_model else ["gemini"])
 
         config = {}
         if json_mode:
             config["response_mime_type"] = "application/json"
+        if temperature is not None:
+            config["temperature"] = temperature
 
         start_time = time.time()
 
         for attempt in range(max_retries + 1):
             try:
-                # The new SDK is synchronous by default, but we wrap it in async for the service interface
-                response = self.client.models.generate_content(
-                    model=self.model_name,
-                    contents=final_prompt,
-                    config=config
-                )
+                response = await self._call_gemini(final_prompt, config, priority)
 
                 # Log success
                 tokens_used = None
                 if hasattr(response, 'usage_metadata') and response.usage_metadata:
                     tokens_used = response.usage_metadata.total_token_count
 
+                latency_ms = (time.time() - start_time) * 1000
+                llm_router.record_success("gemini", latency_ms)
                 self._log_audit(
                     prompt=final_prompt,
+                    extra=audit_extra,
                     response=response.text,
                     model=self.model_name,
                     tokens_used=tokens_used,
-                    latency_ms=(time.time() - start_time) * 1000,
+                    latency_ms=latency_ms,
                     status="success"
                 )
+                if cache_key:
+                    llm_cache_service.put(cache_key, response.text, cache_ttl, self.model_name, cache_tag, latency_ms)
 
                 return response.text
+            except asyncio.CancelledError:
+                llm_router.release("gemini")
+                self._log_audit(
+                    prompt=final_prompt,
+                    extra=audit_extra,
+                    response="CANCELLED",
+                    model=self.model_name,
+                    tokens_used=None,
+                    latency_ms=(time.time() - start_time) * 1000,
+                    status="cancelled"
+                )
+                raise
+            except LLMOverloaded as e:
+                llm_router.release("gemini")
+                self._log_audit(
+                    prompt=final_prompt,
+                    extra=audit_extra,
+                    response="ERROR_RATE_LIMIT_EXCEEDED",
+                    model=self.model_name,
+                    tokens_used=None,
+                    latency_ms=(time.time() - start_time) * 1000,
+                    status="shed",
+                    error_message=str(e)
+                )
+                return "ERROR_RATE_LIMIT_EXCEEDED"
             except Exception as e:
                 error_msg = str(e)
+                if isinstance(e, asyncio.TimeoutError):
+                    error_msg = f"Gemini request timed out after {self.timeout_seconds:g}s"
                 is_rate_limit = "429" in error_msg or "RESOURCE_EXHAUSTED" in error_msg
                 
                 if is_rate_limit and attempt < max_retries:
-                    wait_time = (2 ** attempt) + 1
-                    await asyncio.sleep(wait_time)
+                    # Back off every Gemini caller, not just this one; the retry queues behind the pause
+                    llm_dispatcher.penalize("gemini", (2 ** attempt) + 1)
                     continue
                 
                 latency_ms = (time.time() - start_time) * 1000
                 if is_rate_limit:
+                    # Quota, not health: the dispatcher's backoff handles it
+                    llm_router.release("gemini")
                     self._log_audit(
                         prompt=final_prompt,
+                        extra=audit_extra,
                         response="ERROR_RATE_LIMIT_EXCEEDED",
                         model=self.model_name,
                         tokens_used=None,
@@ -234,8 +413,10 @@ class GeminiService:
                     )
                     return "ERROR_RATE_LIMIT_EXCEEDED"
                 
+                llm_router.record_failure("gemini", error_msg)
                 self._log_audit(
                     prompt=final_prompt,
+                    extra=audit_extra,
                     response=f"Error generating content: {error_msg}",
                     model=self.model_name,
                     tokens_used=None,
@@ -245,5 +426,216 @@ class GeminiService:
                 )
                 return f"Error generating content: {error_msg}"
 
+    @staticmethod
+    async def _buffered(chunks: AsyncIterator[str], timing: Optional[Dict[str, float]] = None) -> AsyncIterator[str]:
+        """
+        Drain `chunks` in a background task and yield them from a queue, so the
+        producer (and the dispatcher slot it holds) runs at the model's pace.
+        Producer errors are re-raised here; closing this generator cancels it.
+        `timing["finished"]` is set when the producer is done, whatever the client's pace.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        end = object()
+
+        async def pump():
+            try:
+                async for chunk in chunks:
+                    queue.put_nowait(chunk)
+                if timing is not None:
+                    timing["finished"] = time.time()
+                queue.put_nowait(end)
+            except Exception as e:
+                queue.put_nowait(e)
+
+        task = asyncio.create_task(pump())
+        try:
+            while True:
+                item = await queue.get()
+                if item is end:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            task.cancel()
+
+    async def _ollama_stream(self, final_prompt: str, temperature: Optional[float], priority: Optional[int]) -> AsyncIterator[str]:
+        client = http_clients.get("ollama")
+        async with llm_dispatcher.slot("ollama", priority):
+            async with client.stream(
+                "POST",
+                f"{settings.OLLAMA_BASE_URL}/api/generate",
+                json=self._ollama_payload(final_prompt, False, temperature, stream=True),
+                timeout=60.0
+            ) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get("response"):
+                        yield chunk["response"]
+                    if chunk.get("done"):
+                        break
+
+    async def _gemini_stream(self, final_prompt: str, config: dict, priority: Optional[int], estimated_tokens: int) -> AsyncIterator[str]:
+        async with llm_dispatcher.slot("gemini", priority, estimated_tokens):
+            stream = await asyncio.wait_for(
+                self.client.aio.models.generate_content_stream(
+                    model=self.model_name,
+                    contents=final_prompt,
+                    config=config
+                ),
+                timeout=self.timeout_seconds
+            )
+            iterator = stream.__aiter__()
+            while True:
+                try:
+                    # Idle timeout: the deadline applies between chunks
+                    chunk = await asyncio.wait_for(iterator.__anext__(), timeout=self.timeout_seconds)
+                except StopAsyncIteration:
+                    break
+                if chunk.text:
+                    yield chunk.text
+
+    async def generate_stream(
+        self,
+        prompt: str,
+        max_retries: int = 3,
+        include_context: bool = False,
+        user_strata: int = 1,
+        use_local_model: bool = True,
+        temperature: Optional[float] = None,
+        cache_ttl: Optional[int] = None,
+        cache_tag: Optional[str] = None,
+        priority: Optional[int] = None,
+        token_breakdown: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[str]:
+        """
+        Like generate_content, but yields the text as the model produces it.
+
+        The full text is assembled for the audit log (with time to first
+        token) and for the LLM cache. A cache hit is yielded as one chunk.
+        The Gemini fallback only happens if Ollama fails before its first
+        chunk. Errors before any output are yielded as an error message,
+        like generate_content returns them; a failure after output has started
+        raises StreamInterrupted (the SSE layer turns it into an error event).
+
+        The model is read by a background task into a queue, so the dispatcher
+        slot is held only while the model generates, not while a slow client
+        consumes the answer.
+        """
+        final_prompt = prompt
+        if include_context:
+            final_prompt += self._build_context(user_strata)
+        audit_extra = self._token_audit(token_breakdown, prompt, final_prompt, include_context)
+
+        cache_key, cached = self._cache_lookup(final_prompt, cache_ttl, cache_tag, use_local_model, False, temperature)
+        if cached is not None:
+            yield cached
+            return
+
+        start_time = time.time()
+        parts: List[str] = []
+        state = {"first_token_ms": None}
+
+        def emit(text: str) -> str:
+            if state["first_token_ms"] is None:
+                state["first_token_ms"] = (time.time() - start_time) * 1000
+            parts.append(text)
+            return text
+
+        def finish(model: str, status: str = "success", error_message: Optional[str] = None):
+            result = "".join(parts)
+            latency_ms = (time.time() - start_time) * 1000
+            self._log_audit(
+                prompt=final_prompt,
+                response=result if status == "success" else f"{result}\n[STREAM ERROR] {error_message}",
+                model=model,
+                tokens_used=None,
+                latency_ms=latency_ms,
+                status=status,
+                error_message=error_message,
+                extra={"streamed": True, "first_token_ms": state["first_token_ms"], **(audit_extra or {})}
+            )
+            if cache_key and status == "success":
+                llm_cache_service.put(cache_key, result, cache_ttl, model, cache_tag, latency_ms)
+
+        route = llm_router.route(use_local_model, self.client is not None)
+
+        if "ollama" in route and llm_router.allow("ollama_generate"):
+            try:
+                timing = {"started": time.time()}
+                async for text in self._buffered(self._ollama_stream(final_prompt, temperature, priority), timing):
+                    yield emit(text)
+                # Total request latency, like generate_content records (not time to first token)
+                llm_router.record_success("ollama_generate", (timing["finished"] - timing["started"]) * 1000)
+                finish("ollama-local")
+                return
+            except LLMOverloaded as e:
+                llm_router.release("ollama_generate")
+                print(f"{e}")
+                yield "ERROR_RATE_LIMIT_EXCEEDED"
+                return
+            except (asyncio.CancelledError, GeneratorExit):
+                llm_router.release("ollama_generate")
+                finish("ollama-local", "cancelled", "Client disconnected")
+                raise
+            except Exception as e:
+                llm_router.record_failure("ollama_generate", e)
+                if parts:
+                    # Already streamed part of the answer; a fallback would restart it
+                    finish("ollama-local", "error", str(e))
+                    raise StreamInterrupted(f"Local model failed mid-answer: {e}") from e
+                print(f"Local Ollama model failed: {e}. Falling back to Gemini.")
+
+        if not self.client:
+            yield "AI Service Unavailable: Missing API Key"
+            return
+        if "gemini" not in route or not llm_router.allow("gemini"):
+            yield llm_router.unavailable_message(["ollama_generate", "gemini"] if use_local_model else ["gemini"])
+            return
+
+        config = {}
+        if temperature is not None:
+            config["temperature"] = temperature
+        estimated_tokens = llm_dispatcher.estimate_tokens(final_prompt)
+        gemini_start = time.time()
+
+        for attempt in range(max_retries + 1):
+            try:
+                timing = {"started": gemini_start}
+                async for text in self._buffered(self._gemini_stream(final_prompt, config, priority, estimated_tokens), timing):
+                    yield emit(text)
+                llm_router.record_success("gemini", (timing["finished"] - timing["started"]) * 1000)
+                finish(self.model_name)
+                return
+            except (asyncio.CancelledError, GeneratorExit):
+                llm_router.release("gemini")
+                finish(self.model_name, "cancelled", "Client disconnected")
+                raise
+            except LLMOverloaded as e:
+                llm_router.release("gemini")
+                finish(self.model_name, "shed", str(e))
+                yield "ERROR_RATE_LIMIT_EXCEEDED"
+                return
+            except Exception as e:
+                error_msg = str(e)
+                if isinstance(e, asyncio.TimeoutError):
+                    error_msg = f"Gemini request timed out after {self.timeout_seconds:g}s"
+                is_rate_limit = "429" in error_msg or "RESOURCE_EXHAUSTED" in error_msg
+                if is_rate_limit and attempt < max_retries and not parts:
+                    llm_dispatcher.penalize("gemini", (2 ** attempt) + 1)
+                    continue
+                if is_rate_limit:
+                    llm_router.release("gemini")
+                else:
+                    llm_router.record_failure("gemini", error_msg)
+                finish(self.model_name, "error", error_msg)
+                if parts:
+                    raise StreamInterrupted(f"Gemini failed mid-answer: {error_msg}") from e
+                yield "ERROR_RATE_LIMIT_EXCEEDED" if is_rate_limit else f"Error generating content: {error_msg}"
+                return
+
 # Singleton instance
 ai_service = GeminiService()
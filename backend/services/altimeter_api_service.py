@@ -1,18 +1,48 @@
 # backend/services/altimeter_api_service.py
+import json
+import time
+import asyncio
 import aiohttp
 import logging
-from typing import Dict, Any, Optional
+import threading
+from typing import Dict, Any, List, Optional
 from core.config import settings
 
 logger = logging.getLogger("altimeter_api")
 
+# get_task result when If-None-Match matched (HTTP 304)
+NOT_MODIFIED = object()
+
+class PreconditionFailed(Exception):
+    """The remote task changed since the ETag we sent with If-Match (HTTP 412)."""
+    pass
+
+class BulkEndpointUnavailable(Exception):
+    """The API has no POST /tasks/bulk endpoint (HTTP 404/405/501)."""
+    pass
+
 class AltimeterAPIService:
     """
     Real HTTP client for Altimeter construction management API.
+
+    All calls share one long-lived aiohttp session (pooled keep-alive
+    connections) and go through a concurrency semaphore and a requests/second
+    limiter, so a sync backlog can be pushed in parallel within rate limits.
+    Sessions are bound to the event loop that created them, so one is kept
+    per loop; `close()` closes all of them.
     """
     def __init__(self):
         self.base_url = getattr(settings, "ALTIMETER_API_URL", "https://api.altimeter.com/v1")
         self.api_key = getattr(settings, "ALTIMETER_API_KEY", "")
+        self.concurrency = max(1, int(getattr(settings, "ALTIMETER_API_CONCURRENCY", 8)))
+        self.rate_limit = float(getattr(settings, "ALTIMETER_API_RATE_LIMIT", 20.0))
+        self.bulk_size = max(1, int(getattr(settings, "ALTIMETER_API_BULK_SIZE", 50)))
+
+        # Per event loop: (session, concurrency semaphore)
+        self._sessions: Dict[asyncio.AbstractEventLoop, tuple] = {}
+        self._lock = threading.Lock()
+        self._next_slot = 0.0 # Shared by all loops: the rate limit is per API key
+        self._bulk_supported: Optional[bool] = None # Unknown until the first bulk call
 
         if not self.api_key:
             logger.warning("ALTIMETER_API_KEY not configured. API calls will fail.")
@@ -23,82 +53,232 @@ class AltimeterAPIService:
             "Content-Type": "application/json"
         }
 
+    def _get_session(self):
+        """Shared (session, semaphore) for the running event loop, created on first use."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._forget_closed_loops()
+            entry = self._sessions.get(loop)
+            if entry is None or entry[0].closed:
+                connector = aiohttp.TCPConnector(limit=self.concurrency, keepalive_timeout=30)
+                session = aiohttp.ClientSession(
+                    connector=connector,
+                    headers=self._headers(),
+                    timeout=aiohttp.ClientTimeout(total=10)
+                )
+                entry = (session, asyncio.Semaphore(self.concurrency))
+                self._sessions[loop] = entry
+            return entry
+
+    def _forget_closed_loops(self):
+        """Drop sessions whose loop ended without closing them (they can't be awaited anymore)."""
+        for loop in [l for l in self._sessions if l.is_closed()]:
+            session, _ = self._sessions.pop(loop)
+            if not session.closed:
+                logger.warning("Altimeter API session abandoned: its event loop closed before close() was called.")
+
+    async def _throttle(self):
+        """Space request starts 1/rate_limit seconds apart."""
+        if self.rate_limit <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + 1.0 / self.rate_limit
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    async def _request(self, method: str, path: str, **kwargs):
+        """Issue a request on the shared session. Returns (status, parsed JSON or text)."""
+        status, body, _ = await self._request_with_etag(method, path, **kwargs)
+        return status, body
+
+    async def _request_with_etag(self, method: str, path: str, **kwargs):
+        """Like _request, plus the response's ETag header (None if absent)."""
+        session, semaphore = self._get_session()
+        async with semaphore:
+            await self._throttle()
+            async with session.request(method, f"{self.base_url}{path}", **kwargs) as resp:
+                text = await resp.text()
+                etag = resp.headers.get("ETag")
+        try:
+            return resp.status, json.loads(text) if text else None, etag
+        except ValueError:
+            return resp.status, text, etag
+
+    @staticmethod
+    def _with_etag(result, etag: Optional[str]):
+        # Callers store the version they synced; the header wins over a body field
+        if isinstance(result, dict) and etag:
+            result["etag"] = etag
+        return result
+
+    async def close(self):
+        """Close every session; those of other, still running loops are closed on their own loop."""
+        with self._lock:
+            sessions = self._sessions
+            self._sessions = {}
+        loop = asyncio.get_running_loop()
+        for session_loop, (session, _) in sessions.items():
+            if session.closed:
+                continue
+            if session_loop is loop:
+                await session.close()
+            elif not session_loop.is_closed():
+                try:
+                    asyncio.run_coroutine_threadsafe(session.close(), session_loop)
+                except RuntimeError: # Loop closed meanwhile
+                    pass
+
     async def create_task(self, task_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new task in Altimeter."""
-        url = f"{self.base_url}/tasks"
-
-        async with aiohttp.ClientSession() as session:
-            try:
-                async with session.post(url, json=task_data, headers=self._headers(), timeout=10) as resp:
-                    if resp.status == 201:
-                        result = await resp.json()
-                        logger.info(f"Created Altimeter task: {result.get('id')}")
-                        return result
-                    else:
-                        error_text = await resp.text()
-                        logger.error(f"Altimeter API error {resp.status}: {error_text}")
-                        raise Exception(f"Altimeter API returned {resp.status}: {error_text}")
-            except aiohttp.ClientError as e:
-                logger.error(f"HTTP error creating task: {e}")
-                raise
+        try:
+            status, result, etag = await self._request_with_etag("POST", "/tasks", json=task_data)
+            if status == 201:
+                logger.info(f"Created Altimeter task: {result.get('id')}")
+                return self._with_etag(result, etag)
+            else:
+                logger.error(f"Altimeter API error {status}: {result}")
+                raise Exception(f"Altimeter API returned {status}: {result}")
+        except aiohttp.ClientError as e:
+            logger.error(f"HTTP error creating task: {e}")
+            raise
 
     async def update_task(self, task_id: str, task_data: Dict[str, Any]) -> Dict[str, Any]:
         """Update an existing task in Altimeter."""
-        url = f"{self.base_url}/tasks/{task_id}"
+        try:
+            status, result, etag = await self._request_with_etag("PUT", f"/tasks/{task_id}", json=task_data)
+            if status == 200:
+                logger.info(f"Updated Altimeter task: {task_id}")
+                return self._with_etag(result, etag)
+            else:
+                logger.error(f"Altimeter API error {status}: {result}")
+                raise Exception(f"Altimeter API returned {status}: {result}")
+        except aiohttp.ClientError as e:
+            logger.error(f"HTTP error updating task: {e}")
+            raise
 
-        async with aiohttp.ClientSession() as session:
-            try:
-                async with session.put(url, json=task_data, headers=self._headers(), timeout=10) as resp:
-                    if resp.status == 200:
-                        result = await resp.json()
-                        logger.info(f"Updated Altimeter task: {task_id}")
-                        return result
-                    else:
-                        error_text = await resp.text()
-                        logger.error(f"Altimeter API error {resp.status}: {error_text}")
-                        raise Exception(f"Altimeter API returned {resp.status}: {error_text}")
-            except aiohttp.ClientError as e:
-                logger.error(f"HTTP error updating task: {e}")
-                raise
-
-    async def get_task(self, task_id: str) -> Optional[Dict[str, Any]]:
-        """Fetch a task from Altimeter by ID."""
-        url = f"{self.base_url}/tasks/{task_id}"
-
-        async with aiohttp.ClientSession() as session:
-            try:
-                async with session.get(url, headers=self._headers(), timeout=10) as resp:
-                    if resp.status == 200:
-                        result = await resp.json()
-                        return result
-                    elif resp.status == 404:
-                        logger.warning(f"Task {task_id} not found in Altimeter")
-                        return None
-                    else:
-                        error_text = await resp.text()
-                        logger.error(f"Altimeter API error {resp.status}: {error_text}")
-                        raise Exception(f"Altimeter API returned {resp.status}")
-            except aiohttp.ClientError as e:
-                logger.error(f"HTTP error fetching task: {e}")
-                raise
+    async def patch_task(self, task_id: str, fields: Dict[str, Any], etag: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Send only changed fields. With `etag`, the update is conditional (If-Match)
+        and raises PreconditionFailed if the remote task changed meanwhile.
+        """
+        headers = {"If-Match": etag} if etag else None
+        try:
+            status, result, new_etag = await self._request_with_etag(
+                "PATCH", f"/tasks/{task_id}", json=fields, headers=headers
+            )
+            if status == 200:
+                logger.info(f"Patched Altimeter task {task_id}: {', '.join(fields)}")
+                return self._with_etag(result, new_etag)
+            elif status == 412:
+                raise PreconditionFailed(f"Altimeter task {task_id} changed remotely")
+            else:
+                logger.error(f"Altimeter API error {status}: {result}")
+                raise Exception(f"Altimeter API returned {status}: {result}")
+        except aiohttp.ClientError as e:
+            logger.error(f"HTTP error patching task: {e}")
+            raise
+
+    async def get_task(self, task_id: str, etag: Optional[str] = None):
+        """
+        Fetch a task from Altimeter by ID. With `etag`, the request is conditional
+        (If-None-Match) and returns NOT_MODIFIED when the task is unchanged.
+        """
+        headers = {"If-None-Match": etag} if etag else None
+        try:
+            status, result, new_etag = await self._request_with_etag("GET", f"/tasks/{task_id}", headers=headers)
+            if status == 200:
+                return self._with_etag(result, new_etag)
+            elif status == 304:
+                return NOT_MODIFIED
+            elif status == 404:
+                logger.warning(f"Task {task_id} not found in Altimeter")
+                return None
+            else:
+                logger.error(f"Altimeter API error {status}: {result}")
+                raise Exception(f"Altimeter API returned {status}")
+        except aiohttp.ClientError as e:
+            logger.error(f"HTTP error fetching task: {e}")
+            raise
 
     async def delete_task(self, task_id: str) -> bool:
         """Delete a task in Altimeter."""
-        url = f"{self.base_url}/tasks/{task_id}"
+        try:
+            status, result = await self._request("DELETE", f"/tasks/{task_id}")
+            if status in [200, 204]:
+                logger.info(f"Deleted Altimeter task: {task_id}")
+                return True
+            else:
+                logger.error(f"Altimeter API error {status}: {result}")
+                return False
+        except aiohttp.ClientError as e:
+            logger.error(f"HTTP error deleting task: {e}")
+            return False
+
+    async def push_tasks(self, pushes: List[Dict[str, Any]]) -> List[Any]:
+        """
+        Create/update many tasks. Each push is {"task_id": remote id or None, "data": {...}},
+        optionally with "fields" (a delta to PATCH instead of a full update) and "etag".
+        Returns one result per push, in order: the remote task dict or the Exception raised.
 
-        async with aiohttp.ClientSession() as session:
+        Uses POST /tasks/bulk in chunks of ALTIMETER_API_BULK_SIZE when the API
+        offers it, otherwise individual calls run concurrently.
+        """
+        if self._bulk_supported is False or len(pushes) < 2:
+            return await self._push_individually(pushes)
+
+        results: List[Any] = []
+        for start in range(0, len(pushes), self.bulk_size):
+            chunk = pushes[start:start + self.bulk_size]
             try:
-                async with session.delete(url, headers=self._headers(), timeout=10) as resp:
-                    if resp.status in [200, 204]:
-                        logger.info(f"Deleted Altimeter task: {task_id}")
-                        return True
-                    else:
-                        error_text = await resp.text()
-                        logger.error(f"Altimeter API error {resp.status}: {error_text}")
-                        return False
-            except aiohttp.ClientError as e:
-                logger.error(f"HTTP error deleting task: {e}")
-                return False
+                results.extend(await self._push_bulk(chunk))
+            except BulkEndpointUnavailable:
+                return results + await self._push_individually(pushes[start:])
+            except Exception as e:
+                logger.error(f"Altimeter bulk push failed: {e}")
+                results.extend([e] * len(chunk))
+        return results
+
+    async def _push_bulk(self, chunk: List[Dict[str, Any]]) -> List[Any]:
+        operations = []
+        for p in chunk:
+            if not p.get("task_id"):
+                operations.append({"op": "create", "data": p["data"]})
+            elif p.get("fields"):
+                operations.append({"op": "patch", "id": p["task_id"], "data": p["fields"], "if_match": p.get("etag")})
+            else:
+                operations.append({"op": "update", "id": p["task_id"], "data": p["data"]})
+        status, result = await self._request("POST", "/tasks/bulk", json={"operations": operations})
+        if status in (404, 405, 501):
+            logger.info("Altimeter API has no bulk endpoint; pushing tasks individually.")
+            self._bulk_supported = False
+            raise BulkEndpointUnavailable(f"POST /tasks/bulk returned {status}")
+        if status not in (200, 207) or not isinstance(result, dict):
+            raise Exception(f"Altimeter API returned {status}: {result}")
+
+        self._bulk_supported = True
+        outcomes = []
+        for entry in result.get("results", []):
+            if entry.get("status") == 412:
+                outcomes.append(PreconditionFailed(f"Altimeter task {entry.get('id')} changed remotely"))
+            elif entry.get("error"):
+                outcomes.append(Exception(f"Altimeter API error: {entry['error']}"))
+            else:
+                outcomes.append(self._with_etag(entry.get("task", entry), entry.get("etag")))
+        if len(outcomes) != len(chunk):
+            raise Exception(f"Altimeter bulk response has {len(outcomes)} results for {len(chunk)} operations")
+        return outcomes
+
+    async def _push_individually(self, pushes: List[Dict[str, Any]]) -> List[Any]:
+        def call(p):
+            if not p.get("task_id"):
+                return self.create_task(p["data"])
+            if p.get("fields"):
+                return self.patch_task(p["task_id"], p["fields"], p.get("etag"))
+            return self.update_task(p["task_id"], p["data"])
+
+        return await asyncio.gather(*(call(p) for p in pushes), return_exceptions=True)
 
 # Singleton instance
 altimeter_api_service = AltimeterAPIService()
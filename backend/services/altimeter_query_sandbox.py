@@ -0,0 +1,204 @@
+import re
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Any, Sequence
+
+# Vetted, parameterized queries for internal jobs (never build SQL by interpolation)
+QUERY_TEMPLATES: Dict[str, str] = {
+    "daily_logs_for_date": """
+        SELECT p.altimeter_project_id, p.name, dl.log_date, dl.description, dl.created_by
+        FROM daily_logs dl
+        JOIN projects p ON dl.project_id = p.id
+        WHERE date(dl.log_date) = ?
+    """,
+}
+
+FORBIDDEN_KEYWORDS = ["INSERT", "UPDATE", "DELETE", "DROP", "ALTER", "TRUNCATE", "GRANT", "REVOKE"]
+
+_LITERAL_OR_SPACE = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|\s+")
+_TABLE_REF = re.compile(r"\b(?:FROM|JOIN)\s+([\w\"\[\]`.]+)(?:\s+(?:AS\s+)?(\w+))?", re.IGNORECASE)
+_SCAN_STEP = re.compile(r"^SCAN (?:TABLE )?([\w\"]+)")
+_NOT_ALIASES = {"where", "on", "join", "left", "right", "inner", "outer", "cross", "natural",
+                "group", "order", "limit", "union", "using", "having", "window", "except", "intersect"}
+
+class QueryTimeout(Exception):
+    pass
+
+class AltimeterQuerySandbox:
+    """
+    Guarded execution of ad-hoc (LLM-written) SQL against the Altimeter database.
+
+    Each query is checked with EXPLAIN QUERY PLAN before it runs: the estimated
+    nested-loop cost of its full table scans must stay under `max_cost` rows.
+    It then runs under a progress-handler deadline and is fetched in chunks
+    up to `max_rows`. Results are cached by normalized SQL and parameters,
+    and the cache is scoped to the database's data_version.
+    """
+    FETCH_CHUNK = 200
+    PROGRESS_OPS = 1000 # VM instructions between deadline checks
+
+    def __init__(self, service, timeout_seconds: float = 5.0, max_rows: int = 500,
+                 max_cost: int = 50_000_000, cache_size: int = 128):
+        self.service = service
+        self.timeout_seconds = float(timeout_seconds)
+        self.max_rows = max(1, int(max_rows))
+        self.max_cost = int(max_cost)
+        self.cache_size = int(cache_size)
+        self._cache: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+        self._table_sizes: Dict[str, int] = {}
+        self._sizes_version = None
+        self._lock = threading.Lock()
+        self._stats = {"executed": 0, "cache_hits": 0, "rejected": 0, "timeouts": 0, "truncated": 0}
+
+    @staticmethod
+    def normalize(sql: str) -> str:
+        """Collapse whitespace outside string literals and drop a trailing semicolon."""
+        normalized = _LITERAL_OR_SPACE.sub(lambda m: " " if m.group(0).isspace() else m.group(0), sql)
+        return normalized.strip().rstrip(";").strip()
+
+    @staticmethod
+    def validate(sql: str):
+        """Reject obvious modification statements (the connection itself is read-only too)."""
+        if any(word in sql.upper() for word in FORBIDDEN_KEYWORDS):
+            raise ValueError("Security Alert: Modification queries are strictly forbidden.")
+
+    # --- Cost pre-check ---
+
+    def _table_size(self, conn, table: str, version) -> int:
+        key = table.lower()
+        with self._lock:
+            if version != self._sizes_version:
+                self._table_sizes, self._sizes_version = {}, version
+            if version is not None and key in self._table_sizes:
+                return self._table_sizes[key]
+        try:
+            # MAX(rowid) is a single b-tree seek, unlike COUNT(*)
+            size = conn.execute(f'SELECT MAX(rowid) FROM "{table}"').fetchone()[0] or 0
+        except sqlite3.Error:
+            size = 0 # Views, CTEs and subqueries: not estimable, don't block on them
+        if version is not None:
+            with self._lock:
+                self._table_sizes[key] = size
+        return size
+
+    def estimate_cost(self, conn, sql: str, params: Sequence = (), version=None) -> int:
+        """Rows visited by the plan's full scans if they nest (product of scanned table sizes)."""
+        aliases = {}
+        for table, alias in _TABLE_REF.findall(sql):
+            table = table.strip('"[]`').split(".")[-1]
+            aliases[table.lower()] = table
+            if alias and alias.lower() not in _NOT_ALIASES:
+                aliases[alias.lower()] = table
+
+        cost = 1
+        for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall():
+            match = _SCAN_STEP.match(row[3])
+            if not match:
+                continue # SEARCH steps use an index
+            table = aliases.get(match.group(1).strip('"').lower())
+            if table:
+                cost *= max(1, self._table_size(conn, table, version))
+        return cost
+
+    # --- Execution ---
+
+    def _cache_get(self, key):
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            self._cache.move_to_end(key)
+            self._stats["cache_hits"] += 1
+        return {**entry, "rows": [dict(r) for r in entry["rows"]], "cached": True}
+
+    def _cache_put(self, key, result: Dict[str, Any]):
+        with self._lock:
+            self._cache[key] = result
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def run(self, sql: str, params: Sequence = (), max_rows: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Execute a read-only query. Returns {"columns", "rows", "truncated", "cached", "elapsed_ms"}.
+        Raises ValueError if the query is rejected, QueryTimeout if it runs too long.
+        """
+        self.validate(sql)
+        sql = self.normalize(sql)
+        params = tuple(params or ())
+        max_rows = min(int(max_rows), self.max_rows) if max_rows else self.max_rows
+
+        version = self.service.reference_cache.data_version()
+        key = (self.service.db_path, version, sql, params, max_rows)
+        if version is not None:
+            cached = self._cache_get(key)
+            if cached is not None:
+                return cached
+
+        started = time.monotonic()
+        deadline = started + self.timeout_seconds
+        with self.service._connection() as conn:
+            conn.set_progress_handler(lambda: 1 if time.monotonic() > deadline else 0, self.PROGRESS_OPS)
+            try:
+                cost = self.estimate_cost(conn, sql, params, version)
+                if cost > self.max_cost:
+                    with self._lock:
+                        self._stats["rejected"] += 1
+                    raise ValueError(
+                        f"Query rejected: estimated cost of {cost:,} rows exceeds the limit of {self.max_cost:,}. "
+                        "Add a WHERE clause on an indexed column or narrow the JOIN."
+                    )
+
+                cursor = conn.execute(sql, params)
+                columns = [d[0] for d in cursor.description] if cursor.description else []
+                rows: List[Dict[str, Any]] = []
+                truncated = False
+                while columns:
+                    chunk = cursor.fetchmany(self.FETCH_CHUNK)
+                    if not chunk:
+                        break
+                    rows.extend(dict(zip(columns, r)) for r in chunk)
+                    if len(rows) > max_rows:
+                        truncated = True
+                        del rows[max_rows:]
+                        break
+                cursor.close()
+            except sqlite3.OperationalError as e:
+                if "interrupted" in str(e):
+                    with self._lock:
+                        self._stats["timeouts"] += 1
+                    raise QueryTimeout(f"Query exceeded the {self.timeout_seconds:g}s time limit") from e
+                raise
+            finally:
+                conn.set_progress_handler(None, 0) # Pooled connection: don't leak the deadline
+
+        with self._lock:
+            self._stats["executed"] += 1
+            if truncated:
+                self._stats["truncated"] += 1
+        result = {
+            "columns": columns,
+            "rows": rows,
+            "truncated": truncated,
+            "cached": False,
+            "elapsed_ms": round((time.monotonic() - started) * 1000, 1)
+        }
+        if version is not None:
+            self._cache_put(key, {**result, "rows": [dict(r) for r in rows]})
+        return result
+
+    def run_template(self, name: str, params: Sequence = (), max_rows: Optional[int] = None) -> Dict[str, Any]:
+        if name not in QUERY_TEMPLATES:
+            raise KeyError(f"Unknown query template: {name}")
+        return self.run(QUERY_TEMPLATES[name], params, max_rows)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self._table_sizes.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"cached_results": len(self._cache), **self._stats}
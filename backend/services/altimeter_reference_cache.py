@@ -0,0 +1,251 @@
+import os
+import time
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Any, Tuple
+
+# Returned when an index could not be loaded (e.g. table missing); callers fall back to SQL.
+UNCACHED = object()
+
+class AltimeterReferenceCache:
+    """
+    In-memory indexes of Altimeter reference data that rarely changes:
+    projects (by altimeter_project_id and id), customer names, contact roles by
+    email and open project phases.
+
+    Freshness is checked at most every `check_interval` seconds with PRAGMA
+    data_version on a dedicated connection. When the database changed, projects
+    are refreshed incrementally from their updated_at watermark and the small
+    tables are reloaded, so lookups during bulk ingestion are dict reads.
+
+    Refreshes build new indexes and swap them in with one assignment, so
+    lock-free readers never see a half-built index. Incremental refreshes
+    only see inserts and updates, so every `reconcile_interval` seconds the
+    project ids are re-read and deleted projects are evicted.
+    """
+    def __init__(self, service, check_interval: float = 5.0, reconcile_interval: float = 60.0):
+        self.service = service
+        self.check_interval = float(check_interval)
+        self.reconcile_interval = float(reconcile_interval)
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self._db_path = None
+        self._watch_conn = None
+        self._data_version = None
+        self._checked_at = 0.0
+        self._loaded = False
+        # (by altimeter_project_id, by id), replaced as a pair on every refresh
+        self._projects: Optional[Tuple[Dict[str, Dict[str, Any]], Dict[str, Dict[str, Any]]]] = None
+        self._projects_watermark = None
+        self._reconciled_at = 0.0
+        self._customer_names: Optional[Dict[str, str]] = None
+        self._contacts: Optional[Dict[str, Dict[str, str]]] = None
+        self._open_phases: Optional[List[Dict[str, Any]]] = None
+
+    def invalidate(self):
+        with self._lock:
+            if self._watch_conn is not None:
+                try:
+                    self._watch_conn.close()
+                except sqlite3.Error:
+                    pass
+            self._reset()
+
+    def _ensure_fresh(self):
+        if self._loaded and time.monotonic() - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            if self._loaded and time.monotonic() - self._checked_at < self.check_interval:
+                return
+
+            self._checked_at = time.monotonic()
+            version = self._read_data_version()
+            if version is None:
+                return
+
+            if self._loaded and version == self._data_version:
+                return
+            self._load(incremental=self._loaded)
+            self._data_version = version
+            self._loaded = True
+
+    def _read_data_version(self):
+        """PRAGMA data_version on the watch connection (None if the database is unavailable)."""
+        with self._lock:
+            db_path = self.service.db_path
+            if db_path != self._db_path:
+                self.invalidate()
+                self._db_path = db_path
+            if not os.path.exists(db_path):
+                return None
+            try:
+                if self._watch_conn is None:
+                    self._watch_conn = self.service._get_pool().dedicated_connection()
+                return self._watch_conn.execute("PRAGMA data_version").fetchone()[0]
+            except Exception as e:
+                print(f"Altimeter cache version check failed: {e}")
+                return None
+
+    def data_version(self):
+        """Current database version, for callers that cache their own query results."""
+        return self._read_data_version()
+
+    def _load(self, incremental: bool):
+        with self.service._connection() as conn:
+            self._load_projects(conn, incremental)
+
+            try:
+                rows = conn.execute("SELECT customer_id, company_name, email FROM customers").fetchall()
+                self._customer_names = {str(r["customer_id"]): r["company_name"] for r in rows}
+                contacts = {
+                    r["email"]: {"role": "Client", "company": r["company_name"]}
+                    for r in rows if r["email"]
+                }
+            except sqlite3.Error:
+                self._customer_names = None
+                contacts = None
+
+            try:
+                # Employees take precedence over customer contacts (same as _get_contact_info)
+                rows = conn.execute("SELECT email, role FROM employees").fetchall()
+                if contacts is not None:
+                    for r in rows:
+                        if r["email"]:
+                            contacts[r["email"]] = {"role": r["role"], "company": "Davis Electric"}
+            except sqlite3.Error:
+                contacts = None
+            self._contacts = contacts
+
+            try:
+                rows = conn.execute("""
+                    SELECT ph.*, p.altimeter_project_id, p.name as project_name
+                    FROM project_phases ph
+                    JOIN projects p ON ph.project_id = p.id
+                    WHERE ph.status != 'Completed'
+                    ORDER BY ph.completion_date ASC
+                """).fetchall()
+                self._open_phases = [dict(r) for r in rows]
+            except sqlite3.Error:
+                self._open_phases = None
+
+    def _load_projects(self, conn, incremental: bool):
+        current = self._projects
+        try:
+            if incremental and self._projects_watermark is not None and current is not None:
+                # >= so rows written later within the watermark's timestamp aren't missed (re-reading is harmless)
+                rows = conn.execute(
+                    "SELECT * FROM projects WHERE updated_at >= ? ORDER BY updated_at, id",
+                    (self._projects_watermark,)
+                ).fetchall()
+                by_number, by_id = dict(current[0]), dict(current[1])
+                if time.monotonic() - self._reconciled_at >= self.reconcile_interval:
+                    self._evict_deleted_projects(conn, by_number, by_id)
+            else:
+                rows = self._read_all_projects(conn)
+                by_number, by_id = {}, {}
+        except sqlite3.Error:
+            # No updated_at column: fall back to a full reload
+            try:
+                rows = self._read_all_projects(conn)
+                by_number, by_id = {}, {}
+            except sqlite3.Error:
+                self._projects = None
+                return
+
+        watermark = self._projects_watermark
+        for row in rows:
+            project = dict(row)
+            # Keys are strings so '12' finds INTEGER ids the way SQLite's affinity would
+            previous = by_id.get(str(project.get("id")))
+            if previous and previous.get("altimeter_project_id") != project.get("altimeter_project_id"):
+                by_number.pop(str(previous.get("altimeter_project_id")), None) # Renumbered
+            if project.get("altimeter_project_id") is not None:
+                by_number[str(project["altimeter_project_id"])] = project
+            if project.get("id") is not None:
+                by_id[str(project["id"])] = project
+            updated_at = project.get("updated_at")
+            if updated_at is not None and (watermark is None or str(updated_at) > str(watermark)):
+                watermark = updated_at
+
+        self._projects = (by_number, by_id) # Atomic swap for lock-free readers
+        self._projects_watermark = watermark
+
+    def _read_all_projects(self, conn):
+        rows = conn.execute("SELECT * FROM projects").fetchall()
+        self._reconciled_at = time.monotonic()
+        return rows
+
+    def _evict_deleted_projects(self, conn, by_number: Dict[str, Dict[str, Any]], by_id: Dict[str, Dict[str, Any]]):
+        """Drop projects that no longer exist in Altimeter (the watermark only sees inserts/updates)."""
+        live = {str(r[0]) for r in conn.execute("SELECT id FROM projects").fetchall()}
+        for project_id in [pid for pid in by_id if pid not in live]:
+            project = by_id.pop(project_id)
+            number = project.get("altimeter_project_id")
+            if number is not None and by_number.get(str(number)) is project:
+                del by_number[str(number)]
+        self._reconciled_at = time.monotonic()
+
+    # --- Lookups ---
+
+    def get_project(self, project_id: str):
+        self._ensure_fresh()
+        projects = self._projects
+        if projects is None:
+            return UNCACHED
+        by_number, by_id = projects
+        project = by_number.get(str(project_id)) or by_id.get(str(project_id))
+        return dict(project) if project else None
+
+    def get_projects(self, project_ids: List[str]):
+        """Resolve several project numbers/ids at once: {requested_id: project}."""
+        self._ensure_fresh()
+        projects = self._projects
+        if projects is None:
+            return UNCACHED
+        by_number, by_id = projects
+        found = {}
+        for project_id in project_ids:
+            project = by_number.get(str(project_id)) or by_id.get(str(project_id))
+            if project:
+                found[project_id] = dict(project)
+        return found
+
+    def get_customer_name(self, customer_id):
+        self._ensure_fresh()
+        names = self._customer_names
+        if names is None:
+            return UNCACHED
+        return names.get(str(customer_id)) or "Unknown"
+
+    def get_contact(self, email: str):
+        self._ensure_fresh()
+        contacts = self._contacts
+        if contacts is None:
+            return UNCACHED
+        contact = contacts.get(email)
+        return dict(contact) if contact else None
+
+    def get_active_phases(self):
+        """Open phases whose start/completion window contains today (UTC, like SQLite's date('now'))."""
+        self._ensure_fresh()
+        phases = self._open_phases
+        if phases is None:
+            return UNCACHED
+        today = datetime.now(timezone.utc).date().isoformat()
+        return [
+            dict(p) for p in phases
+            if p.get("start_date") is not None and p.get("completion_date") is not None
+            and str(p["start_date"]) <= today and str(p["completion_date"]) >= today
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "loaded": self._loaded,
+            "data_version": self._data_version,
+            "projects": len(self._projects[0]) if self._projects is not None else None,
+            "contacts": len(self._contacts) if self._contacts is not None else None,
+            "open_phases": len(self._open_phases) if self._open_phases is not None else None
+        }
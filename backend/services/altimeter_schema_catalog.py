@@ -0,0 +1,171 @@
+import re
+import math
+import time
+import threading
+from typing import Dict, List, Optional, Any, Tuple
+from services.prompt_builder import count_tokens
+
+# Tables hidden below a strata level (same rules get_db_schema always applied)
+SYSTEM_TABLES = ['users', 'secrets', 'audit_logs']
+FINANCIAL_MARKERS = ['financ', 'money', 'budget', 'salary']
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+def _words(text: str) -> set:
+    # Crude singularization so "projects" matches "project_id"
+    return {w[:-1] if len(w) > 3 and w.endswith("s") else w for w in _WORD.findall(text.lower())}
+
+def _cosine(a: List[float], b: List[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+class AltimeterSchemaCatalog:
+    """
+    Cached introspection of the Altimeter schema for the /chat SQL prompt.
+
+    Tables and columns are read once and reused until PRAGMA schema_version
+    changes. Rendered schemas are memoized per strata level. `get_digest`
+    keeps only the tables most relevant to a question, ranked by embedding
+    similarity (lexical overlap when embeddings are unavailable), within a
+    token budget. Table descriptions are embedded in one batch call per
+    schema version. get_digest makes blocking embedding calls, so async
+    callers run it in a worker thread.
+    """
+    EMBEDDING_RETRY_SECONDS = 300
+
+    def __init__(self, service):
+        self.service = service
+        self._lock = threading.Lock()
+        self._key: Optional[Tuple] = None
+        self._tables: Dict[str, List[Tuple[str, str]]] = {}
+        self._rendered: Dict[int, str] = {}
+        self._table_embeddings: Dict[str, List[float]] = {}
+        self._embeddings_failed_at = 0.0
+        self._embedding_lock = threading.Lock() # One batch embed at a time
+
+    @staticmethod
+    def allowed_tables(tables: List[str], strata_level: int) -> List[str]:
+        # Strata 1-2: Ops only (Tasks, Projects, Inventory)
+        # Strata 3-4: + Financials (if exists)
+        # Strata 5: All (including system tables)
+        allowed = list(tables)
+        if strata_level < 5:
+            allowed = [t for t in allowed if t not in SYSTEM_TABLES]
+        if strata_level < 3:
+            allowed = [t for t in allowed if not any(r in t for r in FINANCIAL_MARKERS)]
+        return allowed
+
+    @staticmethod
+    def render_table(table: str, columns: List[Tuple[str, str]]) -> str:
+        return f"- Table '{table}': {', '.join(f'{name} ({col_type})' for name, col_type in columns)}\n"
+
+    def _ensure_fresh(self):
+        with self.service._connection() as conn:
+            key = (self.service.db_path, conn.execute("PRAGMA schema_version").fetchone()[0])
+            if key == self._key:
+                return
+            tables = {}
+            for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type='table'").fetchall():
+                rows = conn.execute(f'PRAGMA table_info("{name}")').fetchall()
+                tables[name] = [(row[1], row[2]) for row in rows]
+
+        with self._lock:
+            self._key = key
+            self._tables = tables
+            self._rendered = {}
+            self._table_embeddings = {}
+
+    def get_schema(self, strata_level: int = 1) -> str:
+        """Full schema of the tables visible at `strata_level`."""
+        self._ensure_fresh()
+        with self._lock:
+            rendered = self._rendered.get(strata_level)
+            if rendered is None:
+                rendered = "Database Schema:\n" + "".join(
+                    self.render_table(t, self._tables[t])
+                    for t in self.allowed_tables(list(self._tables), strata_level)
+                )
+                self._rendered[strata_level] = rendered
+        return rendered
+
+    def _table_vectors(self) -> Optional[Dict[str, List[float]]]:
+        """Embeddings of every table's description, built with one batch call per schema version."""
+        from services.ai_service import ai_service
+
+        with self._lock:
+            if self._table_embeddings:
+                return self._table_embeddings
+        with self._embedding_lock:
+            with self._lock:
+                if self._table_embeddings: # Built by another thread meanwhile
+                    return self._table_embeddings
+                key, tables = self._key, dict(self._tables)
+            names = sorted(tables)
+            vectors = ai_service.get_embeddings([self.render_table(t, tables[t]) for t in names])
+            if not vectors or not all(vectors):
+                return None
+            embeddings = dict(zip(names, vectors))
+            with self._lock:
+                if self._key == key: # Schema didn't change while we were embedding
+                    self._table_embeddings = embeddings
+            return embeddings
+
+    def _embedding_scores(self, question: str, tables: List[str]) -> Optional[Dict[str, float]]:
+        if time.monotonic() - self._embeddings_failed_at < self.EMBEDDING_RETRY_SECONDS:
+            return None
+        from services.ai_service import ai_service
+
+        table_vectors = self._table_vectors()
+        question_vector = ai_service.get_embedding(question) if table_vectors else None
+        if not question_vector:
+            self._embeddings_failed_at = time.monotonic()
+            return None
+        return {t: _cosine(question_vector, table_vectors[t]) for t in tables if t in table_vectors}
+
+    def _lexical_scores(self, question: str, tables: List[str]) -> Dict[str, float]:
+        terms = _words(question)
+        scores = {}
+        for table in tables:
+            table_words = _words(table.replace("_", " "))
+            column_words = set()
+            for name, _ in self._tables[table]:
+                column_words |= _words(name.replace("_", " "))
+            # Table-name hits count more than column hits
+            scores[table] = 2 * len(terms & table_words) + len(terms & column_words)
+        return scores
+
+    def get_digest(self, question: str, strata_level: int = 1, token_budget: int = 1200) -> str:
+        """Schema of the tables most relevant to `question`, trimmed to `token_budget`."""
+        self._ensure_fresh()
+        tables = self.allowed_tables(list(self._tables), strata_level)
+        scores = self._embedding_scores(question, tables) or self._lexical_scores(question, tables)
+        ranked = sorted(tables, key=lambda t: (-scores.get(t, 0), t))
+
+        header = "Database Schema (most relevant tables):\n"
+        digest, used, omitted = header, count_tokens(header), 0
+        for table in ranked:
+            line = self.render_table(table, self._tables[table])
+            cost = count_tokens(line)
+            if used + cost > token_budget and digest != header:
+                omitted += 1
+                continue
+            digest += line
+            used += cost
+        if omitted:
+            digest += f"({omitted} less relevant tables omitted)\n"
+        return digest
+
+    def invalidate(self):
+        with self._lock:
+            self._key = None
+            self._tables = {}
+            self._rendered = {}
+            self._table_embeddings = {}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tables": len(self._tables),
+            "schema_version": self._key[1] if self._key else None,
+            "embedded_tables": len(self._table_embeddings)
+        }
@@ -1,16 +1,27 @@
 import re
-import sqlite3
 import os
-from urllib.request import pathname2url
+import copy
+import time
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
 from datetime import datetime
 from typing import Dict, List, Optional, Any
 from core.config import settings
+from database.sqlite_pool import ReadOnlySQLitePool
+from services.altimeter_reference_cache import AltimeterReferenceCache, UNCACHED
+from services.altimeter_query_sandbox import AltimeterQuerySandbox
+from services.altimeter_schema_catalog import AltimeterSchemaCatalog
 
 class AltimeterService:
     """
     Service for interacting with the Altimeter business logic database.
     Provides project context, milestones, and active phases.
     """
+    # Per-message_id memo of enrichment results (one pipeline run rarely spans more)
+    CONTEXT_MEMO_SIZE = 2048
+    CONTEXT_MEMO_TTL = 900
+
     def __init__(self, api_base_url: str = "http://127.0.0.1:4203"):
         self.api_base_url = api_base_url
         # Robust path resolution
@@ -20,27 +31,55 @@ class AltimeterService:
             alt_path = os.path.join(os.path.expanduser("~"), ".altimeter")
             
         self.db_path = os.path.join(alt_path, "database", "altimeter.db")
-
-    def _get_db_conn(self, readonly: bool = False):
-        """Get a direct connection to the Altimeter database."""
+        self._pool: Optional[ReadOnlySQLitePool] = None
+        self._pool_lock = threading.Lock()
+        self._context_memo: "OrderedDict[str, Any]" = OrderedDict()
+        self._memo_lock = threading.Lock()
+        self.reference_cache = AltimeterReferenceCache(
+            self,
+            check_interval=settings.ALTIMETER_CACHE_CHECK_SECONDS,
+            reconcile_interval=settings.ALTIMETER_CACHE_RECONCILE_SECONDS
+        )
+        self.query_sandbox = AltimeterQuerySandbox(
+            self,
+            timeout_seconds=settings.ALTIMETER_QUERY_TIMEOUT_SECONDS,
+            max_rows=settings.ALTIMETER_QUERY_MAX_ROWS,
+            max_cost=settings.ALTIMETER_QUERY_MAX_COST
+        )
+        self.schema_catalog = AltimeterSchemaCatalog(self)
+
+    def _get_pool(self) -> ReadOnlySQLitePool:
+        """Lazily create the read-only pool (recreated if db_path changes)."""
+        with self._pool_lock:
+            if self._pool is None or self._pool.db_path != self.db_path:
+                if self._pool is not None:
+                    self._pool.close_all()
+                self._pool = ReadOnlySQLitePool(
+                    self.db_path,
+                    size=settings.ALTIMETER_DB_POOL_SIZE,
+                    mmap_size=settings.ALTIMETER_DB_MMAP_SIZE
+                )
+            return self._pool
+
+    @contextmanager
+    def _connection(self):
+        """
+        Borrow a pooled read-only connection to the Altimeter database.
+        Atlas never writes to Altimeter's DB directly (writes go through the API).
+        """
         if not os.path.exists(self.db_path):
             raise FileNotFoundError(f"Altimeter database not found at {self.db_path}")
-
-        if readonly:
-            # Use URI mode to enforce read-only at the database engine level
-            # file:/absolute/path/to/database?mode=ro
-            try:
-                abs_path = os.path.abspath(self.db_path)
-                db_uri = f"file:{pathname2url(abs_path)}?mode=ro"
-                conn = sqlite3.connect(db_uri, uri=True, timeout=5)
-            except Exception as e:
-                # Fallback if URI fails (though it shouldn't on supported versions)
-                conn = sqlite3.connect(self.db_path, timeout=5)
-        else:
-            conn = sqlite3.connect(self.db_path, timeout=5)
-
-        conn.row_factory = sqlite3.Row
-        return conn
+        with self._get_pool().connection() as conn:
+            yield conn
+
+    def close(self):
+        self.reference_cache.invalidate()
+        self.query_sandbox.clear()
+        self.schema_catalog.invalidate()
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.close_all()
+                self._pool = None
 
     def check_health(self) -> Dict[str, Any]:
         """Check connection to Altimeter DB and correct schema."""
@@ -48,13 +87,18 @@ class AltimeterService:
             if not os.path.exists(self.db_path):
                  return {"status": "error", "details": f"Database file missing at {self.db_path}"}
                  
-            conn = self._get_db_conn()
-            # Basic connection test
-            conn.execute("PRAGMA quick_check").fetchone()
-            # Project check
-            count = conn.execute("SELECT count(*) FROM projects WHERE is_active = 1").fetchone()[0]
-            conn.close()
-            return {"status": "connected", "active_projects": count}
+            with self._connection() as conn:
+                # Basic connection test
+                conn.execute("PRAGMA quick_check").fetchone()
+                # Project check
+                count = conn.execute("SELECT count(*) FROM projects WHERE is_active = 1").fetchone()[0]
+            return {
+                "status": "connected",
+                "active_projects": count,
+                "pool": self._get_pool().stats(),
+                "reference_cache": self.reference_cache.stats(),
+                "query_sandbox": self.query_sandbox.stats()
+            }
         except Exception as e:
             return {"status": "error", "details": str(e)}
 
@@ -105,17 +149,18 @@ class AltimeterService:
         }
 
     def get_project_details(self, project_id: str) -> Optional[Dict[str, Any]]:
-        """Fetches project details directly from the Altimeter DB."""
+        """Fetches project details (reference cache first, then the Altimeter DB)."""
         try:
-            conn = self._get_db_conn()
-            cursor = conn.cursor()
-            # Try both UUID and Altimeter Project ID
-            cursor.execute("""
-                SELECT * FROM projects 
-                WHERE altimeter_project_id = ? OR id = ?
-            """, (project_id, project_id))
-            row = cursor.fetchone()
-            conn.close()
+            cached = self.reference_cache.get_project(project_id)
+            if cached is not UNCACHED:
+                return cached
+
+            with self._connection() as conn:
+                # Try both UUID and Altimeter Project ID
+                row = conn.execute("""
+                    SELECT * FROM projects 
+                    WHERE altimeter_project_id = ? OR id = ?
+                """, (project_id, project_id)).fetchone()
             
             if row:
                 return dict(row)
@@ -123,82 +168,233 @@ class AltimeterService:
         except Exception as e:
             return None
 
-    def get_context_for_email(self, sender: str, subject: str, body: str = "") -> Dict[str, Any]:
-        """Get project and contact context for an email."""
-        context = {
-            "project": None,
-            "company_role": "Unknown",
-            "file_context": "",
-            "is_proposal": False,
-            "is_daily_log": False
-        }
-
-        parsed = self.parse_email_for_project(subject, body)
-        context["is_proposal"] = parsed["is_proposal"]
-        context["is_daily_log"] = parsed["is_daily_log"]
-        context["suggested_milestones"] = parsed["suggested_milestones"]
+    def get_context_for_email(self, sender: str, subject: str, body: str = "",
+                              message_id: Optional[str] = None) -> Dict[str, Any]:
+        """Get project and contact context for an email (memoized per message_id when given)."""
+        return self.get_context_for_emails([{
+            "sender": sender,
+            "subject": subject,
+            "body": body,
+            "message_id": message_id
+        }])[0]
+
+    def get_context_for_emails(self, emails: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Batch version of get_context_for_email. Each email is a dict with sender,
+        subject, body and optional message_id; contexts are returned in input order.
+        Project numbers and sender addresses are resolved with one lookup each,
+        mission intel is computed once per distinct project, and results are
+        memoized per message_id so a pipeline never enriches the same email twice.
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(emails)
+        pending = []
+        for i, email in enumerate(emails):
+            message_id = email.get("message_id")
+            if message_id:
+                memoized = self._memo_get(message_id)
+                if memoized is not None:
+                    results[i] = memoized
+                    continue
+            parsed = self.parse_email_for_project(email.get("subject") or "", email.get("body") or "")
+            pending.append((i, email, parsed, self._extract_address(email.get("sender") or "")))
+
+        if not pending:
+            return results
+
+        projects = self._get_projects_bulk({p["project_ids"][0] for _, _, p, _ in pending if p["project_ids"]})
+        customer_names = self._get_customer_names_bulk({p.get("customer_id") for p in projects.values()})
+        contacts = self._get_contacts_bulk({addr for _, _, _, addr in pending if addr})
+
+        numbers = {p.get("altimeter_project_id") for p in projects.values() if p.get("altimeter_project_id")}
+        file_contexts = {n: self._get_recent_activity_context(n) for n in numbers}
+        mission_intel = self._get_mission_intel_bulk(numbers)
+
+        for i, email, parsed, email_addr in pending:
+            context = {
+                "project": None,
+                "company_role": "Unknown",
+                "file_context": "",
+                "is_proposal": parsed["is_proposal"],
+                "is_daily_log": parsed["is_daily_log"],
+                "suggested_milestones": parsed["suggested_milestones"],
+                "mission_intel": []
+            }
 
-        if parsed["project_ids"]:
-            project_id = parsed["project_ids"][0]
-            project = self.get_project_details(project_id)
+            project = projects.get(parsed["project_ids"][0]) if parsed["project_ids"] else None
             if project:
+                number = project.get("altimeter_project_id")
                 context["project"] = {
-                    "number": project.get("altimeter_project_id"),
+                    "number": number,
                     "name": project.get("name"),
                     "status": project.get("status"),
-                    "customer": self._get_customer_name(project.get("customer_id"))
+                    "customer": customer_names.get(project.get("customer_id"), "Unknown")
                 }
+                context["file_context"] = file_contexts.get(number, "")
+                # PROACTIVE BRIDGE: Mission Intel for the identified project
+                context["mission_intel"] = mission_intel.get(number, [])
 
-        # Identify sender role
-        try:
-            email_addr = sender
-            if '<' in sender:
-                email_addr = sender.split('<')[1].rstrip('>')
-            
-            contact_info = self._get_contact_info(email_addr)
+            # Identify sender role
+            contact_info = contacts.get(email_addr)
             if contact_info:
                 context["company_role"] = f"{contact_info.get('role', 'Contact')} at {contact_info.get('company', 'Unknown')}"
-        except Exception as e:
-            pass
 
-        # Get file context
-        if context["project"]:
-            context["file_context"] = self._get_recent_activity_context(context["project"]["number"])
-        
-        # PROACTIVE BRIDGE: Predict Mission Intel for the identified project context
-        if context["project"]:
-             active_phases = self.get_active_phases()
-             # Filter phases for this specific project
-             project_phases = [p for p in active_phases if p['project_id'] == context['project']['number']]
-             if project_phases:
-                 context["mission_intel"] = intelligence_bridge.predict_mission_intel(project_phases)
-             else:
-                 context["mission_intel"] = []
-        else:
-             context["mission_intel"] = []
-
-        return context
+            if email.get("message_id"):
+                self._memo_put(email["message_id"], context)
+            results[i] = context
+
+        return results
+
+    @staticmethod
+    def _extract_address(sender: str) -> str:
+        if '<' in sender:
+            return sender.split('<')[1].rstrip('>')
+        return sender
+
+    def _memo_get(self, message_id: str) -> Optional[Dict[str, Any]]:
+        with self._memo_lock:
+            entry = self._context_memo.get(message_id)
+            if entry is None:
+                return None
+            stored_at, context = entry
+            if time.monotonic() - stored_at > self.CONTEXT_MEMO_TTL:
+                del self._context_memo[message_id]
+                return None
+            self._context_memo.move_to_end(message_id)
+            return copy.deepcopy(context)
+
+    def _memo_put(self, message_id: str, context: Dict[str, Any]):
+        with self._memo_lock:
+            self._context_memo[message_id] = (time.monotonic(), copy.deepcopy(context))
+            self._context_memo.move_to_end(message_id)
+            while len(self._context_memo) > self.CONTEXT_MEMO_SIZE:
+                self._context_memo.popitem(last=False)
+
+    def clear_context_memo(self):
+        with self._memo_lock:
+            self._context_memo.clear()
+
+    def _get_projects_bulk(self, project_ids) -> Dict[str, Dict[str, Any]]:
+        """Resolve project numbers/ids in one lookup: {requested_id: project}."""
+        ids = [p for p in project_ids if p]
+        if not ids:
+            return {}
+        try:
+            cached = self.reference_cache.get_projects(ids)
+            if cached is not UNCACHED:
+                return cached
+
+            placeholders = ",".join("?" * len(ids))
+            with self._connection() as conn:
+                rows = conn.execute(
+                    f"SELECT * FROM projects WHERE altimeter_project_id IN ({placeholders}) OR id IN ({placeholders})",
+                    ids + ids
+                ).fetchall()
+            found = {}
+            for row in rows:
+                project = dict(row)
+                keys = (str(project.get("altimeter_project_id")), str(project.get("id")))
+                for project_id in ids:
+                    if project_id not in found and str(project_id) in keys:
+                        found[project_id] = project
+            return found
+        except Exception:
+            return {}
+
+    def _get_customer_names_bulk(self, customer_ids) -> Dict[Any, str]:
+        ids = [c for c in customer_ids if c]
+        if not ids:
+            return {}
+        try:
+            names = {}
+            uncached = []
+            for customer_id in ids:
+                name = self.reference_cache.get_customer_name(customer_id)
+                if name is UNCACHED:
+                    uncached.append(customer_id)
+                else:
+                    names[customer_id] = name
+            if uncached:
+                placeholders = ",".join("?" * len(uncached))
+                with self._connection() as conn:
+                    rows = conn.execute(
+                        f"SELECT customer_id, company_name FROM customers WHERE customer_id IN ({placeholders})",
+                        uncached
+                    ).fetchall()
+                by_id = {str(r['customer_id']): r['company_name'] for r in rows}
+                for customer_id in uncached:
+                    names[customer_id] = by_id.get(str(customer_id)) or "Unknown"
+            return names
+        except Exception:
+            return {}
+
+    def _get_contacts_bulk(self, addresses) -> Dict[str, Dict[str, str]]:
+        """Resolve sender roles: employees first, then customer contacts."""
+        addrs = [a for a in addresses if a]
+        if not addrs:
+            return {}
+        try:
+            contacts = {}
+            uncached = []
+            for addr in addrs:
+                contact = self.reference_cache.get_contact(addr)
+                if contact is UNCACHED:
+                    uncached.append(addr)
+                elif contact:
+                    contacts[addr] = contact
+            if uncached:
+                placeholders = ",".join("?" * len(uncached))
+                with self._connection() as conn:
+                    for r in conn.execute(
+                        f"SELECT 'Client' as role, company_name as company, email FROM customers WHERE email IN ({placeholders})",
+                        uncached
+                    ).fetchall():
+                        contacts[r['email']] = {"role": r['role'], "company": r['company']}
+                    for r in conn.execute(
+                        f"SELECT role, 'Davis Electric' as company, email FROM employees WHERE email IN ({placeholders})",
+                        uncached
+                    ).fetchall():
+                        contacts[r['email']] = {"role": r['role'], "company": r['company']}
+            return contacts
+        except Exception:
+            return {}
+
+    def _get_mission_intel_bulk(self, project_numbers) -> Dict[str, List[Dict[str, Any]]]:
+        """Mission intel per distinct project, read from the precomputed mission intel cache."""
+        if not project_numbers:
+            return {}
+        from services.mission_intel_service import mission_intel_service
+        active_phases = self.get_active_phases()
+        return {
+            number: mission_intel_service.get_project_intel(number, active_phases)
+            for number in project_numbers
+        }
 
     def _get_customer_name(self, customer_id: Optional[int]) -> str:
         if not customer_id:
             return "Unknown"
         try:
-            conn = self._get_db_conn()
-            row = conn.execute("SELECT company_name FROM customers WHERE customer_id = ?", (customer_id,)).fetchone()
-            conn.close()
+            cached = self.reference_cache.get_customer_name(customer_id)
+            if cached is not UNCACHED:
+                return cached
+
+            with self._connection() as conn:
+                row = conn.execute("SELECT company_name FROM customers WHERE customer_id = ?", (customer_id,)).fetchone()
             return row['company_name'] if row else "Unknown"
         except:
             return "Unknown"
 
     def _get_contact_info(self, email: str) -> Optional[Dict[str, str]]:
         try:
-            conn = self._get_db_conn()
-            # Check employees first
-            row = conn.execute("SELECT role, 'Davis Electric' as company FROM employees WHERE email = ?", (email,)).fetchone()
-            if not row:
-                # Then check customers
-                row = conn.execute("SELECT 'Client' as role, company_name as company FROM customers WHERE email = ?", (email,)).fetchone()
-            conn.close()
+            cached = self.reference_cache.get_contact(email)
+            if cached is not UNCACHED:
+                return cached
+
+            with self._connection() as conn:
+                # Check employees first
+                row = conn.execute("SELECT role, 'Davis Electric' as company FROM employees WHERE email = ?", (email,)).fetchone()
+                if not row:
+                    # Then check customers
+                    row = conn.execute("SELECT 'Client' as role, company_name as company FROM customers WHERE email = ?", (email,)).fetchone()
             return dict(row) if row else None
         except:
             return None
@@ -206,91 +402,76 @@ class AltimeterService:
     def list_projects(self, query: str = None) -> List[Dict[str, Any]]:
         """List all projects directly from Altimeter DB with optional search."""
         try:
-            conn = self._get_db_conn()
-            if query:
-                search_term = f"%{query}%"
-                sql = """
-                    SELECT * FROM projects 
-                    WHERE is_active = 1 
-                    AND (name LIKE ? OR altimeter_project_id LIKE ? OR description LIKE ?)
-                    ORDER BY updated_at DESC
-                """
-                projects = conn.execute(sql, (search_term, search_term, search_term)).fetchall()
-            else:
-                projects = conn.execute("SELECT * FROM projects WHERE is_active = 1 ORDER BY updated_at DESC").fetchall()
-            
-            conn.close()
+            with self._connection() as conn:
+                if query:
+                    search_term = f"%{query}%"
+                    sql = """
+                        SELECT * FROM projects 
+                        WHERE is_active = 1 
+                        AND (name LIKE ? OR altimeter_project_id LIKE ? OR description LIKE ?)
+                        ORDER BY updated_at DESC
+                    """
+                    projects = conn.execute(sql, (search_term, search_term, search_term)).fetchall()
+                else:
+                    projects = conn.execute("SELECT * FROM projects WHERE is_active = 1 ORDER BY updated_at DESC").fetchall()
             return [dict(p) for p in projects]
         except Exception as e:
             return []
 
+    def list_active_project_names(self, limit: int = 3) -> List[str]:
+        """Names of the most recently updated active projects (for the AI system context)."""
+        with self._connection() as conn:
+            rows = conn.execute(
+                "SELECT name FROM projects WHERE is_active = 1 ORDER BY updated_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
     def get_db_schema(self, strata_level: int = 1) -> str:
         """
         Returns a read-only schema representation filtered by Strata Level.
         Allows the LLM to write SQL queries safely.
+        Cached until the database's schema_version changes.
         """
         try:
-            conn = self._get_db_conn()
-            cursor = conn.cursor()
-
-            # Fetch all tables
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-            tables = [row[0] for row in cursor.fetchall()]
-
-            schema_str = "Database Schema:\n"
-
-            # Permission Logic (Simple)
-            # Strata 1-2: Ops only (Tasks, Projects, Inventory)
-            # Strata 3-4: + Financials (if exists)
-            # Strata 5: All (including system tables)
-
-            allowed_tables = tables
-            if strata_level < 5:
-                allowed_tables = [t for t in tables if t not in ['users', 'secrets', 'audit_logs']]
-            if strata_level < 3:
-                # Filter 'financ' (financials), 'money', 'budget', 'salary'
-                restricted = ['financ', 'money', 'budget', 'salary']
-                allowed_tables = [t for t in allowed_tables if not any(r in t for r in restricted)]
-
-            for table in allowed_tables:
-                cursor.execute(f"PRAGMA table_info({table})")
-                columns = [f"{row[1]} ({row[2]})" for row in cursor.fetchall()]
-                schema_str += f"- Table '{table}': {', '.join(columns)}\n"
-
-            conn.close()
-            return schema_str
+            return self.schema_catalog.get_schema(strata_level)
         except Exception as e:
             return f"Error fetching schema: {e}"
 
-    def execute_read_only_query(self, query: str) -> List[Dict[str, Any]]:
+    def get_schema_digest(self, question: str, strata_level: int = 1, token_budget: Optional[int] = None) -> str:
         """
-        Executes a SQL query strictly for READ access.
+        Compact schema for a single question: only the most relevant tables
+        that fit in the token budget (ALTIMETER_SCHEMA_TOKEN_BUDGET by default).
+        """
+        try:
+            budget = token_budget or int(settings.ALTIMETER_SCHEMA_TOKEN_BUDGET)
+            return self.schema_catalog.get_digest(question, strata_level, budget)
+        except Exception as e:
+            return f"Error fetching schema: {e}"
+
+    def execute_read_only_query(self, query: str, params: tuple = ()) -> List[Dict[str, Any]]:
+        """
+        Executes a SQL query strictly for READ access, through the query sandbox
+        (cost pre-check, time limit, row limit, result cache).
         Safeguarded against modification keywords.
         """
         # 1. Safety Check
-        forbidden = ["INSERT", "UPDATE", "DELETE", "DROP", "ALTER", "TRUNCATE", "GRANT", "REVOKE"]
-        if any(word in query.upper() for word in forbidden):
-            raise ValueError("Security Alert: Modification queries are strictly forbidden.")
+        self.query_sandbox.validate(query)
 
         try:
-            conn = self._get_db_conn(readonly=True)
-            cursor = conn.cursor()
-            cursor.execute(query)
-
-            # Fetch column names
-            columns = [description[0] for description in cursor.description]
-            rows = cursor.fetchall()
+            return self.query_sandbox.run(query, params)["rows"]
+        except Exception as e:
+            return [{"error": str(e)}]
 
-            result = [dict(zip(columns, row)) for row in rows]
-            conn.close()
-            return result
+    def execute_query_template(self, name: str, params: tuple = ()) -> List[Dict[str, Any]]:
+        """Run one of the sandbox's parameterized QUERY_TEMPLATES."""
+        try:
+            return self.query_sandbox.run_template(name, params)["rows"]
         except Exception as e:
             return [{"error": str(e)}]
 
     def get_upcoming_milestones(self, days: int = 14) -> List[Dict[str, Any]]:
         """Fetch upcoming milestones from Altimeter projects."""
         try:
-            conn = self._get_db_conn()
             # Join project_phases with projects
             query = """
                 SELECT ph.*, p.altimeter_project_id, p.name as project_name 
@@ -301,8 +482,8 @@ class AltimeterService:
                 AND ph.status != 'Completed'
                 ORDER BY ph.completion_date ASC
             """
-            rows = conn.execute(query, (days,)).fetchall()
-            conn.close()
+            with self._connection() as conn:
+                rows = conn.execute(query, (days,)).fetchall()
             
             res = []
             for r in rows:
@@ -323,22 +504,23 @@ class AltimeterService:
         Used by the Oracle Protocol to predict needed SOPs.
         """
         try:
-            conn = self._get_db_conn()
-            # Assuming project_phases has start_date and completion_date
-            query = """
-                SELECT ph.*, p.altimeter_project_id, p.name as project_name
-                FROM project_phases ph
-                JOIN projects p ON ph.project_id = p.id
-                WHERE ph.start_date <= date('now')
-                AND ph.completion_date >= date('now')
-                AND ph.status != 'Completed'
-                ORDER BY ph.completion_date ASC
-            """
-            rows = conn.execute(query).fetchall()
-            conn.close()
+            phases = self.reference_cache.get_active_phases()
+            if phases is UNCACHED:
+                # Assuming project_phases has start_date and completion_date
+                query = """
+                    SELECT ph.*, p.altimeter_project_id, p.name as project_name
+                    FROM project_phases ph
+                    JOIN projects p ON ph.project_id = p.id
+                    WHERE ph.start_date <= date('now')
+                    AND ph.completion_date >= date('now')
+                    AND ph.status != 'Completed'
+                    ORDER BY ph.completion_date ASC
+                """
+                with self._connection() as conn:
+                    phases = [dict(r) for r in conn.execute(query).fetchall()]
 
             res = []
-            for r in rows:
+            for r in phases:
                 res.append({
                     "id": f"phase-{r['id']}",
                     "phase_name": r['phase'],
@@ -355,40 +537,37 @@ class AltimeterService:
         """Fetch recent logs and emails for the project."""
         lines = []
         try:
-            conn = self._get_db_conn()
-            
-            # Get internal ID first
-            p_row = conn.execute("SELECT id FROM projects WHERE altimeter_project_id = ?", (project_id,)).fetchone()
-            if not p_row:
-                return "No recent activity found."
-            
-            p_uuid = p_row['id']
-            
-            # 1. Recent Logs
-            logs = conn.execute("""
-                SELECT log_date, description FROM daily_logs 
-                WHERE project_id = ? 
-                ORDER BY log_date DESC LIMIT 3
-            """, (p_uuid,)).fetchall()
-            
-            if logs:
-                lines.append("Recent Daily Logs:")
-                for l in logs:
-                    lines.append(f"  - {l['log_date']}: {l['description']}")
-
-            # 2. Linked Emails (from Communications module)
-            emails = conn.execute("""
-                SELECT date, subject FROM Emails 
-                WHERE project_id = ? 
-                ORDER BY date DESC LIMIT 3
-            """, (project_id,)).fetchall()
-            
-            if emails:
-                lines.append("Recently Linked Emails:")
-                for e in emails:
-                    lines.append(f"  - {e['date']}: {e['subject']}")
-
-            conn.close()
+            with self._connection() as conn:
+                # Get internal ID first
+                p_row = conn.execute("SELECT id FROM projects WHERE altimeter_project_id = ?", (project_id,)).fetchone()
+                if not p_row:
+                    return "No recent activity found."
+
+                p_uuid = p_row['id']
+
+                # 1. Recent Logs
+                logs = conn.execute("""
+                    SELECT log_date, description FROM daily_logs 
+                    WHERE project_id = ? 
+                    ORDER BY log_date DESC LIMIT 3
+                """, (p_uuid,)).fetchall()
+
+                if logs:
+                    lines.append("Recent Daily Logs:")
+                    for l in logs:
+                        lines.append(f"  - {l['log_date']}: {l['description']}")
+
+                # 2. Linked Emails (from Communications module)
+                emails = conn.execute("""
+                    SELECT date, subject FROM Emails 
+                    WHERE project_id = ? 
+                    ORDER BY date DESC LIMIT 3
+                """, (project_id,)).fetchall()
+
+                if emails:
+                    lines.append("Recently Linked Emails:")
+                    for e in emails:
+                        lines.append(f"  - {e['date']}: {e['subject']}")
         except Exception as e:
             pass
             
@@ -404,10 +583,10 @@ class IntelligenceBridge:
         to assist Altimeter's decision making.
         """
         try:
-            from services.search_service import search_service
+            from services.hybrid_search_service import hybrid_search_service
 
-            # 1. Search Knowledge Base
-            results = search_service.search(query, collection_name="knowledge", n_results=3)
+            # 1. Search Knowledge Base (keyword + semantic)
+            results = hybrid_search_service.search(query, collection_name="knowledge", n_results=3)
 
             # 2. Format for Altimeter
             context_data = []
@@ -434,6 +613,16 @@ class IntelligenceBridge:
                 "timestamp": datetime.now().isoformat()
             }
 
+    @staticmethod
+    def weather_condition_class(weather: Optional[Dict]) -> str:
+        """Coarse weather class used by the Oracle: 'severe' (rain, storm, snow, wind) or 'clear'."""
+        if weather:
+            # Simple heuristic for bad weather
+            condition = weather.get("current", {}).get("condition", "").lower()
+            if any(x in condition for x in ["rain", "storm", "snow", "wind", "thunder"]):
+                return "severe"
+        return "clear"
+
     def predict_mission_intel(self, active_phases: List[Dict], weather: Optional[Dict] = None) -> List[Dict[str, Any]]:
         """
         The Oracle Protocol: Predicts relevant SOPs based on active work and weather.
@@ -444,14 +633,8 @@ class IntelligenceBridge:
         seen_titles = set()
 
         # 1. Weather Context Injection
-        weather_alert = False
-        weather_keywords = []
-        if weather:
-            # Simple heuristic for bad weather
-            condition = weather.get("current", {}).get("condition", "").lower()
-            if any(x in condition for x in ["rain", "storm", "snow", "wind", "thunder"]):
-                weather_alert = True
-                weather_keywords = ["weather", "rain", "storm", "safety", "protection"]
+        weather_alert = self.weather_condition_class(weather) == "severe"
+        weather_keywords = ["weather", "rain", "storm", "safety", "protection"] if weather_alert else []
 
         for phase in active_phases:
             phase_name = phase.get("phase_name", "")
@@ -501,12 +684,11 @@ class IntelligenceBridge:
         # Get Phases
         phases = []
         try:
-            conn = altimeter_service._get_db_conn()
             # Assuming project_phases table linked by project id (uuid)
             p_uuid = project['id']
-            rows = conn.execute("SELECT * FROM project_phases WHERE project_id = ? ORDER BY start_date", (p_uuid,)).fetchall()
+            with altimeter_service._connection() as conn:
+                rows = conn.execute("SELECT * FROM project_phases WHERE project_id = ? ORDER BY start_date", (p_uuid,)).fetchall()
             phases = [dict(r) for r in rows]
-            conn.close()
         except Exception:
             pass
 
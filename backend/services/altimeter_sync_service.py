@@ -1,22 +1,50 @@
+import os
+import uuid
+import socket
 import asyncio
 import logging
 from datetime import datetime, timedelta, timezone
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import or_, and_, func
 
+from core.config import settings
 from database.database import SessionLocal
 from database.models import Task, SyncQueue, SyncActivityLog, SyncConflict
-from services.altimeter_api_service import altimeter_api_service
+from services.altimeter_api_service import altimeter_api_service, NOT_MODIFIED, PreconditionFailed
 
 # Configure logging
 logger = logging.getLogger("altimeter_sync")
 logger.setLevel(logging.INFO)
 
 class AltimeterSyncService:
+    """
+    Background worker for the Atlas <-> Altimeter sync queue.
+
+    Due items (next_attempt_at in the past) are claimed in one UPDATE that
+    stamps a lease, so a crashed worker's items become claimable again once
+    the lease expires. The lease is renewed while an item runs, and its
+    outcome is only written if the worker still holds the lease. Up to
+    `concurrency` items run at once, with at most one in flight per entity;
+    an entity's items run in queue order, so a newer operation waits for an
+    older one still in backoff. Between claims the worker sleeps until the
+    next item is due or until it is woken by an enqueue or a finished item.
+    """
+    OPEN_STATUSES = ('pending', 'retry', 'syncing')
+    IDLE_WAIT_SECONDS = 300 # Safety net: re-check the queue at least this often
+
     def __init__(self):
         self.is_running = False
         self._ws_manager = None
+        self.concurrency = max(1, int(settings.SYNC_WORKER_CONCURRENCY))
+        self.lease_seconds = int(settings.SYNC_LEASE_SECONDS)
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._in_flight: Dict[Tuple[str, int], asyncio.Task] = {}
+        self._leases: Dict[int, str] = {} # item id -> lease token it was claimed with
+        self.coalesced = 0 # Queue operations merged away by enqueue_task
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
 
     def set_ws_manager(self, manager):
         self._ws_manager = manager
@@ -26,55 +54,204 @@ class AltimeterSyncService:
         if self.is_running:
             return
         self.is_running = True
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
         logger.info("Altimeter Sync Worker started.")
         while self.is_running:
+            self._wakeup.clear() # Before claiming, so wake-ups during the claim aren't lost
+            timeout = self.IDLE_WAIT_SECONDS
             try:
-                await self.process_queue()
+                self._dispatch_due()
+                timeout = self._seconds_until_due()
             except Exception as e:
                 logger.error(f"Error in sync worker loop: {e}")
-            await asyncio.sleep(2) # Poll every 2 seconds
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
 
     def stop_worker(self):
         self.is_running = False
+        self.wake()
         logger.info("Altimeter Sync Worker stopped.")
 
-    async def process_queue(self):
-        """Polls the queue and processes pending items."""
-        db = SessionLocal()
+    def wake(self):
+        """Make the worker look at the queue now (safe to call from any thread)."""
+        if self._wakeup is None or self._loop is None:
+            return
+        try:
+            if asyncio.get_running_loop() is self._loop:
+                self._wakeup.set()
+                return
+        except RuntimeError:
+            pass # Not on an event loop thread
         try:
-            # Fetch pending items that are ready (considering backoff)
-            items = db.query(SyncQueue).filter(
-                or_(SyncQueue.status == 'pending', SyncQueue.status == 'retry')
-            ).all()
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        except RuntimeError:
+            pass # Loop already closed
+
+    async def process_queue(self) -> int:
+        """Claims and processes the currently due items once. Returns how many ran."""
+        tasks = self._dispatch_due()
+        if tasks:
+            await asyncio.gather(*tasks)
+        return len(tasks)
+
+    # --- Claiming ---
+
+    @staticmethod
+    def _due_filter(now: datetime):
+        return or_(
+            and_(
+                SyncQueue.status.in_(('pending', 'retry')),
+                or_(SyncQueue.next_attempt_at.is_(None), SyncQueue.next_attempt_at <= now)
+            ),
+            # Lease ran out: the worker holding it died mid-item
+            and_(SyncQueue.status == 'syncing', SyncQueue.lease_expires_at < now)
+        )
 
-            for item in items:
-                # Check backoff if retry
-                if item.status == 'retry':
-                    backoff_seconds = 5 * (5 ** (item.retry_count - 1)) if item.retry_count > 0 else 5
-                    if item.last_attempt:
-                        # Ensure timezone awareness
-                        last_attempt = item.last_attempt
-                        if last_attempt.tzinfo is None:
-                            last_attempt = last_attempt.replace(tzinfo=timezone.utc)
+    def _claim_due(self, db: Session, limit: int) -> List[SyncQueue]:
+        """Lease up to `limit` due items, oldest first, at most one per entity."""
+        now = datetime.now(timezone.utc)
+        candidates = db.query(SyncQueue.id, SyncQueue.entity_type, SyncQueue.entity_id).filter(
+            self._due_filter(now)
+        ).order_by(SyncQueue.id).limit(limit * 4).all()
+        if not candidates:
+            return []
+
+        # Each entity's oldest unfinished item, due or not (e.g. a retry still in backoff)
+        first_open = {
+            (entity_type, entity_id): first_id
+            for entity_type, entity_id, first_id in db.query(
+                SyncQueue.entity_type, SyncQueue.entity_id, func.min(SyncQueue.id)
+            ).filter(
+                SyncQueue.status.in_(self.OPEN_STATUSES),
+                SyncQueue.entity_id.in_({c[2] for c in candidates})
+            ).group_by(SyncQueue.entity_type, SyncQueue.entity_id).all()
+        }
 
-                        next_attempt = last_attempt + timedelta(seconds=backoff_seconds)
-                        now = datetime.now(timezone.utc)
+        chosen, entities = [], set(self._in_flight)
+        for item_id, entity_type, entity_id in candidates:
+            if (entity_type, entity_id) in entities or first_open.get((entity_type, entity_id), item_id) < item_id:
+                continue # Keep per-entity order: wait for the earlier item
+            entities.add((entity_type, entity_id))
+            chosen.append(item_id)
+            if len(chosen) >= limit:
+                break
+        if not chosen:
+            return []
+
+        token = f"{self.worker_id}:{uuid.uuid4().hex}"
+        db.query(SyncQueue).filter(SyncQueue.id.in_(chosen), self._due_filter(now)).update({
+            SyncQueue.status: 'syncing',
+            SyncQueue.leased_by: token,
+            SyncQueue.lease_expires_at: now + timedelta(seconds=self.lease_seconds),
+            SyncQueue.last_attempt: now
+        }, synchronize_session=False)
+        db.commit()
+        return db.query(SyncQueue).filter(SyncQueue.leased_by == token).order_by(SyncQueue.id).all()
 
-                        if now < next_attempt:
-                            continue
+    def _dispatch_due(self) -> List[asyncio.Task]:
+        """Claims due items up to free capacity and starts processing them."""
+        capacity = self.concurrency - len(set(self._in_flight.values()))
+        if capacity <= 0:
+            return []
+        db = SessionLocal()
+        try:
+            claimed = self._claim_due(db, capacity)
+            claimed = [(i.id, i.entity_type, i.entity_id, i.direction) for i in claimed]
+        finally:
+            db.close()
 
-                await self._process_item(item, db)
+        # A backlog of pushes goes out together (bulk endpoint or concurrent calls)
+        pushes = [c for c in claimed if c[1] == 'task' and c[3] == 'push']
+        groups = [pushes] if len(pushes) > 1 else []
+        groups += [[c] for c in claimed if len(pushes) < 2 or c not in pushes]
+
+        tasks = []
+        for group in groups:
+            task = asyncio.create_task(self._run_claimed([c[0] for c in group]))
+            for c in group:
+                self._in_flight[(c[1], c[2])] = task
+            task.add_done_callback(self._on_done)
+            tasks.append(task)
+        return tasks
+
+    def _on_done(self, task: asyncio.Task):
+        for key in [k for k, t in self._in_flight.items() if t is task]:
+            del self._in_flight[key]
+        self.wake()
+
+    async def _run_claimed(self, item_ids: List[int]):
+        db = SessionLocal()
+        renewer = None
+        try:
+            items = db.query(SyncQueue).filter(SyncQueue.id.in_(item_ids)).order_by(SyncQueue.id).all()
+            self._leases.update({i.id: i.leased_by for i in items if i.leased_by})
+            tokens = {i.leased_by for i in items if i.leased_by}
+            renewer = asyncio.create_task(self._renew_leases(item_ids, tokens))
+            if len(items) > 1:
+                await self._process_push_batch(items, db, claimed=True)
+            elif items:
+                await self._process_item(items[0], db, claimed=True)
+        except Exception as e:
+            logger.error(f"Error processing sync items {item_ids}: {e}")
+        finally:
+            if renewer is not None:
+                renewer.cancel()
+            for item_id in item_ids:
+                self._leases.pop(item_id, None)
+            db.close()
 
+    async def _renew_leases(self, item_ids: List[int], tokens: set):
+        """Keep extending our leases while the items run (a third of the lease at a time)."""
+        while tokens:
+            await asyncio.sleep(max(1.0, self.lease_seconds / 3))
+            db = SessionLocal()
+            try:
+                db.query(SyncQueue).filter(
+                    SyncQueue.id.in_(item_ids), SyncQueue.leased_by.in_(tokens), SyncQueue.status == 'syncing'
+                ).update({
+                    SyncQueue.lease_expires_at: datetime.now(timezone.utc) + timedelta(seconds=self.lease_seconds)
+                }, synchronize_session=False)
+                db.commit()
+            except Exception as e:
+                logger.error(f"Error renewing sync leases for {item_ids}: {e}")
+            finally:
+                db.close()
+
+    def _seconds_until_due(self) -> float:
+        """Time until the next retry or lease expiry; items due now wake us when capacity frees up."""
+        if len(set(self._in_flight.values())) >= self.concurrency:
+            return self.IDLE_WAIT_SECONDS
+        now = datetime.now(timezone.utc)
+        db = SessionLocal()
+        try:
+            next_retry = db.query(func.min(SyncQueue.next_attempt_at)).filter(
+                SyncQueue.status.in_(('pending', 'retry')), SyncQueue.next_attempt_at > now
+            ).scalar()
+            next_expiry = db.query(func.min(SyncQueue.lease_expires_at)).filter(
+                SyncQueue.status == 'syncing', SyncQueue.lease_expires_at > now
+            ).scalar()
         finally:
             db.close()
 
-    async def _process_item(self, item: SyncQueue, db: Session):
-        """Processes a single sync queue item."""
+        candidates = []
+        for moment in (next_retry, next_expiry):
+            if moment is not None:
+                if moment.tzinfo is None:
+                    moment = moment.replace(tzinfo=timezone.utc)
+                candidates.append((moment - now).total_seconds())
+        return min([self.IDLE_WAIT_SECONDS] + [max(0.0, c) for c in candidates])
+
+    async def _process_item(self, item: SyncQueue, db: Session, claimed: bool = False):
+        """Processes a single sync queue item (`claimed` = already leased by _claim_due)."""
         logger.info(f"Processing sync item {item.id}: {item.direction} {item.entity_type} {item.entity_id}")
 
-        item.status = 'syncing'
-        item.last_attempt = datetime.now(timezone.utc)
-        db.commit()
+        if not claimed:
+            item.status = 'syncing'
+            item.last_attempt = datetime.now(timezone.utc)
+            db.commit()
 
         # Notify UI
         if self._ws_manager:
@@ -89,41 +266,113 @@ class AltimeterSyncService:
 
             # If status wasn't changed to conflict during processing, mark as synced
             if item.status != 'conflict':
-                item.status = 'synced'
-                item.error_message = None
-                # Log success
-                self._log_history(db, item, "success")
-                db.commit()
-
-                # Notify UI
-                if self._ws_manager:
-                    await self._ws_manager.broadcast_sync_status(item.entity_type, item.entity_id, "synced")
+                await self._mark_synced(item, db)
             else:
-                 self._log_history(db, item, "conflict")
-                 db.commit()
+                await self._mark_conflict(item, db)
 
         except Exception as e:
-            logger.error(f"Sync failed for item {item.id}: {e}")
-            item.retry_count += 1
-            item.error_message = str(e)
-
-            if item.retry_count >= 3:
-                item.status = 'failed'
-                self._log_history(db, item, "failed", str(e))
-                if self._ws_manager:
-                    await self._ws_manager.broadcast_sync_status(item.entity_type, item.entity_id, "error")
-            else:
-                item.status = 'retry'
+            await self._mark_failed(item, db, e)
+
+    def _finish(self, db: Session, item: SyncQueue, values: Dict[str, Any]) -> bool:
+        """
+        Write an item's outcome (and release its lease) with an UPDATE conditioned on
+        the lease we claimed it with. If another worker reclaimed the item after our
+        lease expired, nothing from this attempt is kept and False is returned.
+        """
+        token = self._leases.get(item.id) # Not item.leased_by: a refresh would show the new owner's
+        query = db.query(SyncQueue).filter(SyncQueue.id == item.id)
+        query = query.filter(SyncQueue.leased_by == token) if token else query.filter(SyncQueue.leased_by.is_(None))
+        values = {**values, SyncQueue.leased_by: None, SyncQueue.lease_expires_at: None}
+        if not query.update(values, synchronize_session=False):
+            db.rollback()
+            logger.warning(f"Lost the lease on sync item {item.id}; another worker owns it now")
+            return False
+        for column, value in values.items():
+            set_committed_value(item, column.key, value) # Mirror the UPDATE without another flush
+        return True
+
+    async def _mark_conflict(self, item: SyncQueue, db: Session):
+        if not self._finish(db, item, {SyncQueue.status: 'conflict'}):
+            return
+        self._log_history(db, item, "conflict")
+        db.commit()
+
+    async def _mark_synced(self, item: SyncQueue, db: Session):
+        if not self._finish(db, item, {SyncQueue.status: 'synced', SyncQueue.error_message: None}):
+            return
+        # Log success
+        self._log_history(db, item, "success")
+        db.commit()
+
+        # Notify UI
+        if self._ws_manager:
+            await self._ws_manager.broadcast_sync_status(item.entity_type, item.entity_id, "synced")
+
+    async def _mark_failed(self, item: SyncQueue, db: Session, e: Exception):
+        logger.error(f"Sync failed for item {item.id}: {e}")
+        retry_count = (item.retry_count or 0) + 1
+        values = {SyncQueue.retry_count: retry_count, SyncQueue.error_message: str(e)}
+        if retry_count >= 3:
+            values[SyncQueue.status] = 'failed'
+        else:
+            # Exponential backoff: 5s, 25s, ...
+            backoff_seconds = 5 * (5 ** (retry_count - 1))
+            values[SyncQueue.status] = 'retry'
+            values[SyncQueue.next_attempt_at] = datetime.now(timezone.utc) + timedelta(seconds=backoff_seconds)
 
+        db.rollback() # Nothing from the failed attempt is kept
+        if not self._finish(db, item, values):
+            return
+        if retry_count >= 3:
+            self._log_history(db, item, "failed", str(e))
+            if self._ws_manager:
+                await self._ws_manager.broadcast_sync_status(item.entity_type, item.entity_id, "error")
+        db.commit()
+
+    async def _process_push_batch(self, items: List[SyncQueue], db: Session, claimed: bool = False):
+        """Pushes several local tasks in one round of API calls."""
+        logger.info(f"Pushing {len(items)} tasks to Altimeter")
+        if not claimed:
+            now = datetime.now(timezone.utc)
+            for item in items:
+                item.status = 'syncing'
+                item.last_attempt = now
             db.commit()
 
-    async def _sync_push_task(self, item: SyncQueue, db: Session):
-        """Pushes a local task to Altimeter."""
-        task = db.query(Task).filter(Task.task_id == item.entity_id).first()
-        if not task:
-            raise ValueError(f"Task {item.entity_id} not found")
+        tasks = {
+            t.task_id: t for t in
+            db.query(Task).filter(Task.task_id.in_([i.entity_id for i in items])).all()
+        }
+        batch, pushes = [], []
+        for item in items:
+            task = tasks.get(item.entity_id)
+            if not task:
+                await self._mark_failed(item, db, ValueError(f"Task {item.entity_id} not found"))
+                continue
+            if self._ws_manager:
+                await self._ws_manager.broadcast_sync_status(item.entity_type, item.entity_id, "syncing")
+            request = self._push_request(task)
+            if request is None:
+                self._apply_push_result(task, None, db)
+                await self._mark_synced(item, db)
+                continue
+            batch.append((item, task, task.local_version or 0))
+            pushes.append(request)
+
+        results = await altimeter_api_service.push_tasks(pushes) if pushes else []
+        for (item, task, sent_version), result in zip(batch, results):
+            if isinstance(result, PreconditionFailed):
+                await self._record_conflict(item, task, db)
+                await self._mark_conflict(item, db)
+            elif isinstance(result, Exception):
+                await self._mark_failed(item, db, result)
+            else:
+                self._apply_push_result(task, result, db, sent_version)
+                await self._mark_synced(item, db)
 
-        task_data = {
+    @staticmethod
+    def _task_payload(task: Task) -> Dict[str, Any]:
+        return {
             "title": task.title,
             "description": task.description,
             "status": task.status,
@@ -133,23 +382,135 @@ class AltimeterSyncService:
             "project_id": task.project_id
         }
 
-        # If we have a remote_id, update. Else create.
-        if task.remote_id:
-            await altimeter_api_service.update_task(task.remote_id, task_data)
-        elif task.related_altimeter_task_id:
-            # Fallback for legacy field
-             await altimeter_api_service.update_task(task.related_altimeter_task_id, task_data)
-             task.remote_id = task.related_altimeter_task_id
-        else:
-            new_remote_task = await altimeter_api_service.create_task(task_data)
-            task.remote_id = str(new_remote_task.get("id"))
-            task.related_altimeter_task_id = str(new_remote_task.get("id"))
+    def _push_request(self, task: Task) -> Optional[Dict[str, Any]]:
+        """
+        What to send for a task: a create, a PATCH of its dirty fields (If-Match
+        its last known ETag), or a full update when no change tracking exists yet.
+        None when nothing changed since the last push.
+        """
+        remote_id = task.remote_id or task.related_altimeter_task_id
+        payload = self._task_payload(task)
+        if not remote_id:
+            return {"task_id": None, "data": payload}
+
+        dirty = [f for f in (task.dirty_fields or {}) if f in payload]
+        if dirty:
+            return {"task_id": remote_id, "data": payload, "fields": {f: payload[f] for f in dirty}, "etag": task.etag}
+        if (task.local_version or 0) > 0 and task.local_version == task.synced_version:
+            return None
+        return {"task_id": remote_id, "data": payload}
+
+    @staticmethod
+    def _remote_version(remote_task: Optional[Dict[str, Any]]) -> Optional[str]:
+        """The remote side of the version vector: the ETag, else the remote updated_at."""
+        if not remote_task:
+            return None
+        version = remote_task.get("etag") or remote_task.get("updated_at")
+        return str(version) if version else None
 
+    @staticmethod
+    def _apply_push_result(task: Task, remote_task: Optional[Dict[str, Any]], db: Session = None,
+                           sent_version: Optional[int] = None):
+        remote_id = task.remote_id or task.related_altimeter_task_id
+        if not remote_id and remote_task:
+            remote_id = str(remote_task.get("id"))
+            task.related_altimeter_task_id = remote_id
+        task.remote_id = remote_id
+        task.etag = AltimeterSyncService._remote_version(remote_task) or task.etag
         task.last_synced_at = datetime.now(timezone.utc)
         task.sync_status = 'synced'
 
+        if db is not None and sent_version is not None:
+            # Only clear dirty fields if nobody edited the task while the push was in flight
+            db.query(Task).filter(
+                Task.task_id == task.task_id,
+                or_(Task.local_version == sent_version, Task.local_version.is_(None))
+            ).update({Task.dirty_fields: None, Task.synced_version: sent_version}, synchronize_session=False)
+
+    async def _sync_push_task(self, item: SyncQueue, db: Session):
+        """Pushes a local task to Altimeter (only its changed fields when known)."""
+        task = db.query(Task).filter(Task.task_id == item.entity_id).first()
+        if not task:
+            raise ValueError(f"Task {item.entity_id} not found")
+
+        request = self._push_request(task)
+        if request is None:
+            self._apply_push_result(task, None)
+            return
+        sent_version = task.local_version or 0
+
+        try:
+            if not request["task_id"]:
+                result = await altimeter_api_service.create_task(request["data"])
+            elif request.get("fields"):
+                result = await altimeter_api_service.patch_task(request["task_id"], request["fields"], request.get("etag"))
+            else:
+                result = await altimeter_api_service.update_task(request["task_id"], request["data"])
+        except PreconditionFailed:
+            # Altimeter changed since our last sync and we changed too
+            await self._record_conflict(item, task, db)
+            return
+
+        self._apply_push_result(task, result, db, sent_version)
+
+    @staticmethod
+    def _comparable(field: str, value):
+        if field == "due_date" and value:
+            if isinstance(value, str):
+                value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+            return value.replace(tzinfo=None).isoformat()
+        return value
+
+    async def _record_conflict(self, item: SyncQueue, task: Task, db: Session,
+                               remote_task: Optional[Dict[str, Any]] = None):
+        """Stores both versions for the user to resolve; nothing is merged."""
+        if remote_task is None:
+            remote_task = await altimeter_api_service.get_task(task.remote_id or task.related_altimeter_task_id) or {}
+        local_updated = task.updated_at or task.created_at
+        conflict = SyncConflict(
+            entity_type='task',
+            entity_id=task.task_id,
+            local_version={
+                "title": task.title,
+                "description": task.description,
+                "status": task.status,
+                "priority": task.priority,
+                "due_date": task.due_date.isoformat() if task.due_date else None,
+                "updated_at": local_updated.isoformat() if local_updated else None,
+                "changed_fields": sorted(task.dirty_fields or {})
+            },
+            remote_version={
+                "title": remote_task.get("title"),
+                "description": remote_task.get("description"),
+                "status": remote_task.get("status"),
+                "priority": remote_task.get("priority"),
+                "due_date": remote_task.get("due_date"),
+                "updated_at": remote_task.get("updated_at"),
+                "etag": self._remote_version(remote_task)
+            },
+            status='unresolved'
+        )
+        db.add(conflict)
+
+        # Mark sync item as conflict
+        item.status = 'conflict'
+        task.sync_status = 'conflict'
+
+        logger.warning(f"Conflict detected for task {task.task_id}")
+
+        # Notify UI
+        if self._ws_manager:
+            await self._ws_manager.broadcast_sync_status('task', task.task_id, 'conflict')
+
     async def _sync_pull_task(self, item: SyncQueue, db: Session):
-        """Pulls a remote task from Altimeter with conflict detection."""
+        """
+        Pulls a remote task from Altimeter with conflict detection.
+
+        The GET is conditional on the last synced ETag, so an unchanged task costs
+        a 304. A changed task conflicts only if a field we edited locally (and
+        haven't pushed yet) was also changed remotely to a different value;
+        otherwise remote values are merged into the fields we didn't touch.
+        """
         task = db.query(Task).filter(Task.task_id == item.entity_id).first()
         if not task:
             return
@@ -158,76 +519,40 @@ class AltimeterSyncService:
         if not remote_id:
             return
 
-        remote_task = await altimeter_api_service.get_task(remote_id)
+        dirty = task.dirty_fields or {}
+        remote_task = await altimeter_api_service.get_task(remote_id, etag=task.etag)
+        remote_version = None if remote_task is NOT_MODIFIED else self._remote_version(remote_task)
+
+        if remote_task is NOT_MODIFIED or (task.etag and remote_version == task.etag):
+            task.last_synced_at = datetime.now(timezone.utc)
+            task.sync_status = 'pending' if dirty else 'synced'
+            return
         if not remote_task:
             return
 
-        # CONFLICT DETECTION
-        local_updated = task.updated_at if task.updated_at else task.created_at
-        if local_updated.tzinfo is None:
-            local_updated = local_updated.replace(tzinfo=timezone.utc)
-
-        remote_updated_str = remote_task.get("updated_at")
-        last_sync = task.last_synced_at
-        if last_sync and last_sync.tzinfo is None:
-            last_sync = last_sync.replace(tzinfo=timezone.utc)
-
-        if remote_updated_str:
-            remote_updated = datetime.fromisoformat(remote_updated_str.replace('Z', '+00:00'))
-
-            # Check if both changed since last sync
-            if last_sync and local_updated > last_sync and remote_updated > last_sync:
-                # CONFLICT: Both sides changed
-                time_delta = abs((local_updated - remote_updated).total_seconds())
-
-                if time_delta < 300:  # Within 5 minutes
-                    # Create conflict record
-                    conflict = SyncConflict(
-                        entity_type='task',
-                        entity_id=task.task_id,
-                        local_version={
-                            "title": task.title,
-                            "description": task.description,
-                            "status": task.status,
-                            "priority": task.priority,
-                            "due_date": task.due_date.isoformat() if task.due_date else None,
-                            "updated_at": local_updated.isoformat()
-                        },
-                        remote_version={
-                            "title": remote_task.get("title"),
-                            "description": remote_task.get("description"),
-                            "status": remote_task.get("status"),
-                            "priority": remote_task.get("priority"),
-                            "due_date": remote_task.get("due_date"),
-                            "updated_at": remote_updated.isoformat()
-                        },
-                        status='unresolved'
-                    )
-                    db.add(conflict)
-
-                    # Mark sync item as conflict
-                    item.status = 'conflict'
-                    task.sync_status = 'conflict'
-
-                    logger.warning(f"Conflict detected for task {task.task_id}")
-
-                    # Notify UI
-                    if self._ws_manager:
-                        await self._ws_manager.broadcast_sync_status('task', task.task_id, 'conflict')
-
-                    return  # Don't auto-merge
-
-        # No conflict, safe to merge
-        task.title = remote_task.get("title", task.title)
-        task.description = remote_task.get("description", task.description)
-        task.status = remote_task.get("status", task.status)
-        task.priority = remote_task.get("priority", task.priority)
-
-        if remote_task.get("due_date"):
+        # CONFLICT DETECTION: both sides changed the same field (from its last
+        # synced value) to different values
+        conflicting = [
+            f for f, base in dirty.items()
+            if f in remote_task
+            and self._comparable(f, remote_task[f]) != self._comparable(f, base)
+            and self._comparable(f, remote_task[f]) != self._comparable(f, getattr(task, f))
+        ]
+        if conflicting:
+            await self._record_conflict(item, task, db, remote_task)
+            return  # Don't auto-merge
+
+        # No conflict, safe to merge (local edits awaiting push are kept)
+        task._applying_remote = True
+        for field in ("title", "description", "status", "priority"):
+            if field not in dirty and field in remote_task:
+                setattr(task, field, remote_task[field])
+        if remote_task.get("due_date") and "due_date" not in dirty:
             task.due_date = datetime.fromisoformat(remote_task["due_date"])
 
+        task.etag = remote_version
         task.last_synced_at = datetime.now(timezone.utc)
-        task.sync_status = 'synced'
+        task.sync_status = 'pending' if dirty else 'synced'
 
     def _log_history(self, db: Session, item: SyncQueue, status: str, details: str = None):
         log = SyncActivityLog(
@@ -239,27 +564,79 @@ class AltimeterSyncService:
         )
         db.add(log)
 
-    def enqueue_task(self, db: Session, task_id: int, direction: str):
-        """Helper to enqueue a task for sync."""
-        existing = db.query(SyncQueue).filter(
+    def enqueue_task(self, db: Session, task_id: int, direction: str, debounce_seconds: Optional[float] = None):
+        """
+        Helper to enqueue a task for sync, coalesced with the task's queued operations:
+        - repeated pushes (or pulls) merge into one row, pushed back by the debounce
+          window but never more than SYNC_COALESCE_MAX_DELAY_SECONDS after the first;
+        - a pull arriving while a push is queued takes the push's place in line and
+          the push is re-queued right behind it with its schedule, so remote changes
+          are merged (and the ETag refreshed) before the push's If-Match is sent;
+          a pull already queued ahead of the push absorbs it.
+        Pushes debounce by SYNC_PUSH_DEBOUNCE_SECONDS unless `debounce_seconds` is given.
+        """
+        if debounce_seconds is None:
+            debounce_seconds = float(settings.SYNC_PUSH_DEBOUNCE_SECONDS) if direction == 'push' else 0.0
+        now = datetime.now(timezone.utc)
+
+        queued = db.query(SyncQueue).filter(
             SyncQueue.entity_type == 'task',
             SyncQueue.entity_id == task_id,
-            SyncQueue.direction == direction,
             or_(SyncQueue.status == 'pending', SyncQueue.status == 'retry')
-        ).first()
-
-        if existing:
-            return existing
+        ).order_by(SyncQueue.id).all()
+        same = [q for q in queued if q.direction == direction]
+        pushes = same if direction == 'push' else [q for q in queued if q.direction == 'push']
+
+        if direction == 'pull' and pushes and not (same and same[0].id < pushes[0].id):
+            push = pushes[0]
+            db.add(SyncQueue(
+                entity_type='task',
+                entity_id=task_id,
+                direction='push',
+                status=push.status,
+                retry_count=push.retry_count,
+                error_message=push.error_message,
+                created_at=push.created_at, # Keeps the coalescing cap
+                next_attempt_at=push.next_attempt_at
+            ))
+            push.direction = 'pull'
+            push.status = 'pending'
+            push.retry_count = 0
+            push.error_message = None
+            push.next_attempt_at = now + timedelta(seconds=debounce_seconds)
+            for duplicate in same:
+                duplicate.status = 'coalesced'
+            self.coalesced += len(same)
+            db.commit()
+            db.refresh(push)
+            self.wake()
+            return push
+
+        if same:
+            item = same[0]
+            for duplicate in same[1:]:
+                duplicate.status = 'coalesced'
+            if debounce_seconds and item.status == 'pending':
+                first_queued = item.created_at or now
+                if first_queued.tzinfo is None:
+                    first_queued = first_queued.replace(tzinfo=timezone.utc)
+                latest = first_queued + timedelta(seconds=float(settings.SYNC_COALESCE_MAX_DELAY_SECONDS))
+                item.next_attempt_at = max(now, min(now + timedelta(seconds=debounce_seconds), latest))
+            self.coalesced += len(same)
+            db.commit()
+            return item
 
         item = SyncQueue(
             entity_type='task',
             entity_id=task_id,
             direction=direction,
-            status='pending'
+            status='pending',
+            next_attempt_at=now + timedelta(seconds=debounce_seconds)
         )
         db.add(item)
         db.commit()
         db.refresh(item)
+        self.wake()
         return item
 
 altimeter_sync_service = AltimeterSyncService()
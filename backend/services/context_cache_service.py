@@ -0,0 +1,97 @@
+import time
+import threading
+from typing import Callable, Dict, Any, List, Optional, Tuple
+from services.prompt_builder import count_tokens
+
+class ContextFragmentCache:
+    """
+    Cache for the pieces of the [SYSTEM CONTEXT] block (lessons, active projects, ...).
+
+    A fragment is rebuilt when any of these happens:
+    - its TTL expires;
+    - its version stamp changes (e.g. the Altimeter data_version);
+    - it is invalidated explicitly (e.g. by LearningService.record_lesson).
+    Otherwise every request reuses the same text. A rebuild that was
+    invalidated while `loader()` ran is returned but not stored. `assemble` joins fragments
+    in priority order within a token budget. Lower-priority fragments are
+    trimmed line by line first. The assembled block is memoized by its
+    fragments' text.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._fragments: Dict[str, Dict[str, Any]] = {}
+        self._assembled: Dict[Tuple, str] = {}
+        # Bumped by invalidate(): per fragment, and for all fragments at once
+        self._generations: Dict[str, int] = {}
+        self._epoch = 0
+        self._stats = {"hits": 0, "misses": 0, "invalidations": 0, "trimmed": 0}
+
+    def get(self, name: str, loader: Callable[[], str], ttl: float, version: Any = None) -> str:
+        """Fragment `name`, rebuilt with `loader()` when expired, invalidated or its version changed."""
+        now = time.monotonic()
+        with self._lock:
+            fragment = self._fragments.get(name)
+            if fragment and fragment["expires_at"] > now and fragment["version"] == version:
+                self._stats["hits"] += 1
+                return fragment["text"]
+            self._stats["misses"] += 1
+            generation = (self._epoch, self._generations.get(name, 0))
+
+        text = loader()
+        with self._lock:
+            if generation == (self._epoch, self._generations.get(name, 0)):
+                self._fragments[name] = {"text": text, "version": version, "expires_at": now + ttl}
+        return text
+
+    def invalidate(self, name: Optional[str] = None):
+        """Drop one fragment (or all of them); the next request rebuilds it."""
+        with self._lock:
+            if name is None:
+                self._fragments = {}
+                self._epoch += 1
+            else:
+                self._fragments.pop(name, None)
+                self._generations[name] = self._generations.get(name, 0) + 1
+            self._assembled = {}
+            self._stats["invalidations"] += 1
+
+    def assemble(self, header: str, parts: List[Tuple[str, str]], token_budget: int) -> str:
+        """
+        Join `parts` ((name, text) in priority order) under `header`, trimmed to `token_budget`.
+        """
+        key = (header, token_budget, tuple(text for _, text in parts))
+        with self._lock:
+            cached = self._assembled.get(key)
+            if cached is not None:
+                return cached
+
+        assembled, used = header, count_tokens(header)
+        for _, text in parts:
+            cost = count_tokens(text)
+            if used + cost <= token_budget:
+                assembled += text
+                used += cost
+                continue
+            # Keep the leading lines that still fit (the fragment's label comes first)
+            self._stats["trimmed"] += 1
+            kept = ""
+            for line in text.splitlines(keepends=True):
+                if used + count_tokens(kept + line) > token_budget:
+                    break
+                kept += line
+            if kept:
+                assembled += kept
+                used += count_tokens(kept)
+
+        with self._lock:
+            if len(self._assembled) > 64: # One entry per strata level in practice
+                self._assembled = {}
+            self._assembled[key] = assembled
+        return assembled
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"fragments": sorted(self._fragments), **self._stats}
+
+# Singleton instance
+context_cache = ContextFragmentCache()
@@ -115,6 +115,19 @@ class DataAPI:
          finally:
              db.close()
 
+    def requeue_task(self, task_id: int, reason: str):
+        """Returns a claimed task to 'pending' (e.g. the AI service shed it) so it is picked up again."""
+        db = SessionLocal()
+        try:
+            task = db.query(TaskQueue).filter(TaskQueue.id == task_id).first()
+            if task:
+                task.status = "pending"
+                task.agent_id = None
+                task.error_message = reason
+                db.commit()
+        finally:
+            db.close()
+
     def create_project_task(self, task_data: Dict[str, Any]) -> int:
         """
         Creates a new Task in the project management table (not the queue).
@@ -2,7 +2,9 @@ import os
 import re
 import shutil
 import glob
+import fnmatch
 import datetime
+import threading
 from typing import List, Dict, Optional, Tuple
 from services.activity_service import activity_service
 from database.database import get_db
@@ -10,9 +12,20 @@ from database.models import DocumentComment
 from datetime import datetime as dt
 
 class DocumentControlService:
+    # state key -> (folder, filename pattern, state label)
+    STATE_FOLDERS = {
+        "draft": ("DRAFTS", "*.DRAFT.md", "DRAFT"),
+        "review": ("REVIEW", "*.REVIEW-v*.md", "REVIEW"),
+        "locked": ("LOCKED", "*.LOCKED-v*.md", "LOCKED")
+    }
+
     def __init__(self):
         self.root_path = r"c:\Users\mhkem\OneDrive\Documents\Davis Projects OneDrive"
         self.sections = ["GUIDELINES", "SKILLS", "TRAINING"]
+        # In-memory listing kept current by the file watcher; None means scan on every call
+        self._catalog: Optional[Dict[str, List[Dict]]] = None
+        self._catalog_root: Optional[str] = None
+        self._catalog_lock = threading.Lock()
 
     def _get_version(self, filename: str) -> str:
         """Extracts version from filename like file.LOCKED-v1.2.md"""
@@ -77,7 +90,8 @@ author: Atlas
             
         with open(file_path, 'w', encoding='utf-8') as f:
             f.write(content)
-            
+
+        self.update_catalog_path(file_path)
         return {"filename": filename, "path": file_path, "status": "created"}
 
     def save_draft(self, path: str, content: str) -> Dict[str, str]:
@@ -93,7 +107,8 @@ author: Atlas
             
         with open(path, 'w', encoding='utf-8') as f:
             f.write(content)
-            
+
+        self.update_catalog_path(path)
         return {"path": path, "status": "saved"}
         
     def delete_draft(self, path: str) -> Dict[str, str]:
@@ -107,6 +122,7 @@ author: Atlas
              raise ValueError("Can only delete DRAFT files")
              
         os.remove(path)
+        self.update_catalog_path(path)
         return {"path": path, "status": "deleted"}
 
     def get_document_content(self, path: str) -> str:
@@ -120,11 +136,21 @@ author: Atlas
 
     # --- Listing & Promotion ---
 
-    def get_all_documents(self) -> Dict[str, List[Dict]]:
-        """
-        Scans DRAFTS, REVIEW, LOCKED, ARCHIVE folders in all managed sections.
-        Returns grouped by state.
-        """
+    def _doc_entry(self, path: str, section: str, state_key: str) -> Dict:
+        filename = os.path.basename(path)
+        entry = {
+            "id": filename,
+            "filename": filename,
+            "path": path,
+            "section": section,
+            "state": self.STATE_FOLDERS[state_key][2],
+            "modified": os.path.getmtime(path)
+        }
+        if state_key != "draft":
+            entry["version"] = self._get_version(filename)
+        return entry
+
+    def _scan_documents(self) -> Dict[str, List[Dict]]:
         docs = {
             "draft": [],
             "review": [],
@@ -136,47 +162,12 @@ author: Atlas
             base_dir = os.path.join(self.root_path, section)
             if not os.path.exists(base_dir):
                 continue
-            
-            # Scan DRAFTS
-            draft_dir = os.path.join(base_dir, "DRAFTS")
-            if os.path.exists(draft_dir):
-                for f in glob.glob(os.path.join(draft_dir, "*.DRAFT.md")):
-                    docs["draft"].append({
-                        "id": os.path.basename(f),
-                        "filename": os.path.basename(f),
-                        "path": f,
-                        "section": section,
-                        "state": "DRAFT",
-                        "modified": os.path.getmtime(f)
-                    })
-
-            # Scan REVIEW
-            review_dir = os.path.join(base_dir, "REVIEW")
-            if os.path.exists(review_dir):
-                for f in glob.glob(os.path.join(review_dir, "*.REVIEW-v*.md")):
-                     docs["review"].append({
-                        "id": os.path.basename(f),
-                        "filename": os.path.basename(f),
-                        "path": f,
-                        "section": section,
-                        "state": "REVIEW",
-                        "version": self._get_version(os.path.basename(f)),
-                        "modified": os.path.getmtime(f)
-                    })
-
-            # Scan LOCKED
-            locked_dir = os.path.join(base_dir, "LOCKED")
-            if os.path.exists(locked_dir):
-                for f in glob.glob(os.path.join(locked_dir, "*.LOCKED-v*.md")):
-                     docs["locked"].append({
-                        "id": os.path.basename(f),
-                        "filename": os.path.basename(f),
-                        "path": f,
-                        "section": section,
-                        "state": "LOCKED",
-                        "version": self._get_version(os.path.basename(f)),
-                        "modified": os.path.getmtime(f)
-                    })
+
+            for state_key, (folder, pattern, _) in self.STATE_FOLDERS.items():
+                state_dir = os.path.join(base_dir, folder)
+                if os.path.exists(state_dir):
+                    for f in glob.glob(os.path.join(state_dir, pattern)):
+                        docs[state_key].append(self._doc_entry(f, section, state_key))
 
         # Sort by Date
         for key in docs:
@@ -184,6 +175,64 @@ author: Atlas
 
         return docs
 
+    def get_all_documents(self) -> Dict[str, List[Dict]]:
+        """
+        Scans DRAFTS, REVIEW, LOCKED, ARCHIVE folders in all managed sections.
+        Returns grouped by state. Served from the in-memory catalog when it is enabled.
+        """
+        with self._catalog_lock:
+            if self._catalog is not None and self._catalog_root == self.root_path:
+                return {key: list(entries) for key, entries in self._catalog.items()}
+        return self._scan_documents()
+
+    def enable_catalog(self):
+        """(Re)build the in-memory catalog; listings become cache reads from then on."""
+        docs = self._scan_documents()
+        with self._catalog_lock:
+            self._catalog = docs
+            self._catalog_root = self.root_path
+
+    def disable_catalog(self):
+        with self._catalog_lock:
+            self._catalog = None
+            self._catalog_root = None
+
+    def _classify(self, path: str) -> Optional[Tuple[str, str]]:
+        """Return (section, state_key) for a managed document path, else None."""
+        try:
+            rel = os.path.relpath(os.path.abspath(path), os.path.abspath(self.root_path))
+        except ValueError:
+            return None
+        parts = rel.split(os.sep)
+        if len(parts) != 3 or parts[0] not in self.sections:
+            return None
+        section, folder, filename = parts
+        for state_key, (state_folder, pattern, _) in self.STATE_FOLDERS.items():
+            if folder == state_folder and fnmatch.fnmatch(filename, pattern):
+                return section, state_key
+        return None
+
+    def update_catalog_path(self, *paths: str):
+        """Apply created/modified/deleted files to the catalog without rescanning."""
+        with self._catalog_lock:
+            if self._catalog is None or self._catalog_root != self.root_path:
+                return
+            for path in paths:
+                abs_path = os.path.abspath(path)
+                for key in self._catalog:
+                    self._catalog[key] = [
+                        e for e in self._catalog[key] if os.path.abspath(e["path"]) != abs_path
+                    ]
+                kind = self._classify(path)
+                if kind and os.path.exists(path):
+                    section, state_key = kind
+                    try:
+                        self._catalog[state_key].append(self._doc_entry(path, section, state_key))
+                    except OSError:
+                        continue
+            for key in self._catalog:
+                self._catalog[key].sort(key=lambda x: x['modified'], reverse=True)
+
     def promote_to_review(self, draft_path: str) -> dict:
         self._validate_path(draft_path)
 
@@ -240,6 +289,7 @@ approver: Pending
 
         # Remove the draft file to prevent duplicates
         os.remove(draft_path)
+        self.update_catalog_path(draft_path, review_path)
 
         return {"status": "success", "new_path": review_path, "version": version}
 
@@ -286,6 +336,7 @@ approver: Pending
 
         # 3. Delete Review File
         os.remove(review_path)
+        self.update_catalog_path(review_path, locked_path, *existing_locked)
 
         activity_service.log_activity(
             type="doc",
@@ -328,7 +379,8 @@ source_origin: {source_path}
 """
         with open(review_path, 'w', encoding='utf-8') as dst:
             dst.write(header + content)
-            
+
+        self.update_catalog_path(review_path)
         activity_service.log_activity(
             type="doc",
             action="Import & Promote",
@@ -503,6 +555,7 @@ source_origin: {source_path}
 
         # 3. Delete Review File
         os.remove(review_path)
+        self.update_catalog_path(review_path, draft_path)
 
         activity_service.log_activity(
             type="doc",
@@ -84,7 +84,8 @@ def persist_email_to_database(email_data, db: Session):
             context = altimeter_service.get_context_for_email(
                 sender=existing_email.sender or existing_email.from_address or "",
                 subject=existing_email.subject or "",
-                body=existing_email.body_text or ""
+                body=existing_email.body_text or "",
+                message_id=existing_email.message_id
             )
             if context.get("project"):
                 existing_email.project_id = context["project"].get("number")
@@ -144,7 +145,8 @@ def persist_email_to_database(email_data, db: Session):
         context = altimeter_service.get_context_for_email(
             sender=sender or "",
             subject=new_email.subject or "",
-            body=new_email.body_text or ""
+            body=new_email.body_text or "",
+            message_id=message_id
         )
         if context.get("project"):
             new_email.project_id = context["project"].get("number")
@@ -208,7 +210,10 @@ def persist_email_to_database(email_data, db: Session):
                     "subject": new_email.subject,
                     "sender": new_email.from_address,
                     "date": new_email.date_received.isoformat() if new_email.date_received else "",
-                    "message_id": new_email.message_id
+                    "message_id": new_email.message_id,
+                    "project_id": new_email.project_id,
+                    "provider": new_email.provider_type,
+                    "category": new_email.category
                 })
             except Exception as e:
                 print(f"Error generating embedding for email {new_email.email_id}: {e}")
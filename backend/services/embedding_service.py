@@ -1,6 +1,7 @@
 from typing import Dict, Any, List, Optional
 from services.ai_service import ai_service
-from services.search_service import search_service
+from services.search_service import search_service, build_email_metadata
+from services.lexical_index_service import lexical_index_service
 
 class EmbeddingService:
     """
@@ -21,6 +22,7 @@ class EmbeddingService:
                         - sender
                         - date
                         - message_id
+                        - project_id, provider, category (optional, filterable)
         """
         body = email_data.get('body') or email_data.get('body_text') or email_data.get('body_html') or ""
 
@@ -39,13 +41,7 @@ class EmbeddingService:
             existing = self.search_service.email_collection.get(ids=[msg_id])
             if existing and existing.get('ids') and len(existing['ids']) > 0:
                 # Update metadata only
-                metadata = {
-                    "subject": email_data.get('subject', ''),
-                    "sender": email_data.get('sender', ''),
-                    "date": email_data.get('date', ''),
-                    "message_id": msg_id,
-                    "source": "email"
-                }
+                metadata = build_email_metadata({**email_data, "message_id": msg_id})
                 self.search_service.email_collection.update(
                     ids=[msg_id],
                     metadatas=[metadata]
@@ -66,13 +62,7 @@ class EmbeddingService:
         # Store in ChromaDB
         try:
             # Metadata
-            metadata = {
-                "subject": email_data.get('subject', ''),
-                "sender": email_data.get('sender', ''),
-                "date": email_data.get('date', ''),
-                "message_id": msg_id,
-                "source": "email"
-            }
+            metadata = build_email_metadata({**email_data, "message_id": msg_id})
 
             # Upsert
             # Use search_service's collection.
@@ -83,14 +73,17 @@ class EmbeddingService:
                 metadatas=[metadata],
                 documents=[text_to_embed]
             )
+            # Mirror into the keyword index used by hybrid retrieval
+            lexical_index_service.upsert("emails", [msg_id], [text_to_embed], [metadata])
             return True
         except Exception as e:
             print(f"Error storing embedding: {e}")
             return False
 
-    def semantic_search_emails(self, query_text: str, top_k: int = 10) -> List[Dict[str, Any]]:
+    def semantic_search_emails(self, query_text: str, top_k: int = 10, filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         """
-        Semantic search for emails.
+        Semantic search for emails, optionally restricted by metadata filters
+        (project_id, sender, provider, category, date_from, date_to).
         """
         embedding = self.ai_service.get_embedding(query_text)
         if not embedding:
@@ -100,10 +93,11 @@ class EmbeddingService:
             if not self.search_service.email_collection:
                 return []
 
-            results = self.search_service.email_collection.query(
-                query_embeddings=[embedding],
-                n_results=top_k
-            )
+            query_kwargs = {"query_embeddings": [embedding], "n_results": top_k}
+            where = self.search_service.build_where(filters)
+            if where:
+                query_kwargs["where"] = where
+            results = self.search_service.email_collection.query(**query_kwargs)
 
             formatted_results = []
             if results['ids']:
@@ -0,0 +1,150 @@
+import os
+import logging
+import threading
+from typing import List, Optional
+from core.config import settings
+from services.knowledge_service import knowledge_service
+from services.document_control_service import document_control_service
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+
+logger = logging.getLogger("file_watcher")
+
+
+class _ChangeHandler(FileSystemEventHandler):
+    """Forwards watchdog events (including both ends of a move) to the watcher."""
+    def __init__(self, watcher: "FileWatcherService"):
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        if event.is_directory:
+            return
+        self.watcher.notify(event.src_path)
+        dest_path = getattr(event, "dest_path", None)
+        if dest_path:
+            self.watcher.notify(dest_path)
+
+
+class FileWatcherService:
+    """
+    Watches the Obsidian vault, the OneDrive knowledge folders and the document-control
+    root. Changes are debounced so an editor's burst of saves triggers a single update,
+    then applied incrementally to the vector index (KnowledgeService.sync_paths) and
+    to the in-memory document catalog (DocumentControlService).
+
+    Without watchdog installed, falls back to a periodic incremental sync.
+    """
+    def __init__(self, debounce_seconds: Optional[float] = None, poll_seconds: Optional[int] = None):
+        self.debounce_seconds = debounce_seconds if debounce_seconds is not None else settings.KNOWLEDGE_WATCHER_DEBOUNCE_SECONDS
+        self.poll_seconds = poll_seconds if poll_seconds is not None else settings.KNOWLEDGE_WATCHER_POLL_SECONDS
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._observer = None
+        self._poll_thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self.is_running = False
+
+    def get_watch_roots(self) -> List[str]:
+        roots = [
+            settings.OBSIDIAN_KNOWLEDGE_PATH,
+            settings.ONEDRIVE_ROOT_PATH,
+            document_control_service.root_path
+        ]
+        unique = []
+        for root in roots:
+            if root and os.path.isdir(root):
+                abs_root = os.path.abspath(root)
+                if abs_root not in unique:
+                    unique.append(abs_root)
+        return unique
+
+    def notify(self, path: str):
+        """Queue a changed path and (re)arm the debounce timer."""
+        if not path.endswith('.md'):
+            return
+        with self._lock:
+            self._pending.add(path)
+            if self._timer:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.debounce_seconds, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        """Apply all queued changes."""
+        with self._lock:
+            paths = sorted(self._pending)
+            self._pending.clear()
+            self._timer = None
+        if not paths:
+            return
+
+        try:
+            document_control_service.update_catalog_path(*paths)
+        except Exception as e:
+            logger.error(f"Document catalog update failed: {e}")
+
+        try:
+            results = knowledge_service.sync_paths(paths)
+            if results:
+                logger.info(f"Knowledge watcher synced {len(paths)} file(s): {results}")
+        except Exception as e:
+            logger.error(f"Knowledge index update failed: {e}")
+
+    def start(self):
+        if self.is_running:
+            return
+
+        document_control_service.enable_catalog()
+        roots = self.get_watch_roots()
+
+        if Observer is not None:
+            observer = Observer()
+            handler = _ChangeHandler(self)
+            for root in roots:
+                observer.schedule(handler, root, recursive=True)
+            observer.daemon = True
+            observer.start()
+            self._observer = observer
+            logger.info(f"Knowledge watcher started on {roots}")
+        else:
+            self._stop_event.clear()
+            self._poll_thread = threading.Thread(target=self._poll_loop, daemon=True, name="knowledge-poll")
+            self._poll_thread.start()
+            logger.info("watchdog not installed; knowledge watcher polling every %ss", self.poll_seconds)
+
+        self.is_running = True
+
+    def _poll_loop(self):
+        while not self._stop_event.wait(self.poll_seconds):
+            try:
+                knowledge_service.reindex_all()
+                document_control_service.enable_catalog()
+            except Exception as e:
+                logger.error(f"Knowledge poll failed: {e}")
+
+    def stop(self):
+        if not self.is_running:
+            return
+
+        self._stop_event.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join(timeout=5)
+            self._observer = None
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+        # Don't drop edits made right before shutdown
+        self.flush()
+        document_control_service.disable_catalog()
+        self.is_running = False
+
+file_watcher_service = FileWatcherService()
@@ -119,10 +119,18 @@ class GoogleService:
             results = self.gmail_service.users().messages().list(userId='me', q=query, maxResults=100).execute()
             messages = results.get('messages', [])
 
+            fetched = []
             for msg_ref in messages:
                 try:
-                    message = self.gmail_service.users().messages().get(userId='me', id=msg_ref['id'], format='full').execute()
+                    fetched.append(self.gmail_service.users().messages().get(userId='me', id=msg_ref['id'], format='full').execute())
+                except Exception as e:
+                    errors.append(f"Failed to process {msg_ref['id']}: {str(e)}")
+
+            # Enrich the whole page in one batch; per-message lookups below hit the memo
+            self._prefetch_context(fetched)
 
+            for message in fetched:
+                try:
                     email_data = self._extract_email_data(message)
                     result = persist_email_to_database(email_data, db)
 
@@ -130,9 +138,9 @@ class GoogleService:
                         if result["action"] == "created": # Only count new emails
                             synced_count += 1
                     else:
-                        errors.append(f"Failed to persist {msg_ref['id']}: {result.get('error')}")
+                        errors.append(f"Failed to persist {message.get('id')}: {result.get('error')}")
                 except Exception as e:
-                    errors.append(f"Failed to process {msg_ref['id']}: {str(e)}")
+                    errors.append(f"Failed to process {message.get('id')}: {str(e)}")
 
             if errors:
                 status = "partial" if synced_count > 0 else "failed"
@@ -157,6 +165,25 @@ class GoogleService:
         finally:
             db.close()
 
+    def _prefetch_context(self, messages):
+        """Resolve Altimeter context for a batch of Gmail messages in one call."""
+        from services.altimeter_service import altimeter_service
+        batch = []
+        for message in messages:
+            payload = message.get('payload', {})
+            headers = {h['name']: h['value'] for h in payload.get('headers', [])}
+            batch.append({
+                "sender": headers.get('From', ''),
+                "subject": headers.get('Subject', ''),
+                "body": self._extract_body(payload)[0],
+                "message_id": headers.get('Message-ID') or f"atlas-{message['id']}"
+            })
+        if batch:
+            try:
+                altimeter_service.get_context_for_emails(batch)
+            except Exception as e:
+                print(f"Batch context prefetch failed: {e}")
+
     def _extract_email_data(self, message):
         """Extract email data from Gmail message for persistence."""
         payload = message.get('payload', {})
@@ -171,7 +198,8 @@ class GoogleService:
         context = altimeter_service.get_context_for_email(
             headers.get('From', ''), 
             headers.get('Subject', ''),
-            body_text
+            body_text,
+            message_id=message_id or f"atlas-{remote_id}"
         )
         
         category = None
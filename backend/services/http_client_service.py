@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import threading
+from typing import Awaitable, Dict, Any, Optional, TypeVar
+import httpx
+from core.config import settings
+
+try:
+    import h2 # Optional: enables HTTP/2 for https upstreams that offer it
+except ImportError:
+    h2 = None
+
+logger = logging.getLogger("http_clients")
+
+T = TypeVar("T")
+
+class HttpClientRegistry:
+    """
+    App-scoped pooled HTTP clients, one per upstream (Ollama, weather, Altimeter health).
+
+    Each named client keeps its connections alive between calls, with a
+    per-host connection limit and a default timeout. Clients are created in
+    the FastAPI lifespan (or lazily on first use) and closed on shutdown.
+    Async clients are bound to the event loop that created them, so they are
+    kept per loop: another loop (e.g. a scheduler job's) gets its own and
+    never replaces the app's. Short-lived loops should be run through
+    `run()`, which closes their clients before the loop ends. Sync callers
+    (e.g. embeddings) share one thread-safe httpx.Client per upstream.
+    """
+    def __init__(self):
+        self._profiles: Dict[str, Dict[str, Any]] = {}
+        self._async: Dict[asyncio.AbstractEventLoop, Dict[str, httpx.AsyncClient]] = {}
+        self._sync: Dict[str, httpx.Client] = {}
+        self._lock = threading.Lock()
+        self._created = 0
+        self._abandoned = 0
+
+        max_connections = int(getattr(settings, "HTTP_POOL_MAX_CONNECTIONS", 10))
+        self.register("default", timeout=30.0, max_connections=max_connections)
+        self.register("ollama", timeout=60.0, max_connections=int(getattr(settings, "OLLAMA_MAX_CONNECTIONS", 4)))
+        self.register("weather", timeout=20.0, max_connections=max_connections)
+        self.register("altimeter", timeout=5.0, max_connections=max_connections)
+
+    def register(self, name: str, timeout: float = 30.0, max_connections: int = 10):
+        """Define (or redefine) a named client. Takes effect when the client is next created."""
+        self._profiles[name] = {"timeout": float(timeout), "max_connections": max(1, int(max_connections))}
+
+    def _client_kwargs(self, name: str) -> Dict[str, Any]:
+        profile = self._profiles.get(name) or self._profiles["default"]
+        limits = httpx.Limits(
+            max_connections=profile["max_connections"],
+            max_keepalive_connections=profile["max_connections"],
+            keepalive_expiry=float(getattr(settings, "HTTP_POOL_KEEPALIVE_SECONDS", 30.0))
+        )
+        return {"timeout": profile["timeout"], "limits": limits, "http2": h2 is not None}
+
+    def get(self, name: str = "default") -> httpx.AsyncClient:
+        """Shared async client for `name`, (re)created for the running event loop."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._forget_closed_loops()
+            clients = self._async.setdefault(loop, {})
+            client = clients.get(name)
+            if client is None or client.is_closed:
+                client = httpx.AsyncClient(**self._client_kwargs(name))
+                clients[name] = client
+                self._created += 1
+            return client
+
+    def _forget_closed_loops(self):
+        """Drop clients whose loop ended without closing them (they can't be awaited anymore)."""
+        for loop in [l for l in self._async if l.is_closed()]:
+            clients = self._async.pop(loop)
+            self._abandoned += sum(1 for c in clients.values() if not c.is_closed)
+
+    async def _close_loop_clients(self, loop: asyncio.AbstractEventLoop):
+        with self._lock:
+            clients = list(self._async.pop(loop, {}).values())
+        for client in clients:
+            await client.aclose()
+
+    def run(self, coro: Awaitable[T]) -> T:
+        """
+        asyncio.run() for sync code such as scheduler jobs: runs `coro` on a
+        fresh event loop and closes the async clients that loop opened.
+        """
+        async def scoped():
+            try:
+                return await coro
+            finally:
+                await self._close_loop_clients(asyncio.get_running_loop())
+        return asyncio.run(scoped())
+
+    def get_sync(self, name: str = "default") -> httpx.Client:
+        """Shared blocking client for `name` (for code that isn't async)."""
+        with self._lock:
+            client = self._sync.get(name)
+            if client is None or client.is_closed:
+                client = httpx.Client(**self._client_kwargs(name))
+                self._sync[name] = client
+                self._created += 1
+            return client
+
+    def start(self):
+        """Open the async clients up front (called from the app lifespan)."""
+        for name in self._profiles:
+            self.get(name)
+        logger.info(f"HTTP client pools ready: {', '.join(self._profiles)} (HTTP/2: {'on' if h2 else 'off'})")
+
+    async def aclose(self):
+        """Close every client; those of other, still running loops are closed on their own loop."""
+        with self._lock:
+            async_clients = self._async
+            sync_clients = list(self._sync.values())
+            self._async = {}
+            self._sync = {}
+        loop = asyncio.get_running_loop()
+        for client_loop, clients in async_clients.items():
+            for client in clients.values():
+                if client_loop is loop:
+                    await client.aclose()
+                elif not client_loop.is_closed():
+                    try:
+                        asyncio.run_coroutine_threadsafe(client.aclose(), client_loop)
+                    except RuntimeError: # Loop closed meanwhile
+                        pass
+        for client in sync_clients:
+            client.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "async_clients": sorted({name for clients in self._async.values() for name in clients}),
+                "event_loops": len(self._async),
+                "sync_clients": sorted(self._sync),
+                "clients_created": self._created,
+                "clients_abandoned": self._abandoned,
+                "http2": h2 is not None
+            }
+
+# Singleton instance
+http_clients = HttpClientRegistry()
@@ -0,0 +1,67 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional
+from services.search_service import search_service
+from services.lexical_index_service import lexical_index_service
+
+# Standard RRF damping constant; keeps a single top rank from dominating the fused list.
+RRF_K = 60
+
+class HybridSearchService:
+    """
+    Hybrid retriever: runs BM25 keyword search and vector similarity in parallel
+    and fuses the two rankings with Reciprocal Rank Fusion (RRF).
+    """
+    def __init__(self, max_workers: int = 4):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hybrid-search")
+
+    def fuse(self, ranked_lists: Dict[str, List[Dict[str, Any]]], n_results: int) -> List[Dict[str, Any]]:
+        """
+        Reciprocal Rank Fusion: score(d) = sum(1 / (RRF_K + rank)) over every list containing d.
+        Higher fused scores are better.
+        """
+        fused: Dict[str, Dict[str, Any]] = {}
+        for source, results in ranked_lists.items():
+            for rank, res in enumerate(results, start=1):
+                entry = fused.get(res["id"])
+                if entry is None:
+                    entry = {
+                        "id": res["id"],
+                        "score": 0.0,
+                        "metadata": res.get("metadata", {}),
+                        "content_snippet": res.get("content_snippet", ""),
+                        "sources": []
+                    }
+                    fused[res["id"]] = entry
+                entry["score"] += 1.0 / (RRF_K + rank)
+                entry["sources"].append(source)
+
+        ordered = sorted(fused.values(), key=lambda x: x["score"], reverse=True)
+        return ordered[:n_results]
+
+    def search(self, query: str, collection_name: str = "emails", n_results: int = 5,
+               filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Hybrid search over one collection.
+        Supported filters: project_id, sender, provider, category, date_from, date_to
+        (pushed into both engines).
+        """
+        # Over-fetch from each engine so fusion has room to re-rank
+        candidates = max(n_results * 3, 10)
+        vector_future = self._executor.submit(
+            search_service.search, query, collection_name, candidates, filters=filters
+        )
+        lexical_future = self._executor.submit(
+            lexical_index_service.search, query, collection_name, candidates, filters
+        )
+
+        ranked_lists = {}
+        for source, future in (("vector", vector_future), ("lexical", lexical_future)):
+            try:
+                ranked_lists[source] = future.result()
+            except Exception as e:
+                print(f"Hybrid search: {source} engine failed: {e}")
+                ranked_lists[source] = []
+
+        return self.fuse(ranked_lists, n_results)
+
+hybrid_search_service = HybridSearchService()
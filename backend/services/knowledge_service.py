@@ -3,11 +3,47 @@ import glob
 import yaml
 import re
 import hashlib
-from typing import List, Dict, Optional, Any
+import logging
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from typing import List, Dict, Optional, Any, Iterator, Tuple
 from datetime import datetime
 from core.config import settings
 from services.search_service import search_service
 from integrations.onedrive_service import onedrive_service
+from database.database import SessionLocal
+from database.models import KnowledgeManifest
+
+logger = logging.getLogger("knowledge")
+
+# Below this many changed files the pipeline parses in-process (pool startup isn't worth it)
+POOL_MIN_FILES = 16
+
+def _normalize_path(path: str) -> str:
+    """Manifest key for a file: absolute and normalized, so "./data/x.md" and "/app/data/x.md" match."""
+    return os.path.abspath(path)
+
+def _chunk_key(path: str) -> str:
+    """Vector ID stem for a file: the basename plus a hash of the normalized path, so
+    files with the same name in different folders (or a file moved between them) never share IDs."""
+    digest = hashlib.sha1(_normalize_path(path).encode("utf-8")).hexdigest()[:12]
+    return f"{os.path.basename(path)}@{digest}"
+
+def _prepare_file(build_chunks, file_path: str, known_sha256: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    Read, hash and chunk one file. Module-level so it can run in a worker process.
+    Returns chunks=None when the content hash is unchanged.
+    """
+    try:
+        with open(file_path, "r", encoding="utf-8") as f:
+            content = f.read()
+    except Exception as e:
+        print(f"Error reading knowledge file {file_path}: {e}")
+        return None
+
+    digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+    if digest == known_sha256:
+        return {"path": file_path, "sha256": digest, "chunks": None}
+    return {"path": file_path, "sha256": digest, "chunks": build_chunks(file_path, content)}
 
 class KnowledgeService:
     """
@@ -20,6 +56,12 @@ class KnowledgeService:
             "obsidian": settings.OBSIDIAN_KNOWLEDGE_PATH,
             "onedrive": settings.ONEDRIVE_ROOT_PATH
         }
+        self.workers = settings.KNOWLEDGE_REINDEX_WORKERS or os.cpu_count() or 1
+        self.batch_size = settings.KNOWLEDGE_REINDEX_BATCH_SIZE
+        # collection -> progress of the running / last sync
+        self.progress: Dict[str, Dict[str, Any]] = {}
+        # Bumped whenever indexed content changes (lets derived caches such as mission intel invalidate)
+        self.version = 0
 
     def _parse_frontmatter(self, content: str) -> Dict:
         """Extract YAML frontmatter from markdown content."""
@@ -47,99 +89,334 @@ class KnowledgeService:
                 chunks.append({"header": header, "content": body})
         return chunks
 
-    def load_skills_from_onedrive(self) -> Dict[str, Any]:
-        """Load SKILLS documents from OneDrive, chunk them, and index in ChromaDB."""
-        skills_folder = settings.ONEDRIVE_SKILLS_PATH
-        files = onedrive_service.list_knowledge_files(skills_folder)
-        all_chunks = []
-        for file_path in files:
-            content = onedrive_service.read_knowledge_file(file_path)
-            if not content: continue
-            filename = os.path.basename(file_path)
-            meta = self._parse_frontmatter(content)
-            title = meta.get('title') or filename.replace('.md', '')
-            mtime = os.path.getmtime(file_path)
-            chunks = self._chunk_document(content)
-            for i, chunk in enumerate(chunks):
-                all_chunks.append({
-                    "id": f"skill:{filename}:{i}",
-                    "text": f"Skill: {title}\nSection: {chunk['header']}\n\n{chunk['content']}",
-                    "metadata": {
-                        "filename": filename,
-                        "title": title,
-                        "section_header": chunk['header'],
-                        "category": "SKILL",
-                        "last_modified": mtime,
-                        "loaded_at": datetime.now().isoformat()
+    def _sync_files(self, collection: str, files: List[str], build_chunks, prune: bool = True) -> Dict[str, Any]:
+        """
+        Diff files against the knowledge manifest and only re-embed what changed.
+        Files with the same (mtime, size) are skipped without being read; touched but
+        identical files are skipped on sha256. Vectors of removed files and stale
+        chunks (e.g. a deleted H2 section) are deleted.
+
+        Changed files stream through a process pool (read, hash, chunk) and are
+        embedded/upserted in fixed-size batches, so memory stays bounded by the
+        batch size rather than the size of the vault.
+
+        With prune=False only the given files are considered (used by the file
+        watcher); a listed file that no longer exists is treated as removed.
+        Paths are normalized (_normalize_path) before any manifest lookup, write
+        or prune, whichever form the caller passed.
+        """
+        stats = {
+            "indexed_chunks": 0,
+            "changed_files": 0,
+            "unchanged_files": 0,
+            "removed_files": 0,
+            "stale_chunks_removed": 0
+        }
+        db = SessionLocal()
+        try:
+            manifest = self._load_manifest(db, collection)
+            seen = set()
+            candidates = []
+
+            for file_path in dict.fromkeys(_normalize_path(f) for f in files):
+                seen.add(file_path)
+                entry = manifest.get(file_path)
+                try:
+                    st = os.stat(file_path)
+                except OSError:
+                    if entry and self._remove_manifest_entry(db, collection, entry):
+                        stats["removed_files"] += 1
+                    continue
+
+                if entry and entry.mtime == st.st_mtime and entry.size == st.st_size:
+                    stats["unchanged_files"] += 1
+                    continue
+                candidates.append((file_path, st, entry))
+
+            progress = self._start_progress(collection, len(candidates))
+            batch = []
+            batch_chunks = 0
+            for (file_path, st, entry), prepared in self._prepare_stream(candidates, build_chunks):
+                progress["processed"] += 1
+                if prepared is None:
+                    continue
+
+                if prepared["chunks"] is None:
+                    entry.mtime = st.st_mtime
+                    entry.size = st.st_size
+                    stats["unchanged_files"] += 1
+                    continue
+
+                batch.append((file_path, st, entry, prepared))
+                batch_chunks += len(prepared["chunks"])
+                if batch_chunks >= self.batch_size:
+                    self._flush_batch(db, collection, batch, stats)
+                    progress["indexed_chunks"] = stats["indexed_chunks"]
+                    batch = []
+                    batch_chunks = 0
+
+            if batch:
+                self._flush_batch(db, collection, batch, stats)
+            db.commit()
+
+            # Files that disappeared from disk. Chunk IDs a live row still owns
+            # (e.g. vectors just upserted for the same file under its new path) stay.
+            if prune:
+                removed = [entry for path, entry in manifest.items() if path not in seen]
+                if removed:
+                    removed_ids = {id(entry) for entry in removed}
+                    live_ids = {
+                        cid
+                        for entry in db.query(KnowledgeManifest).filter(KnowledgeManifest.collection == collection).all()
+                        if id(entry) not in removed_ids
+                        for cid in (entry.chunk_ids or [])
                     }
-                })
-        if all_chunks:
-            search_service.skills_collection.upsert(
-                ids=[c["id"] for c in all_chunks],
-                documents=[c["text"] for c in all_chunks],
-                metadatas=[c["metadata"] for c in all_chunks]
-            )
-        return {"status": "success", "indexed_chunks": len(all_chunks)}
+                    for entry in removed:
+                        if self._remove_manifest_entry(db, collection, entry, keep=live_ids):
+                            stats["removed_files"] += 1
+            db.commit()
+        except Exception:
+            db.rollback()
+            self.progress.get(collection, {})["status"] = "error"
+            raise
+        finally:
+            db.close()
 
-    def load_guidelines_from_onedrive(self) -> Dict[str, Any]:
-        """Load GUIDELINES documents from OneDrive and index."""
-        folder = settings.ONEDRIVE_GUIDELINES_PATH
-        files = onedrive_service.list_knowledge_files(folder)
-        all_docs = []
-        for file_path in files:
-            content = onedrive_service.read_knowledge_file(file_path)
-            if not content: continue
-            filename = os.path.basename(file_path)
-            meta = self._parse_frontmatter(content)
-            mtime = os.path.getmtime(file_path)
-            all_docs.append({
-                "id": f"guideline:{filename}",
-                "text": content,
+        progress["indexed_chunks"] = stats["indexed_chunks"]
+        progress["status"] = "complete"
+        if stats["changed_files"] or stats["removed_files"]:
+            self.version += 1
+        stats["status"] = "success"
+        return stats
+
+    def _start_progress(self, collection: str, total: int) -> Dict[str, Any]:
+        progress = {
+            "status": "running",
+            "total": total,
+            "processed": 0,
+            "indexed_chunks": 0,
+            "started_at": datetime.now().isoformat()
+        }
+        self.progress[collection] = progress
+        return progress
+
+    def get_reindex_status(self) -> Dict[str, Any]:
+        """Progress of the running (or last) sync per collection."""
+        return {collection: dict(p) for collection, p in self.progress.items()}
+
+    def _prepare_stream(self, candidates: List[Tuple], build_chunks) -> Iterator[Tuple[Tuple, Optional[Dict[str, Any]]]]:
+        """
+        Yield (candidate, prepared) as files are parsed. Large runs use a process pool
+        with a bounded number of in-flight files: the pool only runs ahead of the
+        embedding step by that window (backpressure).
+        """
+        if self.workers <= 1 or len(candidates) < POOL_MIN_FILES:
+            for candidate in candidates:
+                file_path, _, entry = candidate
+                yield candidate, _prepare_file(build_chunks, file_path, entry.sha256 if entry else None)
+            return
+
+        max_in_flight = self.workers * 2
+        pending = {}
+        remaining = iter(candidates)
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            while True:
+                while len(pending) < max_in_flight:
+                    candidate = next(remaining, None)
+                    if candidate is None:
+                        break
+                    file_path, _, entry = candidate
+                    future = executor.submit(_prepare_file, build_chunks, file_path, entry.sha256 if entry else None)
+                    pending[future] = candidate
+                if not pending:
+                    break
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    candidate = pending.pop(future)
+                    try:
+                        yield candidate, future.result()
+                    except Exception as e:
+                        print(f"Error parsing {candidate[0]}: {e}")
+                        yield candidate, None
+
+    def _flush_batch(self, db, collection: str, batch: List[Tuple], stats: Dict[str, Any]):
+        """Embed and upsert one batch of parsed files, then record them in the manifest."""
+        ids, documents, metadatas, stale = [], [], [], []
+        for file_path, st, entry, prepared in batch:
+            new_ids = [c["id"] for c in prepared["chunks"]]
+            ids.extend(new_ids)
+            documents.extend(c["text"] for c in prepared["chunks"])
+            metadatas.extend(c["metadata"] for c in prepared["chunks"])
+            stale.extend(cid for cid in ((entry.chunk_ids if entry else None) or []) if cid not in new_ids)
+
+        try:
+            if ids and not search_service.upsert_documents(collection, ids=ids, documents=documents, metadatas=metadatas):
+                return
+            if stale:
+                search_service.delete_documents(collection, stale)
+        except Exception as e:
+            # Manifest is left untouched so these files are retried on the next sync
+            print(f"Error indexing batch of {len(batch)} files for {collection}: {e}")
+            return
+
+        for file_path, st, entry, prepared in batch:
+            if entry is None:
+                entry = KnowledgeManifest(collection=collection, path=file_path)
+                db.add(entry)
+            entry.mtime = st.st_mtime
+            entry.size = st.st_size
+            entry.sha256 = prepared["sha256"]
+            entry.chunk_ids = [c["id"] for c in prepared["chunks"]]
+            stats["changed_files"] += 1
+            stats["indexed_chunks"] += len(prepared["chunks"])
+        stats["stale_chunks_removed"] += len(stale)
+        db.commit()
+        logger.info(f"Indexed {stats['indexed_chunks']} chunks into {collection}")
+
+    def _load_manifest(self, db, collection: str) -> Dict[str, KnowledgeManifest]:
+        """
+        Manifest rows keyed by normalized path. Rows stored under another form of
+        the same path (older relative entries) are merged into one; only chunks the
+        kept row no longer covers are deleted, so the live vectors stay.
+        """
+        manifest: Dict[str, KnowledgeManifest] = {}
+        rows = db.query(KnowledgeManifest).filter(KnowledgeManifest.collection == collection).all()
+        for entry in sorted(rows, key=lambda m: m.mtime or 0, reverse=True):
+            path = _normalize_path(entry.path)
+            kept = manifest.get(path)
+            if kept is None:
+                entry.path = path
+                manifest[path] = entry
+                continue
+            orphaned = [cid for cid in (entry.chunk_ids or []) if cid not in (kept.chunk_ids or [])]
+            try:
+                if orphaned:
+                    search_service.delete_documents(collection, orphaned)
+            except Exception as e:
+                print(f"Error removing vectors for {entry.path}: {e}")
+                continue
+            db.delete(entry)
+        db.commit()
+        return manifest
+
+    def _remove_manifest_entry(self, db, collection: str, entry: KnowledgeManifest, keep: Optional[set] = None) -> bool:
+        """Delete a file's vectors (except IDs in `keep`) and its manifest row."""
+        chunk_ids = [cid for cid in (entry.chunk_ids or []) if cid not in (keep or ())]
+        try:
+            if chunk_ids:
+                search_service.delete_documents(collection, chunk_ids)
+        except Exception as e:
+            print(f"Error removing vectors for {entry.path}: {e}")
+            return False
+        db.delete(entry)
+        db.commit()
+        return True
+
+    def _skill_chunks(self, file_path: str, content: str) -> List[Dict[str, Any]]:
+        """Chunk a SKILL document by H2 section."""
+        filename = os.path.basename(file_path)
+        meta = self._parse_frontmatter(content)
+        title = meta.get('title') or filename.replace('.md', '')
+        mtime = os.path.getmtime(file_path)
+        return [
+            {
+                "id": f"skill:{_chunk_key(file_path)}:{i}",
+                "text": f"Skill: {title}\nSection: {chunk['header']}\n\n{chunk['content']}",
                 "metadata": {
                     "filename": filename,
-                    "title": meta.get('title') or filename.replace('.md', ''),
-                    "category": "GUIDELINE",
+                    "title": title,
+                    "section_header": chunk['header'],
+                    "category": "SKILL",
                     "last_modified": mtime,
                     "loaded_at": datetime.now().isoformat()
                 }
-            })
-        if all_docs:
-            search_service.guidelines_collection.upsert(
-                ids=[d["id"] for d in all_docs],
-                documents=[d["text"] for d in all_docs],
-                metadatas=[d["metadata"] for d in all_docs]
-            )
-        return {"status": "success", "indexed_docs": len(all_docs)}
+            }
+            for i, chunk in enumerate(self._chunk_document(content))
+        ]
+
+    def _whole_doc_chunks(self, file_path: str, content: str, id_prefix: str, category: str) -> List[Dict[str, Any]]:
+        """Index a GUIDELINE/TEMPLATE document as a single vector."""
+        if not content:
+            return []
+        filename = os.path.basename(file_path)
+        meta = self._parse_frontmatter(content)
+        return [{
+            "id": f"{id_prefix}:{_chunk_key(file_path)}",
+            "text": content,
+            "metadata": {
+                "filename": filename,
+                "title": meta.get('title') or filename.replace('.md', ''),
+                "category": category,
+                "last_modified": os.path.getmtime(file_path),
+                "loaded_at": datetime.now().isoformat()
+            }
+        }]
+
+    def _guideline_chunks(self, file_path: str, content: str) -> List[Dict[str, Any]]:
+        return self._whole_doc_chunks(file_path, content, "guideline", "GUIDELINE")
+
+    def _template_chunks(self, file_path: str, content: str) -> List[Dict[str, Any]]:
+        return self._whole_doc_chunks(file_path, content, "template", "TEMPLATE")
+
+    def _obsidian_chunks(self, file_path: str, content: str) -> List[Dict[str, Any]]:
+        return self._knowledge_chunks(file_path, content, self.sources["obsidian"], "Knowledge Base")
+
+    def _collection_sources(self) -> Dict[str, Any]:
+        """Map each vector collection to its source folder and chunk builder."""
+        onedrive_root = onedrive_service.root_path
+        return {
+            "knowledge": (self.sources["obsidian"], self._obsidian_chunks),
+            "skills": (os.path.join(onedrive_root, settings.ONEDRIVE_SKILLS_PATH), self._skill_chunks),
+            "guidelines": (os.path.join(onedrive_root, settings.ONEDRIVE_GUIDELINES_PATH), self._guideline_chunks),
+            "templates": (os.path.join(onedrive_root, settings.ONEDRIVE_TEMPLATES_PATH), self._template_chunks)
+        }
+
+    def sync_paths(self, paths: List[str]) -> Dict[str, Any]:
+        """
+        Incrementally index specific changed/deleted files (called by the file watcher).
+        Paths outside the known knowledge folders are ignored.
+        """
+        sources = self._collection_sources()
+        grouped: Dict[str, List[str]] = {}
+        for path in paths:
+            if not path.endswith('.md'):
+                continue
+            abs_path = _normalize_path(path)
+            for collection, (folder, _) in sources.items():
+                if not folder:
+                    continue
+                abs_folder = _normalize_path(folder)
+                try:
+                    if os.path.commonpath([abs_path, abs_folder]) == abs_folder:
+                        grouped.setdefault(collection, []).append(abs_path)
+                        break
+                except ValueError:
+                    continue # Different drives on Windows
+
+        return {
+            collection: self._sync_files(collection, files, sources[collection][1], prune=False)
+            for collection, files in grouped.items()
+        }
+
+    def load_skills_from_onedrive(self) -> Dict[str, Any]:
+        """Load SKILLS documents from OneDrive, chunk them, and index changed files in ChromaDB."""
+        files = onedrive_service.list_knowledge_files(settings.ONEDRIVE_SKILLS_PATH)
+        return self._sync_files("skills", files, self._skill_chunks)
+
+    def load_guidelines_from_onedrive(self) -> Dict[str, Any]:
+        """Load GUIDELINES documents from OneDrive and index changed files."""
+        files = onedrive_service.list_knowledge_files(settings.ONEDRIVE_GUIDELINES_PATH)
+        stats = self._sync_files("guidelines", files, self._guideline_chunks)
+        stats["indexed_docs"] = stats["indexed_chunks"]
+        return stats
 
     def load_templates_from_onedrive(self) -> Dict[str, Any]:
-        """Load TEMPLATES documents from OneDrive and index."""
-        folder = settings.ONEDRIVE_TEMPLATES_PATH
-        files = onedrive_service.list_knowledge_files(folder)
-        all_docs = []
-        for file_path in files:
-            content = onedrive_service.read_knowledge_file(file_path)
-            if not content: continue
-            filename = os.path.basename(file_path)
-            meta = self._parse_frontmatter(content)
-            mtime = os.path.getmtime(file_path)
-            all_docs.append({
-                "id": f"template:{filename}",
-                "text": content,
-                "metadata": {
-                    "filename": filename,
-                    "title": meta.get('title') or filename.replace('.md', ''),
-                    "category": "TEMPLATE",
-                    "last_modified": mtime,
-                    "loaded_at": datetime.now().isoformat()
-                }
-            })
-        if all_docs:
-            search_service.templates_collection.upsert(
-                ids=[d["id"] for d in all_docs],
-                documents=[d["text"] for d in all_docs],
-                metadatas=[d["metadata"] for d in all_docs]
-            )
-        return {"status": "success", "indexed_docs": len(all_docs)}
+        """Load TEMPLATES documents from OneDrive and index changed files."""
+        files = onedrive_service.list_knowledge_files(settings.ONEDRIVE_TEMPLATES_PATH)
+        stats = self._sync_files("templates", files, self._template_chunks)
+        stats["indexed_docs"] = stats["indexed_chunks"]
+        return stats
 
     def search_knowledge(self, query: str, collection: str = "skills", top_k: int = 5) -> List[Dict[str, Any]]:
         """Semantic search across knowledge collections."""
@@ -155,7 +432,7 @@ class KnowledgeService:
         }
 
     def sync_knowledge(self) -> Dict[str, Any]:
-        """Smart sync: only re-index changed files."""
+        """Smart sync: only re-index changed files (see _sync_files)."""
         stats = {
             "skills": self.load_skills_from_onedrive(),
             "guidelines": self.load_guidelines_from_onedrive(),
@@ -164,43 +441,75 @@ class KnowledgeService:
         return {"status": "success", "details": stats}
 
     # Legacy scan methods for Obsidian
-    def _scan_directory(self, root_path: str, source_name: str) -> List[Dict]:
-        results = []
-        if not os.path.exists(root_path): return results
+    def _list_markdown_files(self, root_path: str) -> List[str]:
+        """All .md files under root_path, skipping hidden folders (.obsidian, .trash)."""
+        paths = []
+        if not root_path or not os.path.exists(root_path): return paths
         for root, dirs, files in os.walk(root_path):
             dirs[:] = [d for d in dirs if not d.startswith('.')]
             for file in files:
                 if file.endswith('.md'):
-                    full_path = os.path.join(root, file)
-                    rel_path = os.path.relpath(full_path, root_path)
-                    try:
-                        with open(full_path, 'r', encoding='utf-8') as f:
-                            raw_content = f.read()
-                            meta = self._parse_frontmatter(raw_content)
-                            title = meta.get('title')
-                            if not title:
-                                for line in raw_content.split('\n'):
-                                    if line.startswith('# '):
-                                        title = line.replace('# ', '').strip(); break
-                            if not title: title = file.replace('.md', '')
-                            category = meta.get('category') or rel_path.split(os.sep)[0]
-                        results.append({
-                            "id": f"{source_name}:{rel_path.replace(os.sep, '/')}",
-                            "title": title,
-                            "filename": file,
-                            "path": rel_path.replace(os.sep, '/'),
-                            "source": source_name,
-                            "full_path": full_path,
-                            "category": category,
-                            "content": raw_content
-                        })
-                    except Exception as e: print(f"Error: {e}")
+                    paths.append(_normalize_path(os.path.join(root, file)))
+        return paths
+
+    def _build_knowledge_doc(self, full_path: str, raw_content: str, root_path: str, source_name: str) -> Dict:
+        """Parse one Obsidian note into the document shape used by index_knowledge_batch."""
+        file = os.path.basename(full_path)
+        rel_path = os.path.relpath(full_path, root_path)
+        meta = self._parse_frontmatter(raw_content)
+        title = meta.get('title')
+        if not title:
+            for line in raw_content.split('\n'):
+                if line.startswith('# '):
+                    title = line.replace('# ', '').strip(); break
+        if not title: title = file.replace('.md', '')
+        category = meta.get('category') or rel_path.split(os.sep)[0]
+        return {
+            "id": f"{source_name}:{rel_path.replace(os.sep, '/')}",
+            "title": title,
+            "filename": file,
+            "path": rel_path.replace(os.sep, '/'),
+            "source": source_name,
+            "full_path": full_path,
+            "category": category,
+            "content": raw_content
+        }
+
+    def _scan_directory(self, root_path: str, source_name: str) -> List[Dict]:
+        results = []
+        for full_path in self._list_markdown_files(root_path):
+            try:
+                with open(full_path, 'r', encoding='utf-8') as f:
+                    raw_content = f.read()
+                results.append(self._build_knowledge_doc(full_path, raw_content, root_path, source_name))
+            except Exception as e: print(f"Error: {e}")
         return results
 
-    def reindex_all(self):
-        """Perform full reindex of all sources."""
-        docs = self._scan_directory(self.sources["obsidian"], "Knowledge Base")
-        search_service.index_knowledge_batch(docs)
-        self.sync_knowledge()
+    def _knowledge_chunks(self, full_path: str, raw_content: str, root_path: str, source_name: str) -> List[Dict[str, Any]]:
+        doc = self._build_knowledge_doc(full_path, raw_content, root_path, source_name)
+        return [{
+            "id": doc["id"],
+            "text": f"Title: {doc['title']}\nCategory: {doc['category']}\n\n{doc['content']}",
+            "metadata": {
+                "title": doc["title"],
+                "category": doc["category"] or "UNCATEGORIZED",
+                "path": doc["path"],
+                "source": doc["source"],
+                "full_path": doc["full_path"]
+            }
+        }]
+
+    def reindex_all(self) -> Dict[str, Any]:
+        """
+        Reindex all sources. Incremental: the manifest skips unchanged files,
+        so only new/edited notes are re-embedded and deleted notes are purged.
+        """
+        details = {
+            "knowledge": self._sync_files(
+                "knowledge", self._list_markdown_files(self.sources["obsidian"]), self._obsidian_chunks
+            )
+        }
+        details.update(self.sync_knowledge()["details"])
+        return {"status": "success", "details": details}
 
 knowledge_service = KnowledgeService()
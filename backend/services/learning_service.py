@@ -3,6 +3,7 @@ from database.database import SessionLocal
 from database.models import Learning
 from datetime import datetime
 from typing import List, Dict, Any
+from services.context_cache_service import context_cache
 
 class LearningService:
     def get_recent_lessons(self, limit: int = 10) -> List[Dict[str, Any]]:
@@ -56,6 +57,8 @@ class LearningService:
             raise e
         finally:
             db.close()
+        # The AI system context lists recent lessons
+        context_cache.invalidate("lessons")
 
     # Legacy/Helper for AI Service context injection, maintaining backward compatibility if needed
     def get_lessons(self) -> str:
@@ -0,0 +1,192 @@
+import os
+import re
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+from core.config import settings
+
+# Hyphen is kept inside tokens so project numbers like 25-0142 match exactly.
+FTS_TOKENIZER = "unicode61 tokenchars '-'"
+
+class LexicalIndexService:
+    """
+    SQLite FTS5 keyword index that mirrors the ChromaDB collections.
+    Provides BM25 ranking for exact terms (project numbers, part numbers, names)
+    that embeddings match poorly.
+    """
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or os.path.join(settings.DATA_DIR, "databases", "lexical_index.db")
+        self._conn = None
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _ensure_initialized(self) -> bool:
+        """Lazy initialization so a missing FTS5 build never blocks startup."""
+        if self._initialized:
+            return self._conn is not None
+
+        self._initialized = True
+        try:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=5)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(f"""
+                CREATE TABLE IF NOT EXISTS lexical_docs (
+                    rowid INTEGER PRIMARY KEY,
+                    collection TEXT NOT NULL,
+                    doc_id TEXT NOT NULL,
+                    project_id TEXT,
+                    sender TEXT,
+                    date_epoch REAL,
+                    metadata TEXT,
+                    UNIQUE(collection, doc_id)
+                );
+                CREATE INDEX IF NOT EXISTS ix_lexical_docs_project ON lexical_docs(collection, project_id);
+                CREATE INDEX IF NOT EXISTS ix_lexical_docs_sender ON lexical_docs(collection, sender);
+                CREATE INDEX IF NOT EXISTS ix_lexical_docs_date ON lexical_docs(collection, date_epoch);
+                CREATE VIRTUAL TABLE IF NOT EXISTS lexical_fts USING fts5(content, tokenize="{FTS_TOKENIZER}");
+            """)
+            conn.commit()
+            self._conn = conn
+            return True
+        except Exception as e:
+            print(f"Lexical index unavailable: {e}")
+            self._conn = None
+            return False
+
+    @staticmethod
+    def to_epoch(value: Any) -> Optional[float]:
+        """Convert an ISO date string, datetime or number into a UNIX epoch."""
+        if value is None or value == "":
+            return None
+        if isinstance(value, (int, float)):
+            return float(value)
+        if isinstance(value, datetime):
+            return value.timestamp()
+        try:
+            return datetime.fromisoformat(str(value).replace('Z', '+00:00')).timestamp()
+        except ValueError:
+            return None
+
+    @staticmethod
+    def build_match_query(query: str) -> str:
+        """
+        Turn free text into an FTS5 MATCH expression.
+        Every token is quoted so punctuation never becomes FTS syntax.
+        """
+        tokens = re.findall(r"\w[\w\-]*", query or "")
+        return " OR ".join('"' + t.replace('"', '""') + '"' for t in tokens)
+
+    def upsert(self, collection: str, ids: List[str], documents: List[str], metadatas: List[Dict[str, Any]]) -> bool:
+        """Add or replace documents in the keyword index."""
+        if not ids or not self._ensure_initialized():
+            return False
+        try:
+            with self._lock:
+                for doc_id, text, meta in zip(ids, documents, metadatas):
+                    meta = meta or {}
+                    date_epoch = meta.get("date_epoch")
+                    if date_epoch is None:
+                        date_epoch = self.to_epoch(meta.get("date"))
+                    row = self._conn.execute(
+                        "SELECT rowid FROM lexical_docs WHERE collection = ? AND doc_id = ?",
+                        (collection, doc_id)
+                    ).fetchone()
+                    values = (meta.get("project_id"), meta.get("sender"), date_epoch, json.dumps(meta, default=str))
+                    if row:
+                        rowid = row["rowid"]
+                        self._conn.execute(
+                            "UPDATE lexical_docs SET project_id = ?, sender = ?, date_epoch = ?, metadata = ? WHERE rowid = ?",
+                            values + (rowid,)
+                        )
+                        self._conn.execute("DELETE FROM lexical_fts WHERE rowid = ?", (rowid,))
+                    else:
+                        cursor = self._conn.execute(
+                            "INSERT INTO lexical_docs (collection, doc_id, project_id, sender, date_epoch, metadata) VALUES (?, ?, ?, ?, ?, ?)",
+                            (collection, doc_id) + values
+                        )
+                        rowid = cursor.lastrowid
+                    self._conn.execute("INSERT INTO lexical_fts (rowid, content) VALUES (?, ?)", (rowid, text or ""))
+                self._conn.commit()
+            return True
+        except Exception as e:
+            print(f"Error updating lexical index: {e}")
+            return False
+
+    def delete(self, collection: str, ids: List[str]) -> bool:
+        """Remove documents from the keyword index."""
+        if not ids or not self._ensure_initialized():
+            return False
+        try:
+            with self._lock:
+                for doc_id in ids:
+                    row = self._conn.execute(
+                        "SELECT rowid FROM lexical_docs WHERE collection = ? AND doc_id = ?",
+                        (collection, doc_id)
+                    ).fetchone()
+                    if row:
+                        self._conn.execute("DELETE FROM lexical_fts WHERE rowid = ?", (row["rowid"],))
+                        self._conn.execute("DELETE FROM lexical_docs WHERE rowid = ?", (row["rowid"],))
+                self._conn.commit()
+            return True
+        except Exception as e:
+            print(f"Error deleting from lexical index: {e}")
+            return False
+
+    def search(self, query: str, collection: str = "emails", n_results: int = 5,
+               filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        BM25 keyword search with optional metadata pre-filters.
+        Supported filters: project_id, sender, provider, category, date_from, date_to.
+        """
+        match = self.build_match_query(query)
+        if not match or not self._ensure_initialized():
+            return []
+
+        sql = """
+            SELECT d.doc_id, d.metadata, bm25(lexical_fts) AS rank, lexical_fts.content AS content
+            FROM lexical_fts
+            JOIN lexical_docs d ON d.rowid = lexical_fts.rowid
+            WHERE lexical_fts MATCH ? AND d.collection = ?
+        """
+        params: List[Any] = [match, collection]
+        filters = filters or {}
+        if filters.get("project_id"):
+            sql += " AND d.project_id = ?"
+            params.append(filters["project_id"])
+        if filters.get("sender"):
+            sql += " AND d.sender = ?"
+            params.append(filters["sender"])
+        for key in ("provider", "category"):
+            if filters.get(key):
+                sql += f" AND json_extract(d.metadata, '$.{key}') = ?"
+                params.append(filters[key])
+        if filters.get("date_from") is not None:
+            sql += " AND d.date_epoch >= ?"
+            params.append(self.to_epoch(filters["date_from"]))
+        if filters.get("date_to") is not None:
+            sql += " AND d.date_epoch <= ?"
+            params.append(self.to_epoch(filters["date_to"]))
+        sql += " ORDER BY rank LIMIT ?"
+        params.append(n_results)
+
+        try:
+            with self._lock:
+                rows = self._conn.execute(sql, params).fetchall()
+            return [
+                {
+                    "id": r["doc_id"],
+                    "score": r["rank"],
+                    "metadata": json.loads(r["metadata"]) if r["metadata"] else {},
+                    "content_snippet": (r["content"] or "")[:200] + "..."
+                }
+                for r in rows
+            ]
+        except Exception as e:
+            print(f"Lexical search failed: {e}")
+            return []
+
+lexical_index_service = LexicalIndexService()
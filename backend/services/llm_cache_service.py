@@ -0,0 +1,152 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, Any, Optional
+from core.config import settings
+
+_WHITESPACE = re.compile(r"\s+")
+
+class LLMCacheService:
+    """
+    Persistent cache of LLM responses in a small SQLite database.
+
+    Entries are keyed by a hash of the model route, the normalized prompt,
+    json_mode and temperature, and expire after a TTL chosen by the caller.
+    Callers opt in per request. The cache is bounded to LLM_CACHE_MAX_ENTRIES,
+    and the least recently used entries are evicted first. Only successful
+    responses are stored.
+    """
+    def __init__(self, db_path: Optional[str] = None, max_entries: Optional[int] = None):
+        self.db_path = db_path or os.path.join(settings.DATA_DIR, "databases", "llm_cache.db")
+        self.max_entries = int(max_entries or getattr(settings, "LLM_CACHE_MAX_ENTRIES", 5000))
+        self.enabled = bool(getattr(settings, "LLM_CACHE_ENABLED", True))
+        self._conn = None
+        self._lock = threading.Lock()
+        self._initialized = False
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "saved_ms": 0.0}
+
+    def _ensure_initialized(self) -> bool:
+        """Lazy initialization; a broken cache file just disables caching."""
+        if self._initialized:
+            return self._conn is not None
+
+        self._initialized = True
+        try:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    model TEXT,
+                    tag TEXT,
+                    response TEXT NOT NULL,
+                    latency_ms REAL,
+                    created_at REAL NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_used_at REAL NOT NULL,
+                    hits INTEGER DEFAULT 0
+                );
+                CREATE INDEX IF NOT EXISTS ix_llm_cache_last_used ON llm_cache(last_used_at);
+            """)
+            conn.commit()
+            self._conn = conn
+            return True
+        except Exception as e:
+            print(f"LLM cache unavailable: {e}")
+            self._conn = None
+            return False
+
+    @staticmethod
+    def normalize_prompt(prompt: str) -> str:
+        # Prompts are indented f-strings; layout differences shouldn't miss the cache
+        return _WHITESPACE.sub(" ", prompt).strip()
+
+    @classmethod
+    def make_key(cls, model: str, prompt: str, json_mode: bool = False, temperature: Optional[float] = None) -> str:
+        payload = json.dumps([model, cls.normalize_prompt(prompt), bool(json_mode), temperature])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Cached entry {"response", "latency_ms", "model", "tag"} or None if missing/expired."""
+        if not self.enabled or not self._ensure_initialized():
+            return None
+        now = time.time()
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT response, latency_ms, model, tag, expires_at FROM llm_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None or row[4] <= now:
+                    if row is not None:
+                        self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                        self._conn.commit()
+                    self._stats["misses"] += 1
+                    return None
+                self._conn.execute(
+                    "UPDATE llm_cache SET hits = hits + 1, last_used_at = ? WHERE key = ?", (now, key)
+                )
+                self._conn.commit()
+                self._stats["hits"] += 1
+                self._stats["saved_ms"] += row[1] or 0.0
+        except sqlite3.Error as e:
+            # A locked or corrupt cache is a miss, not a failed request
+            print(f"Failed to read LLM cache entry: {e}")
+            self._stats["misses"] += 1
+            return None
+        return {"response": row[0], "latency_ms": row[1], "model": row[2], "tag": row[3]}
+
+    def put(self, key: str, response: str, ttl_seconds: int, model: Optional[str] = None,
+            tag: Optional[str] = None, latency_ms: Optional[float] = None):
+        if not self.enabled or not response or not self._ensure_initialized():
+            return
+        now = time.time()
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache "
+                    "(key, model, tag, response, latency_ms, created_at, expires_at, last_used_at, hits) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0)",
+                    (key, model, tag, response, latency_ms, now, now + ttl_seconds, now)
+                )
+                self._stats["stores"] += 1
+                count = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+                if count > self.max_entries:
+                    # Expired entries go first, then the least recently used
+                    self._conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,))
+                    excess = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0] - self.max_entries
+                    if excess > 0:
+                        self._conn.execute(
+                            "DELETE FROM llm_cache WHERE key IN "
+                            "(SELECT key FROM llm_cache ORDER BY last_used_at LIMIT ?)", (excess,)
+                        )
+                    self._stats["evictions"] += count - self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+                self._conn.commit()
+        except Exception as e:
+            print(f"Failed to store LLM cache entry: {e}")
+
+    def clear(self):
+        if not self._ensure_initialized():
+            return
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        entries = 0
+        if self._ensure_initialized():
+            with self._lock:
+                entries = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            "entries": entries,
+            "hit_rate": round(self._stats["hits"] / lookups, 3) if lookups else None,
+            **self._stats
+        }
+
+# Singleton instance
+llm_cache_service = LLMCacheService()
@@ -0,0 +1,343 @@
+import time
+import heapq
+import asyncio
+import itertools
+import threading
+import contextvars
+from contextlib import asynccontextmanager, contextmanager
+from typing import Dict, Any, List, Optional
+from core.config import settings
+from services.llm_quota_store import LLMQuotaStore
+from services.prompt_builder import count_tokens
+
+# Priority lanes, lowest value served first
+PRIORITY_INTERACTIVE = 0 # A user is waiting (chat)
+PRIORITY_AGENT = 1       # Agent work triggered by a user action (default)
+PRIORITY_BATCH = 2       # Background ingestion and scheduled jobs
+LANE_NAMES = {PRIORITY_INTERACTIVE: "interactive", PRIORITY_AGENT: "agent", PRIORITY_BATCH: "batch"}
+
+_current_priority: contextvars.ContextVar = contextvars.ContextVar("llm_priority", default=PRIORITY_AGENT)
+
+class LLMOverloaded(Exception):
+    """A request was shed instead of queued (batch lane full or waited too long)."""
+    pass
+
+class TokenBucket:
+    """
+    `rate_per_minute` units refilled continuously, up to one minute's worth (0 = unlimited).
+    Shared by every event loop that calls the backend, so it is thread-safe.
+    """
+    def __init__(self, rate_per_minute: float):
+        self.rate = float(rate_per_minute) / 60.0
+        self.capacity = float(rate_per_minute)
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float = 1.0) -> float:
+        """Seconds until `amount` can be taken (0 = now)."""
+        with self._lock:
+            now = time.monotonic()
+            paused = max(0.0, self._paused_until - now)
+            if self.rate <= 0:
+                return paused
+            self._refill(now)
+            missing = min(amount, self.capacity) - self.tokens
+            return max(paused, missing / self.rate if missing > 0 else 0.0)
+
+    def take(self, amount: float = 1.0):
+        if self.rate > 0:
+            with self._lock:
+                self._refill(time.monotonic())
+                self.tokens -= amount # May go negative after a usage correction; refill pays it back
+
+    def pause(self, seconds: float):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+class _Backend:
+    """A backend's admission state in this process, shared by every event loop."""
+    def __init__(self, name: str, concurrency: int, requests: TokenBucket, tokens: TokenBucket):
+        self.name = name
+        self.concurrency = max(1, int(concurrency))
+        self.requests = requests
+        self.tokens = tokens
+        self.in_flight = 0
+        self.leases: List[str] = [] # Shared-store slots held by this process
+        self.waiters: List = [] # heap of (priority, seq, enqueued_at, tokens, future)
+        self.timer: Optional[threading.Timer] = None
+        self.demand: Optional[int] = None # Best waiting priority last published to the shared store
+
+class LLMDispatcher:
+    """
+    Central admission control for LLM calls (Ollama and Gemini).
+
+    Callers wait in priority lanes: interactive, then agent, then batch.
+    Each backend has a concurrency cap, plus token buckets for requests and
+    tokens per minute. A 429 pauses the whole backend, so every caller backs
+    off together instead of retrying on its own. Batch requests are shed
+    (LLMOverloaded) once their lane is full or they have waited too long,
+    so bulk ingestion can't starve interactive chat. Every lane has a
+    finite max wait, so no caller can hang on a stuck queue.
+
+    One queue per backend serves every event loop in the process (the app's,
+    and asyncio.run in scheduler threads); a waiter is woken on its own loop.
+    With LLM_ADMISSION_SHARED, slots, rate limits and lane priority are also
+    coordinated with other processes (the task worker) through
+    LLMQuotaStore, so the concurrency caps and the Gemini quota are global
+    and batch work in any process yields to interactive requests. If the
+    shared store is off or unavailable, the limits apply per process.
+    """
+    def __init__(self, store: Optional[LLMQuotaStore] = None):
+        self.max_batch_queue = int(getattr(settings, "LLM_BATCH_MAX_QUEUE", 50))
+        self.max_wait = {
+            PRIORITY_INTERACTIVE: float(getattr(settings, "LLM_INTERACTIVE_MAX_WAIT_SECONDS", 60.0)),
+            PRIORITY_AGENT: float(getattr(settings, "LLM_AGENT_MAX_WAIT_SECONDS", 300.0)),
+            PRIORITY_BATCH: float(getattr(settings, "LLM_BATCH_MAX_WAIT_SECONDS", 120.0)),
+        }
+        self._backend_config = {
+            "gemini": (
+                int(getattr(settings, "GEMINI_MAX_CONCURRENCY", 4)),
+                float(getattr(settings, "GEMINI_REQUESTS_PER_MINUTE", 15)),
+                float(getattr(settings, "GEMINI_TOKENS_PER_MINUTE", 1000000)),
+            ),
+            "ollama": (int(getattr(settings, "OLLAMA_MAX_CONCURRENCY", 1)), 0, 0),
+        }
+        if store is None and getattr(settings, "LLM_ADMISSION_SHARED", True):
+            store = LLMQuotaStore()
+        self.store = store
+        # Reentrant: timers, releases and acquires from any thread dispatch under it
+        self._lock = threading.RLock()
+        self._backends: Dict[str, _Backend] = {}
+        self._seq = itertools.count()
+        self._lanes = {p: {"requests": 0, "shed": 0, "wait_ms_total": 0.0, "max_wait_ms": 0.0} for p in LANE_NAMES}
+
+    # --- Lanes ---
+
+    @contextmanager
+    def lane(self, priority: int):
+        """Run LLM calls made inside this block (in this task) at `priority`."""
+        token = _current_priority.set(priority)
+        try:
+            yield
+        finally:
+            _current_priority.reset(token)
+
+    @staticmethod
+    def current_priority() -> int:
+        return _current_priority.get()
+
+    # --- Admission ---
+
+    def _backend(self, name: str) -> _Backend:
+        with self._lock:
+            backend = self._backends.get(name)
+            if backend is None:
+                concurrency, requests_per_minute, tokens_per_minute = self._backend_config.get(name, (4, 0, 0))
+                backend = _Backend(name, concurrency, TokenBucket(requests_per_minute), TokenBucket(tokens_per_minute))
+                self._backends[name] = backend
+            return backend
+
+    def configure(self, name: str, concurrency: Optional[int] = None,
+                  requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None):
+        """Override a backend's limits (queued waiters are kept)."""
+        with self._lock:
+            current = self._backend_config.get(name, (4, 0, 0))
+            self._backend_config[name] = (
+                current[0] if concurrency is None else concurrency,
+                current[1] if requests_per_minute is None else requests_per_minute,
+                current[2] if tokens_per_minute is None else tokens_per_minute,
+            )
+            backend = self._backends.get(name)
+            if backend is not None:
+                concurrency, requests_per_minute, tokens_per_minute = self._backend_config[name]
+                backend.concurrency = max(1, int(concurrency))
+                backend.requests, backend.tokens = TokenBucket(requests_per_minute), TokenBucket(tokens_per_minute)
+
+    def _admit(self, backend: _Backend, priority: int, tokens: int) -> float:
+        """Take quota for one request: 0 if admitted, else seconds until it may be."""
+        if self.store is not None:
+            _, requests_per_minute, tokens_per_minute = self._backend_config.get(backend.name, (4, 0, 0))
+            lease = f"{self.store.owner}:{backend.name}:{next(self._seq)}"
+            wait = self.store.try_acquire(
+                backend.name, lease, priority, backend.concurrency, requests_per_minute, tokens_per_minute, tokens
+            )
+            if wait is not None:
+                if wait == 0:
+                    backend.leases.append(lease)
+                return wait
+            # Store unavailable: fall back to this process's buckets
+        wait = max(backend.requests.wait_time(1), backend.tokens.wait_time(tokens))
+        if wait > 0:
+            return wait
+        backend.requests.take(1)
+        backend.tokens.take(tokens)
+        return 0.0
+
+    def _dispatch(self, backend: _Backend):
+        """Admit queued waiters while slots and quota allow (from any thread)."""
+        with self._lock:
+            if backend.timer is not None:
+                backend.timer.cancel()
+                backend.timer = None
+            retry = 0.0
+            while backend.waiters and backend.in_flight < backend.concurrency:
+                priority, _, enqueued_at, tokens, future = backend.waiters[0]
+                if future.done(): # Cancelled or timed out while queued
+                    heapq.heappop(backend.waiters)
+                    continue
+                retry = self._admit(backend, priority, tokens)
+                if retry > 0:
+                    break
+                heapq.heappop(backend.waiters)
+                backend.in_flight += 1
+
+                waited_ms = (time.monotonic() - enqueued_at) * 1000
+                lane = self._lanes[priority]
+                lane["wait_ms_total"] += waited_ms
+                lane["max_wait_ms"] = max(lane["max_wait_ms"], waited_ms)
+                self._grant(backend, future)
+            self._publish_demand(backend)
+            if retry > 0:
+                backend.timer = threading.Timer(retry, self._dispatch, (backend,))
+                backend.timer.daemon = True
+                backend.timer.start()
+
+    def _grant(self, backend: _Backend, future: asyncio.Future):
+        loop = future.get_loop()
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError: # Timer thread
+            running = None
+        if loop is running:
+            future.set_result(None)
+            return
+        try:
+            loop.call_soon_threadsafe(self._deliver, backend, future)
+        except RuntimeError: # Its loop closed meanwhile
+            self._release_slot(backend)
+
+    def _deliver(self, backend: _Backend, future: asyncio.Future):
+        """Runs on the waiter's loop: hand over the slot, or give it back if the waiter gave up."""
+        if future.done():
+            self._release_slot(backend)
+        else:
+            future.set_result(None)
+
+    def _publish_demand(self, backend: _Backend):
+        if self.store is None:
+            return
+        waiting = [w[0] for w in backend.waiters if not w[4].done()]
+        demand = min(waiting) if waiting else None
+        if demand != backend.demand:
+            self.store.set_demand(backend.name, demand)
+            backend.demand = demand
+
+    def _shed(self, priority: int, reason: str):
+        self._lanes[priority]["shed"] += 1
+        raise LLMOverloaded(f"LLM {LANE_NAMES[priority]} lane overloaded: {reason}")
+
+    async def acquire(self, backend_name: str, priority: Optional[int] = None, tokens: int = 0):
+        priority = self.current_priority() if priority is None else priority
+        backend = self._backend(backend_name)
+        future = asyncio.get_running_loop().create_future()
+        with self._lock:
+            self._lanes[priority]["requests"] += 1
+            if priority == PRIORITY_BATCH:
+                queued = sum(1 for w in backend.waiters if w[0] == PRIORITY_BATCH and not w[4].done())
+                if queued >= self.max_batch_queue:
+                    self._shed(priority, f"{queued} requests already queued")
+            heapq.heappush(backend.waiters, (priority, next(self._seq), time.monotonic(), tokens, future))
+        self._dispatch(backend)
+
+        try:
+            await asyncio.wait_for(future, self.max_wait[priority])
+        except asyncio.TimeoutError:
+            self._dispatch(backend) # Withdraw its demand from the shared store
+            self._shed(priority, f"waited over {self.max_wait[priority]:g}s")
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release(backend_name) # Granted just as we were cancelled
+            else:
+                self._dispatch(backend)
+            raise
+
+    def _release_slot(self, backend: _Backend):
+        with self._lock:
+            backend.in_flight = max(0, backend.in_flight - 1)
+            if backend.leases and self.store is not None:
+                self.store.release(backend.leases.pop())
+        self._dispatch(backend)
+
+    def release(self, backend_name: str):
+        self._release_slot(self._backend(backend_name))
+
+    @asynccontextmanager
+    async def slot(self, backend_name: str, priority: Optional[int] = None, tokens: int = 0):
+        """Hold one of `backend_name`'s request slots for the duration of the block."""
+        await self.acquire(backend_name, priority, tokens)
+        try:
+            yield
+        finally:
+            self.release(backend_name)
+
+    def record_usage(self, backend_name: str, estimated_tokens: int, actual_tokens: Optional[int]):
+        """Correct the token bucket once the real token count is known."""
+        if actual_tokens is None:
+            return
+        backend = self._backend(backend_name)
+        backend.tokens.take(actual_tokens - estimated_tokens)
+        if self.store is not None:
+            tokens_per_minute = self._backend_config.get(backend_name, (4, 0, 0))[2]
+            self.store.adjust_tokens(backend_name, actual_tokens - estimated_tokens, tokens_per_minute)
+
+    def penalize(self, backend_name: str, seconds: float):
+        """Back off a backend (e.g. after a 429): nothing is admitted to it for `seconds`."""
+        backend = self._backend(backend_name)
+        backend.requests.pause(seconds)
+        if self.store is not None:
+            self.store.pause(backend_name, seconds, self._backend_config.get(backend_name, (4, 0, 0))[1])
+        self._dispatch(backend)
+
+    @staticmethod
+    def estimate_tokens(prompt: str) -> int:
+        return count_tokens(prompt)
+
+    # --- Metrics ---
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            backends = {
+                backend.name: {
+                    "in_flight": backend.in_flight,
+                    "concurrency": backend.concurrency,
+                    "queued": {
+                        lane: sum(1 for w in backend.waiters if w[0] == priority and not w[4].done())
+                        for priority, lane in LANE_NAMES.items()
+                    }
+                }
+                for backend in self._backends.values()
+            }
+
+        lanes = {}
+        for priority, lane in self._lanes.items():
+            admitted = lane["requests"] - lane["shed"]
+            lanes[LANE_NAMES[priority]] = {
+                "requests": lane["requests"],
+                "shed": lane["shed"],
+                "avg_wait_ms": round(lane["wait_ms_total"] / admitted, 1) if admitted else 0.0,
+                "max_wait_ms": round(lane["max_wait_ms"], 1)
+            }
+        return {
+            "backends": backends,
+            "lanes": lanes,
+            "shared": self.store.stats() if self.store is not None else {"available": False}
+        }
+
+# Singleton instance
+llm_dispatcher = LLMDispatcher()
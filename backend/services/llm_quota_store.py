@@ -0,0 +1,261 @@
+import os
+import time
+import uuid
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, Optional
+from core.config import settings
+
+logger = logging.getLogger("llm_quota")
+
+class LLMQuotaStore:
+    """
+    LLM admission state shared by every process on this host, in a small
+    SQLite database next to the LLM cache.
+
+    It holds three things:
+    - Slot leases: one row per request in flight, so a backend's concurrency
+      cap is global (API, task worker, scheduler jobs).
+    - Demand: each process's best waiting priority per backend. A process
+      only admits a request if no other process is waiting at a higher
+      priority, so batch work yields to /chat even across processes.
+    - Rate-limit buckets: one Gemini quota for all processes.
+
+    Leases and demand rows expire after LLM_ADMISSION_LEASE_SECONDS unless
+    renewed, so a crashed process can't hold a slot forever. A background
+    thread renews this process's rows. Every call degrades to "unavailable"
+    (None) on a database error, and the dispatcher falls back to
+    process-local limits.
+    """
+    def __init__(self, db_path: Optional[str] = None, lease_seconds: Optional[float] = None,
+                 poll_seconds: Optional[float] = None):
+        self.db_path = db_path or os.path.join(settings.DATA_DIR, "databases", "llm_admission.db")
+        self.lease_seconds = float(lease_seconds or getattr(settings, "LLM_ADMISSION_LEASE_SECONDS", 30.0))
+        self.poll_seconds = float(poll_seconds or getattr(settings, "LLM_ADMISSION_POLL_SECONDS", 0.2))
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._conn = None
+        self._lock = threading.Lock()
+        self._initialized = False
+        self._renewer: Optional[threading.Thread] = None
+
+    def _ensure_initialized(self) -> bool:
+        """Lazy initialization; a broken database file disables sharing."""
+        if self._initialized:
+            return self._conn is not None
+
+        self._initialized = True
+        try:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            # Autocommit mode: transactions are opened explicitly with BEGIN IMMEDIATE
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS llm_leases (
+                    id TEXT PRIMARY KEY,
+                    backend TEXT NOT NULL,
+                    owner TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS ix_llm_leases_backend ON llm_leases(backend);
+                CREATE TABLE IF NOT EXISTS llm_demand (
+                    owner TEXT NOT NULL,
+                    backend TEXT NOT NULL,
+                    priority INTEGER NOT NULL,
+                    expires_at REAL NOT NULL,
+                    PRIMARY KEY (owner, backend)
+                );
+                CREATE TABLE IF NOT EXISTS llm_buckets (
+                    backend TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    level REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    paused_until REAL NOT NULL DEFAULT 0,
+                    PRIMARY KEY (backend, kind)
+                );
+            """)
+            self._conn = conn
+            return True
+        except Exception as e:
+            logger.warning(f"Shared LLM admission unavailable, using process-local limits: {e}")
+            self._conn = None
+            return False
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE") # Take the write lock up front: read-check-write
+            try:
+                yield self._conn
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _start_renewer(self):
+        if self._renewer is None:
+            self._renewer = threading.Thread(target=self._renew_loop, name="llm-quota-renew", daemon=True)
+            self._renewer.start()
+
+    def _renew_loop(self):
+        while True:
+            time.sleep(self.lease_seconds / 3)
+            self.renew()
+
+    def renew(self):
+        """Extend this process's leases and demand rows."""
+        if not self._ensure_initialized():
+            return
+        expires_at = time.time() + self.lease_seconds
+        try:
+            with self._transaction() as conn:
+                conn.execute("UPDATE llm_leases SET expires_at = ? WHERE owner = ?", (expires_at, self.owner))
+                conn.execute("UPDATE llm_demand SET expires_at = ? WHERE owner = ?", (expires_at, self.owner))
+        except sqlite3.Error as e:
+            logger.warning(f"LLM admission lease renewal failed: {e}")
+
+    # --- Rate-limit buckets (same model as llm_dispatcher.TokenBucket, on the wall clock) ---
+
+    @staticmethod
+    def _bucket(conn, backend: str, kind: str, rate_per_minute: float, now: float):
+        """(level, paused_until) refilled up to now."""
+        row = conn.execute(
+            "SELECT level, updated_at, paused_until FROM llm_buckets WHERE backend = ? AND kind = ?", (backend, kind)
+        ).fetchone()
+        if row is None:
+            return float(rate_per_minute), 0.0
+        level = min(float(rate_per_minute), row[0] + max(0.0, now - row[1]) * rate_per_minute / 60.0)
+        return level, row[2]
+
+    @staticmethod
+    def _bucket_wait(level: float, paused_until: float, rate_per_minute: float, amount: float, now: float) -> float:
+        wait = max(0.0, paused_until - now)
+        if rate_per_minute > 0:
+            missing = min(amount, rate_per_minute) - level
+            if missing > 0:
+                wait = max(wait, missing / (rate_per_minute / 60.0))
+        return wait
+
+    @staticmethod
+    def _save_bucket(conn, backend: str, kind: str, level: float, paused_until: float, now: float):
+        conn.execute(
+            "INSERT OR REPLACE INTO llm_buckets (backend, kind, level, updated_at, paused_until) VALUES (?, ?, ?, ?, ?)",
+            (backend, kind, level, now, paused_until)
+        )
+
+    # --- Admission ---
+
+    def try_acquire(self, backend: str, lease_id: str, priority: int, concurrency: int,
+                    requests_per_minute: float, tokens_per_minute: float, tokens: int = 0) -> Optional[float]:
+        """
+        Take a slot for `backend` if the global cap, other processes' demand
+        and the rate limits allow it. Returns 0 when admitted (lease
+        `lease_id` is held until release), otherwise the seconds to wait
+        before trying again, or None if the store is unavailable.
+        """
+        if not self._ensure_initialized():
+            return None
+        now = time.time()
+        try:
+            with self._transaction() as conn:
+                conn.execute("DELETE FROM llm_leases WHERE expires_at < ?", (now,))
+                conn.execute("DELETE FROM llm_demand WHERE expires_at < ?", (now,))
+                (held,) = conn.execute("SELECT COUNT(*) FROM llm_leases WHERE backend = ?", (backend,)).fetchone()
+                if held >= concurrency:
+                    return self.poll_seconds
+                ahead = conn.execute(
+                    "SELECT 1 FROM llm_demand WHERE backend = ? AND owner != ? AND priority < ? LIMIT 1",
+                    (backend, self.owner, priority)
+                ).fetchone()
+                if ahead:
+                    return self.poll_seconds # A higher lane is waiting in another process
+
+                requests_level, requests_paused = self._bucket(conn, backend, "requests", requests_per_minute, now)
+                tokens_level, tokens_paused = self._bucket(conn, backend, "tokens", tokens_per_minute, now)
+                wait = max(
+                    self._bucket_wait(requests_level, requests_paused, requests_per_minute, 1, now),
+                    self._bucket_wait(tokens_level, tokens_paused, tokens_per_minute, tokens, now)
+                )
+                if wait > 0:
+                    return wait
+
+                self._save_bucket(conn, backend, "requests", requests_level - 1, requests_paused, now)
+                self._save_bucket(conn, backend, "tokens", tokens_level - tokens, tokens_paused, now)
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_leases (id, backend, owner, expires_at) VALUES (?, ?, ?, ?)",
+                    (lease_id, backend, self.owner, now + self.lease_seconds)
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Shared LLM admission failed, using process-local limits: {e}")
+            return None
+        self._start_renewer()
+        return 0.0
+
+    def release(self, lease_id: str):
+        if not self._ensure_initialized():
+            return
+        try:
+            with self._transaction() as conn:
+                conn.execute("DELETE FROM llm_leases WHERE id = ?", (lease_id,))
+        except sqlite3.Error as e:
+            logger.warning(f"LLM admission lease release failed (expires on its own): {e}")
+
+    def set_demand(self, backend: str, priority: Optional[int]):
+        """Publish this process's best waiting priority for `backend` (None = nothing waiting)."""
+        if not self._ensure_initialized():
+            return
+        try:
+            with self._transaction() as conn:
+                if priority is None:
+                    conn.execute("DELETE FROM llm_demand WHERE owner = ? AND backend = ?", (self.owner, backend))
+                else:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO llm_demand (owner, backend, priority, expires_at) VALUES (?, ?, ?, ?)",
+                        (self.owner, backend, priority, time.time() + self.lease_seconds)
+                    )
+        except sqlite3.Error as e:
+            logger.warning(f"LLM admission demand update failed: {e}")
+            return
+        if priority is not None:
+            self._start_renewer()
+
+    def pause(self, backend: str, seconds: float, requests_per_minute: float):
+        """Nothing is admitted to `backend` by any process for `seconds` (e.g. after a 429)."""
+        if not self._ensure_initialized():
+            return
+        now = time.time()
+        try:
+            with self._transaction() as conn:
+                level, paused_until = self._bucket(conn, backend, "requests", requests_per_minute, now)
+                self._save_bucket(conn, backend, "requests", level, max(paused_until, now + seconds), now)
+        except sqlite3.Error as e:
+            logger.warning(f"LLM admission pause failed: {e}")
+
+    def adjust_tokens(self, backend: str, delta: float, tokens_per_minute: float):
+        """Charge (or refund) the shared token bucket once the real usage is known."""
+        if tokens_per_minute <= 0 or not self._ensure_initialized():
+            return
+        now = time.time()
+        try:
+            with self._transaction() as conn:
+                level, paused_until = self._bucket(conn, backend, "tokens", tokens_per_minute, now)
+                self._save_bucket(conn, backend, "tokens", level - delta, paused_until, now)
+        except sqlite3.Error as e:
+            logger.warning(f"LLM admission token correction failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        if not self._ensure_initialized():
+            return {"available": False}
+        now = time.time()
+        try:
+            with self._lock:
+                leases = dict(self._conn.execute(
+                    "SELECT backend, COUNT(*) FROM llm_leases WHERE expires_at >= ? GROUP BY backend", (now,)
+                ).fetchall())
+                waiting = dict(self._conn.execute(
+                    "SELECT backend, COUNT(*) FROM llm_demand WHERE expires_at >= ? GROUP BY backend", (now,)
+                ).fetchall())
+        except sqlite3.Error as e:
+            return {"available": False, "error": str(e)}
+        return {"available": True, "in_flight": leases, "waiting_processes": waiting}
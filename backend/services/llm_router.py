@@ -0,0 +1,243 @@
+import time
+import asyncio
+import logging
+import threading
+from typing import Dict, Any, List, Optional
+from core.config import settings
+from services.http_client_service import http_clients
+
+logger = logging.getLogger("llm_router")
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+class CircuitBreaker:
+    """
+    Per-backend failure tracker.
+
+    After `failure_threshold` consecutive failures the breaker opens, and
+    callers skip the backend without waiting for it to time out. Once
+    `reset_seconds` have passed, one trial request is let through
+    (half-open). If it succeeds the breaker closes; if it fails the breaker
+    opens again. A successful health probe only skips the wait: the breaker
+    goes half-open, and a real request still has to succeed to close it.
+    Successful calls also update an EWMA of the backend's total request
+    latency (streamed or not).
+    """
+    def __init__(self, name: str, failure_threshold: int = 3, reset_seconds: float = 30.0):
+        self.name = name
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_seconds = float(reset_seconds)
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.last_error: Optional[str] = None
+        self.latency_ms: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """True if a request may go to this backend now."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self.state = HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def is_available(self) -> bool:
+        """Like allow(), without claiming the half-open trial request."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN:
+                return time.monotonic() - self.opened_at >= self.reset_seconds
+            return not self._trial_in_flight
+
+    def record_success(self, latency_ms: Optional[float] = None):
+        with self._lock:
+            if self.state != CLOSED:
+                logger.info(f"LLM backend {self.name} recovered; circuit closed")
+            self.state = CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+            if latency_ms is not None:
+                self.latency_ms = latency_ms if self.latency_ms is None else 0.8 * self.latency_ms + 0.2 * latency_ms
+
+    def record_failure(self, error: Any = None):
+        with self._lock:
+            self.failures += 1
+            self.last_error = str(error) if error is not None else None
+            self._trial_in_flight = False
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    logger.warning(f"LLM backend {self.name} unavailable ({self.last_error}); circuit open")
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def half_open(self):
+        """Let the trial request through now (e.g. a health probe passed) instead of after reset_seconds."""
+        with self._lock:
+            if self.state == OPEN:
+                logger.info(f"LLM backend {self.name} answers its health probe; circuit half-open")
+                self.state = HALF_OPEN
+                self._trial_in_flight = False
+
+    def release(self):
+        """A request ended without a verdict on health (cancelled, shed, rate limited)."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def trip(self, error: Any = None):
+        """Open immediately (e.g. a failed health probe)."""
+        with self._lock:
+            self.failures = max(self.failures, self.failure_threshold - 1)
+        self.record_failure(error)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            retry_in = None
+            if self.state == OPEN:
+                retry_in = round(max(0.0, self.reset_seconds - (time.monotonic() - self.opened_at)), 1)
+            return {
+                "state": self.state,
+                "failures": self.failures,
+                "latency_ms": round(self.latency_ms, 1) if self.latency_ms is not None else None,
+                "last_error": self.last_error,
+                "retry_in_seconds": retry_in
+            }
+
+class LLMRouter:
+    """
+    Chooses which LLM backend serves a request.
+
+    Each backend (Ollama generate, Ollama embed, Gemini) has a circuit
+    breaker, so known-dead backends are skipped immediately. A background
+    probe checks Ollama (GET /api/tags) every LLM_ROUTER_PROBE_SECONDS. A
+    down server is detected before a request has to wait on it, and as soon
+    as it comes back the next request is let through as the trial. Gemini has no free probe, so it
+    recovers through half-open trial requests. When both generators are
+    healthy but the local model's latency is more than
+    LLM_ROUTER_LATENCY_FACTOR times Gemini's, local-first requests go to
+    Gemini (with an occasional local request to keep its latency current).
+    """
+    LATENCY_RESAMPLE_EVERY = 10
+
+    def __init__(self):
+        threshold = int(getattr(settings, "LLM_BREAKER_FAILURE_THRESHOLD", 3))
+        reset = float(getattr(settings, "LLM_BREAKER_RESET_SECONDS", 30.0))
+        self.breakers = {
+            name: CircuitBreaker(name, threshold, reset)
+            for name in ("ollama_generate", "ollama_embed", "gemini")
+        }
+        self.probe_seconds = float(getattr(settings, "LLM_ROUTER_PROBE_SECONDS", 30.0))
+        self.probe_timeout = float(getattr(settings, "LLM_ROUTER_PROBE_TIMEOUT_SECONDS", 2.0))
+        self.latency_factor = float(getattr(settings, "LLM_ROUTER_LATENCY_FACTOR", 3.0))
+        self._probe_task: Optional[asyncio.Task] = None
+        self._last_probe: Optional[float] = None
+        self._latency_skips = 0
+
+    def breaker(self, name: str) -> CircuitBreaker:
+        return self.breakers[name]
+
+    def allow(self, name: str) -> bool:
+        return self.breakers[name].allow()
+
+    def record_success(self, name: str, latency_ms: Optional[float] = None):
+        self.breakers[name].record_success(latency_ms)
+
+    def record_failure(self, name: str, error: Any = None):
+        self.breakers[name].record_failure(error)
+
+    def release(self, name: str):
+        self.breakers[name].release()
+
+    def unavailable_message(self, names: List[str]) -> str:
+        states = ", ".join(f"{n}: {self.breakers[n].state}" for n in names)
+        return f"Error generating content: LLM backend unavailable ({states})"
+
+    def route(self, prefer_local: bool, gemini_configured: bool = True) -> List[str]:
+        """
+        Generation backends to try, in order ("ollama", "gemini"). Empty when none is available.
+        Only local-first requests use Ollama; Gemini-only callers never get the local model.
+        """
+        local = self.breakers["ollama_generate"]
+        remote = self.breakers["gemini"]
+        gemini_ok = gemini_configured and remote.is_available()
+        if not prefer_local:
+            return ["gemini"] if gemini_ok else []
+
+        order = []
+        if local.is_available():
+            order.append("ollama")
+        if gemini_ok:
+            slow_local = (
+                order and local.state == CLOSED and remote.state == CLOSED
+                and local.latency_ms is not None and remote.latency_ms is not None
+                and local.latency_ms > self.latency_factor * remote.latency_ms
+            )
+            if slow_local:
+                self._latency_skips += 1
+            # Every LATENCY_RESAMPLE_EVERY-th request still goes local, so its latency can recover
+            if slow_local and self._latency_skips % self.LATENCY_RESAMPLE_EVERY:
+                order = ["gemini"] # The fallback would only add the slow local call back
+            else:
+                order.append("gemini")
+        return order
+
+    # --- Active probes ---
+
+    async def probe(self) -> bool:
+        """Check that the Ollama server answers; updates both Ollama breakers."""
+        self._last_probe = time.time()
+        start = time.time()
+        try:
+            response = await http_clients.get("ollama").get(
+                f"{settings.OLLAMA_BASE_URL}/api/tags", timeout=self.probe_timeout
+            )
+            response.raise_for_status()
+        except Exception as e:
+            # Also pushes back an open breaker's half-open trial: the server is still down
+            for name in ("ollama_generate", "ollama_embed"):
+                self.breakers[name].trip(f"health probe failed: {str(e) or type(e).__name__}")
+            return False
+
+        for name in ("ollama_generate", "ollama_embed"):
+            # The server is up, but the model may still fail: the next request decides
+            self.breakers[name].half_open()
+        logger.debug(f"Ollama probe ok in {(time.time() - start) * 1000:.0f}ms")
+        return True
+
+    async def _probe_loop(self):
+        while True:
+            try:
+                await self.probe()
+            except Exception as e:
+                logger.error(f"LLM router probe error: {e}")
+            await asyncio.sleep(self.probe_seconds)
+
+    def start(self):
+        """Start the background probe loop (called from the app lifespan)."""
+        if self.probe_seconds > 0 and (self._probe_task is None or self._probe_task.done()):
+            self._probe_task = asyncio.get_running_loop().create_task(self._probe_loop())
+
+    async def stop(self):
+        if self._probe_task is not None:
+            self._probe_task.cancel()
+            try:
+                await self._probe_task
+            except asyncio.CancelledError:
+                pass
+            self._probe_task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backends": {name: breaker.stats() for name, breaker in self.breakers.items()},
+            "last_probe": self._last_probe
+        }
+
+# Singleton instance
+llm_router = LLMRouter()
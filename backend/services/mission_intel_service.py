@@ -0,0 +1,117 @@
+import copy
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Any, Tuple
+from services.altimeter_service import altimeter_service, intelligence_bridge
+from services.knowledge_service import knowledge_service
+
+class MissionIntelService:
+    """
+    Precomputed Oracle Protocol results.
+
+    Mission intel (several vector searches per phase) is computed once per project
+    and once for the Oracle feed, and reused until its inputs change: the set of
+    active phases, the knowledge index version or the weather condition class.
+    A scheduled job refreshes everything; reads compute lazily on a miss.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._key: Optional[Tuple] = None
+        self._project_intel: Dict[str, List[Dict[str, Any]]] = {}
+        self._feed: Optional[List[Dict[str, Any]]] = None
+        self._weather: Optional[Dict[str, Any]] = None
+        self._weather_class = "clear"
+        self.computed_at: Optional[str] = None
+
+    @staticmethod
+    def _phase_fingerprint(active_phases: List[Dict[str, Any]]) -> Tuple:
+        return tuple(sorted(
+            (str(p.get("id")), str(p.get("project_id")), str(p.get("phase_name")))
+            for p in active_phases
+        ))
+
+    def _sync_key(self, active_phases: List[Dict[str, Any]]) -> Tuple:
+        """Drop cached intel when phases, knowledge or weather class changed. Returns the current key."""
+        key = (self._phase_fingerprint(active_phases), knowledge_service.version, self._weather_class)
+        with self._lock:
+            if key != self._key:
+                self._key = key
+                self._project_intel = {}
+                self._feed = None
+        return key
+
+    def _store(self, key: Tuple, project: Optional[str], intel: List[Dict[str, Any]]):
+        with self._lock:
+            if key != self._key:
+                return # Inputs changed while computing; don't cache a stale result
+            if project is None:
+                self._feed = intel
+            else:
+                self._project_intel[project] = intel
+            self.computed_at = datetime.now().isoformat()
+
+    def update_weather(self, weather: Optional[Dict[str, Any]]):
+        """Record the latest forecast; intel is only invalidated if the condition class changes."""
+        if weather is None:
+            return
+        with self._lock:
+            self._weather = weather
+            self._weather_class = intelligence_bridge.weather_condition_class(weather)
+
+    def has_weather(self) -> bool:
+        return self._weather is not None
+
+    def get_project_intel(self, project_number: str, active_phases: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+        """Ready mission intel for one project (computed on first use after an invalidation)."""
+        if active_phases is None:
+            active_phases = altimeter_service.get_active_phases()
+        key = self._sync_key(active_phases)
+        with self._lock:
+            cached = self._project_intel.get(project_number)
+        if cached is not None:
+            return copy.deepcopy(cached)
+
+        project_phases = [p for p in active_phases if p.get("project_id") == project_number]
+        intel = intelligence_bridge.predict_mission_intel(project_phases, self._weather) if project_phases else []
+        self._store(key, project_number, intel)
+        return copy.deepcopy(intel)
+
+    def get_oracle_feed(self) -> List[Dict[str, Any]]:
+        """Mission intel across all active phases (the Oracle dashboard feed)."""
+        active_phases = altimeter_service.get_active_phases()
+        key = self._sync_key(active_phases)
+        with self._lock:
+            cached = self._feed
+        if cached is not None:
+            return copy.deepcopy(cached)
+
+        intel = intelligence_bridge.predict_mission_intel(active_phases, self._weather)
+        self._store(key, None, intel)
+        return copy.deepcopy(intel)
+
+    def refresh(self, weather: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Precompute intel for every project with active phases plus the Oracle feed."""
+        self.update_weather(weather)
+        active_phases = altimeter_service.get_active_phases()
+        projects = {p.get("project_id") for p in active_phases if p.get("project_id")}
+        for number in projects:
+            self.get_project_intel(number, active_phases)
+        self.get_oracle_feed()
+        return self.stats()
+
+    def invalidate(self):
+        with self._lock:
+            self._key = None
+            self._project_intel = {}
+            self._feed = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "projects": len(self._project_intel),
+                "feed_ready": self._feed is not None,
+                "weather_class": self._weather_class,
+                "computed_at": self.computed_at
+            }
+
+mission_intel_service = MissionIntelService()
@@ -1,5 +1,6 @@
 from typing import Dict, Any, Optional
 from services.ai_service import ai_service
+from core.config import settings
 
 class BaseAgent:
     def __init__(self, name: str, role_prompt: str):
@@ -39,7 +40,9 @@ class AgentRouter:
         Query: {query}
         Output just the category.
         """
-        intent = await ai_service.generate_content(intent_prompt)
+        intent = await ai_service.generate_content(
+            intent_prompt, cache_ttl=settings.LLM_CACHE_TTL_SECONDS, cache_tag="agent_router"
+        )
         intent = intent.strip().upper() if intent else "GENERAL_CHAT"
 
         print(f"AgentRouter: Routing '{query}' -> {intent}")
@@ -0,0 +1,133 @@
+import re
+from typing import Dict, Any, List, Optional
+
+_PIECES = re.compile(r"\w+|[^\w\s]")
+# Where quoted reply history starts in an email body
+_QUOTE_MARKERS = re.compile(
+    r"^(On .+wrote:\s*$|-{2,}\s*Original Message\s*-{2,}|From: .+\n(Sent|Date): )",
+    re.MULTILINE | re.IGNORECASE
+)
+
+def count_tokens(text: Optional[str]) -> int:
+    """
+    Approximate model token count (BPE-like: one per word or symbol, more for long words).
+    Close enough for budgeting across Gemini and Ollama models without a tokenizer.
+    """
+    if not text:
+        return 0
+    return sum(1 + len(piece) // 6 for piece in _PIECES.findall(text))
+
+def strip_quoted_history(body: str) -> str:
+    """Drop quoted replies ("> ..." lines and everything after "On ... wrote:") from an email body."""
+    match = _QUOTE_MARKERS.search(body)
+    if match and match.start() > 0:
+        body = body[:match.start()]
+    lines = [line for line in body.splitlines() if not line.lstrip().startswith(">")]
+    return "\n".join(lines).strip()
+
+def _cut(text: str, max_tokens: int, from_end: bool = False) -> str:
+    """Longest prefix (or suffix) of `text` within `max_tokens`."""
+    if max_tokens <= 0:
+        return ""
+    low, high = 0, len(text)
+    while low < high: # Binary search on length; count_tokens is monotonic in it
+        mid = (low + high + 1) // 2
+        piece = text[len(text) - mid:] if from_end else text[:mid]
+        if count_tokens(piece) <= max_tokens:
+            low = mid
+        else:
+            high = mid - 1
+    return text[len(text) - low:] if from_end else text[:low]
+
+def trim_to_tokens(text: str, max_tokens: int, strategy: str = "head") -> str:
+    """
+    Shorten `text` to about `max_tokens`.
+
+    Strategies:
+    - "head": keep the beginning, cutting at a line break where possible (lists, RAG hits, logs).
+    - "middle": keep the beginning and the end (long free text).
+    - "email": drop quoted reply history first, then "middle".
+    """
+    if not text or count_tokens(text) <= max_tokens:
+        return text or ""
+    if strategy == "email":
+        text = strip_quoted_history(text)
+        if count_tokens(text) <= max_tokens:
+            return text
+        strategy = "middle"
+
+    if strategy == "middle":
+        marker = "\n[... trimmed ...]\n"
+        half = max(0, (max_tokens - count_tokens(marker)) // 2)
+        return _cut(text, half) + marker + _cut(text, half, from_end=True)
+
+    kept = _cut(text, max_tokens)
+    line_end = kept.rfind("\n")
+    if line_end > len(kept) // 2: # Don't leave half a line behind
+        kept = kept[:line_end + 1]
+    return kept
+
+class PromptBuilder:
+    """
+    Renders a prompt template within a token budget.
+
+    Variable-size sections (email bodies, RAG snippets, schemas, logs) are
+    added in priority order, each with an optional cap and a trim strategy.
+    The template text and fixed fields count first. If the sections still
+    don't fit the budget, the lowest-priority sections shrink first, down
+    to their `min_tokens`. After `render`, `breakdown` holds per-section
+    token counts for the audit log.
+    """
+    def __init__(self, name: str, budget: int):
+        self.name = name
+        self.budget = int(budget)
+        self._sections: List[Dict[str, Any]] = []
+        self.breakdown: Dict[str, Any] = {}
+
+    def add(self, name: str, text: Optional[str], max_tokens: Optional[int] = None,
+            min_tokens: int = 0, strategy: str = "head") -> "PromptBuilder":
+        self._sections.append({
+            "name": name,
+            "text": text or "",
+            "max_tokens": max_tokens,
+            "min_tokens": min_tokens,
+            "strategy": strategy
+        })
+        return self
+
+    def render(self, template: str, **fields) -> str:
+        """Format `template` ({section} and {field} placeholders, {{ }} for literal braces)."""
+        overhead = count_tokens(template.format(**fields, **{s["name"]: "" for s in self._sections}))
+        available = max(0, self.budget - overhead)
+
+        original, fitted, tokens = {}, {}, {}
+        for section in self._sections:
+            name = section["name"]
+            original[name] = count_tokens(section["text"])
+            text = section["text"]
+            if section["max_tokens"] is not None and original[name] > section["max_tokens"]:
+                text = trim_to_tokens(text, section["max_tokens"], section["strategy"])
+            fitted[name] = text
+            tokens[name] = count_tokens(text)
+
+        overflow = sum(tokens.values()) - available
+        for section in reversed(self._sections):
+            if overflow <= 0:
+                break
+            name = section["name"]
+            target = max(section["min_tokens"], tokens[name] - overflow)
+            if target < tokens[name]:
+                fitted[name] = trim_to_tokens(fitted[name], target, section["strategy"])
+                overflow -= tokens[name] - count_tokens(fitted[name])
+                tokens[name] = count_tokens(fitted[name])
+
+        prompt = template.format(**fields, **fitted)
+        self.breakdown = {
+            "prompt": self.name,
+            "budget": self.budget,
+            "instructions": overhead,
+            "sections": tokens,
+            "trimmed": {name: original[name] for name in tokens if tokens[name] < original[name]},
+            "total": count_tokens(prompt)
+        }
+        return prompt
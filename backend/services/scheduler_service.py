@@ -1,12 +1,77 @@
 from apscheduler.schedulers.background import BackgroundScheduler
 from datetime import datetime, timedelta
-import httpx
+from services.http_client_service import http_clients
+from services.llm_dispatcher import PRIORITY_BATCH
 import asyncio
 from typing import List, Dict, Any, Optional
 from core.config import settings
 
 scheduler = BackgroundScheduler()
 
+# A manual re-run of the briefing over the same logs reuses the summary
+MORNING_BRIEFING_CACHE_TTL = 12 * 3600
+# Below this a log's details are too short to summarize: fewer logs are included instead
+MORNING_BRIEFING_MIN_LOG_TOKENS = 50
+# Room kept for the note listing logs that didn't fit
+MORNING_BRIEFING_OMITTED_NOTE_TOKENS = 80
+
+MORNING_BRIEFING_TEMPLATE = '''
+        You are an executive construction manager. 
+        Review the following daily logs from yesterday and provide a concise, 
+        bulleted "Morning Briefing" summary for the management team. 
+        Highlight any potential delays, issues, or key accomplishments.
+
+        Raw Logs:
+        {log_text}
+        '''
+
+def format_daily_logs(logs: List[Dict[str, Any]], max_tokens: int) -> str:
+    """
+    Daily logs as prompt text within `max_tokens`. Every included log keeps
+    its header and at least MORNING_BRIEFING_MIN_LOG_TOKENS of details, with
+    the remaining budget shared evenly. Logs that don't fit are left out and
+    listed in a closing note, never cut off silently.
+    """
+    from services.prompt_builder import count_tokens, trim_to_tokens
+
+    title = "Yesterday's Daily Logs:\\n\\n"
+    separator = "-" * 20 + "\\n"
+    headers = [
+        f"Project: {log.get('altimeter_project_id')} - {log.get('name')}\\n"
+        f"Author: {log.get('created_by')}\\n"
+        for log in logs
+    ]
+    # Token counts of concatenated pieces never exceed the sum of their counts
+    overhead = [count_tokens(h + "Details: \\n" + separator) for h in headers]
+
+    available = max_tokens - count_tokens(title)
+    if sum(overhead) + MORNING_BRIEFING_MIN_LOG_TOKENS * len(logs) > available:
+        available -= MORNING_BRIEFING_OMITTED_NOTE_TOKENS
+    kept, used = 0, 0
+    for cost in overhead:
+        if used + cost + MORNING_BRIEFING_MIN_LOG_TOKENS > available:
+            break
+        used += cost + MORNING_BRIEFING_MIN_LOG_TOKENS
+        kept += 1
+
+    per_log_tokens = MORNING_BRIEFING_MIN_LOG_TOKENS + (available - used) // kept if kept else 0
+    log_text = title
+    for log, header in zip(logs[:kept], headers):
+        details = trim_to_tokens(str(log.get('description') or ''), per_log_tokens, "middle")
+        log_text += header + f"Details: {details}\\n" + separator
+
+    omitted = logs[kept:]
+    if omitted:
+        projects = ", ".join(dict.fromkeys(str(log.get('altimeter_project_id')) for log in omitted))
+        note = trim_to_tokens(
+            f"[{len(omitted)} more daily log(s) not included to fit the prompt budget. Projects: {projects}]",
+            MORNING_BRIEFING_OMITTED_NOTE_TOKENS - 6 # Leaves room for the closing " ...]"
+        )
+        if not note.endswith("]"):
+            note += " ...]"
+        log_text += note + "\\n"
+    return log_text
+
 def sync_emails_job():
     """Background job to sync emails with retry and persistence."""
     from services.communication_service import comm_service
@@ -132,20 +197,18 @@ def watchtower_job():
     The Watchtower: Proactive Risk Scanning.
     Checks Weather + Active Phases for risks.
     """
-    from services.altimeter_service import altimeter_service, intelligence_bridge
+    from services.mission_intel_service import mission_intel_service
     from services.weather_service import weather_service
     from services.activity_service import activity_service
 
     try:
         # 1. Get Forecast
         # get_weather is async, but watchtower_job is run in a background thread.
-        weather = asyncio.run(weather_service.get_weather())
-
-        # 2. Get Active Phases
-        phases = altimeter_service.get_active_phases()
+        weather = http_clients.run(weather_service.get_weather())
 
-        # 3. Predict Risks
-        intel = intelligence_bridge.predict_mission_intel(phases, weather)
+        # 2-3. Active Phases + Predicted Risks (recomputed only if phases/knowledge/weather class changed)
+        mission_intel_service.refresh(weather)
+        intel = mission_intel_service.get_oracle_feed()
 
         # 4. Check for 'Weather Alert' triggers
         alerts = [i for i in intel if i.get('trigger') == 'Weather Alert']
@@ -159,6 +222,24 @@ def watchtower_job():
     except Exception as e:
         print(f"Error generating Morning Briefing: {e}")
 
+def mission_intel_job():
+    """
+    Precompute Mission Intel per project so email enrichment and the Oracle
+    endpoint read ready results.
+    """
+    from services.mission_intel_service import mission_intel_service
+    from services.weather_service import weather_service
+
+    try:
+        weather = None
+        try:
+            weather = http_clients.run(weather_service.get_weather())
+        except Exception as e:
+            print(f"Mission Intel: weather unavailable: {e}")
+        mission_intel_service.refresh(weather)
+    except Exception as e:
+        print(f"Error precomputing Mission Intel: {e}")
+
 def morning_briefing_job():
     """
     Collects yesterday's Daily Logs and alerts from Altimeter,
@@ -168,42 +249,36 @@ def morning_briefing_job():
     from services.ai_service import ai_service
     from services.communication_service import comm_service
     from services.weather_service import weather_service
+    from services.prompt_builder import PromptBuilder, count_tokens
     from datetime import datetime, timedelta
     
     try:
         # 1. Fetch yesterday's logs
         yesterday_date = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
         
-        # Read-only query to Altimeter
-        query = f"""
-            SELECT p.altimeter_project_id, p.name, dl.log_date, dl.description, dl.created_by
-            FROM daily_logs dl
-            JOIN projects p ON dl.project_id = p.id
-            WHERE date(dl.log_date) = '{yesterday_date}'
-        """
-        logs = altimeter_service.execute_read_only_query(query)
+        # Read-only, parameterized query to Altimeter
+        logs = altimeter_service.execute_query_template("daily_logs_for_date", (yesterday_date,))
         
         if not logs or (isinstance(logs, list) and len(logs) > 0 and 'error' in logs[0]):
              # No logs or error
              print("Morning Briefing: No logs found or error fetching logs.")
              return
 
-        # 2. Format Data
-        log_text = "Yesterday's Daily Logs:\\n\\n"
-        for log in logs:
-            log_text += f"Project: {log.get('altimeter_project_id')} - {log.get('name')}\\n"
-            log_text += f"Author: {log.get('created_by')}\\n"
-            log_text += f"Details: {log.get('description')}\\n"
-            log_text += "-" * 20 + "\\n"
+        # 2. Format Data (each log gets an even share of the budget, so one long entry can't crowd out the rest)
+        briefing_budget = settings.MORNING_BRIEFING_TOKEN_BUDGET
+        log_text = format_daily_logs(logs, briefing_budget - count_tokens(MORNING_BRIEFING_TEMPLATE))
             
         # 2.5 Fetch Weather
         weather_data_html = ""
         try:
-            loop = asyncio.get_event_loop()
-            if loop.is_running():
-                weather_res = asyncio.run_coroutine_threadsafe(weather_service.get_weather(), loop).result()
-            else:
-                weather_res = loop.run_until_complete(weather_service.get_weather())
+            try:
+                loop = asyncio.get_event_loop()
+                if loop.is_running():
+                    weather_res = asyncio.run_coroutine_threadsafe(weather_service.get_weather(), loop).result()
+                else:
+                    weather_res = http_clients.run(weather_service.get_weather())
+            except RuntimeError: # No event loop in the scheduler thread
+                weather_res = http_clients.run(weather_service.get_weather())
             
             forecasts = weather_res.get("forecast", [])
             if forecasts:
@@ -220,25 +295,26 @@ def morning_briefing_job():
             print(f"Failed to fetch weather for Morning Briefing: {e}")
         
         # 3. AI Summarization
-        prompt = f'''
-        You are an executive construction manager. 
-        Review the following daily logs from yesterday and provide a concise, 
-        bulleted "Morning Briefing" summary for the management team. 
-        Highlight any potential delays, issues, or key accomplishments.
-
-        Raw Logs:
-        {log_text}
-        '''
+        builder = PromptBuilder("morning_briefing", briefing_budget)
+        # Already fitted to the budget; "middle" keeps the omitted-logs note if anything is still cut
+        builder.add("log_text", log_text, strategy="middle")
+        prompt = builder.render(MORNING_BRIEFING_TEMPLATE)
         
+        def summarize():
+            return ai_service.generate_content(
+                prompt, cache_ttl=MORNING_BRIEFING_CACHE_TTL, cache_tag="morning_briefing", priority=PRIORITY_BATCH,
+                token_breakdown=builder.breakdown
+            )
+
         # Need an event loop to run async generate completion here if not already in one
         try:
              loop = asyncio.get_event_loop()
              if loop.is_running():
-                 summary_html = asyncio.run_coroutine_threadsafe(ai_service.generate_content(prompt), loop).result()
+                 summary_html = asyncio.run_coroutine_threadsafe(summarize(), loop).result()
              else:
-                 summary_html = loop.run_until_complete(ai_service.generate_content(prompt))
+                 summary_html = http_clients.run(summarize())
         except RuntimeError:
-             summary_html = asyncio.run(ai_service.generate_content(prompt))
+             summary_html = http_clients.run(summarize())
         
         
         # Format HTML email loosely
@@ -272,6 +348,7 @@ def morning_briefing_job():
 scheduler.add_job(sync_emails_job, 'interval', minutes=5, id='email_sync', replace_existing=True)
 scheduler.add_job(sync_calendar_job, 'interval', minutes=15, id='calendar_sync', replace_existing=True)
 scheduler.add_job(watchtower_job, 'interval', minutes=60, id='watchtower', replace_existing=True)
+scheduler.add_job(mission_intel_job, 'interval', minutes=15, id='mission_intel', replace_existing=True)
 scheduler.add_job(morning_briefing_job, 'cron', hour=6, minute=0, id='morning_briefing', replace_existing=True)
 
 class SchedulerService:
@@ -454,9 +531,9 @@ class SchedulerService:
         
         # 1. Altimeter Check (via API)
         try:
-            async with httpx.AsyncClient() as client:
-                res = await client.get(f"{settings.ALTIMETER_API_URL}/api/system/health", timeout=1.0)
-                altimeter_status = "Online" if res.status_code == 200 else "Degraded"
+            client = http_clients.get("altimeter")
+            res = await client.get(f"{settings.ALTIMETER_API_URL}/api/system/health", timeout=1.0)
+            altimeter_status = "Online" if res.status_code == 200 else "Degraded"
         except Exception:
             altimeter_status = "Offline"
 
@@ -466,6 +543,19 @@ class SchedulerService:
         # 3. Gmail Check (Stubbed for now)
         gmail_status = "Online"
 
+        # 4. LLM backends (circuit breaker state from the router's probes and recent calls)
+        from services.llm_router import llm_router
+        llm_backends = llm_router.stats()["backends"]
+        from services.ai_service import ai_service
+        if ai_service.client is None:
+            gemini_status = "Not Configured" # No API key (or SDK): the breaker never sees a call
+        else:
+            gemini_status = "Online" if llm_backends["gemini"]["state"] == "closed" else "Degraded"
+        llm_status = {
+            "ollama": "Online" if llm_backends["ollama_generate"]["state"] == "closed" else "Offline",
+            "gemini": gemini_status
+        }
+
         return {
             "status": "online" if altimeter_status == "Online" and vector_db == "Online" else "degraded",
             "scheduler": "running" if scheduler.running else "stopped",
@@ -473,8 +563,10 @@ class SchedulerService:
                 "backend": "Online",
                 "gmail": gmail_status,
                 "altimeter": altimeter_status,
-                "vector_db": vector_db
+                "vector_db": vector_db,
+                **llm_status
             },
+            "llm_backends": llm_backends,
             "last_check": datetime.now().isoformat()
         }
 
@@ -3,6 +3,28 @@ from chromadb.utils import embedding_functions
 from typing import List, Dict, Any, Optional
 import os
 from core.config import settings
+from services.lexical_index_service import lexical_index_service
+
+def build_email_metadata(email_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Vector metadata for an email. Besides display fields it carries filterable keys:
+    project_id, provider, category and a numeric date_epoch (ISO strings are not range-filterable).
+    Chroma rejects None values, so optional keys are only set when present.
+    """
+    metadata = {
+        "subject": email_data.get('subject') or '',
+        "sender": email_data.get('sender') or '',
+        "date": email_data.get('date') or '',
+        "message_id": email_data.get('message_id') or '',
+        "source": "email"
+    }
+    date_epoch = lexical_index_service.to_epoch(email_data.get('date'))
+    if date_epoch is not None:
+        metadata["date_epoch"] = date_epoch
+    for key in ("project_id", "provider", "category"):
+        if email_data.get(key):
+            metadata[key] = email_data[key]
+    return metadata
 
 class SearchService:
     """
@@ -98,23 +120,48 @@ class SearchService:
         self._ensure_initialized()
         return self._templates_collection
 
+    def get_collection(self, collection_name: str):
+        """Resolve a collection by name (unknown names map to the knowledge collection)."""
+        if collection_name == "emails":
+            return self.email_collection
+        elif collection_name == "skills":
+            return self.skills_collection
+        elif collection_name == "guidelines":
+            return self.guidelines_collection
+        elif collection_name == "templates":
+            return self.templates_collection
+        return self.knowledge_collection
+
+    def upsert_documents(self, collection_name: str, ids: List[str], documents: List[str],
+                         metadatas: List[Dict[str, Any]], embeddings: Optional[List[List[float]]] = None) -> bool:
+        """Upsert into a vector collection and mirror the text into the keyword index."""
+        if not self._ensure_initialized() or not ids: return False
+        kwargs = {"ids": ids, "documents": documents, "metadatas": metadatas}
+        if embeddings is not None:
+            kwargs["embeddings"] = embeddings
+        self.get_collection(collection_name).upsert(**kwargs)
+        lexical_index_service.upsert(collection_name, ids, documents, metadatas)
+        return True
+
+    def delete_documents(self, collection_name: str, ids: List[str]) -> bool:
+        """Remove vectors (and their keyword-index mirror) by ID."""
+        if not self._ensure_initialized() or not ids: return False
+        self.get_collection(collection_name).delete(ids=ids)
+        lexical_index_service.delete(collection_name, ids)
+        return True
+
     def index_email(self, email_data: Dict[str, Any]) -> bool:
         """Add or update an email in the vector index."""
         if not self._ensure_initialized(): return False
         try:
             text_to_embed = f"Subject: {email_data.get('subject', '')}\nFrom: {email_data.get('sender', '')}\n\n{email_data.get('body', '')}"
-            metadata = {
-                "subject": email_data.get('subject', ''),
-                "sender": email_data.get('sender', ''),
-                "date": email_data.get('date', ''),
-                "message_id": email_data.get('message_id', ''),
-                "source": "email"
-            }
+            metadata = build_email_metadata(email_data)
             self.email_collection.upsert(
                 documents=[text_to_embed],
                 metadatas=[metadata],
                 ids=[email_data.get('message_id', 'unknown_id')]
             )
+            lexical_index_service.upsert("emails", [email_data.get('message_id', 'unknown_id')], [text_to_embed], [metadata])
             return True
         except Exception as e:
             return False
@@ -145,29 +192,47 @@ class SearchService:
                 metadatas=metadatas,
                 ids=ids
             )
+            lexical_index_service.upsert("knowledge", ids, documents, metadatas)
             return True
         except Exception as e:
             return False
 
-    def search(self, query: str, collection_name: str = "emails", n_results: int = 5) -> List[Dict[str, Any]]:
-        """Semantic search for a specific collection."""
+    def build_where(self, filters: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Translate structured filters into a Chroma `where` clause.
+        Supported filters: project_id, sender, provider, category, date_from, date_to.
+        """
+        if not filters:
+            return None
+        conditions = []
+        for key in ("project_id", "sender", "provider", "category"):
+            if filters.get(key):
+                conditions.append({key: filters[key]})
+        if filters.get("date_from") is not None:
+            conditions.append({"date_epoch": {"$gte": lexical_index_service.to_epoch(filters["date_from"])}})
+        if filters.get("date_to") is not None:
+            conditions.append({"date_epoch": {"$lte": lexical_index_service.to_epoch(filters["date_to"])}})
+        if not conditions:
+            return None
+        return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
+    def search(self, query: str, collection_name: str = "emails", n_results: int = 5,
+               where: Optional[Dict[str, Any]] = None,
+               filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Semantic search for a specific collection.
+        Structured `filters` (see build_where) or a raw Chroma `where` clause restrict
+        the scan to matching vectors only.
+        """
         if not self._ensure_initialized(): return []
         try:
-            if collection_name == "emails":
-                col = self.email_collection
-            elif collection_name == "skills":
-                col = self.skills_collection
-            elif collection_name == "guidelines":
-                col = self.guidelines_collection
-            elif collection_name == "templates":
-                col = self.templates_collection
-            else:
-                col = self.knowledge_collection
-
-            results = col.query(
-                query_texts=[query],
-                n_results=n_results
-            )
+            col = self.get_collection(collection_name)
+            where = where or self.build_where(filters)
+
+            query_kwargs = {"query_texts": [query], "n_results": n_results}
+            if where:
+                query_kwargs["where"] = where
+            results = col.query(**query_kwargs)
             
             # Transform results into a cleaner list of dicts
             formatted_results = []
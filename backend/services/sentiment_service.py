@@ -1,4 +1,5 @@
 from services.ai_service import ai_service
+from core.config import settings
 from typing import Dict, Any
 
 class SentimentService:
@@ -23,7 +24,9 @@ class SentimentService:
         """
         
         try:
-            response = await ai_service.generate_content(prompt)
+            response = await ai_service.generate_content(
+                prompt, cache_ttl=settings.LLM_CACHE_TTL_SECONDS, cache_tag="sentiment"
+            )
             # Clean possible markdown
             cleaned = response.replace("```json", "").replace("```", "").strip()
             import json
@@ -1,7 +1,7 @@
-import httpx
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
 import time
+from services.http_client_service import http_clients
 
 class WeatherService:
     """
@@ -47,59 +47,59 @@ class WeatherService:
                 return cached_data
 
         try:
-            async with httpx.AsyncClient() as client:
-                url = "https://api.open-meteo.com/v1/forecast"
-                params = {
-                    "latitude": latitude,
-                    "longitude": longitude,
-                    "daily": "temperature_2m_max,temperature_2m_min,precipitation_probability_max,weather_code,wind_speed_10m_max",
-                    "temperature_unit": "fahrenheit",
-                    "wind_speed_unit": "mph",
-                    "timezone": "America/Chicago",
-                    "forecast_days": 7
-                }
-                response = await client.get(url, params=params, timeout=20.0)
-                response.raise_for_status()
-                data = response.json()
-                daily = data.get("daily", {})
-                dates = daily.get("time", [])
-                max_temps = daily.get("temperature_2m_max", [])
-                min_temps = daily.get("temperature_2m_min", [])
-                codes = daily.get("weather_code", [])
-                winds = daily.get("wind_speed_10m_max", [])
-                rains = daily.get("precipitation_probability_max", [])
-                forecast = []
-                for i in range(min(7, len(dates))):
-                    try:
-                        date = datetime.fromisoformat(dates[i])
-                        forecast.append({
-                            "date": dates[i],
-                            "display_date": "Today" if i == 0 else date.strftime("%a"),
-                            "high": int(max_temps[i]) if i < len(max_temps) else 32,
-                            "low": int(min_temps[i]) if i < len(min_temps) else 18,
-                            "condition": self.map_weather_code(codes[i]) if i < len(codes) else "Cloudy",
-                            "wind_speed": int(winds[i]) if i < len(winds) else 0,
-                            "wind_direction": "N",
-                            "rain_chance": int(rains[i]) if (i < len(rains) and rains[i] is not None) else 0
-                        })
-                    except (IndexError, ValueError) as e:
-                        pass
+            client = http_clients.get("weather")
+            url = "https://api.open-meteo.com/v1/forecast"
+            params = {
+                "latitude": latitude,
+                "longitude": longitude,
+                "daily": "temperature_2m_max,temperature_2m_min,precipitation_probability_max,weather_code,wind_speed_10m_max",
+                "temperature_unit": "fahrenheit",
+                "wind_speed_unit": "mph",
+                "timezone": "America/Chicago",
+                "forecast_days": 7
+            }
+            response = await client.get(url, params=params, timeout=20.0)
+            response.raise_for_status()
+            data = response.json()
+            daily = data.get("daily", {})
+            dates = daily.get("time", [])
+            max_temps = daily.get("temperature_2m_max", [])
+            min_temps = daily.get("temperature_2m_min", [])
+            codes = daily.get("weather_code", [])
+            winds = daily.get("wind_speed_10m_max", [])
+            rains = daily.get("precipitation_probability_max", [])
+            forecast = []
+            for i in range(min(7, len(dates))):
+                try:
+                    date = datetime.fromisoformat(dates[i])
+                    forecast.append({
+                        "date": dates[i],
+                        "display_date": "Today" if i == 0 else date.strftime("%a"),
+                        "high": int(max_temps[i]) if i < len(max_temps) else 32,
+                        "low": int(min_temps[i]) if i < len(min_temps) else 18,
+                        "condition": self.map_weather_code(codes[i]) if i < len(codes) else "Cloudy",
+                        "wind_speed": int(winds[i]) if i < len(winds) else 0,
+                        "wind_direction": "N",
+                        "rain_chance": int(rains[i]) if (i < len(rains) and rains[i] is not None) else 0
+                    })
+                except (IndexError, ValueError) as e:
+                    pass
 
-                result = {
-                    "location": location,
-                    "current": {
-                        "condition": forecast[0]["condition"] if forecast else "Cloudy",
-                        "temp": forecast[0]["high"] if forecast else 32
-                    },
-                    "forecast": forecast,
-                    "updated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    "source": "Open-Meteo (Live)"
-                }
+            result = {
+                "location": location,
+                "current": {
+                    "condition": forecast[0]["condition"] if forecast else "Cloudy",
+                    "temp": forecast[0]["high"] if forecast else 32
+                },
+                "forecast": forecast,
+                "updated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "source": "Open-Meteo (Live)"
+            }
 
-                # Update cache
-                self._cache[cache_key] = (result, time.time())
-                return result
-                
+            # Update cache
+            self._cache[cache_key] = (result, time.time())
+            return result
+            
         except Exception as e:
             # Generate 7-day fallback forecast
             fallback_forecast = []
@@ -40,3 +40,15 @@ async def test_no_event_found(mock_ai_service):
     assert result["status"] == "success"
     assert result["data"]["is_event"] is False
     assert result["data"]["event"] is None
+
+@pytest.mark.asyncio
+async def test_prompt_is_stable_for_the_same_email(mock_ai_service):
+    agent = CalendarAgent()
+    context = {"subject": "Walkthrough", "body": "Site walk Thursday at 9am"}
+
+    await agent.process(context)
+    await agent.process(context)
+
+    # Same prompt twice, so the LLM cache can hit
+    first, second = [c.args[0] for c in mock_ai_service.generate_content.call_args_list]
+    assert first == second
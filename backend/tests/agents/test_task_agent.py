@@ -38,3 +38,59 @@ async def test_task_extraction_error(mock_ai_service):
     result = await agent.process({"body": "test"})
     
     assert result["status"] == "error"
+
+@pytest.mark.asyncio
+async def test_batch_extraction_splits_results_per_email(mock_ai_service):
+    mock_ai_service.generate_content.return_value = '''{"results": [
+        {"id": "E2", "category": "Material", "summary": "Delivery", "tasks": []},
+        {"id": "E1", "category": "Financial", "summary": "Invoice", "tasks": [
+            {"title": "Pay invoice", "description": "Pay it.", "priority": "High", "due_date": "2026-03-01", "confidence": 0.8, "evidence": "Please pay."}
+        ]}
+    ]}'''
+    agent = TaskAgent()
+    contexts = [
+        {"subject": "Invoice", "body": "Please pay.", "message_id": "m1"},
+        {"subject": "Delivery", "body": "Steel arrives Monday.", "message_id": "m2"},
+    ]
+
+    results = await agent.process_batch(contexts)
+
+    assert mock_ai_service.generate_content.await_count == 1
+    assert mock_ai_service.generate_content.call_args.kwargs["json_mode"] is True
+    assert [r["status"] for r in results] == ["success", "success"]
+    assert results[0]["data"]["tasks"][0]["title"] == "Pay invoice"
+    assert results[0]["data"]["tasks"][0]["source_id"] == "m1"
+    assert results[1]["data"]["tasks"] == []
+
+@pytest.mark.asyncio
+async def test_batch_extraction_falls_back_to_single_calls(mock_ai_service):
+    single = '{"tasks": [{"title": "Review Proposal", "description": "d", "priority": "High", "due_date": null, "confidence": 0.9, "evidence": "e"}]}'
+    # E2 is missing from the batch response: only it is retried on its own
+    mock_ai_service.generate_content.side_effect = [
+        '{"results": [{"id": "E1", "tasks": []}, {"id": "E9", "tasks": []}]}',
+        single,
+    ]
+    agent = TaskAgent()
+    results = await agent.process_batch([{"subject": "a", "body": "x"}, {"subject": "b", "body": "y"}])
+    assert mock_ai_service.generate_content.await_count == 2
+    assert results[0]["data"]["tasks"] == []
+    assert results[1]["data"]["tasks"][0]["title"] == "Review Proposal"
+
+    # Unparseable batch response: every email is retried on its own
+    mock_ai_service.generate_content.reset_mock()
+    mock_ai_service.generate_content.side_effect = ["not json", single, single]
+    results = await agent.process_batch([{"body": "x"}, {"body": "y"}])
+    assert mock_ai_service.generate_content.await_count == 3
+    assert all(r["status"] == "success" for r in results)
+
+@pytest.mark.asyncio
+async def test_rate_limited_batch_is_deferred_not_retried(mock_ai_service, monkeypatch):
+    monkeypatch.setattr("agents.task_agent.settings.TASK_AGENT_BATCH_SIZE", 2)
+    mock_ai_service.generate_content.return_value = "ERROR_RATE_LIMIT_EXCEEDED"
+    agent = TaskAgent()
+    results = await agent.process_batch([{"body": "a"}, {"body": "b"}, {"body": "c"}])
+
+    # One shed call; no single-item retries and no calls for the later batch
+    assert mock_ai_service.generate_content.await_count == 1
+    assert [r["status"] for r in results] == ["deferred", "deferred", "deferred"]
+    assert results[0]["error"] == "AI Rate limit exceeded."
@@ -47,3 +47,79 @@ def test_get_dashboard_status(client):
         response = client.get("/api/v1/dashboard/status")
         assert response.status_code == 200
         assert response.json() == {"status": "Healthy"}
+
+def _sse_frames(text):
+    import json
+    frames = []
+    for block in text.strip().split("\n\n"):
+        lines = block.split("\n")
+        event = lines[0][len("event: "):] if lines[0].startswith("event: ") else None
+        frames.append((event, json.loads(lines[-1][len("data: "):])))
+    return frames
+
+def _fake_stream(*chunks):
+    async def stream(*args, **kwargs):
+        for chunk in chunks:
+            yield chunk
+    return stream
+
+def test_chat_stream_passes_answer_through(client):
+    from services.ai_service import ai_service
+    with patch("api.routes._build_chat_prompt", return_value=("prompt", {})), \
+         patch.object(ai_service, "generate_stream", _fake_stream("S", "ure, ", "three projects.")):
+        response = client.post("/api/v1/chat/stream", json={"message": "How many projects?"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    frames = _sse_frames(response.text)
+    assert "".join(f[1]["delta"] for f in frames if f[0] is None) == "Sure, three projects."
+    assert frames[-1][0] == "done"
+
+def test_chat_stream_ui_action(client):
+    from services.ai_service import ai_service
+    with patch("api.routes._build_chat_prompt", return_value=("prompt", {})), \
+         patch.object(ai_service, "generate_stream", _fake_stream(" U", "I: render_", "schedule")):
+        response = client.post("/api/v1/chat/stream", json={"message": "Show me the schedule"})
+
+    frames = _sse_frames(response.text)
+    assert [f[1]["delta"] for f in frames if f[0] is None] == ["Opening render_schedule view..."]
+    assert frames[-1] == ("done", {"ui_action": {"component": "render_schedule", "props": {}}})
+
+def test_chat_stream_failure_mid_answer_sends_error_event(client):
+    from services.ai_service import ai_service, StreamInterrupted
+
+    async def failing_stream(*args, **kwargs):
+        yield "Sure, "
+        raise StreamInterrupted("Local model failed mid-answer: connection reset")
+
+    with patch("api.routes._build_chat_prompt", return_value=("prompt", {})), \
+         patch.object(ai_service, "generate_stream", failing_stream):
+        response = client.post("/api/v1/chat/stream", json={"message": "How many projects?"})
+
+    frames = _sse_frames(response.text)
+    assert frames[0] == (None, {"delta": "Sure, "})
+    assert frames[-1][0] == "error"
+    assert "connection reset" in frames[-1][1]["error"]
+
+def test_chat_stream_runs_sql_tool_off_the_event_loop(client):
+    import asyncio
+    from services.ai_service import ai_service
+    on_loop = []
+
+    def sql_prompt(query, sql_query):
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(True)
+        except RuntimeError: # Worker thread: the event loop keeps serving other requests
+            on_loop.append(False)
+        return "final prompt", {}
+
+    streams = iter([_fake_stream("SQL: SELECT 1")(), _fake_stream("One project.")()])
+    with patch("api.routes._build_chat_prompt", return_value=("prompt", {})), \
+         patch("api.routes._chat_sql_prompt", sql_prompt), \
+         patch.object(ai_service, "generate_stream", lambda *a, **k: next(streams)):
+        response = client.post("/api/v1/chat/stream", json={"message": "How many projects?"})
+
+    frames = _sse_frames(response.text)
+    assert [f[1]["delta"] for f in frames if f[0] is None] == ["One project."]
+    assert on_loop == [False]
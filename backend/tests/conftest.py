@@ -15,6 +15,10 @@ print(f"DEBUG: sys.path={sys.path}")
 
 # Override DATABASE_URL for tests to prevent using production DB
 os.environ["DATABASE_URL"] = "sqlite:///./test_atlas.db"
+# No watchdog observer inside every TestClient lifespan
+os.environ.setdefault("KNOWLEDGE_WATCHER_ENABLED", "false")
+# Dispatchers built in tests keep their limits to themselves (shared-store tests pass a temp LLMQuotaStore)
+os.environ.setdefault("LLM_ADMISSION_SHARED", "false")
 
 from core.app import app
 from database.database import Base, get_db
@@ -0,0 +1,95 @@
+import gzip
+import json
+import datetime
+import pytest
+from services.ai_audit_service import AIAuditLogger
+
+@pytest.fixture
+def audit_logger(tmp_path):
+    logger = AIAuditLogger(log_file=str(tmp_path / "ai_audit_log.jsonl"), blob_dir=str(tmp_path / "blobs"))
+    yield logger
+    logger.close()
+
+def _entry(minutes_ago=0, **fields):
+    entry = {
+        "timestamp": (datetime.datetime.now() - datetime.timedelta(minutes=minutes_ago)).isoformat(),
+        "prompt": "What is the status?",
+        "response": "On track.",
+        "model": "gemini-2.0-flash",
+        "tokens_used": 10,
+        "latency_ms": 100.0,
+        "status": "success"
+    }
+    entry.update(fields)
+    return entry
+
+def _lines(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+def test_log_is_written_in_background_batches(audit_logger):
+    for i in range(5):
+        audit_logger.log(_entry(prompt=f"prompt {i}"))
+    assert audit_logger.flush()
+
+    entries = _lines(audit_logger.log_file)
+    assert [e["prompt"] for e in entries] == [f"prompt {i}" for i in range(5)]
+    stats = audit_logger.stats()
+    assert stats["written"] == 5
+    assert stats["batches"] < 5
+
+def test_content_store_keeps_only_hashes(audit_logger):
+    audit_logger.content_store = True
+    audit_logger.log(_entry())
+    audit_logger.log(_entry(response="Behind schedule."))
+    audit_logger.flush()
+
+    first, second = _lines(audit_logger.log_file)
+    assert "prompt" not in first and "response" not in first
+    # Identical prompts share one blob
+    assert first["prompt_sha256"] == second["prompt_sha256"]
+    assert first["prompt_chars"] == len("What is the status?")
+    assert audit_logger.load_body(second["response_sha256"]) == "Behind schedule."
+
+def test_rotation_compresses_and_retains(audit_logger):
+    audit_logger.max_bytes = 400
+    audit_logger.retain_files = 2
+    for i in range(8):
+        audit_logger.log(_entry(prompt=f"prompt {i}"))
+        audit_logger.flush()
+
+    rotated = audit_logger.rotated_files()
+    assert len(rotated) == 2
+    with gzip.open(rotated[-1], "rt") as f:
+        assert json.loads(f.readline())["prompt"].startswith("prompt")
+    assert audit_logger.stats()["rotations"] > 2
+
+def test_rotation_by_age(audit_logger):
+    audit_logger.rotate_seconds = 3600
+    # File left over from an earlier run, started two hours ago
+    with open(audit_logger.log_file, "w") as f:
+        f.write(json.dumps(_entry(minutes_ago=120)) + "\n")
+    audit_logger.log(_entry())
+    audit_logger.flush()
+
+    assert len(audit_logger.rotated_files()) == 1
+    assert len(_lines(audit_logger.log_file)) == 1
+
+def test_summarize_aggregates_latency_and_tokens(audit_logger):
+    audit_logger.log(_entry(latency_ms=100.0, tokens_used=10))
+    audit_logger.log(_entry(latency_ms=300.0, tokens_used=30))
+    audit_logger.log(_entry(status="error", latency_ms=50.0, tokens_used=None))
+    audit_logger.log(_entry(status="cache_hit", latency_ms=1.0, tokens_used=0))
+    audit_logger.log(_entry(model="ollama-local", latency_ms=900.0, tokens_used=None))
+    audit_logger.log(_entry(minutes_ago=60 * 48)) # Outside the default window
+
+    summary = audit_logger.summarize(bucket="day")
+    assert summary["totals"] == {"requests": 5, "errors": 1, "cache_hits": 1, "tokens": 40}
+
+    gemini = next(r for r in summary["buckets"] if r["model"] == "gemini-2.0-flash")
+    assert gemini["requests"] == 4
+    assert gemini["latency_ms"]["avg"] == 150.0
+    assert gemini["latency_ms"]["p95"] == 300.0
+
+    with pytest.raises(ValueError):
+        audit_logger.summarize(bucket="week")
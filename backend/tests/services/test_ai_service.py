@@ -1,13 +1,24 @@
+import asyncio
 import pytest
-from unittest.mock import MagicMock, patch
-from services.ai_service import GeminiService
+from unittest.mock import AsyncMock, MagicMock, patch
+import services.ai_service as ai_module
+from services.ai_service import GeminiService, StreamInterrupted
+from services.llm_dispatcher import LLMDispatcher
+from services.llm_router import LLMRouter
 from core.config import settings
 
 @pytest.fixture
 def ai_service_instance(monkeypatch):
     # Mock settings to have an API key
     monkeypatch.setattr(settings, "GEMINI_API_KEY", "fake_key")
+    # Fresh dispatcher without the production rate limits
+    dispatcher = LLMDispatcher()
+    dispatcher.configure("gemini", requests_per_minute=0, tokens_per_minute=0)
+    monkeypatch.setattr(ai_module, "llm_dispatcher", dispatcher)
+    # Fresh circuit breakers, so failures in other tests don't open them
+    monkeypatch.setattr(ai_module, "llm_router", LLMRouter())
     with patch("google.genai.Client") as mock_client:
+        mock_client.return_value.aio.models.generate_content = AsyncMock()
         service = GeminiService()
         return service, mock_client
 
@@ -19,11 +30,11 @@ async def test_generate_content_success(ai_service_instance):
     # Mock response
     mock_response = MagicMock()
     mock_response.text = "Generated AI Content"
-    mock_client.models.generate_content.return_value = mock_response
+    mock_client.aio.models.generate_content.return_value = mock_response
     
     result = await service.generate_content("Hello")
     assert result == "Generated AI Content"
-    mock_client.models.generate_content.assert_called_once()
+    mock_client.aio.models.generate_content.assert_called_once()
 
 @pytest.mark.asyncio
 async def test_generate_content_no_key(monkeypatch):
@@ -39,7 +50,7 @@ async def test_generate_content_api_error(ai_service_instance):
     mock_client = mock_client_class.return_value
     
     # Mock API exception
-    mock_client.models.generate_content.side_effect = Exception("API Error")
+    mock_client.aio.models.generate_content.side_effect = Exception("API Error")
     
     result = await service.generate_content("Hello")
     assert "Error generating content" in result
@@ -52,14 +63,243 @@ async def test_generate_content_json_mode(ai_service_instance):
     # Mock response
     mock_response = MagicMock()
     mock_response.text = '{"key": "value"}'
-    mock_client.models.generate_content.return_value = mock_response
+    mock_client.aio.models.generate_content.return_value = mock_response
 
     result = await service.generate_content("Hello", json_mode=True)
     assert result == '{"key": "value"}'
 
     # Verify config passed
-    mock_client.models.generate_content.assert_called_with(
+    mock_client.aio.models.generate_content.assert_called_with(
         model='gemini-2.0-flash',
         contents='Hello',
         config={'response_mime_type': 'application/json'}
     )
+
+@pytest.mark.asyncio
+async def test_generate_content_does_not_block_event_loop(ai_service_instance):
+    service, mock_client_class = ai_service_instance
+    mock_client = mock_client_class.return_value
+    ai_module.llm_dispatcher.configure("gemini", concurrency=2)
+    state = {"running": 0, "max": 0}
+
+    async def slow_call(**kwargs):
+        state["running"] += 1
+        state["max"] = max(state["max"], state["running"])
+        await asyncio.sleep(0.05)
+        state["running"] -= 1
+        return MagicMock(text="ok")
+    mock_client.aio.models.generate_content.side_effect = slow_call
+
+    ticks = 0
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.01)
+    ticking = asyncio.create_task(ticker())
+    results = await asyncio.gather(*(service.generate_content("Hello", use_local_model=False) for _ in range(4)))
+    ticking.cancel()
+
+    assert results == ["ok"] * 4
+    assert state["max"] == 2
+    assert ticks >= 5
+
+@pytest.mark.asyncio
+async def test_generate_content_times_out(ai_service_instance):
+    service, mock_client_class = ai_service_instance
+    service.timeout_seconds = 0.05
+
+    async def hang(**kwargs):
+        await asyncio.sleep(10)
+    mock_client_class.return_value.aio.models.generate_content.side_effect = hang
+
+    result = await service.generate_content("Hello", use_local_model=False)
+    assert "timed out" in result
+
+class _FakeOllamaStream:
+    def __init__(self, lines, fail=None):
+        self.lines, self.fail = lines, fail
+
+    async def __aenter__(self):
+        if self.fail:
+            raise self.fail
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    async def aiter_lines(self):
+        for line in self.lines:
+            if isinstance(line, Exception):
+                raise line
+            if isinstance(line, float): # Model pause, in seconds
+                await asyncio.sleep(line)
+                continue
+            yield line
+
+def _gemini_chunks(*texts):
+    async def stream():
+        for text in texts:
+            yield MagicMock(text=text)
+    return AsyncMock(return_value=stream())
+
+@pytest.mark.asyncio
+async def test_generate_stream_gemini_assembles_audit_and_cache(ai_service_instance, tmp_path, monkeypatch):
+    from services.llm_cache_service import LLMCacheService
+    service, mock_client_class = ai_service_instance
+    monkeypatch.setattr(ai_module, "llm_cache_service", LLMCacheService(db_path=str(tmp_path / "cache.db")))
+    mock_client_class.return_value.aio.models.generate_content_stream = _gemini_chunks("Hel", "lo ", "world")
+    service._log_audit = MagicMock()
+
+    chunks = [c async for c in service.generate_stream("Hi", use_local_model=False, cache_ttl=60)]
+    assert chunks == ["Hel", "lo ", "world"]
+    audit = service._log_audit.call_args.kwargs
+    assert audit["response"] == "Hello world"
+    assert audit["status"] == "success"
+    assert audit["extra"]["first_token_ms"] is not None
+
+    # Second request is served from the cache as a single chunk
+    cached = [c async for c in service.generate_stream("Hi", use_local_model=False, cache_ttl=60)]
+    assert cached == ["Hello world"]
+    assert service._log_audit.call_args.kwargs["status"] == "cache_hit"
+
+@pytest.mark.asyncio
+async def test_generate_content_records_token_breakdown(ai_service_instance):
+    service, mock_client_class = ai_service_instance
+    mock_client_class.return_value.aio.models.generate_content.return_value = MagicMock(text="ok")
+    service._log_audit = MagicMock()
+    breakdown = {"prompt": "draft_agent", "sections": {"body": 120}, "trimmed": {}}
+
+    await service.generate_content("Hi", use_local_model=False, token_breakdown=breakdown)
+    assert service._log_audit.call_args.kwargs["extra"] == {"token_breakdown": breakdown}
+
+@pytest.mark.asyncio
+async def test_generate_stream_ollama_ndjson(ai_service_instance, monkeypatch):
+    service, _ = ai_service_instance
+    lines = ['{"response": "Daily", "done": false}', '', '{"response": " log", "done": true}']
+    client = MagicMock()
+    client.stream.return_value = _FakeOllamaStream(lines)
+    monkeypatch.setattr(ai_module, "http_clients", MagicMock(get=MagicMock(return_value=client)))
+    service._log_audit = MagicMock()
+
+    chunks = [c async for c in service.generate_stream("Hi")]
+    assert chunks == ["Daily", " log"]
+    assert client.stream.call_args.kwargs["json"]["stream"] is True
+    assert service._log_audit.call_args.kwargs["model"] == "ollama-local"
+
+@pytest.mark.asyncio
+async def test_generate_stream_falls_back_to_gemini_before_first_chunk(ai_service_instance, monkeypatch):
+    service, mock_client_class = ai_service_instance
+    client = MagicMock()
+    client.stream.return_value = _FakeOllamaStream([], fail=ConnectionError("ollama down"))
+    monkeypatch.setattr(ai_module, "http_clients", MagicMock(get=MagicMock(return_value=client)))
+    mock_client_class.return_value.aio.models.generate_content_stream = _gemini_chunks("from gemini")
+    service._log_audit = MagicMock()
+
+    chunks = [c async for c in service.generate_stream("Hi")]
+    assert chunks == ["from gemini"]
+
+@pytest.mark.asyncio
+async def test_open_ollama_circuit_goes_straight_to_gemini(ai_service_instance, monkeypatch):
+    service, mock_client_class = ai_service_instance
+    mock_client_class.return_value.aio.models.generate_content.return_value = MagicMock(text="from gemini")
+    registry = MagicMock()
+    monkeypatch.setattr(ai_module, "http_clients", registry)
+    ai_module.llm_router.breaker("ollama_generate").trip("connection refused")
+
+    assert await service.generate_content("Hello") == "from gemini"
+    registry.get.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_open_gemini_circuit_fails_fast(ai_service_instance):
+    service, mock_client_class = ai_service_instance
+    ai_module.llm_router.breaker("gemini").trip("timeout")
+
+    result = await service.generate_content("Hello", use_local_model=False)
+    assert "LLM backend unavailable (gemini: open)" in result
+    mock_client_class.return_value.aio.models.generate_content.assert_not_called()
+
+def test_open_embed_circuit_skips_ollama(ai_service_instance, monkeypatch):
+    service, _ = ai_service_instance
+    registry = MagicMock()
+    monkeypatch.setattr(ai_module, "http_clients", registry)
+    ai_module.llm_router.breaker("ollama_embed").trip("connection refused")
+
+    assert service.get_embedding("text") is None
+    registry.get_sync.assert_not_called()
+
+def test_get_embeddings_is_one_batch_call(ai_service_instance, monkeypatch):
+    service, _ = ai_service_instance
+    client = MagicMock()
+    client.post.return_value = MagicMock(status_code=200, json=MagicMock(return_value={"embeddings": [[0.1], [0.2]]}))
+    monkeypatch.setattr(ai_module, "http_clients", MagicMock(get_sync=MagicMock(return_value=client)))
+
+    assert service.get_embeddings(["projects", "daily_logs"]) == [[0.1], [0.2]]
+    client.post.assert_called_once()
+    assert client.post.call_args.kwargs["json"]["input"] == ["projects", "daily_logs"]
+
+@pytest.mark.asyncio
+async def test_generate_stream_releases_slot_before_slow_client_reads(ai_service_instance, monkeypatch):
+    service, _ = ai_service_instance
+    lines = ['{"response": "Daily", "done": false}', '{"response": " log", "done": true}']
+    client = MagicMock()
+    client.stream.return_value = _FakeOllamaStream(lines)
+    monkeypatch.setattr(ai_module, "http_clients", MagicMock(get=MagicMock(return_value=client)))
+    service._log_audit = MagicMock()
+
+    stream = service.generate_stream("Hi")
+    assert await stream.__anext__() == "Daily"
+    await asyncio.sleep(0.01) # The client stalls; Ollama finishes meanwhile
+    assert ai_module.llm_dispatcher.stats()["backends"]["ollama"]["in_flight"] == 0
+    assert [c async for c in stream] == [" log"]
+
+@pytest.mark.asyncio
+async def test_generate_stream_raises_on_failure_mid_answer(ai_service_instance, monkeypatch):
+    service, mock_client_class = ai_service_instance
+    lines = ['{"response": "Daily", "done": false}', ConnectionError("ollama crashed")]
+    client = MagicMock()
+    client.stream.return_value = _FakeOllamaStream(lines)
+    monkeypatch.setattr(ai_module, "http_clients", MagicMock(get=MagicMock(return_value=client)))
+    mock_client_class.return_value.aio.models.generate_content_stream = _gemini_chunks("from gemini")
+    service._log_audit = MagicMock()
+
+    chunks = []
+    with pytest.raises(StreamInterrupted):
+        async for chunk in service.generate_stream("Hi"):
+            chunks.append(chunk)
+    assert chunks == ["Daily"] # No restart on Gemini after output started
+    assert service._log_audit.call_args.kwargs["status"] == "error"
+
+@pytest.mark.asyncio
+async def test_generate_stream_records_total_latency(ai_service_instance, monkeypatch):
+    service, _ = ai_service_instance
+    lines = ['{"response": "Daily", "done": false}', 0.05, '{"response": " log", "done": true}']
+    client = MagicMock()
+    client.stream.return_value = _FakeOllamaStream(lines)
+    monkeypatch.setattr(ai_module, "http_clients", MagicMock(get=MagicMock(return_value=client)))
+    service._log_audit = MagicMock()
+
+    chunks = [c async for c in service.generate_stream("Hi")]
+    assert chunks == ["Daily", " log"]
+    # Same measure as generate_content (whole request), not time to first token
+    assert ai_module.llm_router.breaker("ollama_generate").latency_ms >= 50
+    assert service._log_audit.call_args.kwargs["extra"]["first_token_ms"] < 50
+
+@pytest.mark.asyncio
+async def test_generate_stream_audits_client_disconnect(ai_service_instance, monkeypatch):
+    service, _ = ai_service_instance
+    lines = ['{"response": "Daily", "done": false}', '{"response": " log", "done": true}']
+    client = MagicMock()
+    client.stream.return_value = _FakeOllamaStream(lines)
+    monkeypatch.setattr(ai_module, "http_clients", MagicMock(get=MagicMock(return_value=client)))
+    service._log_audit = MagicMock()
+
+    stream = service.generate_stream("Hi")
+    assert await stream.__anext__() == "Daily"
+    await stream.aclose() # The client went away mid-answer
+
+    audit = service._log_audit.call_args.kwargs
+    assert (audit["model"], audit["status"], audit["error_message"]) == ("ollama-local", "cancelled", "Client disconnected")
@@ -0,0 +1,106 @@
+import asyncio
+import threading
+import pytest
+from aiohttp import web
+from services.altimeter_api_service import AltimeterAPIService
+
+async def start_stub_api(bulk: bool):
+    """Stand-in Altimeter API that records concurrency and client connections."""
+    state = {"in_flight": 0, "max_in_flight": 0, "peers": set(), "bulk_calls": 0, "next_id": 0}
+
+    async def create(request):
+        state["peers"].add(request.transport.get_extra_info("peername"))
+        state["in_flight"] += 1
+        state["max_in_flight"] = max(state["max_in_flight"], state["in_flight"])
+        await asyncio.sleep(0.01)
+        state["in_flight"] -= 1
+        state["next_id"] += 1
+        return web.json_response({"id": f"r{state['next_id']}"}, status=201)
+
+    async def bulk_push(request):
+        state["bulk_calls"] += 1
+        operations = (await request.json())["operations"]
+        return web.json_response({"results": [
+            {"task": {"id": op.get("id") or f"b{i}"}} if op["data"]["title"] != "bad" else {"error": "invalid"}
+            for i, op in enumerate(operations)
+        ]})
+
+    app = web.Application()
+    app.router.add_post("/tasks", create)
+    if bulk:
+        app.router.add_post("/tasks/bulk", bulk_push)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}", state
+
+def make_client(base_url: str, concurrency: int = 4) -> AltimeterAPIService:
+    client = AltimeterAPIService()
+    client.base_url = base_url
+    client.concurrency = concurrency
+    client.rate_limit = 0
+    client.bulk_size = 10
+    return client
+
+@pytest.mark.asyncio
+async def test_backlog_is_pushed_concurrently_over_shared_connections():
+    runner, url, state = await start_stub_api(bulk=False)
+    client = make_client(url, concurrency=4)
+    try:
+        results = await client.push_tasks([{"task_id": None, "data": {"title": f"t{i}"}} for i in range(40)])
+    finally:
+        await client.close()
+        await runner.cleanup()
+
+    assert all(r["id"].startswith("r") for r in results)
+    assert client._bulk_supported is False
+    assert 1 < state["max_in_flight"] <= 4
+    assert len(state["peers"]) <= 4 # Keep-alive connections are reused
+
+@pytest.mark.asyncio
+async def test_bulk_endpoint_is_used_in_chunks():
+    runner, url, state = await start_stub_api(bulk=True)
+    client = make_client(url)
+    pushes = [{"task_id": None, "data": {"title": "ok"}} for _ in range(24)]
+    pushes[5] = {"task_id": "remote-5", "data": {"title": "bad"}}
+    try:
+        results = await client.push_tasks(pushes)
+    finally:
+        await client.close()
+        await runner.cleanup()
+
+    assert state["bulk_calls"] == 3
+    assert isinstance(results[5], Exception)
+    assert results[0] == {"id": "b0"}
+    assert len(results) == 24
+
+@pytest.mark.asyncio
+async def test_sessions_are_kept_per_loop_and_all_closed():
+    client = make_client("http://127.0.0.1:9")
+    other_loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=other_loop.run_forever, daemon=True)
+    thread.start()
+
+    async def open_session():
+        return client._get_session()[0]
+
+    try:
+        other = asyncio.run_coroutine_threadsafe(open_session(), other_loop).result(5)
+        mine, _ = client._get_session()
+        # The other loop's session is neither replaced nor dropped
+        assert mine is not other and not other.closed
+        assert client._get_session()[0] is mine
+
+        await client.close()
+        assert mine.closed
+        for _ in range(50):
+            if other.closed:
+                break
+            await asyncio.sleep(0.01)
+        assert other.closed
+    finally:
+        other_loop.call_soon_threadsafe(other_loop.stop)
+        thread.join(5)
+        other_loop.close()
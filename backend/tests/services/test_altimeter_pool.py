@@ -0,0 +1,54 @@
+import sqlite3
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from services.altimeter_service import AltimeterService
+
+@pytest.fixture
+def altimeter(tmp_path):
+    db_path = tmp_path / "altimeter.db"
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        CREATE TABLE projects (id TEXT, altimeter_project_id TEXT, name TEXT, status TEXT,
+                               customer_id INTEGER, is_active INTEGER, updated_at TEXT);
+        CREATE TABLE customers (customer_id INTEGER, company_name TEXT, email TEXT);
+        INSERT INTO projects VALUES ('p1', '25-0142', 'Main St', 'Active', 1, 1, '2025-01-01');
+        INSERT INTO customers VALUES (1, 'Acme', 'gc@acme.com');
+    """)
+    conn.commit()
+    conn.close()
+
+    service = AltimeterService()
+    service.db_path = str(db_path)
+    yield service
+    service.close()
+
+def test_pool_reuses_connections(altimeter):
+    for _ in range(20):
+        assert altimeter.list_projects()[0]["name"] == "Main St"
+
+    health = altimeter.check_health()
+    assert health["status"] == "connected"
+    assert health["active_projects"] == 1
+    assert health["pool"]["connects"] == 1
+    assert health["pool"]["checkouts"] == 21
+    assert health["pool"]["in_use"] == 0
+
+def test_pool_is_read_only_and_bounded(altimeter):
+    result = altimeter.execute_read_only_query("PRAGMA query_only")
+    assert result == [{"query_only": 1}]
+
+    with pytest.raises(sqlite3.OperationalError):
+        with altimeter._connection() as conn:
+            conn.execute("CREATE TABLE scratch (x)")
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        names = list(executor.map(lambda _: altimeter.get_project_details("p1")["name"], range(40)))
+    assert names == ["Main St"] * 40
+    assert altimeter.check_health()["pool"]["open"] <= altimeter._get_pool().size
+
+def test_broken_connection_is_replaced_on_checkout(altimeter):
+    with altimeter._connection() as conn:
+        conn.close()
+
+    assert altimeter.get_project_details("25-0142") is not None
+    assert altimeter.check_health()["pool"]["recycled"] == 1
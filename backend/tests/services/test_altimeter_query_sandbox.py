@@ -0,0 +1,72 @@
+import sqlite3
+import pytest
+from services.altimeter_service import AltimeterService
+from services.altimeter_query_sandbox import AltimeterQuerySandbox, QueryTimeout
+
+@pytest.fixture
+def altimeter(tmp_path):
+    db_path = tmp_path / "altimeter.db"
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        CREATE TABLE projects (id TEXT, altimeter_project_id TEXT, name TEXT);
+        CREATE TABLE daily_logs (id INTEGER PRIMARY KEY, project_id TEXT, log_date TEXT,
+                                 description TEXT, created_by TEXT);
+    """)
+    conn.executemany("INSERT INTO projects VALUES (?, ?, ?)",
+                     [(f"p{i}", f"25-{i:04d}", f"Project {i}") for i in range(1000)])
+    conn.executemany("INSERT INTO daily_logs (project_id, log_date, description, created_by) VALUES (?, ?, ?, ?)",
+                     [(f"p{i % 1000}", "2025-03-0%d" % (1 + i % 2), "Pulled wire", "MK") for i in range(2000)])
+    conn.commit()
+    conn.close()
+
+    service = AltimeterService()
+    service.db_path = str(db_path)
+    service.query_sandbox = AltimeterQuerySandbox(service, timeout_seconds=5, max_rows=50, max_cost=100_000)
+    yield service
+    service.close()
+
+def test_rows_are_capped_and_results_cached(altimeter):
+    sandbox = altimeter.query_sandbox
+    first = sandbox.run("SELECT name FROM projects")
+    assert len(first["rows"]) == 50
+    assert first["truncated"] and not first["cached"]
+
+    # Whitespace differences normalize to the same cache entry
+    again = sandbox.run("SELECT   name\n FROM projects;")
+    assert again["cached"] and again["rows"] == first["rows"]
+    assert sandbox.stats()["executed"] == 1
+
+    assert altimeter.execute_read_only_query("SELECT name FROM projects WHERE id = ?", ("p7",)) == [{"name": "Project 7"}]
+
+def test_cache_is_invalidated_when_database_changes(altimeter):
+    assert altimeter.execute_read_only_query("SELECT count(*) AS n FROM projects") == [{"n": 1000}]
+
+    conn = sqlite3.connect(altimeter.db_path)
+    conn.execute("INSERT INTO projects VALUES ('p-new', '26-0001', 'New')")
+    conn.commit()
+    conn.close()
+
+    assert altimeter.execute_read_only_query("SELECT count(*) AS n FROM projects") == [{"n": 1001}]
+
+def test_expensive_join_is_rejected_before_running(altimeter):
+    result = altimeter.execute_read_only_query(
+        "SELECT * FROM daily_logs dl JOIN projects p ON p.name LIKE dl.description"
+    )
+    assert "Query rejected" in result[0]["error"]
+    assert altimeter.query_sandbox.stats()["rejected"] == 1
+
+def test_templates_bind_parameters(altimeter):
+    logs = altimeter.execute_query_template("daily_logs_for_date", ("2025-03-01",))
+    assert len(logs) == 50 # max_rows
+    assert logs[0]["created_by"] == "MK"
+    assert altimeter.execute_query_template("daily_logs_for_date", ("2025-03-01' OR '1'='1",)) == []
+
+def test_long_running_query_times_out(altimeter):
+    altimeter.query_sandbox.timeout_seconds = 0.05
+    with pytest.raises(QueryTimeout):
+        altimeter.query_sandbox.run("""
+            WITH RECURSIVE n(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM n)
+            SELECT count(*) FROM n
+        """)
+    # The pooled connection is usable again without the deadline
+    assert altimeter.execute_read_only_query("SELECT 1 AS one") == [{"one": 1}]
@@ -0,0 +1,111 @@
+import sqlite3
+import pytest
+from datetime import date, timedelta
+from unittest.mock import patch
+import services.altimeter_service as altimeter_module
+from services.altimeter_service import AltimeterService
+from services.mission_intel_service import mission_intel_service
+
+@pytest.fixture
+def altimeter(tmp_path):
+    db_path = tmp_path / "altimeter.db"
+    today = date.today()
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        CREATE TABLE projects (id TEXT, altimeter_project_id TEXT, name TEXT, status TEXT,
+                               customer_id INTEGER, is_active INTEGER, updated_at TEXT);
+        CREATE TABLE customers (customer_id INTEGER, company_name TEXT, email TEXT);
+        CREATE TABLE employees (email TEXT, role TEXT);
+        CREATE TABLE project_phases (id INTEGER, project_id TEXT, phase TEXT, status TEXT,
+                                     start_date TEXT, completion_date TEXT);
+        INSERT INTO projects VALUES ('p1', '25-0142', 'Main St', 'Active', 1, 1, '2025-01-01 08:00:00');
+        INSERT INTO customers VALUES (1, 'Acme', 'gc@acme.com');
+        INSERT INTO employees VALUES ('pm@davis.com', 'Project Manager');
+    """)
+    conn.executemany("INSERT INTO project_phases VALUES (?, 'p1', ?, ?, ?, ?)", [
+        (1, "Rough-In", "Active", str(today - timedelta(days=3)), str(today + timedelta(days=3))),
+        (2, "Trim", "Active", str(today + timedelta(days=10)), str(today + timedelta(days=20))),
+        (3, "Underground", "Completed", str(today - timedelta(days=3)), str(today + timedelta(days=3)))
+    ])
+    conn.commit()
+    conn.close()
+
+    service = AltimeterService()
+    service.db_path = str(db_path)
+    service.reference_cache.check_interval = 0 # Check data_version on every lookup
+    yield service
+    service.close()
+
+def test_lookups_are_served_from_memory(altimeter):
+    assert altimeter.get_project_details("25-0142")["name"] == "Main St"
+    checkouts = altimeter._get_pool().stats()["checkouts"]
+
+    for _ in range(20):
+        assert altimeter.get_project_details("p1")["altimeter_project_id"] == "25-0142"
+        assert altimeter._get_customer_name(1) == "Acme"
+        assert altimeter._get_contact_info("pm@davis.com") == {"role": "Project Manager", "company": "Davis Electric"}
+        assert altimeter._get_contact_info("gc@acme.com") == {"role": "Client", "company": "Acme"}
+        assert [p["phase_name"] for p in altimeter.get_active_phases()] == ["Rough-In"]
+
+    assert altimeter._get_pool().stats()["checkouts"] == checkouts
+
+def test_cache_refreshes_after_external_write(altimeter):
+    assert altimeter.get_project_details("25-0199") is None
+
+    writer = sqlite3.connect(altimeter.db_path)
+    writer.execute("INSERT INTO projects VALUES ('p2', '25-0199', 'Depot', 'Active', 1, 1, '2025-02-01 08:00:00')")
+    writer.execute("UPDATE projects SET name = 'Main Street', updated_at = '2025-02-02 08:00:00' WHERE id = 'p1'")
+    writer.commit()
+    writer.close()
+
+    assert altimeter.get_project_details("25-0199")["name"] == "Depot"
+    assert altimeter.get_project_details("25-0142")["name"] == "Main Street"
+    assert altimeter.check_health()["reference_cache"]["projects"] == 2
+
+def test_refresh_evicts_deleted_projects(altimeter):
+    altimeter.reference_cache.reconcile_interval = 0
+    assert altimeter.get_project_details("25-0142")["name"] == "Main St"
+
+    writer = sqlite3.connect(altimeter.db_path)
+    writer.execute("DELETE FROM projects WHERE id = 'p1'")
+    writer.commit()
+    writer.close()
+
+    assert altimeter.get_project_details("25-0142") is None
+    assert altimeter.get_project_details("p1") is None
+    assert altimeter.check_health()["reference_cache"]["projects"] == 0
+
+def test_refresh_sees_rows_sharing_the_watermark_timestamp(altimeter):
+    assert altimeter.get_project_details("25-0142")["name"] == "Main St"
+
+    # Same updated_at as the row already cached (second-resolution timestamps)
+    writer = sqlite3.connect(altimeter.db_path)
+    writer.execute("INSERT INTO projects VALUES ('p0', '25-0100', 'Annex', 'Active', 1, 1, '2025-01-01 08:00:00')")
+    writer.commit()
+    writer.close()
+
+    assert altimeter.get_project_details("25-0100")["name"] == "Annex"
+    assert altimeter.get_project_details("25-0142")["name"] == "Main St"
+
+def test_batch_context_resolves_once_per_project(altimeter):
+    emails = [
+        {"sender": "PM <pm@davis.com>", "subject": "25-0142 rough-in", "body": "", "message_id": "m1"},
+        {"sender": "gc@acme.com", "subject": "RFP for 25-0142", "body": "", "message_id": "m2"},
+        {"sender": "someone@else.com", "subject": "Lunch?", "body": "", "message_id": "m3"}
+    ]
+    mission_intel_service.invalidate()
+    with patch.object(altimeter_module.intelligence_bridge, "predict_mission_intel", return_value=[{"title": "SOP"}]) as mock_intel:
+        contexts = altimeter.get_context_for_emails(emails)
+        assert mock_intel.call_count == 1
+
+        assert contexts[0]["project"]["customer"] == "Acme"
+        assert contexts[0]["company_role"] == "Project Manager at Davis Electric"
+        assert contexts[0]["mission_intel"] == [{"title": "SOP"}]
+        assert contexts[1]["is_proposal"] is True
+        assert contexts[1]["company_role"] == "Client at Acme"
+        assert contexts[2]["project"] is None
+
+        # Same message_id later in the pipeline: memoized, not enriched again
+        again = altimeter.get_context_for_email("PM <pm@davis.com>", "25-0142 rough-in", message_id="m1")
+        assert again == contexts[0]
+        assert mock_intel.call_count == 1
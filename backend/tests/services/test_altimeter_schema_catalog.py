@@ -0,0 +1,64 @@
+import sqlite3
+import pytest
+from unittest.mock import patch
+import services.ai_service as ai_module
+from services.altimeter_service import AltimeterService
+
+@pytest.fixture
+def altimeter(tmp_path):
+    db_path = tmp_path / "altimeter.db"
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        CREATE TABLE projects (id TEXT, altimeter_project_id TEXT, name TEXT, status TEXT);
+        CREATE TABLE daily_logs (id INTEGER, project_id TEXT, log_date TEXT, description TEXT);
+        CREATE TABLE budget_lines (id INTEGER, project_id TEXT, amount REAL);
+        CREATE TABLE audit_logs (id INTEGER, action TEXT);
+    """)
+    conn.commit()
+    conn.close()
+
+    service = AltimeterService()
+    service.db_path = str(db_path)
+    yield service
+    service.close()
+
+def test_schema_is_cached_until_schema_version_changes(altimeter):
+    with patch.object(altimeter.schema_catalog, "render_table", wraps=altimeter.schema_catalog.render_table) as render:
+        first = altimeter.get_db_schema(5)
+        assert altimeter.get_db_schema(5) == first
+        assert render.call_count == 4
+
+    assert "budget_lines" not in altimeter.get_db_schema(1)
+    assert "audit_logs" not in altimeter.get_db_schema(4)
+
+    conn = sqlite3.connect(altimeter.db_path)
+    conn.execute("CREATE TABLE employees (email TEXT, role TEXT)")
+    conn.commit()
+    conn.close()
+    assert "employees" in altimeter.get_db_schema(5)
+
+def test_digest_keeps_relevant_tables_within_budget(altimeter):
+    with patch.object(ai_module.ai_service, "get_embeddings", return_value=None), \
+         patch.object(ai_module.ai_service, "get_embedding", return_value=None):
+        digest = altimeter.get_schema_digest("What did the daily logs say yesterday?", 5, token_budget=40)
+
+        lines = [line for line in digest.splitlines() if line.startswith("- Table")]
+        assert lines[0].startswith("- Table 'daily_logs'")
+        assert "omitted" in digest
+        assert "budget_lines" not in altimeter.get_schema_digest("budget for projects", 1)
+
+def test_digest_ranks_by_embedding_similarity(altimeter):
+    def fake_embedding(text):
+        return [1.0, 0.0] if ("status" in text or "Which jobs" in text) else [0.0, 1.0]
+
+    with patch.object(ai_module.ai_service, "get_embeddings",
+                      side_effect=lambda texts: [fake_embedding(t) for t in texts]) as embed_tables, \
+         patch.object(ai_module.ai_service, "get_embedding", side_effect=fake_embedding) as embed:
+        digest = altimeter.get_schema_digest("Which jobs are running?", 5, token_budget=30)
+        assert "- Table 'projects'" in digest.splitlines()[1]
+
+        altimeter.get_schema_digest("Which jobs are open?", 5)
+        # All tables are embedded in one batch call and reused; only the question is embedded again
+        assert embed_tables.call_count == 1
+        assert len(embed_tables.call_args.args[0]) == 4
+        assert embed.call_count == 2
@@ -0,0 +1,326 @@
+import asyncio
+import pytest
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import services.altimeter_sync_service as sync_module
+from database.database import Base
+from database.models import Task, SyncQueue, SyncConflict, SyncActivityLog
+from services.altimeter_api_service import NOT_MODIFIED, PreconditionFailed
+from services.altimeter_sync_service import AltimeterSyncService
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'atlas.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    with patch.object(sync_module, "SessionLocal", factory):
+        yield factory
+    engine.dispose()
+
+@pytest.fixture
+def api():
+    api = MagicMock()
+    with patch.object(sync_module, "altimeter_api_service", api):
+        yield api
+
+def add_tasks(factory, count):
+    db = factory()
+    for i in range(1, count + 1):
+        db.add(Task(task_id=i, title=f"Task {i}", status="open", remote_id=f"r-{i}"))
+    db.commit()
+    db.close()
+
+@pytest.mark.asyncio
+async def test_items_run_concurrently_one_per_entity(session_factory, api):
+    add_tasks(session_factory, 4)
+    state = {"running": set(), "max": 0, "overlap": False}
+
+    async def get_task(remote_id, etag=None):
+        if remote_id in state["running"]:
+            state["overlap"] = True
+        state["running"].add(remote_id)
+        state["max"] = max(state["max"], len(state["running"]))
+        await asyncio.sleep(0.05)
+        state["running"].discard(remote_id)
+        return None
+    api.get_task = AsyncMock(side_effect=get_task)
+
+    service = AltimeterSyncService()
+    service.concurrency = 3
+    db = session_factory()
+    for task_id in (1, 2, 3, 4):
+        db.add(SyncQueue(entity_type='task', entity_id=task_id, direction='pull', status='pending'))
+    db.add(SyncQueue(entity_type='task', entity_id=1, direction='pull', status='pending'))
+    db.commit()
+
+    assert await service.process_queue() == 3
+    assert state["max"] == 3
+    while await service.process_queue():
+        pass
+
+    assert not state["overlap"]
+    assert api.get_task.await_count == 5
+    assert {i.status for i in db.query(SyncQueue).all()} == {'synced'}
+    assert all(i.leased_by is None for i in db.query(SyncQueue).all())
+    db.close()
+
+@pytest.mark.asyncio
+async def test_failures_back_off_and_expired_leases_are_reclaimed(session_factory, api):
+    add_tasks(session_factory, 2)
+    api.get_task = AsyncMock(side_effect=Exception("API Error"))
+    service = AltimeterSyncService()
+
+    db = session_factory()
+    failing = SyncQueue(entity_type='task', entity_id=1, direction='pull', status='pending')
+    # Left 'syncing' by a worker that died; its lease has run out
+    orphan = SyncQueue(entity_type='task', entity_id=2, direction='pull', status='syncing',
+                       leased_by="dead-worker", lease_expires_at=datetime.now(timezone.utc) - timedelta(seconds=1))
+    db.add_all([failing, orphan])
+    db.commit()
+
+    assert await service.process_queue() == 2
+    db.expire_all()
+    assert failing.status == 'retry' and failing.retry_count == 1
+    assert orphan.retry_count == 1 and orphan.leased_by is None
+
+    # Not due again until the backoff elapses
+    assert await service.process_queue() == 0
+    assert 0 < service._seconds_until_due() <= 5
+    db.close()
+
+@pytest.mark.asyncio
+async def test_newer_item_waits_for_older_retry_in_backoff(session_factory, api):
+    add_tasks(session_factory, 1)
+    api.get_task = AsyncMock(return_value=None)
+    service = AltimeterSyncService()
+
+    db = session_factory()
+    db.add(SyncQueue(entity_type='task', entity_id=1, direction='push', status='retry', retry_count=1,
+                     next_attempt_at=datetime.now(timezone.utc) + timedelta(seconds=30)))
+    db.add(SyncQueue(entity_type='task', entity_id=1, direction='pull', status='pending'))
+    db.commit()
+
+    assert await service.process_queue() == 0
+    api.get_task.assert_not_called()
+    db.close()
+
+@pytest.mark.asyncio
+async def test_outcome_is_dropped_after_the_lease_was_lost(session_factory, api):
+    add_tasks(session_factory, 1)
+    service = AltimeterSyncService()
+
+    async def get_task(remote_id, etag=None):
+        # Our lease ran out mid-call and another worker reclaimed the item
+        other = session_factory()
+        other.query(SyncQueue).update({SyncQueue.leased_by: "other-worker"})
+        other.commit()
+        other.close()
+        return None
+    api.get_task = AsyncMock(side_effect=get_task)
+
+    db = session_factory()
+    item = SyncQueue(entity_type='task', entity_id=1, direction='pull', status='pending')
+    db.add(item)
+    db.commit()
+
+    assert await service.process_queue() == 1
+    db.expire_all()
+    assert item.status == 'syncing' and item.leased_by == "other-worker"
+    assert db.query(SyncActivityLog).count() == 0
+    db.close()
+
+@pytest.mark.asyncio
+async def test_idle_worker_wakes_on_enqueue(session_factory, api):
+    add_tasks(session_factory, 1)
+    api.get_task = AsyncMock(return_value=None)
+    service = AltimeterSyncService()
+    worker = asyncio.create_task(service.start_worker())
+    await asyncio.sleep(0.05)
+    assert service._seconds_until_due() == service.IDLE_WAIT_SECONDS
+
+    db = session_factory()
+    item = service.enqueue_task(db, 1, 'pull')
+    for _ in range(50):
+        await asyncio.sleep(0.02)
+        db.expire_all()
+        if item.status == 'synced':
+            break
+    assert item.status == 'synced'
+
+    service.stop_worker()
+    await asyncio.wait_for(worker, 1)
+    db.close()
+
+@pytest.mark.asyncio
+async def test_push_backlog_goes_out_as_one_batch(session_factory, api):
+    db = session_factory()
+    db.add_all([Task(task_id=1, title="New", remote_id=None), Task(task_id=2, title="Old", remote_id="r-2")])
+    db.add_all([SyncQueue(entity_type='task', entity_id=i, direction='push', status='pending') for i in (1, 2)])
+    db.commit()
+
+    api.push_tasks = AsyncMock(return_value=[{"id": "r-1"}, Exception("API Error")])
+    assert await AltimeterSyncService().process_queue() == 1
+
+    pushes = api.push_tasks.await_args.args[0]
+    assert [p["task_id"] for p in pushes] == [None, "r-2"]
+    db.expire_all()
+    assert db.get(Task, 1).remote_id == "r-1"
+    items = db.query(SyncQueue).order_by(SyncQueue.id).all()
+    assert items[0].status == 'synced'
+    assert items[1].status == 'retry' and items[1].error_message == "API Error"
+    db.close()
+
+def test_enqueue_coalesces_operations_per_task(session_factory):
+    service = AltimeterSyncService()
+    db = session_factory()
+
+    pushes = [service.enqueue_task(db, 1, 'push') for _ in range(5)]
+    assert len({p.id for p in pushes}) == 1
+    assert pushes[0].next_attempt_at.replace(tzinfo=timezone.utc) > datetime.now(timezone.utc) # debounced
+
+    # A webhook pull while the push is queued goes ahead of it; the push keeps its schedule
+    push_id, push_due = pushes[0].id, pushes[0].next_attempt_at
+    pull = service.enqueue_task(db, 1, 'pull')
+    assert (pull.id, pull.direction) == (push_id, 'pull')
+    requeued = db.query(SyncQueue).filter(SyncQueue.entity_id == 1, SyncQueue.direction == 'push').one()
+    assert requeued.id > pull.id and requeued.next_attempt_at == push_due
+    assert service.enqueue_task(db, 1, 'pull').id == pull.id
+
+    # A burst of webhook pulls for another task becomes one debounced pull
+    pulls = [service.enqueue_task(db, 2, 'pull', debounce_seconds=5) for _ in range(3)]
+    assert len({p.id for p in pulls}) == 1
+
+    # A pull queued before a push still runs first
+    assert service.enqueue_task(db, 2, 'push').direction == 'push'
+    assert db.query(SyncQueue).filter(SyncQueue.entity_id == 2).count() == 2
+
+    assert db.query(SyncQueue).count() == 4
+    assert service.coalesced == 4 + 1 + 2
+    db.close()
+
+def synced_task(factory):
+    """A task that was pushed before: remote version "v1", no local edits since."""
+    db = factory()
+    db.add(Task(task_id=1, title="Pour slab", status="open", priority="medium",
+                remote_id="r-1", etag="v1", local_version=1, synced_version=1))
+    db.commit()
+    db.close()
+
+def test_local_edits_mark_only_changed_fields_dirty(session_factory):
+    synced_task(session_factory)
+    db = session_factory()
+    task = db.get(Task, 1)
+    task.status = "done"
+    task.title = "Pour slab"  # unchanged value
+    db.commit()
+    assert task.dirty_fields == {"status": "open"}
+    assert task.local_version == 2
+
+    task._applying_remote = True
+    task.priority = "high"
+    db.commit()
+    assert task.dirty_fields == {"status": "open"}
+    assert task.local_version == 2
+    db.close()
+
+@pytest.mark.asyncio
+async def test_push_patches_changed_fields_with_if_match(session_factory, api):
+    synced_task(session_factory)
+    db = session_factory()
+    db.get(Task, 1).status = "done"
+    db.add(SyncQueue(entity_type='task', entity_id=1, direction='push', status='pending'))
+    db.commit()
+
+    api.patch_task = AsyncMock(return_value={"id": "r-1", "etag": "v2"})
+    await AltimeterSyncService().process_queue()
+
+    api.patch_task.assert_awaited_once_with("r-1", {"status": "done"}, "v1")
+    db.expire_all()
+    task = db.get(Task, 1)
+    assert task.etag == "v2" and task.dirty_fields is None
+    assert task.synced_version == task.local_version == 2
+
+    # Nothing changed since: a second push makes no API call
+    db.add(SyncQueue(entity_type='task', entity_id=1, direction='push', status='pending'))
+    db.commit()
+    await AltimeterSyncService().process_queue()
+    assert api.patch_task.await_count == 1
+    db.close()
+
+@pytest.mark.asyncio
+async def test_push_rejected_by_if_match_records_conflict(session_factory, api):
+    synced_task(session_factory)
+    db = session_factory()
+    db.get(Task, 1).status = "done"
+    db.add(SyncQueue(entity_type='task', entity_id=1, direction='push', status='pending'))
+    db.commit()
+
+    api.patch_task = AsyncMock(side_effect=PreconditionFailed("changed"))
+    api.get_task = AsyncMock(return_value={"id": "r-1", "status": "blocked", "etag": "v2"})
+    await AltimeterSyncService().process_queue()
+
+    db.expire_all()
+    assert db.query(SyncQueue).one().status == 'conflict'
+    conflict = db.query(SyncConflict).one()
+    assert conflict.local_version["status"] == "done"
+    assert conflict.local_version["changed_fields"] == ["status"]
+    assert conflict.remote_version["status"] == "blocked"
+    db.close()
+
+@pytest.mark.asyncio
+async def test_webhook_pull_after_a_queued_push_runs_first(session_factory, api):
+    synced_task(session_factory)
+    service = AltimeterSyncService()
+    db = session_factory()
+    db.get(Task, 1).status = "done"
+    db.commit()
+    service.enqueue_task(db, 1, 'push', debounce_seconds=0)
+    service.enqueue_task(db, 1, 'pull')
+
+    # Remote priority changed: the pull merges it and picks up the new ETag...
+    api.get_task = AsyncMock(return_value={"id": "r-1", "title": "Pour slab", "status": "open",
+                                           "priority": "high", "etag": "v2"})
+    api.patch_task = AsyncMock(return_value={"id": "r-1", "etag": "v3"})
+    await service.process_queue()
+    api.get_task.assert_awaited_once_with("r-1", etag="v1")
+    api.patch_task.assert_not_awaited()
+
+    # ...so the push that follows matches the remote version instead of conflicting
+    await service.process_queue()
+    api.patch_task.assert_awaited_once_with("r-1", {"status": "done"}, "v2")
+    db.expire_all()
+    task = db.get(Task, 1)
+    assert (task.status, task.priority, task.etag) == ("done", "high", "v3")
+    assert [q.status for q in db.query(SyncQueue).order_by(SyncQueue.id)] == ['synced', 'synced']
+    assert db.query(SyncConflict).count() == 0
+    db.close()
+
+@pytest.mark.asyncio
+async def test_pull_is_conditional_and_merges_untouched_fields(session_factory, api):
+    synced_task(session_factory)
+    db = session_factory()
+    db.add(SyncQueue(entity_type='task', entity_id=1, direction='pull', status='pending'))
+    db.commit()
+
+    api.get_task = AsyncMock(return_value=NOT_MODIFIED)
+    await AltimeterSyncService().process_queue()
+    api.get_task.assert_awaited_once_with("r-1", etag="v1")
+
+    # Local edit to status, remote edit to priority: no conflict, both kept
+    db.expire_all()
+    db.get(Task, 1).status = "done"
+    db.add(SyncQueue(entity_type='task', entity_id=1, direction='pull', status='pending'))
+    db.commit()
+    api.get_task = AsyncMock(return_value={"id": "r-1", "title": "Pour slab", "status": "open",
+                                           "priority": "high", "etag": "v2"})
+    await AltimeterSyncService().process_queue()
+
+    db.expire_all()
+    task = db.get(Task, 1)
+    assert (task.status, task.priority, task.etag) == ("done", "high", "v2")
+    assert task.dirty_fields == {"status": "open"} and task.sync_status == "pending"
+    assert db.query(SyncConflict).count() == 0
+    db.close()
@@ -0,0 +1,61 @@
+import pytest
+from unittest.mock import MagicMock
+from services.context_cache_service import ContextFragmentCache
+from services.prompt_builder import count_tokens
+
+@pytest.fixture
+def cache():
+    return ContextFragmentCache()
+
+def test_fragment_reused_until_ttl(cache, monkeypatch):
+    import services.context_cache_service as module
+    loader = MagicMock(side_effect=["v1\n", "v2\n"])
+    clock = [100.0]
+    monkeypatch.setattr(module.time, "monotonic", lambda: clock[0])
+
+    assert cache.get("lessons", loader, ttl=60) == "v1\n"
+    assert cache.get("lessons", loader, ttl=60) == "v1\n"
+    assert loader.call_count == 1
+
+    clock[0] += 61
+    assert cache.get("lessons", loader, ttl=60) == "v2\n"
+
+def test_fragment_rebuilt_on_version_change_and_invalidate(cache):
+    loader = MagicMock(side_effect=["a\n", "b\n", "c\n"])
+
+    assert cache.get("projects", loader, ttl=300, version=1) == "a\n"
+    assert cache.get("projects", loader, ttl=300, version=1) == "a\n"
+    assert cache.get("projects", loader, ttl=300, version=2) == "b\n"
+    cache.invalidate("projects")
+    assert cache.get("projects", loader, ttl=300, version=2) == "c\n"
+    assert cache.stats()["hits"] == 1
+
+def test_invalidation_during_rebuild_is_not_overwritten(cache):
+    def stale_loader():
+        cache.invalidate("lessons") # A lesson is recorded while the old list is being read
+        return "stale\n"
+
+    assert cache.get("lessons", stale_loader, ttl=300) == "stale\n"
+    assert cache.get("lessons", lambda: "fresh\n", ttl=300) == "fresh\n"
+
+    def stale_all():
+        cache.invalidate()
+        return "stale\n"
+
+    assert cache.get("projects", stale_all, ttl=300) == "stale\n"
+    assert cache.get("projects", lambda: "fresh\n", ttl=300) == "fresh\n"
+    assert cache.get("projects", lambda: "unused\n", ttl=300) == "fresh\n"
+
+def test_assemble_trims_lower_priority_fragments(cache):
+    strata = "User Access Level: Strata 1\n"
+    lessons = "Previous learnings:\n" + "".join(f"- lesson number {i} with some detail\n" for i in range(20))
+    projects = "Active Projects: Main St, Oak Ave\n"
+
+    full = cache.assemble("[SYSTEM CONTEXT]\n", [("strata", strata), ("lessons", lessons), ("projects", projects)], 1000)
+    assert full == "[SYSTEM CONTEXT]\n" + strata + lessons + projects
+
+    trimmed = cache.assemble("[SYSTEM CONTEXT]\n", [("strata", strata), ("lessons", lessons), ("projects", projects)], 80)
+    assert count_tokens(trimmed) <= 80
+    assert trimmed.startswith("[SYSTEM CONTEXT]\n" + strata + "Previous learnings:\n- lesson number 0")
+    assert "lesson number 19" not in trimmed
+    assert cache.stats()["trimmed"] >= 1
@@ -0,0 +1,55 @@
+import os
+import time
+import pytest
+from unittest.mock import patch
+import services.file_watcher_service as watcher_module
+from services.document_control_service import DocumentControlService
+from services.file_watcher_service import FileWatcherService
+
+@pytest.fixture
+def doc_service(tmp_path):
+    service = DocumentControlService()
+    service.root_path = str(tmp_path)
+    return service
+
+def test_catalog_serves_listing_and_applies_changes(doc_service, tmp_path):
+    draft = doc_service.create_draft("Plan", "Initial Plan")
+    doc_service.enable_catalog()
+    assert [d["filename"] for d in doc_service.get_all_documents()["draft"]] == ["plan.DRAFT.md"]
+
+    # A file dropped in by OneDrive is invisible until the watcher reports it
+    review_dir = tmp_path / "SKILLS" / "REVIEW"
+    review_dir.mkdir(parents=True)
+    review_file = review_dir / "wiring.REVIEW-v1.0.md"
+    review_file.write_text("body")
+    assert doc_service.get_all_documents()["review"] == []
+
+    doc_service.update_catalog_path(str(review_file))
+    review = doc_service.get_all_documents()["review"]
+    assert review[0]["section"] == "SKILLS"
+    assert review[0]["version"] == "1.0"
+
+    # Internal mutations keep the catalog current too
+    doc_service.promote_to_review(draft["path"])
+    docs = doc_service.get_all_documents()
+    assert docs["draft"] == []
+    assert len(docs["review"]) == 2
+
+    os.remove(review_file)
+    doc_service.update_catalog_path(str(review_file))
+    assert len(doc_service.get_all_documents()["review"]) == 1
+
+def test_watcher_debounces_bursts_into_one_sync(tmp_path):
+    watcher = FileWatcherService(debounce_seconds=0.05)
+    with patch.object(watcher_module, "knowledge_service") as mock_knowledge, \
+         patch.object(watcher_module, "document_control_service") as mock_docs:
+        for _ in range(5):
+            watcher.notify(str(tmp_path / "note.md"))
+        watcher.notify(str(tmp_path / "other.md"))
+        watcher.notify(str(tmp_path / "image.png"))
+        time.sleep(0.3)
+
+        mock_knowledge.sync_paths.assert_called_once_with(
+            sorted([str(tmp_path / "note.md"), str(tmp_path / "other.md")])
+        )
+        mock_docs.update_catalog_path.assert_called_once()
@@ -0,0 +1,78 @@
+import asyncio
+import pytest
+from aiohttp import web
+from services.http_client_service import HttpClientRegistry
+
+@pytest.fixture
+async def upstream():
+    state = {"connections": set()}
+
+    async def handler(request):
+        state["connections"].add(request.transport.get_extra_info("peername"))
+        return web.json_response({"ok": True})
+
+    app = web.Application()
+    app.router.add_get("/ping", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    yield f"http://127.0.0.1:{port}", state
+    await runner.cleanup()
+
+@pytest.mark.asyncio
+async def test_async_client_is_shared_and_keeps_connections_alive(upstream):
+    url, state = upstream
+    registry = HttpClientRegistry()
+    registry.register("local", timeout=5.0, max_connections=2)
+
+    for _ in range(10):
+        response = await registry.get("local").get(f"{url}/ping")
+        assert response.json() == {"ok": True}
+    await asyncio.gather(*(registry.get("local").get(f"{url}/ping") for _ in range(10)))
+
+    assert registry.get("local") is registry.get("local")
+    assert len(state["connections"]) <= 2
+    assert registry.stats()["clients_created"] == 1
+
+    client = registry.get("local")
+    await registry.aclose()
+    assert client.is_closed
+    assert registry.stats()["async_clients"] == []
+
+@pytest.mark.asyncio
+async def test_sync_client_is_shared(upstream):
+    url, state = upstream
+    registry = HttpClientRegistry()
+    client = registry.get_sync("ollama")
+
+    for _ in range(5):
+        await asyncio.to_thread(lambda: registry.get_sync("ollama").get(f"{url}/ping").raise_for_status())
+
+    assert registry.get_sync("ollama") is client
+    assert len(state["connections"]) == 1
+    await registry.aclose()
+    assert client.is_closed
+
+@pytest.mark.asyncio
+async def test_scheduler_loop_gets_its_own_client_and_closes_it(upstream):
+    url, state = upstream
+    registry = HttpClientRegistry()
+    app_client = registry.get("weather")
+    job_clients = []
+
+    async def job():
+        client = registry.get("weather")
+        job_clients.append(client)
+        return (await client.get(f"{url}/ping")).json()
+
+    # e.g. watchtower_job in an APScheduler thread
+    assert await asyncio.to_thread(registry.run, job()) == {"ok": True}
+
+    assert job_clients[0] is not app_client and job_clients[0].is_closed
+    assert registry.get("weather") is app_client and not app_client.is_closed
+    assert registry.stats()["event_loops"] == 1
+    assert registry.stats()["clients_abandoned"] == 0
+    await registry.aclose()
+    assert app_client.is_closed
@@ -0,0 +1,56 @@
+import pytest
+from unittest.mock import patch
+from services.lexical_index_service import LexicalIndexService
+from services.hybrid_search_service import HybridSearchService
+
+@pytest.fixture
+def lexical_index(tmp_path):
+    return LexicalIndexService(db_path=str(tmp_path / "lexical.db"))
+
+def test_lexical_exact_project_number(lexical_index):
+    """Project numbers are kept as a single token and ranked by BM25."""
+    lexical_index.upsert(
+        "emails",
+        ids=["a", "b"],
+        documents=["Update for project 25-0142 conduit rough-in", "General safety meeting notes"],
+        metadatas=[{"project_id": "25-0142", "date": "2025-01-02T08:00:00"}, {"project_id": "25-0999"}]
+    )
+
+    results = lexical_index.search("25-0142 status", collection="emails")
+    assert [r["id"] for r in results] == ["a"]
+
+def test_lexical_filters_and_upsert_replaces(lexical_index):
+    lexical_index.upsert("emails", ["a"], ["panel schedule"], [{"sender": "bob@example.com"}])
+    lexical_index.upsert("emails", ["a"], ["panel schedule revised"], [{"sender": "amy@example.com"}])
+
+    assert lexical_index.search("panel", "emails", filters={"sender": "bob@example.com"}) == []
+    results = lexical_index.search("revised", "emails", filters={"sender": "amy@example.com"})
+    assert len(results) == 1
+
+    lexical_index.delete("emails", ["a"])
+    assert lexical_index.search("panel", "emails") == []
+
+def test_rrf_fusion_prefers_documents_in_both_lists():
+    service = HybridSearchService()
+    fused = service.fuse({
+        "vector": [{"id": "x"}, {"id": "y"}],
+        "lexical": [{"id": "y"}, {"id": "z"}]
+    }, n_results=3)
+
+    assert fused[0]["id"] == "y"
+    assert fused[0]["sources"] == ["vector", "lexical"]
+    assert {r["id"] for r in fused} == {"x", "y", "z"}
+
+def test_hybrid_search_pushes_filters_into_both_engines():
+    service = HybridSearchService()
+    with patch("services.hybrid_search_service.search_service") as mock_vector, \
+         patch("services.hybrid_search_service.lexical_index_service") as mock_lexical:
+        mock_vector.search.return_value = [{"id": "v1", "metadata": {}, "content_snippet": ""}]
+        mock_lexical.search.return_value = [{"id": "v1", "metadata": {}, "content_snippet": ""}]
+
+        filters = {"project_id": "25-0142", "date_from": "2025-01-01"}
+        results = service.search("rough-in", "emails", n_results=2, filters=filters)
+
+        assert results[0]["id"] == "v1"
+        assert mock_vector.search.call_args.kwargs["filters"] == filters
+        assert mock_lexical.search.call_args.args[3] == filters
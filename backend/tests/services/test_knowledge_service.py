@@ -1,6 +1,7 @@
 import pytest
 import os
 from services.knowledge_service import KnowledgeService
+import services.knowledge_service as knowledge_module
 
 @pytest.fixture
 def knowledge_service_instance(temp_onedrive):
@@ -25,3 +26,138 @@ def test_get_document_content(knowledge_service_instance, temp_onedrive):
         
     content = knowledge_service_instance.get_document_content(str(path))
     assert content == "Full Content Here"
+
+@pytest.fixture
+def skills_dir(tmp_path, monkeypatch):
+    from core.config import settings
+    from integrations.onedrive_service import onedrive_service
+
+    (tmp_path / "SKILLS").mkdir()
+    monkeypatch.setattr(onedrive_service, "root_path", str(tmp_path))
+    monkeypatch.setattr(settings, "ONEDRIVE_SKILLS_PATH", "SKILLS")
+
+    # Use the service's own bindings; other test modules stub database.models in sys.modules
+    db = knowledge_module.SessionLocal()
+    manifest = knowledge_module.KnowledgeManifest
+    db.query(manifest).filter(manifest.collection == "skills").delete()
+    db.commit()
+    db.close()
+    return tmp_path / "SKILLS"
+
+def test_incremental_skill_sync(skills_dir):
+    from unittest.mock import patch
+
+    doc = skills_dir / "grounding.md"
+    doc.write_text("Intro\n## Step 1\nBond the panel\n## Step 2\nTest continuity", encoding="utf-8")
+    service = KnowledgeService()
+    ids = [c["id"] for c in service._skill_chunks(str(doc), doc.read_text(encoding="utf-8"))]
+
+    with patch("services.knowledge_service.search_service") as mock_search:
+        mock_search.upsert_documents.return_value = True
+
+        first = service.load_skills_from_onedrive()
+        assert first["changed_files"] == 1
+        assert first["indexed_chunks"] == 3
+
+        # Nothing changed: nothing is re-embedded
+        mock_search.upsert_documents.reset_mock()
+        second = service.load_skills_from_onedrive()
+        assert second["unchanged_files"] == 1
+        mock_search.upsert_documents.assert_not_called()
+
+        # A section was removed: its stale chunk is deleted
+        doc.write_text("Intro\n## Step 1\nBond the panel and torque lugs", encoding="utf-8")
+        os.utime(doc, (1, 1))
+        third = service.load_skills_from_onedrive()
+        assert third["changed_files"] == 1
+        assert third["stale_chunks_removed"] == 1
+        mock_search.delete_documents.assert_called_with("skills", ids[2:])
+
+        # File deleted: all of its vectors are removed
+        doc.unlink()
+        fourth = service.load_skills_from_onedrive()
+        assert fourth["removed_files"] == 1
+        mock_search.delete_documents.assert_called_with("skills", ids[:2])
+
+def test_streaming_sync_batches_through_process_pool(skills_dir, monkeypatch):
+    from unittest.mock import patch
+
+    for i in range(5):
+        (skills_dir / f"skill{i}.md").write_text(f"Procedure {i}", encoding="utf-8")
+    service = KnowledgeService()
+    service.workers = 2
+    service.batch_size = 2
+    monkeypatch.setattr(knowledge_module, "POOL_MIN_FILES", 0)
+
+    with patch.object(knowledge_module, "search_service") as mock_search:
+        mock_search.upsert_documents.return_value = True
+        stats = service.load_skills_from_onedrive()
+
+    assert stats["changed_files"] == 5
+    assert stats["indexed_chunks"] == 5
+    # Fixed-size batches: 2 + 2 + 1 chunks
+    assert [len(c.kwargs["ids"]) for c in mock_search.upsert_documents.call_args_list] == [2, 2, 1]
+    assert service.get_reindex_status()["skills"]["processed"] == 5
+    assert service.get_reindex_status()["skills"]["status"] == "complete"
+
+def test_relative_and_absolute_paths_share_one_manifest_row(skills_dir, monkeypatch):
+    from unittest.mock import patch
+
+    monkeypatch.chdir(skills_dir.parent)
+    (skills_dir / "lockout.md").write_text("Lock out the panel", encoding="utf-8")
+    relative = os.path.join(".", "SKILLS", "lockout.md")
+    service = KnowledgeService()
+    manifest = knowledge_module.KnowledgeManifest
+
+    with patch.object(knowledge_module, "search_service") as mock_search:
+        mock_search.upsert_documents.return_value = True
+        # Full sync with a relative path, watcher event with an absolute one, full sync again
+        assert service._sync_files("skills", [relative], service._skill_chunks)["changed_files"] == 1
+        watched = service.sync_paths([str((skills_dir / "lockout.md").resolve())])
+        assert watched["skills"]["unchanged_files"] == 1
+        again = service._sync_files("skills", [relative], service._skill_chunks)
+
+        # A legacy row stored under the relative form is merged, not pruned with its vectors
+        db = knowledge_module.SessionLocal()
+        db.add(manifest(collection="skills", path=relative, mtime=0, size=0, chunk_ids=[c["id"] for c in service._skill_chunks(relative, "Lock out the panel")]))
+        db.commit()
+        db.close()
+        merged = service._sync_files("skills", [relative], service._skill_chunks)
+
+    assert again["unchanged_files"] == 1 and again["removed_files"] == 0
+    assert merged["removed_files"] == 0
+    mock_search.delete_documents.assert_not_called()
+    db = knowledge_module.SessionLocal()
+    rows = db.query(manifest).filter(manifest.collection == "skills").all()
+    db.close()
+    assert [r.path for r in rows] == [str((skills_dir / "lockout.md").resolve())]
+
+def test_moved_file_keeps_its_vectors(skills_dir):
+    from unittest.mock import patch
+
+    (skills_dir / "a").mkdir()
+    (skills_dir / "b").mkdir()
+    old = skills_dir / "a" / "bonding.md"
+    new = skills_dir / "b" / "bonding.md"
+    old.write_text("Intro\n## Step 1\nBond the panel", encoding="utf-8")
+    service = KnowledgeService()
+    old_ids = [c["id"] for c in service._skill_chunks(str(old), old.read_text(encoding="utf-8"))]
+
+    with patch.object(knowledge_module, "search_service") as mock_search:
+        mock_search.upsert_documents.return_value = True
+        service._sync_files("skills", [str(old)], service._skill_chunks)
+
+        # Same basename, new folder, same mtime and size
+        os.rename(old, new)
+        mock_search.upsert_documents.reset_mock()
+        moved = service._sync_files("skills", [str(new)], service._skill_chunks)
+
+    new_ids = mock_search.upsert_documents.call_args.kwargs["ids"]
+    assert moved["changed_files"] == 1 and moved["removed_files"] == 1
+    assert not set(new_ids) & set(old_ids)
+    mock_search.delete_documents.assert_called_once_with("skills", old_ids)
+    db = knowledge_module.SessionLocal()
+    manifest = knowledge_module.KnowledgeManifest
+    rows = db.query(manifest).filter(manifest.collection == "skills").all()
+    db.close()
+    assert [(r.path, r.chunk_ids) for r in rows] == [(os.path.abspath(new), new_ids)]
@@ -77,8 +77,19 @@ def test_get_recent_lessons(mock_session_local):
     assert lessons[0]["topic"] == "T1"
     assert lessons[1]["topic"] == "T2"
 
+def test_record_lesson_invalidates_context_fragment():
+    from services.context_cache_service import context_cache
+    context_cache.get("lessons", lambda: "Previous learnings: None\n", ttl=300)
+
+    with patch("services.learning_service.SessionLocal"):
+        learning_service.record_lesson("Topic C", "Insight C", "Source C")
+
+    assert "lessons" not in context_cache.stats()["fragments"]
+
 def test_ai_service_integration():
     from services.ai_service import ai_service
+    from services.context_cache_service import context_cache
+    context_cache.invalidate() # Don't reuse lessons cached by an earlier test
 
     # Mock learning_service within ai_service context
     with patch("services.learning_service.learning_service") as mock_ls:
@@ -0,0 +1,75 @@
+import time
+import sqlite3
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+import services.ai_service as ai_module
+from services.ai_service import GeminiService
+from services.llm_cache_service import LLMCacheService
+from services.llm_dispatcher import LLMDispatcher
+from services.llm_router import LLMRouter
+from core.config import settings
+
+@pytest.fixture
+def cache(tmp_path):
+    return LLMCacheService(db_path=str(tmp_path / "llm_cache.db"), max_entries=3)
+
+def test_key_ignores_prompt_layout_but_not_parameters():
+    key = LLMCacheService.make_key("gemini", "Classify:\n    hello  world")
+    assert key == LLMCacheService.make_key("gemini", "Classify: hello world")
+    assert key != LLMCacheService.make_key("gemini", "Classify: hello world", json_mode=True)
+    assert key != LLMCacheService.make_key("gemini", "Classify: hello world", temperature=0.2)
+    assert key != LLMCacheService.make_key("llama3", "Classify: hello world")
+
+def test_entries_expire_and_lru_is_evicted(cache):
+    cache.put("a", "A", ttl_seconds=60, latency_ms=900)
+    cache.put("gone", "G", ttl_seconds=-1)
+    assert cache.get("a")["response"] == "A"
+    assert cache.get("gone") is None
+
+    time.sleep(0.01)
+    for key in ("b", "c", "d"):
+        cache.put(key, key.upper(), ttl_seconds=60)
+        time.sleep(0.01)
+    cache.get("b")
+    cache.put("e", "E", ttl_seconds=60)
+
+    assert [k for k in "abcde" if cache.get(k)] == ["b", "d", "e"]
+    stats = cache.stats()
+    assert stats["entries"] == 3
+    assert stats["saved_ms"] >= 900
+
+def test_database_errors_on_read_are_a_miss(cache):
+    cache.put("a", "A", ttl_seconds=60)
+    cache._conn = MagicMock()
+    cache._conn.execute.side_effect = sqlite3.OperationalError("database is locked")
+
+    assert cache.get("a") is None
+    assert cache._stats["misses"] == 1
+
+@pytest.mark.asyncio
+async def test_generate_content_serves_repeats_from_cache(cache, monkeypatch):
+    monkeypatch.setattr(settings, "GEMINI_API_KEY", "fake_key")
+    monkeypatch.setattr(ai_module, "llm_cache_service", cache)
+    monkeypatch.setattr(ai_module, "llm_dispatcher", LLMDispatcher())
+    monkeypatch.setattr(ai_module, "llm_router", LLMRouter())
+    with patch("google.genai.Client") as mock_client_class:
+        generate = mock_client_class.return_value.aio.models.generate_content = AsyncMock(
+            return_value=MagicMock(text='{"label": "Neutral"}')
+        )
+        service = GeminiService()
+
+    for _ in range(3):
+        result = await service.generate_content("Analyze this", use_local_model=False, cache_ttl=60, cache_tag="sentiment")
+        assert result == '{"label": "Neutral"}'
+    assert generate.await_count == 1
+
+    # Not opted in: always calls the model
+    await service.generate_content("Analyze this", use_local_model=False)
+    assert generate.await_count == 2
+
+    # Errors are never cached
+    generate.side_effect = Exception("API Error")
+    assert "Error" in await service.generate_content("Other", use_local_model=False, cache_ttl=60)
+    generate.side_effect = None
+    await service.generate_content("Other", use_local_model=False, cache_ttl=60)
+    assert generate.await_count == 4
@@ -0,0 +1,168 @@
+import time
+import asyncio
+import pytest
+from services.llm_dispatcher import (
+    LLMDispatcher, LLMOverloaded, PRIORITY_INTERACTIVE, PRIORITY_AGENT, PRIORITY_BATCH
+)
+from services.llm_quota_store import LLMQuotaStore
+
+@pytest.fixture
+def dispatcher():
+    dispatcher = LLMDispatcher()
+    dispatcher.configure("gemini", concurrency=1, requests_per_minute=0, tokens_per_minute=0)
+    return dispatcher
+
+@pytest.mark.asyncio
+async def test_higher_priority_lanes_are_served_first(dispatcher):
+    order = []
+
+    async def call(name, priority):
+        async with dispatcher.slot("gemini", priority):
+            order.append(name)
+            await asyncio.sleep(0.01)
+
+    async with dispatcher.slot("gemini", PRIORITY_AGENT):
+        waiting = [
+            asyncio.create_task(call("batch", PRIORITY_BATCH)),
+            asyncio.create_task(call("agent", PRIORITY_AGENT)),
+            asyncio.create_task(call("chat", PRIORITY_INTERACTIVE)),
+        ]
+        await asyncio.sleep(0.01)
+        assert dispatcher.stats()["backends"]["gemini"]["queued"] == {"interactive": 1, "agent": 1, "batch": 1}
+    await asyncio.gather(*waiting)
+
+    assert order == ["chat", "agent", "batch"]
+    lanes = dispatcher.stats()["lanes"]
+    assert lanes["batch"]["max_wait_ms"] >= lanes["interactive"]["max_wait_ms"] > 0
+
+@pytest.mark.asyncio
+async def test_lane_context_sets_default_priority(dispatcher):
+    with dispatcher.lane(PRIORITY_BATCH):
+        assert dispatcher.current_priority() == PRIORITY_BATCH
+        async with dispatcher.slot("gemini"):
+            pass
+    assert dispatcher.current_priority() == PRIORITY_AGENT
+    assert dispatcher.stats()["lanes"]["batch"]["requests"] == 1
+
+@pytest.mark.asyncio
+async def test_batch_requests_are_shed_under_load(dispatcher):
+    dispatcher.max_batch_queue = 1
+    dispatcher.max_wait[PRIORITY_BATCH] = 0.05
+
+    async with dispatcher.slot("gemini", PRIORITY_INTERACTIVE):
+        queued = asyncio.create_task(dispatcher.acquire("gemini", PRIORITY_BATCH))
+        await asyncio.sleep(0)
+        with pytest.raises(LLMOverloaded):
+            await dispatcher.acquire("gemini", PRIORITY_BATCH) # Lane full
+        with pytest.raises(LLMOverloaded):
+            await queued # Waited too long
+
+    assert dispatcher.stats()["lanes"]["batch"]["shed"] == 2
+    assert dispatcher.stats()["backends"]["gemini"]["in_flight"] == 0
+
+@pytest.mark.asyncio
+async def test_rate_limits_and_backoff_delay_admission():
+    dispatcher = LLMDispatcher()
+    dispatcher.configure("gemini", concurrency=4, requests_per_minute=600, tokens_per_minute=0)
+
+    started = time.monotonic()
+    dispatcher.penalize("gemini", 0.1) # e.g. after a 429
+    async with dispatcher.slot("gemini"):
+        pass
+    assert time.monotonic() - started >= 0.09
+
+    # A drained bucket refills at 10 requests/second
+    dispatcher._backend("gemini").requests.tokens = 0
+    started = time.monotonic()
+    async with dispatcher.slot("gemini"):
+        pass
+    assert 0.05 <= time.monotonic() - started < 1
+
+@pytest.mark.asyncio
+async def test_scheduler_loop_shares_the_slot_and_the_lanes(dispatcher):
+    order = []
+
+    async def scheduler_job():
+        # e.g. morning_briefing_job running asyncio.run in an APScheduler thread
+        async with dispatcher.slot("gemini", PRIORITY_BATCH):
+            order.append("batch")
+
+    async def chat():
+        async with dispatcher.slot("gemini", PRIORITY_INTERACTIVE):
+            order.append("chat")
+
+    async with dispatcher.slot("gemini", PRIORITY_AGENT):
+        waiting = asyncio.create_task(chat())
+        job = asyncio.create_task(asyncio.to_thread(asyncio.run, scheduler_job()))
+        await asyncio.sleep(0.05)
+        # concurrency=1 holds across loops: the other loop's request is queued, not given its own slot
+        assert order == []
+        assert dispatcher.stats()["backends"]["gemini"]["queued"] == {"interactive": 1, "agent": 0, "batch": 1}
+
+    await asyncio.wait_for(asyncio.gather(waiting, job), 2)
+    assert order == ["chat", "batch"]
+    assert dispatcher.stats()["backends"]["gemini"]["in_flight"] == 0
+
+def _shared_dispatcher(db_path):
+    # One LLMQuotaStore per dispatcher stands in for one process each
+    dispatcher = LLMDispatcher(store=LLMQuotaStore(db_path, lease_seconds=5, poll_seconds=0.01))
+    dispatcher.configure("ollama", concurrency=1)
+    return dispatcher
+
+@pytest.mark.asyncio
+async def test_concurrency_cap_is_shared_across_processes(tmp_path):
+    api, worker = _shared_dispatcher(str(tmp_path / "admission.db")), _shared_dispatcher(str(tmp_path / "admission.db"))
+
+    async with api.slot("ollama", PRIORITY_INTERACTIVE):
+        queued = asyncio.create_task(worker.acquire("ollama", PRIORITY_BATCH))
+        await asyncio.sleep(0.05)
+        assert not queued.done() # The worker's own queue is empty, but the API holds the only slot
+    await asyncio.wait_for(queued, 1)
+    assert api.stats()["shared"]["in_flight"] == {"ollama": 1}
+    worker.release("ollama")
+    assert worker.stats()["shared"]["in_flight"] == {}
+
+@pytest.mark.asyncio
+async def test_batch_in_another_process_yields_to_interactive(tmp_path):
+    api, worker = _shared_dispatcher(str(tmp_path / "admission.db")), _shared_dispatcher(str(tmp_path / "admission.db"))
+    order = []
+
+    async def call(dispatcher, name, priority):
+        async with dispatcher.slot("ollama", priority):
+            order.append(name)
+            await asyncio.sleep(0.02)
+
+    async with worker.slot("ollama", PRIORITY_BATCH):
+        chat = asyncio.create_task(call(api, "chat", PRIORITY_INTERACTIVE))
+        await asyncio.sleep(0.02)
+        more_batch = asyncio.create_task(call(worker, "batch", PRIORITY_BATCH))
+        await asyncio.sleep(0.02)
+    await asyncio.wait_for(asyncio.gather(chat, more_batch), 2)
+
+    # The worker freed the slot and had its next batch request queued first, but chat was waiting
+    assert order == ["chat", "batch"]
+
+def test_gemini_quota_and_backoff_are_shared(tmp_path):
+    first = LLMQuotaStore(str(tmp_path / "admission.db"))
+    second = LLMQuotaStore(str(tmp_path / "admission.db"))
+
+    assert first.try_acquire("gemini", "a", PRIORITY_AGENT, 10, 2, 0) == 0
+    assert second.try_acquire("gemini", "b", PRIORITY_AGENT, 10, 2, 0) == 0
+    assert second.try_acquire("gemini", "c", PRIORITY_AGENT, 10, 2, 0) > 0 # 2 RPM spent between them
+
+    first.pause("ollama", 30, 0)
+    assert second.try_acquire("ollama", "d", PRIORITY_AGENT, 10, 0, 0) >= 29
+
+def test_expired_leases_free_their_slots(tmp_path):
+    crashed = LLMQuotaStore(str(tmp_path / "admission.db"), lease_seconds=0.05)
+    crashed._start_renewer = lambda: None # Its renewal thread died with it
+    alive = LLMQuotaStore(str(tmp_path / "admission.db"))
+
+    assert crashed.try_acquire("ollama", "a", PRIORITY_BATCH, 1, 0, 0) == 0
+    crashed.set_demand("ollama", PRIORITY_INTERACTIVE)
+    assert alive.try_acquire("ollama", "b", PRIORITY_BATCH, 1, 0, 0) > 0
+    time.sleep(0.1)
+    assert alive.try_acquire("ollama", "b", PRIORITY_BATCH, 1, 0, 0) == 0
+
+def test_every_lane_has_a_finite_max_wait():
+    assert all(wait is not None and wait > 0 for wait in LLMDispatcher().max_wait.values())
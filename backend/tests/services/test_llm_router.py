@@ -0,0 +1,78 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+import services.llm_router as router_module
+from services.llm_router import CircuitBreaker, LLMRouter, CLOSED, OPEN, HALF_OPEN
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(router_module.time, "monotonic", lambda: now[0])
+    return now
+
+def test_breaker_opens_after_threshold_and_half_opens(clock):
+    breaker = CircuitBreaker("ollama_generate", failure_threshold=2, reset_seconds=30)
+    breaker.record_failure("refused")
+    assert breaker.allow()
+    breaker.record_failure("refused")
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+    clock[0] += 31
+    assert breaker.allow() # One trial request
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+
+    breaker.record_failure("refused") # Trial failed: open again
+    assert breaker.state == OPEN
+    clock[0] += 31
+    assert breaker.allow()
+    breaker.record_success(120.0)
+    assert breaker.state == CLOSED
+    assert breaker.stats()["latency_ms"] == 120.0
+
+def test_route_skips_dead_backends():
+    router = LLMRouter()
+    assert router.route(prefer_local=True) == ["ollama", "gemini"]
+    assert router.route(prefer_local=False) == ["gemini"]
+    assert router.route(prefer_local=True, gemini_configured=False) == ["ollama"]
+
+    router.breaker("ollama_generate").trip("refused")
+    assert router.route(prefer_local=True) == ["gemini"]
+    router.breaker("gemini").trip("timeout")
+    assert router.route(prefer_local=True) == []
+
+def test_route_prefers_gemini_when_local_is_much_slower():
+    router = LLMRouter()
+    router.record_success("ollama_generate", 20000.0)
+    router.record_success("gemini", 1500.0)
+
+    routes = [router.route(prefer_local=True) for _ in range(router.LATENCY_RESAMPLE_EVERY)]
+    assert routes.count(["gemini"]) == router.LATENCY_RESAMPLE_EVERY - 1
+    assert ["ollama", "gemini"] in routes # Occasional local request keeps its latency current
+
+@pytest.mark.asyncio
+async def test_probe_trips_and_recovers_ollama(monkeypatch):
+    router = LLMRouter()
+    client = MagicMock()
+    client.get = AsyncMock(side_effect=ConnectionError("refused"))
+    monkeypatch.setattr(router_module, "http_clients", MagicMock(get=MagicMock(return_value=client)))
+
+    assert await router.probe() is False
+    assert router.breaker("ollama_generate").state == OPEN
+    assert router.breaker("ollama_embed").state == OPEN
+    assert router.breaker("gemini").state == CLOSED
+
+    client.get = AsyncMock(return_value=MagicMock())
+    assert await router.probe() is True
+    # The server answers, but only a real request may close the breaker
+    generate = router.breaker("ollama_generate")
+    assert generate.state == HALF_OPEN
+    assert generate.allow() is True
+    assert generate.allow() is False # One trial at a time
+    router.record_failure("ollama_generate", "model not loaded")
+    assert generate.state == OPEN
+
+    assert await router.probe() is True
+    assert generate.allow() is True
+    router.record_success("ollama_generate", 900.0)
+    assert router.stats()["backends"]["ollama_generate"]["state"] == CLOSED
@@ -0,0 +1,50 @@
+import pytest
+from unittest.mock import patch
+import services.mission_intel_service as mission_module
+from services.mission_intel_service import MissionIntelService
+
+PHASES = [
+    {"id": "phase-1", "phase_name": "Site Grounding", "project_id": "25-0142"},
+    {"id": "phase-2", "phase_name": "Trim", "project_id": "25-0199"}
+]
+
+@pytest.fixture
+def oracle():
+    with patch.object(mission_module, "altimeter_service") as mock_altimeter, \
+         patch.object(mission_module, "knowledge_service") as mock_knowledge, \
+         patch.object(mission_module.intelligence_bridge, "predict_mission_intel") as mock_predict:
+        mock_altimeter.get_active_phases.return_value = list(PHASES)
+        mock_knowledge.version = 1
+        mock_predict.side_effect = lambda phases, weather=None: [{"title": p["phase_name"]} for p in phases]
+        yield MissionIntelService(), mock_altimeter, mock_knowledge, mock_predict
+
+def test_refresh_precomputes_and_reads_are_cached(oracle):
+    service, _, _, mock_predict = oracle
+    service.refresh({"current": {"condition": "Sunny/Clear"}})
+    assert mock_predict.call_count == 3 # Two projects + the Oracle feed
+
+    assert service.get_project_intel("25-0142", PHASES) == [{"title": "Site Grounding"}]
+    assert len(service.get_oracle_feed()) == 2
+    assert service.get_project_intel("99-0000", PHASES) == []
+    assert mock_predict.call_count == 3
+
+def test_invalidated_by_phases_knowledge_and_weather_class(oracle):
+    service, mock_altimeter, mock_knowledge, mock_predict = oracle
+    service.get_oracle_feed()
+
+    # Same weather class: still cached
+    service.update_weather({"current": {"condition": "Partly Cloudy"}})
+    service.get_oracle_feed()
+    assert mock_predict.call_count == 1
+
+    service.update_weather({"current": {"condition": "Rain Showers"}})
+    service.get_oracle_feed()
+    assert mock_predict.call_count == 2
+
+    mock_knowledge.version = 2
+    service.get_oracle_feed()
+    assert mock_predict.call_count == 3
+
+    mock_altimeter.get_active_phases.return_value = PHASES[:1]
+    assert service.get_oracle_feed() == [{"title": "Site Grounding"}]
+    assert mock_predict.call_count == 4
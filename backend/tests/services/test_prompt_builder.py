@@ -0,0 +1,84 @@
+from services.prompt_builder import PromptBuilder, count_tokens, strip_quoted_history, trim_to_tokens
+
+def _words(n, word="concrete"):
+    return " ".join(f"{word}{i}" for i in range(n))
+
+def test_count_tokens():
+    assert count_tokens("") == 0
+    assert count_tokens(None) == 0
+    assert count_tokens("pour the slab") == 3
+    assert count_tokens("slab, pour!") == 4
+    # Long words cost more than one token
+    assert count_tokens("electromechanical") > 1
+
+def test_trim_head_keeps_beginning_at_line_break():
+    text = "\n".join(f"- line {i} with some detail" for i in range(200))
+    trimmed = trim_to_tokens(text, 50)
+    assert count_tokens(trimmed) <= 50
+    assert trimmed.startswith("- line 0 ")
+    assert trimmed.endswith("\n")
+
+def test_trim_middle_keeps_both_ends():
+    text = _words(500)
+    trimmed = trim_to_tokens(text, 60, "middle")
+    assert count_tokens(trimmed) <= 60
+    assert trimmed.startswith("concrete0")
+    assert trimmed.endswith("concrete499")
+    assert "[... trimmed ...]" in trimmed
+
+def test_trim_within_budget_is_unchanged():
+    assert trim_to_tokens("short note", 100, "email") == "short note"
+    assert trim_to_tokens("", 10) == ""
+
+def test_strip_quoted_history():
+    body = (
+        "Please send the revised RFI by Friday.\n\n"
+        "On Mon, Mar 3, 2025 at 9:00 AM Jane Foreman wrote:\n"
+        "> The RFI is attached.\n"
+        "> Thanks"
+    )
+    assert strip_quoted_history(body) == "Please send the revised RFI by Friday."
+    assert strip_quoted_history("Reply above\n> quoted line\nmore reply") == "Reply above\nmore reply"
+
+def test_trim_email_drops_history_before_cutting_reply():
+    reply = "Approved, proceed with the pour."
+    body = reply + "\n\n-----Original Message-----\n" + _words(2000, "history")
+    assert trim_to_tokens(body, 100, "email") == reply
+
+def test_builder_under_budget_keeps_sections_intact():
+    builder = PromptBuilder("test", 1000)
+    builder.add("body", "Pour scheduled for Tuesday.")
+    prompt = builder.render("From: {sender}\nBody: {body}\nReturn {{\"ok\": true}}", sender="gc@example.com")
+    assert prompt == 'From: gc@example.com\nBody: Pour scheduled for Tuesday.\nReturn {"ok": true}'
+    assert builder.breakdown["trimmed"] == {}
+    assert builder.breakdown["sections"]["body"] == count_tokens("Pour scheduled for Tuesday.")
+    assert builder.breakdown["total"] == count_tokens(prompt)
+
+def test_builder_applies_section_cap():
+    builder = PromptBuilder("test", 10000)
+    builder.add("knowledge", _words(1000), max_tokens=100)
+    builder.render("Knowledge: {knowledge}")
+    assert builder.breakdown["sections"]["knowledge"] <= 100
+    assert builder.breakdown["trimmed"]["knowledge"] == count_tokens(_words(1000))
+
+def test_builder_trims_lowest_priority_first():
+    builder = PromptBuilder("test", 500)
+    builder.add("body", _words(200, "body"), min_tokens=100, strategy="middle")
+    builder.add("rag", _words(400, "rag"))
+    prompt = builder.render("Body: {body}\nRAG: {rag}")
+
+    sections = builder.breakdown["sections"]
+    assert sections["body"] == count_tokens(_words(200, "body")) # Untouched
+    assert "rag" in builder.breakdown["trimmed"] and "body" not in builder.breakdown["trimmed"]
+    assert builder.breakdown["total"] <= 500
+    assert count_tokens(prompt) == builder.breakdown["total"]
+
+def test_builder_respects_min_tokens():
+    builder = PromptBuilder("test", 300)
+    builder.add("body", _words(400, "body"), min_tokens=150, strategy="middle")
+    builder.add("rag", _words(400, "rag"))
+    builder.render("{body}\n{rag}")
+
+    sections = builder.breakdown["sections"]
+    assert sections["rag"] == 0 # Gave way completely
+    assert 140 <= sections["body"] <= 300
@@ -1,7 +1,8 @@
 import pytest
 from unittest.mock import patch, MagicMock
 from datetime import datetime, timedelta
-from services.scheduler_service import scheduler_service
+from services.scheduler_service import scheduler_service, format_daily_logs
+from services.prompt_builder import count_tokens
 from database.models import Task, CalendarEvent, Email
 
 @pytest.fixture
@@ -141,3 +142,26 @@ async def test_get_dashboard_stats(mock_session_local, mock_altimeter_service, m
     assert stats["inbox_total"] == 1
     assert stats["inbox_unread"] == 1
     assert stats["active_projects"] == 3
+
+
+def _daily_logs(n, words=400):
+    return [
+        {"altimeter_project_id": f"P{i}", "name": f"Site {i}", "created_by": "foreman",
+         "description": " ".join(f"pour{i}x{w}" for w in range(words))}
+        for i in range(n)
+    ]
+
+def test_format_daily_logs_shares_budget_evenly():
+    text = format_daily_logs(_daily_logs(3), 1000)
+    assert count_tokens(text) <= 1000
+    assert all(f"Project: P{i} - Site {i}" in text for i in range(3))
+    assert "not included" not in text
+
+def test_format_daily_logs_caps_log_count_and_marks_omitted():
+    # 200 logs can't each get 50 tokens of details in 2000: the old per-log floor overflowed the budget
+    text = format_daily_logs(_daily_logs(200), 2000)
+    assert count_tokens(text) <= 2000
+    kept = text.count("Project: ")
+    assert 0 < kept < 200
+    assert f"[{200 - kept} more daily log(s) not included" in text
+    assert f"P{kept}" in text.split("not included")[1] # The omitted projects are named
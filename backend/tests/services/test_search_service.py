@@ -1,11 +1,13 @@
 import pytest
 from unittest.mock import MagicMock, patch
-from services.search_service import SearchService
+import services.search_service as search_module
+from services.search_service import SearchService, build_email_metadata
 
 @pytest.fixture
 def mock_chroma_setup():
     """Patches chromadb at the module level and returns the mock client and collection."""
-    with patch("services.search_service.chromadb") as mock_chromadb:
+    # Patch the imported module object: other test modules replace services.search_service in sys.modules
+    with patch.object(search_module, "chromadb") as mock_chromadb:
         mock_client = MagicMock()
         mock_collection = MagicMock()
 
@@ -168,3 +170,32 @@ def test_dummy_embedding_fallback(search_service, mock_chroma_setup):
         vector = search_service._embedding_fn(["test"])
         assert len(vector) == 1
         assert len(vector[0]) == 384
+
+def test_search_with_filters_builds_where(search_service, mock_chroma_setup):
+    """Structured filters are pushed into the Chroma where clause."""
+    mock_collection = mock_chroma_setup['collection']
+    mock_collection.query.return_value = {'ids': [[]], 'distances': [[]], 'metadatas': [[]], 'documents': [[]]}
+
+    search_service.search("rough-in", filters={"project_id": "25-0142", "date_to": 200.0, "sender": None})
+
+    mock_collection.query.assert_called_once_with(
+        query_texts=["rough-in"],
+        n_results=5,
+        where={"$and": [{"project_id": "25-0142"}, {"date_epoch": {"$lte": 200.0}}]}
+    )
+
+def test_build_email_metadata_filterable_fields():
+    meta = build_email_metadata({
+        "subject": "RFI 12",
+        "sender": "gc@example.com",
+        "date": "2025-01-01T00:00:00+00:00",
+        "message_id": "m1",
+        "project_id": "25-0142",
+        "provider": "imap",
+        "category": None
+    })
+
+    assert meta["project_id"] == "25-0142"
+    assert meta["provider"] == "imap"
+    assert meta["date_epoch"] == 1735689600.0
+    assert "category" not in meta  # Chroma rejects None values
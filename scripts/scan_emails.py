@@ -13,13 +13,10 @@ from backend.agents.task_agent import task_agent
 from backend.services.activity_service import activity_service
 from backend.services.altimeter_service import altimeter_service
 
-async def process_email_tasks(email, db):
+async def process_email_tasks(email, db, context):
     """
     Use AI TaskAgent to extract real tasks and save them.
     """
-    # Get project context via Altimeter
-    context = altimeter_service.get_context_for_email(email.from_address, email.subject, email.body_text)
-    
     agent_context = {
         "subject": email.subject,
         "sender": email.from_address,
@@ -78,9 +75,20 @@ async def main():
 
         print(f"Found {len(emails)} new emails to analyze.")
         
+        # Get project context via Altimeter for the whole batch
+        contexts = altimeter_service.get_context_for_emails([
+            {
+                "sender": email.from_address,
+                "subject": email.subject,
+                "body": email.body_text,
+                "message_id": email.message_id
+            }
+            for email in emails
+        ])
+
         total_tasks = 0
-        for email in emails:
-            tasks_created = await process_email_tasks(email, db)
+        for email, context in zip(emails, contexts):
+            tasks_created = await process_email_tasks(email, db, context)
             total_tasks += tasks_created
         
         if total_tasks > 0:
@@ -24,10 +24,10 @@ async def test_get_system_health_optimization():
     # Setup mocks
     search_service_instance_mock._ensure_initialized.return_value = True
 
-    # We need to verify httpx usage.
-    with patch('services.scheduler_service.httpx.AsyncClient') as mock_client_cls:
+    # We need to verify the shared (pooled) client is used.
+    with patch('services.scheduler_service.http_clients') as mock_registry:
         mock_client = AsyncMock()
-        mock_client_cls.return_value.__aenter__.return_value = mock_client
+        mock_registry.get.return_value = mock_client
 
         mock_response = MagicMock()
         mock_response.status_code = 200
@@ -40,12 +40,26 @@ async def test_get_system_health_optimization():
         assert health['status'] == 'online'
         assert health['services']['altimeter'] == 'Online'
 
-        # Verify it used httpx
+        # Verify it used the pooled Altimeter client
+        mock_registry.get.assert_called_once_with("altimeter")
         mock_client.get.assert_called_once()
         args, kwargs = mock_client.get.call_args
         assert "https://api.altimeter.com/v1/api/system/health" in args[0]
         assert kwargs.get('timeout') == 1
 
+@pytest.mark.asyncio
+async def test_get_system_health_reports_gemini_without_key():
+    from services.ai_service import ai_service
+    search_service_instance_mock._ensure_initialized.return_value = True
+    with patch('services.scheduler_service.http_clients') as mock_registry, \
+         patch.object(ai_service, "client", None):
+        mock_registry.get.return_value = AsyncMock()
+        health = await scheduler_service.get_system_health()
+
+    # The breaker is closed only because no call was ever made
+    assert health['llm_backends']['gemini']['state'] == 'closed'
+    assert health['services']['gemini'] == 'Not Configured'
+
 if __name__ == "__main__":
     import asyncio
     asyncio.run(test_get_system_health_optimization())